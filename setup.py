@@ -32,5 +32,13 @@ setup(
         'oci',
         'six>=1.11.0',
         'gevent',
-    ]
+    ],
+    entry_points={
+        'console_scripts': [
+            'oci-inventory='
+            'tortuga.resourceAdapter.oraclecloud.inventory:main',
+            'oci-maintenance='
+            'tortuga.resourceAdapter.oraclecloud.maintenance:main',
+        ],
+    }
 )
@@ -0,0 +1,109 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measure the cost of importing the Oracle Cloud resource adapter module,
+and of loading the OCI SDK when the first operation needs it.  Each
+measurement runs in a fresh interpreter.
+
+    python tests/benchmark_import.py [--repeat N] [--module MODULE]
+
+Trees without lazy SDK loading only report the import.  To compare with
+an earlier revision, check it out with 'git worktree add' and run this
+script with PYTHONPATH pointing at the worktree.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+
+MEASURE = '''
+import json
+import os
+import resource
+import sys
+import time
+
+
+def rss_kb():
+    try:
+        with open('/proc/self/statm') as fp:
+            pages = int(fp.read().split()[1])
+
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (IOError, OSError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+result = {}
+
+rss = rss_kb()
+start = time.time()
+
+__import__(sys.argv[1])
+
+result['import_seconds'] = time.time() - start
+result['import_rss_kb'] = rss_kb() - rss
+result['sdk_loaded_by_import'] = 'oci' in sys.modules
+
+try:
+    from tortuga.resourceAdapter.oraclecloud import sdk
+except ImportError:
+    # SDK is imported with the adapter module
+    sdk = None
+
+if sdk is not None:
+    rss = rss_kb()
+    start = time.time()
+
+    sdk.load()
+
+    result['sdk_load_seconds'] = time.time() - start
+    result['sdk_load_rss_kb'] = rss_kb() - rss
+
+print(json.dumps(result))
+'''
+
+
+def measure(module):
+    output = subprocess.check_output(
+        [sys.executable, '-c', MEASURE, module])
+
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--module', default='tortuga.resourceAdapter.oracleadapter')
+
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.repeat)]
+
+    summary = {'module': args.module, 'runs': len(runs)}
+
+    for key in runs[0]:
+        values = sorted(run[key] for run in runs)
+
+        summary[key] = values[len(values) // 2]
+
+    print(json.dumps(summary, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
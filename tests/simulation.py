@@ -0,0 +1,821 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Deterministic simulation of OCI for adapter tests.
+
+VirtualClock replaces gevent.sleep, gevent.spawn_later, gevent.Timeout,
+time.time and time.sleep with a discrete-event scheduler: time only
+advances when every greenlet is blocked, straight to the next timer, so
+hours of launches, polls and back-off run in a fraction of a second and
+always in the same order.
+
+SimulatedCloud provides scripted compute and virtual network clients
+on top of a VirtualClock, with lifecycle transitions, throttling,
+injected failures and per-operation call counts.
+
+AdapterHarness wires both into Oracleadapter; it requires Tortuga core
+and the OCI SDK (see ADAPTER_AVAILABLE).
+"""
+
+import collections
+import configparser
+import contextlib
+import datetime
+import heapq
+import importlib
+import itertools
+import logging
+import random
+import tempfile
+
+import gevent
+import gevent.event
+from unittest import mock
+
+
+_sleep = gevent.sleep
+_idle = gevent.idle
+_spawn = gevent.spawn
+
+
+def _importable(name):
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        return False
+
+    return True
+
+
+#: AdapterHarness can run: Tortuga core and the OCI SDK are installed
+ADAPTER_AVAILABLE = _importable('tortuga.resourceAdapter.resourceAdapter') \
+    and _importable('oci')
+
+
+class Deadlock(Exception):
+    """
+    Raised when the simulation is blocked with no timer left to fire.
+    """
+
+
+class _Timer(object):
+    def __init__(self, when, seq, callback, args):
+        self.when = when
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.when, self.seq) < (other.when, other.seq)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class VirtualTimeout(BaseException):
+    """
+    gevent.Timeout counterpart expiring on virtual time.  The clock is
+    bound by VirtualClock.patch().
+    """
+    clock = None
+
+    def __init__(self, seconds=None, exception=None, ref=True, priority=-1):
+        super(VirtualTimeout, self).__init__()
+
+        self.seconds = seconds
+        self.exception = exception
+        self.__timer = None
+
+    def start(self):
+        if self.seconds is None or self.pending:
+            return
+
+        self.__timer = self.clock.call_later(
+            self.seconds, self.__expire, gevent.getcurrent())
+
+    @property
+    def pending(self):
+        return self.__timer is not None and not self.__timer.cancelled
+
+    def __expire(self, target):
+        self.__timer = None
+
+        if target.dead:
+            return
+
+        exception = self if self.exception in (None, False) \
+            else self.exception
+
+        # Thrown from the hub, as gevent does for its own timeouts
+        gevent.get_hub().loop.run_callback(target.throw, exception)
+
+    def cancel(self):
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+
+    close = cancel
+
+    def __enter__(self):
+        self.start()
+
+        return self
+
+    def __exit__(self, typ, value, tb):
+        self.cancel()
+
+        return value is self and self.exception is False
+
+    def __str__(self):
+        return '%s seconds' % (self.seconds)
+
+
+class VirtualClock(object):
+    """
+    Discrete-event clock for gevent code.
+    """
+    def __init__(self, start=1500000000.0):
+        """
+        :param start: Number initial time, in seconds since the epoch
+        """
+        self.now = float(start)
+        self.started = self.now
+        self.timers_fired = 0
+        self.__timers = []
+        self.__seq = itertools.count()
+
+    def time(self):
+        return self.now
+
+    @property
+    def elapsed(self):
+        """
+        :return: Number virtual seconds since the clock was created
+        """
+        return self.now - self.started
+
+    def call_later(self, delay, callback, *args):
+        """
+        Call 'callback' once 'delay' virtual seconds have passed.
+
+        :return: Timer, with a cancel() method
+        """
+        timer = _Timer(self.now + max(delay, 0), next(self.__seq),
+                       callback, args)
+
+        heapq.heappush(self.__timers, timer)
+
+        return timer
+
+    def sleep(self, seconds=0, ref=True):
+        if seconds <= 0:
+            _sleep(0)
+
+            return
+
+        event = gevent.event.Event()
+
+        self.call_later(seconds, event.set)
+
+        event.wait()
+
+    def spawn_later(self, seconds, func, *args, **kwargs):
+        def run():
+            self.sleep(seconds)
+
+            return func(*args, **kwargs)
+
+        return _spawn(run)
+
+    def advance(self):
+        """
+        Move time to the next timer and fire it.
+
+        :return: Boolean False if there was no timer left
+        """
+        while self.__timers:
+            timer = heapq.heappop(self.__timers)
+
+            if timer.cancelled:
+                continue
+
+            self.now = max(self.now, timer.when)
+            self.timers_fired += 1
+
+            timer.callback(*timer.args)
+
+            return True
+
+        return False
+
+    def run(self, func, *args, **kwargs):
+        """
+        Run func in a greenlet until it completes, advancing virtual time
+        whenever all greenlets are blocked.
+
+        :return: Return value of func
+        :raises Deadlock: func is blocked and no timer is left
+        """
+        greenlet = _spawn(func, *args, **kwargs)
+
+        while True:
+            _idle()
+
+            if greenlet.ready():
+                return greenlet.get()
+
+            if not self.advance():
+                greenlet.kill(block=False)
+
+                raise Deadlock(
+                    'Blocked at %0.1f virtual seconds with no pending'
+                    ' timers' % (self.elapsed))
+
+    @contextlib.contextmanager
+    def patch(self):
+        """
+        Route gevent sleeps, delayed spawns and timeouts, time.time() and
+        time.sleep() (used by SDK retries) through this clock.
+        """
+        timeout_class = type(
+            'Timeout', (VirtualTimeout,), {'clock': self})
+
+        with mock.patch('gevent.sleep', self.sleep), \
+                mock.patch('gevent.spawn_later', self.spawn_later), \
+                mock.patch('gevent.Timeout', timeout_class), \
+                mock.patch('time.time', self.time), \
+                mock.patch('time.sleep', self.sleep):
+            yield self
+
+
+class SimulatedServiceError(Exception):
+    """
+    Stand-in for oci.exceptions.ServiceError where the SDK is absent.
+    """
+    def __init__(self, status, code, headers, message):
+        super(SimulatedServiceError, self).__init__(
+            '%s %s: %s' % (status, code, message))
+
+        self.status = status
+        self.code = code
+        self.headers = headers
+        self.message = message
+
+
+def service_error(status, code, message=''):
+    try:
+        from oci.exceptions import ServiceError
+    except ImportError:
+        ServiceError = SimulatedServiceError
+
+    return ServiceError(status, code, {}, message or code)
+
+
+class Model(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def __repr__(self):
+        return 'Model(%r)' % (self.__dict__)
+
+
+class Response(object):
+    def __init__(self, data, next_page=None):
+        self.status = 200
+        self.headers = {}
+        self.request = None
+        self.data = data
+        self.next_page = next_page
+
+    @property
+    def has_next_page(self):
+        return self.next_page is not None
+
+
+class SimulatedCloud(object):
+    """
+    Compute and virtual network services on a VirtualClock.
+
+    Launched instances are PROVISIONING for a random duration drawn
+    from 'launch_delay' before they are RUNNING; terminate, stop and
+    start transitions work the same way.  All randomness comes from
+    'seed'.
+    """
+    def __init__(self, clock, seed=0, launch_delay=(40, 90),
+                 terminate_delay=(20, 40), stop_delay=(15, 30),
+                 start_delay=(20, 40), page_size=100, rate_limit=None,
+                 public_ips=True):
+        """
+        :param clock: VirtualClock
+        :param seed: Integer random seed
+        :param launch_delay: (min, max) seconds PROVISIONING
+        :param page_size: Integer items per page of list calls
+        :param rate_limit: Integer calls per second per service above
+                           which requests fail with 429 (optional)
+        :param public_ips: Boolean assign ephemeral public IPs
+        """
+        self.clock = clock
+        self.launch_delay = launch_delay
+        self.terminate_delay = terminate_delay
+        self.stop_delay = stop_delay
+        self.start_delay = start_delay
+        self.page_size = page_size
+        self.rate_limit = rate_limit
+        self.public_ips = public_ips
+        self.calls = collections.Counter()
+        self.errors = collections.Counter()
+        self.instances = collections.OrderedDict()
+        self.attachments = []
+        self.private_ips = []
+        self.assigned_public_ips = []
+        self.__random = random.Random(seed)
+        self.__ids = itertools.count(1)
+        self.__failures = collections.defaultdict(collections.deque)
+        self.__hang = 0
+        self.__recent = collections.defaultdict(collections.deque)
+        self.__clients = {
+            'compute': SimulatedComputeClient(self),
+            'network': SimulatedNetworkClient(self),
+        }
+
+    def client(self, kind):
+        """
+        :param kind: String 'compute' or 'network'
+        """
+        return self.__clients[kind]
+
+    def fail(self, operation, status=500, code='InternalServerError',
+             count=1):
+        """
+        Fail the next 'count' calls of an operation.
+        """
+        for _ in range(count):
+            self.__failures[operation].append((status, code))
+
+    def hang(self, count=1):
+        """
+        Keep the next 'count' launched instances PROVISIONING forever.
+        """
+        self.__hang += count
+
+    def call(self, service, operation):
+        """
+        Count a call, apply throttling and scripted failures.
+        """
+        self.calls[operation] += 1
+
+        if self.rate_limit:
+            recent = self.__recent[service]
+
+            while recent and recent[0] <= self.clock.now - 1:
+                recent.popleft()
+
+            if len(recent) >= self.rate_limit:
+                self.errors[429] += 1
+
+                raise service_error(429, 'TooManyRequests')
+
+            recent.append(self.clock.now)
+
+        if self.__failures[operation]:
+            status, code = self.__failures[operation].popleft()
+
+            self.errors[status] += 1
+
+            raise service_error(status, code)
+
+    def page(self, items, page):
+        start = int(page or 0)
+        end = start + self.page_size
+
+        return Response(items[start:end],
+                        str(end) if end < len(items) else None)
+
+    def get(self, instance_id):
+        instance = self.instances.get(instance_id)
+
+        if instance is None:
+            raise service_error(404, 'NotAuthorizedOrNotFound')
+
+        return instance
+
+    def transition(self, instance, state, delay, then=None):
+        """
+        Move instance to 'state' after a random delay in range 'delay'.
+        """
+        def apply():
+            instance.lifecycle_state = state
+
+            if then is not None:
+                then()
+
+        self.clock.call_later(self.__random.uniform(*delay), apply)
+
+    def count(self, state):
+        return sum(1 for instance in self.instances.values()
+                   if instance.lifecycle_state == state)
+
+    def launch(self, details):
+        idx = next(self.__ids)
+
+        instance = Model(
+            id='ocid1.instance.oc1.sim.%06d' % idx,
+            compartment_id=details.compartment_id,
+            availability_domain=details.availability_domain,
+            display_name=getattr(details, 'display_name', None) or
+            'instance-%06d' % idx,
+            hostname_label=getattr(details, 'hostname_label', None),
+            shape=details.shape,
+            image_id=getattr(details, 'image_id', None),
+            freeform_tags={},
+            lifecycle_state='PROVISIONING',
+            time_created=datetime.datetime.fromtimestamp(
+                self.clock.now, tz=datetime.timezone.utc),
+        )
+
+        self.instances[instance.id] = instance
+
+        attachment = Model(
+            id='ocid1.vnicattachment.oc1.sim.%06d' % idx,
+            instance_id=instance.id,
+            compartment_id=instance.compartment_id,
+            vnic_id='ocid1.vnic.oc1.sim.%06d' % idx,
+            subnet_id=details.subnet_id,
+            lifecycle_state='ATTACHING',
+            time_created=self.clock.now,
+        )
+
+        self.attachments.append(attachment)
+
+        private_ip = Model(
+            id='ocid1.privateip.oc1.sim.%06d' % idx,
+            vnic_id=attachment.vnic_id,
+            subnet_id=details.subnet_id,
+            ip_address='10.%d.%d.%d' % (
+                idx // 65536 % 256, idx // 256 % 256, idx % 256),
+            is_primary=True,
+        )
+
+        self.private_ips.append(private_ip)
+
+        if self.public_ips:
+            self.assigned_public_ips.append(Model(
+                scope='AVAILABILITY_DOMAIN',
+                availability_domain=instance.availability_domain,
+                compartment_id=instance.compartment_id,
+                private_ip_id=private_ip.id,
+                ip_address='129.%d.%d.%d' % (
+                    idx // 65536 % 256, idx // 256 % 256, idx % 256),
+            ))
+
+        if self.__hang > 0:
+            self.__hang -= 1
+        else:
+            def attached():
+                attachment.lifecycle_state = 'ATTACHED'
+
+            self.transition(instance, 'RUNNING', self.launch_delay,
+                            attached)
+
+        return instance
+
+
+class SimulatedComputeClient(object):
+    def __init__(self, cloud):
+        self._cloud = cloud
+
+    def launch_instance(self, launch_instance_details, **kwargs):
+        self._cloud.call('compute', 'launch_instance')
+
+        return Response(self._cloud.launch(launch_instance_details))
+
+    def get_instance(self, instance_id, **kwargs):
+        self._cloud.call('compute', 'get_instance')
+
+        return Response(self._cloud.get(instance_id))
+
+    def list_instances(self, compartment_id, availability_domain=None,
+                       page=None, **kwargs):
+        self._cloud.call('compute', 'list_instances')
+
+        return self._cloud.page([
+            instance for instance in self._cloud.instances.values()
+            if instance.compartment_id == compartment_id and
+            availability_domain in (None, instance.availability_domain)
+        ], page)
+
+    def terminate_instance(self, instance_id, **kwargs):
+        self._cloud.call('compute', 'terminate_instance')
+
+        instance = self._cloud.get(instance_id)
+
+        if instance.lifecycle_state not in ('TERMINATING', 'TERMINATED'):
+            instance.lifecycle_state = 'TERMINATING'
+
+            self._cloud.transition(instance, 'TERMINATED',
+                                   self._cloud.terminate_delay)
+
+        return Response(None)
+
+    def instance_action(self, instance_id, action, **kwargs):
+        self._cloud.call('compute', 'instance_action')
+
+        instance = self._cloud.get(instance_id)
+
+        transitions = {
+            ('STOP', 'RUNNING'): ('STOPPING', 'STOPPED',
+                                  self._cloud.stop_delay),
+            ('START', 'STOPPED'): ('STARTING', 'RUNNING',
+                                   self._cloud.start_delay),
+        }
+
+        transition = transitions.get((action, instance.lifecycle_state))
+
+        if transition is None:
+            raise service_error(409, 'IncorrectState')
+
+        instance.lifecycle_state = transition[0]
+
+        self._cloud.transition(instance, transition[1], transition[2])
+
+        return Response(instance)
+
+    def list_vnic_attachments(self, compartment_id, instance_id=None,
+                              page=None, **kwargs):
+        self._cloud.call('compute', 'list_vnic_attachments')
+
+        return self._cloud.page([
+            attachment for attachment in self._cloud.attachments
+            if attachment.compartment_id == compartment_id and
+            instance_id in (None, attachment.instance_id)
+        ], page)
+
+
+class SimulatedNetworkClient(object):
+    def __init__(self, cloud):
+        self._cloud = cloud
+
+    def list_private_ips(self, subnet_id=None, page=None, **kwargs):
+        self._cloud.call('network', 'list_private_ips')
+
+        return self._cloud.page([
+            private_ip for private_ip in self._cloud.private_ips
+            if private_ip.subnet_id == subnet_id
+        ], page)
+
+    def list_public_ips(self, scope, compartment_id,
+                        availability_domain=None, page=None, **kwargs):
+        self._cloud.call('network', 'list_public_ips')
+
+        return self._cloud.page([
+            public_ip for public_ip in self._cloud.assigned_public_ips
+            if public_ip.scope == scope and
+            public_ip.compartment_id == compartment_id and
+            public_ip.availability_domain == availability_domain
+        ], page)
+
+
+class AdapterHarness(object):
+    """
+    Oracleadapter running against a SimulatedCloud on a VirtualClock,
+    with the Tortuga database, instance cache and node registration
+    replaced by in-memory stand-ins.
+
+    Usage::
+
+        with AdapterHarness(nodes=...) as harness:
+            nodes = harness.start(100)
+            harness.delete(nodes)
+    """
+    #: Adapter settings; tests override individual keys
+    CONFIG = {
+        'region': 'us-phoenix-1',
+        'tenancy': 'ocid1.tenancy.oc1..sim',
+        'user': 'ocid1.user.oc1..sim',
+        'fingerprint': '00:00',
+        'key_file': '/dev/null',
+        'availability_domain': 'AD-1',
+        'compartment_id': 'ocid1.compartment.oc1..sim',
+        'subnet_id': 'ocid1.subnet.oc1.sim.a',
+        'image_id': 'ocid1.image.oc1.sim',
+        'shape': 'VM.Standard2.1',
+        'vcpus': 1,
+        'launch_timeout': 300,
+        'adaptive_launch_timeout': False,
+        'speculative_launch': False,
+        'preflight_check': False,
+        'inventory': False,
+        'request_history': False,
+        'bootstrap_telemetry': False,
+        'hibernate': False,
+        'address_mode': 'private',
+        'state_poll_interval': 5,
+        'post_launch_window_ms': 500,
+        'post_launch_batch_size': 100,
+        'shard_rate_limit': 10,
+        'launch_concurrency': 0,
+        'launch_wave_size': 0,
+        'coalesce_window_ms': 0,
+    }
+
+    def __init__(self, seed=0, config=None, name_format='*',
+                 **cloud_options):
+        """
+        :param seed: Integer random seed for the cloud and back-off
+        :param config: Dictionary adapter settings overriding CONFIG
+        :param name_format: String hardware profile name format; '*'
+                            names nodes after their instances
+        :param cloud_options: SimulatedCloud keyword arguments
+        """
+        self.seed = seed
+        self.name_format = name_format
+        # Node numbers handed out for name_format; tests may reset it
+        self.names = itertools.count(1)
+        self.clock = VirtualClock()
+        self.cloud = SimulatedCloud(self.clock, seed=seed, **cloud_options)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config = dict(
+            self.CONFIG,
+            health_file='%s/health.json' % (self.tmpdir.name),
+            launch_stats_file='%s/launch-stats.json' % (self.tmpdir.name),
+            **(config or {}))
+        self.instance_cache = {}
+        self.provisioned = collections.OrderedDict()
+        self.registered = []
+        self.adapter = None
+        self.__stack = None
+
+    def __enter__(self):
+        from tortuga.db.models.hardwareProfile import HardwareProfile
+        from tortuga.db.models.softwareProfile import SoftwareProfile
+        from tortuga.resourceAdapter import oracleadapter
+        from tortuga.resourceAdapter.oraclecloud import coalesce, \
+            sharding, userdata
+        from tortuga.resourceAdapter.resourceAdapter import ResourceAdapter
+
+        self.__stack = contextlib.ExitStack()
+
+        stack = self.__stack
+
+        stack.enter_context(self.clock.patch())
+
+        # Back-off jitter is drawn from the seeded global generator
+        state = random.getstate()
+        random.seed(self.seed)
+        stack.callback(random.setstate, state)
+
+        Oracleadapter = oracleadapter.Oracleadapter
+
+        harness = self
+
+        def patch_base(name, value):
+            stack.enter_context(
+                mock.patch.object(ResourceAdapter, name, value,
+                                  create=True))
+
+        def init(adapter, addHostSession=None):
+            adapter.addHostSession = addHostSession
+
+        def instance_cache_refresh(adapter):
+            cfg = configparser.ConfigParser(interpolation=None)
+
+            for name, entry in harness.instance_cache.items():
+                cfg[name] = entry
+
+            return cfg
+
+        def instance_cache_set(adapter, name, metadata=None):
+            harness.instance_cache[name] = {
+                key: str(value) for key, value in (metadata or {}).items()
+            }
+
+        def instance_cache_delete(adapter, name):
+            harness.instance_cache.pop(name, None)
+
+        def pre_add_host(adapter, name, hardwareprofile, softwareprofile,
+                         ip):
+            harness.registered.append((name, ip))
+
+        def fire_provisioned_event(adapter, node):
+            harness.provisioned[node.name] = harness.clock.elapsed
+
+        logger = logging.getLogger('simulation')
+
+        patch_base('__init__', init)
+        patch_base('getResourceAdapterConfig',
+                   lambda adapter, *args, **kwargs: dict(harness.config))
+        patch_base('getLogger', lambda adapter: logger)
+        patch_base('instanceCacheRefresh', instance_cache_refresh)
+        patch_base('instanceCacheSet', instance_cache_set)
+        patch_base('instanceCacheDelete', instance_cache_delete)
+        patch_base('_pre_add_host', pre_add_host)
+        patch_base('fire_provisioned_event', fire_provisioned_event)
+        patch_base('installer_public_hostname', 'installer.sim.example')
+        patch_base('private_dns_zone', 'sim.example')
+        patch_base('addHostApi', mock.Mock(
+            generate_node_name=lambda session, name_format, dns_zone=None:
+                '%s.%s' % (name_format.replace('#', '') + '%03d' % next(
+                    harness.names), dns_zone)))
+
+        stack.enter_context(mock.patch.object(
+            Oracleadapter, '_Oracleadapter__create_client',
+            staticmethod(
+                lambda oci_config, kind, region: harness.cloud.client(kind))))
+        stack.enter_context(mock.patch.object(
+            Oracleadapter, '_Oracleadapter__get_user_data',
+            lambda adapter, config, node=None, name=None,
+            includes=None: ''))
+        stack.enter_context(mock.patch.object(
+            oracleadapter, 'osUtility', mock.Mock()))
+        stack.enter_context(mock.patch.object(
+            oracleadapter.OciSession, '_get_ssh_key',
+            staticmethod(lambda: 'ssh-rsa sim')))
+
+        # Fresh process-wide state for every harness
+        for name, value in (
+                ('_user_data_cache', userdata.UserDataCache()),
+                ('_launch_coalescer',
+                 coalesce.LaunchCoalescer(sleep=gevent.sleep)),
+                ('_instance_configurations', {}),
+                ('_preflights', {}),
+                ('_instance_cache_index', None),
+                ('_shard_pools', {}),
+                ('_placement_policy', sharding.PlacementPolicy()),
+                ('_image_indexes', {}),
+                ('_launch_stats', None),
+                ('_dns_backends', {}),
+                ('_request_history', None),
+                ('_inventories', {})):
+            stack.enter_context(mock.patch.object(Oracleadapter, name, value))
+
+        self.hardware_profile = HardwareProfile(
+            name='sim', nameFormat=self.name_format)
+        self.software_profile = SoftwareProfile(name='compute')
+        self.adapter = Oracleadapter(addHostSession='sim-session')
+
+        return self
+
+    def __exit__(self, *exc_info):
+        self.__stack.close()
+        self.tmpdir.cleanup()
+
+    def start(self, count):
+        """
+        Add 'count' nodes.
+
+        :return: List Nodes objects
+        """
+        return self.clock.run(
+            self.adapter.start, {'count': count}, FakeDbSession(),
+            self.hardware_profile, self.software_profile)
+
+    def delete(self, nodes):
+        self.clock.run(self.adapter.deleteNode, nodes)
+
+
+class FakeDbSession(object):
+    """
+    Database session keeping added nodes in memory.
+    """
+    def __init__(self):
+        self.nodes = []
+        self.commits = 0
+
+    def add(self, node):
+        if node not in self.nodes:
+            self.nodes.append(node)
+
+    def delete(self, node):
+        if node in self.nodes:
+            self.nodes.remove(node)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def query(self, *args, **kwargs):
+        return _EmptyQuery()
+
+
+class _EmptyQuery(object):
+    def filter(self, *args, **kwargs):
+        return self
+
+    def __iter__(self):
+        return iter([])
@@ -12,12 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
 import os
 import oci
 import mock
 import unittest
 from helpers import TestDbManager
-from tortuga.resourceAdapter.oracleadapter import Oracleadapter, OciSession
+from tortuga.resourceAdapter.oracleadapter import Oracleadapter, OciSession, \
+    CustomAdapter, LogSampler
 
 
 class TestOracleCloudSession(unittest.TestCase):
@@ -166,3 +168,43 @@ dns_nameservers = foo
             )
         )
 
+
+class TestLogging(unittest.TestCase):
+    def testSampler(self):
+        sampler = LogSampler(rate=3)
+
+        self.assertEqual(
+            [sampler('foo') for _ in range(6)],
+            [True, False, False, True, False, False]
+        )
+
+        self.assertTrue(sampler('bar'), 'Keys are sampled independently.')
+
+    def testStructuredFields(self):
+        logger = mock.Mock()
+        logger.isEnabledFor.return_value = True
+
+        log_adapter = CustomAdapter(
+            logger,
+            {'instance_ocid': 'ocid1.instance.abcdef',
+             'add_host_session': 'session'}
+        )
+
+        msg, kwargs = log_adapter.process('state: %s', {})
+
+        self.assertEqual(msg, 'Instance OCID [...abcdef]: state: %s')
+        self.assertEqual(kwargs['extra']['add_host_session'], 'session')
+
+    def testSampledDisabledLevel(self):
+        logger = mock.Mock()
+        logger.isEnabledFor.return_value = False
+
+        sampler = mock.Mock(return_value=True)
+
+        log_adapter = CustomAdapter(
+            logger, {'instance_ocid': None}, sampler=sampler)
+
+        log_adapter.sampled(logging.DEBUG, 'state: %s', 'RUNNING')
+
+        sampler.assert_not_called()
+        logger.log.assert_not_called()
@@ -0,0 +1,305 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import unittest
+
+from simulation import ADAPTER_AVAILABLE, AdapterHarness
+
+
+@unittest.skipUnless(ADAPTER_AVAILABLE,
+                     'requires Tortuga core and the OCI SDK')
+class TestLaunchSimulation(unittest.TestCase):
+    def test_launch_many(self):
+        with AdapterHarness(seed=1, config={'shard_rate_limit': 100}) \
+                as harness:
+            nodes = harness.start(2000)
+
+        calls = harness.cloud.calls
+
+        self.assertEqual(len(nodes), 2000)
+        self.assertEqual(len(harness.provisioned), 2000)
+        self.assertEqual(len(harness.registered), 2000)
+
+        self.assertEqual(calls['launch_instance'], 2000)
+        self.assertEqual(calls['get_instance'], 2000)
+
+        # State polling and address lookups are batched, not per node
+        self.assertLess(calls['list_instances'], 1000)
+        self.assertLess(calls['list_vnic_attachments'], 1000)
+        self.assertEqual(calls['get_vnic'], 0)
+
+        # Launch takes at most 90 seconds, plus polling and rate limits
+        self.assertLess(max(harness.provisioned.values()), 300)
+
+    def test_deterministic(self):
+        def scenario():
+            with AdapterHarness(seed=7) as harness:
+                harness.start(200)
+
+            return dict(harness.cloud.calls), list(
+                harness.provisioned.items())
+
+        self.assertEqual(scenario(), scenario())
+
+    def test_throttling(self):
+        # Adapter rate limit below the service limit: no throttling
+        with AdapterHarness(rate_limit=20, config={'shard_rate_limit': 10}) \
+                as harness:
+            nodes = harness.start(300)
+
+        self.assertEqual(len(nodes), 300)
+        self.assertEqual(harness.cloud.errors[429], 0)
+
+        # Adapter rate limit above the service limit fails launches
+        with AdapterHarness(rate_limit=20, config={'shard_rate_limit': 50}) \
+                as harness:
+            nodes = harness.start(300)
+
+        self.assertGreater(harness.cloud.errors[429], 0)
+        self.assertLess(len(nodes), 300)
+
+    def test_launch_timeout(self):
+        with AdapterHarness(config={'launch_timeout': 300}) as harness:
+            harness.cloud.hang(3)
+
+            nodes = harness.start(20)
+
+        self.assertEqual(len(nodes), 17)
+        # Instances of timed out launches are terminated
+        self.assertEqual(harness.cloud.calls['terminate_instance'], 3)
+        self.assertGreaterEqual(harness.clock.elapsed, 300)
+        self.assertLess(harness.clock.elapsed, 400)
+        self.assertLess(max(harness.provisioned.values()), 120)
+
+    def test_adaptive_launch_timeout(self):
+        with AdapterHarness(launch_delay=(10, 20),
+                            config={'adaptive_launch_timeout': True,
+                                    'launch_timeout': 300}) as harness:
+            # Derived timeout (twice the expected 20 seconds) is below
+            # launch_timeout
+            harness.start(20)
+
+            harness.cloud.hang(1)
+
+            started = harness.clock.elapsed
+
+            nodes = harness.start(5)
+
+            elapsed = harness.clock.elapsed - started
+
+        self.assertEqual(len(nodes), 4)
+        self.assertGreaterEqual(elapsed, 300)
+        self.assertLess(elapsed, 400)
+
+    def test_launch_failures(self):
+        with AdapterHarness() as harness:
+            harness.cloud.fail('launch_instance', status=500, count=5)
+
+            nodes = harness.start(50)
+
+        self.assertEqual(len(nodes), 45)
+        self.assertEqual(harness.cloud.calls['launch_instance'], 50)
+
+    def test_speculative_launch(self):
+        with AdapterHarness(name_format='compute-##',
+                            config={'speculative_launch': True}) as harness:
+            # Launch durations to derive the expected duration from
+            harness.start(20)
+
+            harness.cloud.hang(1)
+
+            nodes = harness.start(5)
+
+        self.assertEqual(len(nodes), 5)
+        self.assertEqual(harness.cloud.calls['launch_instance'], 26)
+        self.assertEqual(harness.cloud.calls['terminate_instance'], 1)
+
+        # The replacement won; its node was renamed to match
+        self.assertEqual(
+            [node.name for node in nodes if '-r.' in node.name],
+            ['compute-021-r.sim.example'])
+
+        running = {
+            instance.display_name: instance
+            for instance in harness.cloud.instances.values()
+            if instance.lifecycle_state == 'RUNNING'
+        }
+
+        for node in nodes:
+            self.assertEqual(running[node.name].hostname_label,
+                             node.name.split('.', 1)[0])
+
+    def test_public_addresses(self):
+        with AdapterHarness(config={'address_mode': 'both'}) as harness:
+            nodes = harness.start(100)
+
+        self.assertEqual(len(nodes), 100)
+        self.assertTrue(all(len(node.nics) == 2 for node in nodes))
+        self.assertTrue(all(ip.startswith('10.')
+                            for _, ip in harness.registered))
+        self.assertLess(harness.cloud.calls['list_public_ips'], 100)
+
+    def test_shard_pool_settings(self):
+        def get_pool(adapter):
+            return adapter._Oracleadapter__shard_pool
+
+        with AdapterHarness() as harness:
+            adapter_class = type(harness.adapter)
+
+            same = adapter_class(addHostSession='sim-session')
+
+            harness.config['shard_rate_limit'] = 50
+            harness.config['shard_reset_timeout'] = 30
+
+            changed = adapter_class(addHostSession='sim-session')
+
+        self.assertIs(get_pool(same), get_pool(harness.adapter))
+        self.assertIsNot(get_pool(changed), get_pool(harness.adapter))
+        self.assertEqual(get_pool(changed).rate, 50)
+        self.assertEqual(
+            get_pool(changed).breaker_options['reset_timeout'], 30)
+
+
+@unittest.skipUnless(ADAPTER_AVAILABLE,
+                     'requires Tortuga core and the OCI SDK')
+class TestDeleteSimulation(unittest.TestCase):
+    def test_delete(self):
+        with AdapterHarness(terminate_delay=(20, 40)) as harness:
+            nodes = harness.start(500)
+
+            calls = dict(harness.cloud.calls)
+            started = harness.clock.elapsed
+
+            harness.delete(nodes)
+
+            elapsed = harness.clock.elapsed - started
+
+        self.assertEqual(harness.cloud.calls['terminate_instance'], 500)
+        self.assertEqual(harness.cloud.count('TERMINATED'), 500)
+        self.assertEqual(harness.instance_cache, {})
+
+        # Includes the 3 second pause before polling and back-off
+        self.assertGreaterEqual(elapsed, 23)
+        self.assertLess(elapsed, 120)
+        # Termination is confirmed by listing, not per instance
+        self.assertEqual(
+            harness.cloud.calls['get_instance'], calls['get_instance'])
+        self.assertLess(
+            harness.cloud.calls['list_instances'] - calls['list_instances'],
+            500)
+
+    def test_hibernate_resume(self):
+        with AdapterHarness(config={'hibernate': True}) as harness:
+            nodes = harness.start(100)
+
+            harness.delete(nodes)
+
+            self.assertEqual(harness.cloud.count('STOPPED'), 100)
+            self.assertEqual(len(harness.instance_cache), 100)
+
+            launches = harness.cloud.calls['launch_instance']
+            started = harness.clock.elapsed
+
+            resumed = harness.start(100)
+
+            elapsed = harness.clock.elapsed - started
+
+        self.assertEqual(len(resumed), 100)
+        self.assertEqual(harness.cloud.calls['launch_instance'], launches)
+        self.assertEqual(harness.cloud.count('RUNNING'), 100)
+        self.assertEqual(sorted(node.name for node in resumed),
+                         sorted(node.name for node in nodes))
+        self.assertLess(elapsed, 60)
+
+    def test_private_dns(self):
+        def lookup(harness, nodes):
+            backend, = harness.adapter._dns_backends.values()
+
+            return {
+                node.name: backend.lookup(node.name, 'A') for node in nodes
+            }
+
+        with AdapterHarness(config={'address_mode': 'public',
+                                    'dns_backend': 'memory',
+                                    'hibernate': True}) as harness:
+            nodes = harness.start(10)
+
+            # Nodes register their public IP; the private zone gets the
+            # private IP of the primary VNIC
+            self.assertTrue(all(ip.startswith('129.')
+                                for _, ip in harness.registered))
+
+            private = lookup(harness, nodes)
+
+            self.assertTrue(all(
+                len(ips) == 1 and ips[0].startswith('10.')
+                for ips in private.values()))
+
+            harness.delete(nodes)
+
+            self.assertEqual(lookup(harness, nodes),
+                             {node.name: [] for node in nodes})
+
+            resumed = harness.start(10)
+
+            self.assertEqual(lookup(harness, resumed), private)
+
+            harness.config['hibernate'] = False
+
+            harness.delete(resumed)
+
+            self.assertEqual(lookup(harness, resumed),
+                             {node.name: [] for node in resumed})
+
+    def test_parked_name_reused(self):
+        with AdapterHarness(name_format='compute-##',
+                            config={'hibernate': True}) as harness:
+            nodes = sorted(harness.start(2), key=lambda node: node.name)
+
+            parked_id = harness.instance_cache[nodes[0].name]['id']
+
+            harness.delete(nodes[:1])
+
+            # A new node takes the name of the parked node
+            harness.config['hibernate'] = False
+            harness.names = itertools.count(1)
+
+            new_node, = harness.start(1)
+
+            self.assertEqual(new_node.name, nodes[0].name)
+            self.assertEqual(harness.cloud.count('STOPPED'), 1)
+            self.assertNotEqual(
+                harness.instance_cache[new_node.name]['id'], parked_id)
+            self.assertIn('parked:%s' % (parked_id), harness.instance_cache)
+
+            # The parked instance can no longer be resumed under its name
+            # and is released
+            harness.config['hibernate'] = True
+            harness.names = itertools.count(3)
+
+            resumed = harness.start(1)
+
+            self.assertEqual([node.name for node in resumed],
+                             ['compute-003.sim.example'])
+            self.assertEqual(
+                harness.cloud.instances[parked_id].lifecycle_state,
+                'TERMINATED')
+            self.assertEqual(
+                [key for key in harness.instance_cache
+                 if key.startswith('parked:')], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
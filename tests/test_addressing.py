@@ -0,0 +1,210 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud import addressing
+from tortuga.resourceAdapter.oraclecloud.addressing import \
+    AddressingError, VnicAddress, VnicResolver, get_nic_addresses, \
+    get_private_address
+
+
+class _Model(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class _Response(object):
+    def __init__(self, data, next_page=None):
+        self.data = data
+        self.next_page = next_page
+
+
+def _paged(calls, name, items, page_size, kwargs):
+    calls.append(name)
+
+    start = int(kwargs.get('page') or 0)
+    end = start + page_size
+
+    return _Response(items[start:end],
+                     str(end) if end < len(items) else None)
+
+
+class FakeComputeClient(object):
+    def __init__(self, attachments, calls, page_size=2):
+        self.attachments = attachments
+        self.calls = calls
+        self.page_size = page_size
+
+    def list_vnic_attachments(self, compartment_id, **kwargs):
+        return _paged(
+            self.calls, 'list_vnic_attachments',
+            [attachment for attachment in self.attachments
+             if attachment.compartment_id == compartment_id],
+            self.page_size, kwargs)
+
+
+class FakeNetworkClient(object):
+    def __init__(self, private_ips, public_ips, calls, page_size=2):
+        self.private_ips = private_ips
+        self.public_ips = public_ips
+        self.calls = calls
+        self.page_size = page_size
+
+    def list_private_ips(self, subnet_id=None, **kwargs):
+        return _paged(
+            self.calls, 'list_private_ips',
+            [ip for ip in self.private_ips if ip.subnet_id == subnet_id],
+            self.page_size, kwargs)
+
+    def list_public_ips(self, scope, compartment_id,
+                        availability_domain=None, **kwargs):
+        return _paged(
+            self.calls, 'list_public_ips',
+            [ip for ip in self.public_ips
+             if ip.scope == scope and
+             ip.availability_domain == availability_domain],
+            self.page_size, kwargs)
+
+    def get_vnic(self, vnic_id):
+        raise AssertionError('get_vnic called')
+
+
+def _instance(idx):
+    return _Model(id='instance-%d' % idx, compartment_id='compartment',
+                  availability_domain='AD-1')
+
+
+def _attachment(instance_idx, vnic_idx, subnet_id, state='ATTACHED'):
+    return _Model(instance_id='instance-%d' % instance_idx,
+                  compartment_id='compartment',
+                  vnic_id='vnic-%d-%d' % (instance_idx, vnic_idx),
+                  subnet_id=subnet_id,
+                  lifecycle_state=state,
+                  time_created=vnic_idx)
+
+
+def _private_ip(instance_idx, vnic_idx, subnet_id, is_primary=True):
+    return _Model(id='privateip-%d-%d' % (instance_idx, vnic_idx),
+                  vnic_id='vnic-%d-%d' % (instance_idx, vnic_idx),
+                  subnet_id=subnet_id,
+                  ip_address='10.0.%d.%d' % (vnic_idx, instance_idx),
+                  is_primary=is_primary)
+
+
+class TestVnicResolver(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+        attachments = []
+        private_ips = []
+        public_ips = []
+
+        for idx in range(10):
+            # Secondary VNIC listed before the primary one
+            attachments.append(_attachment(idx, 1, 'subnet-b'))
+            attachments.append(_attachment(idx, 0, 'subnet-a'))
+
+            private_ips.append(_private_ip(idx, 0, 'subnet-a'))
+            private_ips.append(_private_ip(idx, 1, 'subnet-b'))
+            # Secondary private IP of a VNIC is ignored
+            private_ips.append(
+                _private_ip(idx, 1, 'subnet-b', is_primary=False))
+
+            public_ips.append(_Model(
+                scope='AVAILABILITY_DOMAIN', availability_domain='AD-1',
+                private_ip_id='privateip-%d-0' % idx,
+                ip_address='129.0.0.%d' % idx))
+
+        attachments.append(_attachment(0, 2, 'subnet-b', state='DETACHED'))
+
+        # Reserved public IP of another instance; unassigned one
+        public_ips.append(_Model(
+            scope='REGION', availability_domain=None,
+            private_ip_id='privateip-11-0', ip_address='129.0.1.1'))
+        public_ips.append(_Model(
+            scope='REGION', availability_domain=None,
+            private_ip_id=None, ip_address='129.0.1.2'))
+
+        self.resolver = VnicResolver(
+            FakeComputeClient(attachments, self.calls),
+            FakeNetworkClient(private_ips, public_ips, self.calls))
+
+    def test_resolve_private(self):
+        result = self.resolver.resolve(
+            [_instance(idx) for idx in range(5)])
+
+        self.assertEqual(sorted(result), ['instance-%d' % idx
+                                          for idx in range(5)])
+        self.assertEqual(result['instance-3'], [
+            VnicAddress('vnic-3-0', True, '10.0.0.3', None),
+            VnicAddress('vnic-3-1', False, '10.0.1.3', None),
+        ])
+
+        # Listings are paginated; the call count does not grow with the
+        # number of instances
+        self.assertNotIn('list_public_ips', self.calls)
+        self.assertEqual(self.resolver.calls, 3)
+
+    def test_resolve_public(self):
+        result = self.resolver.resolve(
+            [_instance(idx) for idx in range(10)], public=True)
+
+        self.assertEqual(
+            [vnic.public_ip for vnic in result['instance-7']],
+            ['129.0.0.7', None])
+        self.assertEqual(self.resolver.calls, 5)
+
+    def test_resolve_unknown(self):
+        self.assertEqual(self.resolver.resolve([_instance(42)]), {})
+
+
+class TestGetNicAddresses(unittest.TestCase):
+    vnics = [
+        VnicAddress('vnic-0', True, '10.0.0.2', '129.0.0.2'),
+        VnicAddress('vnic-1', False, '10.0.1.2', None),
+    ]
+
+    def test_modes(self):
+        self.assertEqual(get_nic_addresses(self.vnics), [
+            ('10.0.0.2', True), ('10.0.1.2', False)])
+        self.assertEqual(get_nic_addresses(self.vnics, addressing.PUBLIC), [
+            ('129.0.0.2', True), ('10.0.1.2', False)])
+        self.assertEqual(get_nic_addresses(self.vnics, addressing.BOTH), [
+            ('10.0.0.2', True), ('129.0.0.2', False),
+            ('10.0.1.2', False)])
+
+    def test_private_address(self):
+        self.assertEqual(get_private_address(self.vnics), '10.0.0.2')
+        self.assertIsNone(get_private_address(self.vnics[1:]))
+        self.assertIsNone(get_private_address(None))
+
+    def test_errors(self):
+        with self.assertRaises(AddressingError):
+            get_nic_addresses(self.vnics, 'external')
+
+        with self.assertRaises(AddressingError):
+            get_nic_addresses([])
+
+        with self.assertRaises(AddressingError):
+            get_nic_addresses(self.vnics[1:])
+
+        with self.assertRaises(AddressingError):
+            get_nic_addresses(
+                [self.vnics[0]._replace(public_ip=None)], addressing.PUBLIC)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,278 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import itertools
+import types
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud.attachments import \
+    AttachmentError, AttachmentOrchestrator, parse_vnic_specs, \
+    parse_volume_specs
+
+
+class _Model(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+# Stand-in for oci.core.models
+models = types.SimpleNamespace(**{
+    name: type(name, (_Model,), {}) for name in (
+        'CreateVolumeDetails',
+        'CreateVnicDetails',
+        'AttachVnicDetails',
+        'AttachParavirtualizedVolumeDetails',
+        'AttachIScsiVolumeDetails',
+    )
+})
+
+
+class _Response(object):
+    def __init__(self, data):
+        self.data = data
+
+
+class ServiceError(Exception):
+    def __init__(self, status):
+        super(ServiceError, self).__init__(status)
+
+        self.status = status
+
+
+class FakeComputeClient(object):
+    """
+    Attach requests are rejected while the instance is provisioning;
+    attachments take 'attach_polls' polls to reach ATTACHED.
+    """
+    def __init__(self, provisioning_polls=1, attach_polls=2):
+        self.provisioning_polls = provisioning_polls
+        self.attach_polls = attach_polls
+        self.attachments = {}
+        self.requests = []
+        self.__ids = itertools.count()
+
+    def __attach(self, details):
+        if self.provisioning_polls > 0:
+            self.provisioning_polls -= 1
+
+            raise ServiceError(409)
+
+        self.requests.append(details)
+
+        attachment_id = 'attachment-%d' % next(self.__ids)
+
+        self.attachments[attachment_id] = self.attach_polls
+
+        return _Response(_Model(id=attachment_id))
+
+    def __get(self, attachment_id):
+        polls = self.attachments[attachment_id]
+
+        self.attachments[attachment_id] = max(polls - 1, 0)
+
+        return _Response(_Model(
+            lifecycle_state='ATTACHED' if polls == 0 else 'ATTACHING'))
+
+    def attach_vnic(self, details):
+        return self.__attach(details)
+
+    def attach_volume(self, details):
+        return self.__attach(details)
+
+    def get_vnic_attachment(self, attachment_id):
+        return self.__get(attachment_id)
+
+    def get_volume_attachment(self, attachment_id):
+        return self.__get(attachment_id)
+
+
+class FakeBlockstorageClient(object):
+    def __init__(self, provision_polls=2, state='AVAILABLE',
+                 attached_polls=0):
+        self.provision_polls = provision_polls
+        self.state = state
+        self.attached_polls = attached_polls
+        self.volumes = {}
+        self.deleted = []
+        self.__ids = itertools.count()
+
+    def create_volume(self, details):
+        volume_id = 'volume-%d' % next(self.__ids)
+
+        self.volumes[volume_id] = {
+            'details': details,
+            'polls': self.provision_polls,
+            'attached_polls': self.attached_polls,
+        }
+
+        return _Response(_Model(id=volume_id))
+
+    def get_volume(self, volume_id):
+        volume = self.volumes[volume_id]
+
+        if volume['polls'] > 0:
+            volume['polls'] -= 1
+
+            return _Response(_Model(lifecycle_state='PROVISIONING'))
+
+        return _Response(_Model(lifecycle_state=self.state))
+
+    def delete_volume(self, volume_id):
+        if volume_id not in self.volumes:
+            raise ServiceError(404)
+
+        volume = self.volumes[volume_id]
+
+        if volume['attached_polls'] > 0:
+            volume['attached_polls'] -= 1
+
+            raise ServiceError(409)
+
+        del self.volumes[volume_id]
+
+        self.deleted.append(volume_id)
+
+
+class TestParseSpecs(unittest.TestCase):
+    def test_parse_vnic_specs(self):
+        self.assertEqual(
+            parse_vnic_specs([
+                'subnet_id=ocid1.subnet.1,nic_index=1,'
+                'assign_public_ip=true']),
+            [{
+                'subnet_id': 'ocid1.subnet.1',
+                'nic_index': 1,
+                'assign_public_ip': True,
+                'skip_source_dest_check': False,
+            }]
+        )
+
+        self.assertEqual(parse_vnic_specs(None), [])
+
+        with self.assertRaises(ValueError):
+            parse_vnic_specs(['nic_index=1'])
+
+        with self.assertRaises(ValueError):
+            parse_vnic_specs(['subnet=ocid1.subnet.1'])
+
+    def test_parse_volume_specs(self):
+        self.assertEqual(
+            parse_volume_specs(['size_in_gbs=1024,vpus_per_gb=20',
+                                'size_in_gbs=50,attachment_type=iscsi']),
+            [
+                {'size_in_gbs': 1024, 'vpus_per_gb': 20,
+                 'attachment_type': 'paravirtualized'},
+                {'size_in_gbs': 50, 'vpus_per_gb': 10,
+                 'attachment_type': 'iscsi'},
+            ]
+        )
+
+        for spec in ('vpus_per_gb=20', 'size_in_gbs=50,vpus_per_gb=25',
+                     'size_in_gbs=50,vpus_per_gb=130',
+                     'size_in_gbs=50,attachment_type=nfs'):
+            with self.assertRaises(ValueError):
+                parse_volume_specs([spec])
+
+
+class TestAttachmentOrchestrator(unittest.TestCase):
+    def setUp(self):
+        self.compute = FakeComputeClient()
+        self.blockstorage = FakeBlockstorageClient()
+        self.sleeps = []
+        self.orchestrator = AttachmentOrchestrator(
+            self.compute, self.blockstorage, models=models,
+            sleep=self.sleeps.append, interval=5)
+
+    def test_attach_in_parallel(self):
+        volume_specs = parse_volume_specs([
+            'size_in_gbs=1024,vpus_per_gb=20',
+            'size_in_gbs=512,attachment_type=iscsi',
+        ])
+        vnic_specs = parse_vnic_specs(['subnet_id=ocid1.subnet.1'])
+
+        volume_ids = self.orchestrator.create_volumes(
+            'compartment', 'AD-1', volume_specs, 'node-01')
+
+        self.assertEqual(
+            self.blockstorage.volumes[volume_ids[0]][
+                'details'].vpus_per_gb, 20)
+
+        result = self.orchestrator.attach(
+            'instance', vnic_specs, volume_ids, volume_specs, 'node-01')
+
+        self.assertEqual(len(result.vnic_attachment_ids), 1)
+        self.assertEqual(len(result.volume_attachment_ids), 2)
+
+        # Sequential attachment would take at least 3 polls for each of
+        # the three attachments
+        self.assertLessEqual(len(self.sleeps), 5)
+
+        requests = {
+            type(details).__name__: details
+            for details in self.compute.requests
+        }
+
+        self.assertEqual(
+            requests['AttachVnicDetails'].create_vnic_details.subnet_id,
+            'ocid1.subnet.1')
+        self.assertEqual(
+            requests['AttachIScsiVolumeDetails'].volume_id, volume_ids[1])
+        self.assertEqual(
+            requests['AttachParavirtualizedVolumeDetails'].display_name,
+            'node-01-volume0')
+
+    def test_failed_volume(self):
+        self.blockstorage.state = 'FAULTY'
+
+        volume_specs = parse_volume_specs(['size_in_gbs=50'])
+
+        volume_ids = self.orchestrator.create_volumes(
+            'compartment', 'AD-1', volume_specs, 'node-01')
+
+        with self.assertRaises(AttachmentError):
+            self.orchestrator.attach(
+                'instance', [], volume_ids, volume_specs, 'node-01')
+
+    def test_delete_volumes_batched(self):
+        self.blockstorage.attached_polls = 1
+
+        volume_specs = parse_volume_specs(['size_in_gbs=50'] * 3)
+
+        volume_ids = self.orchestrator.create_volumes(
+            'compartment', 'AD-1', volume_specs, 'node-01')
+
+        failed = self.orchestrator.delete_volumes(
+            volume_ids + ['volume-gone'])
+
+        self.assertEqual(failed, {})
+        self.assertEqual(sorted(self.blockstorage.deleted), volume_ids)
+
+        # Still detaching volumes are retried together
+        self.assertEqual(len(self.sleeps), 1)
+
+    def test_delete_volumes_gives_up(self):
+        self.blockstorage.attached_polls = 10
+
+        volume_ids = self.orchestrator.create_volumes(
+            'compartment', 'AD-1', parse_volume_specs(['size_in_gbs=50']),
+            'node-01')
+
+        failed = self.orchestrator.delete_volumes(volume_ids, attempts=3)
+
+        self.assertEqual(list(failed), volume_ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
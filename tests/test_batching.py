@@ -0,0 +1,124 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import gevent
+
+from tortuga.resourceAdapter.oraclecloud.batching import BatchAggregator
+
+
+class TestBatchAggregator(unittest.TestCase):
+    def setUp(self):
+        self.flushed = []
+
+    def flush(self, items):
+        self.flushed.append(list(items))
+
+        return [
+            ValueError(item) if item < 0 else item * 2
+            for item in items
+        ]
+
+    def testWindow(self):
+        aggregator = BatchAggregator(self.flush, window=0.01, max_size=100)
+
+        greenlets = [gevent.spawn(aggregator.submit, idx) for idx in range(5)]
+
+        gevent.joinall(greenlets)
+
+        self.assertEqual([greenlet.value for greenlet in greenlets],
+                         [0, 2, 4, 6, 8])
+        self.assertEqual(len(self.flushed), 1)
+
+    def testMaxSize(self):
+        aggregator = BatchAggregator(self.flush, window=10, max_size=2)
+
+        greenlets = [gevent.spawn(aggregator.submit, idx) for idx in range(4)]
+
+        gevent.joinall(greenlets, timeout=1)
+
+        self.assertEqual(self.flushed, [[0, 1], [2, 3]])
+
+    def testErrorIsolation(self):
+        aggregator = BatchAggregator(self.flush, window=0.01)
+
+        greenlets = [gevent.spawn(aggregator.submit, idx)
+                     for idx in (1, -1, 2)]
+
+        gevent.joinall(greenlets)
+
+        self.assertEqual(greenlets[0].value, 2)
+        self.assertIsInstance(greenlets[1].exception, ValueError)
+        self.assertEqual(greenlets[2].value, 4)
+
+    def testMaxSizeFlushIsNotInterrupted(self):
+        flushing = []
+
+        def flush(items):
+            flushing.append(gevent.getcurrent())
+
+            gevent.sleep(0.05)
+
+            return self.flush(items)
+
+        aggregator = BatchAggregator(flush, window=10, max_size=2)
+
+        def submit(item):
+            with gevent.Timeout(0.01, False):
+                return aggregator.submit(item)
+
+        first = gevent.spawn(aggregator.submit, 1)
+        second = gevent.spawn(submit, 2)
+
+        gevent.joinall([first, second], timeout=1)
+
+        # The batch completed although the submitter which filled it
+        # timed out, and ran in neither submitting greenlet; the timed
+        # out submitter still got the result of its taken item
+        self.assertEqual(first.value, 2)
+        self.assertEqual(second.value, 4)
+        self.assertEqual(self.flushed, [[1, 2]])
+        self.assertNotIn(flushing[0], (first, second))
+
+    def testAbandonedItemIsDropped(self):
+        aggregator = BatchAggregator(self.flush, window=0.05, max_size=100)
+
+        def submit(item):
+            with gevent.Timeout(0.01, False):
+                return aggregator.submit(item)
+
+        greenlets = [gevent.spawn(submit, -5),
+                     gevent.spawn(aggregator.submit, 3)]
+
+        gevent.joinall(greenlets, timeout=1)
+
+        self.assertEqual(greenlets[1].value, 6)
+        self.assertEqual(self.flushed, [[3]])
+
+    def testAbandonedTakenItemIsSkipped(self):
+        aggregator = BatchAggregator(self.flush, window=10, max_size=2)
+
+        first = gevent.spawn(aggregator.submit, 1)
+
+        # The kill reaches the first submitter after the second one has
+        # taken both items, but before the batch greenlet starts
+        gevent.spawn(first.kill, block=False)
+
+        second = gevent.spawn(aggregator.submit, 2)
+
+        gevent.joinall([first, second], timeout=1)
+
+        self.assertEqual(second.value, 4)
+        self.assertEqual(self.flushed, [[2]])
@@ -0,0 +1,242 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud import breaker
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class ServiceError(Exception):
+    def __init__(self, status, code=None):
+        super(ServiceError, self).__init__('status %d' % (status))
+
+        self.status = status
+        self.code = code
+
+
+class TestIsFailure(unittest.TestCase):
+    def test_is_failure(self):
+        self.assertTrue(breaker.is_failure(ServiceError(503)))
+        self.assertTrue(breaker.is_retryable(ServiceError(503)))
+        self.assertFalse(breaker.is_retryable(ConnectionError('reset')))
+        self.assertTrue(breaker.is_failure(ServiceError(429)))
+        self.assertTrue(breaker.is_failure(ConnectionError('reset')))
+        self.assertFalse(breaker.is_failure(ServiceError(404)))
+        self.assertFalse(breaker.is_failure(
+            ServiceError(500, code='OutOfHostCapacity')))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.transitions = []
+
+        self.breaker = breaker.CircuitBreaker(
+            'test',
+            failure_threshold=3,
+            reset_timeout=60,
+            error_rate=0.5,
+            slow_call_duration=10,
+            window=10,
+            min_calls=4,
+            clock=self.clock,
+            listener=lambda circuit, old, new:
+                self.transitions.append((old, new))
+        )
+
+    def fail(self, exc=None):
+        exc = exc or ConnectionError('reset')
+
+        def func():
+            raise exc
+
+        with self.assertRaises(type(exc)):
+            self.breaker.call(func)
+
+    def test_consecutive_failures(self):
+        self.fail()
+        self.fail()
+
+        self.assertEqual(self.breaker.state, breaker.CLOSED)
+
+        self.fail()
+
+        self.assertEqual(self.breaker.state, breaker.OPEN)
+
+        with self.assertRaises(breaker.CircuitOpenError):
+            self.breaker.call(lambda: None)
+
+        self.assertEqual(self.breaker.rejected, 1)
+        self.assertEqual(self.transitions, [(breaker.CLOSED, breaker.OPEN)])
+
+    def test_error_rate(self):
+        for _ in range(2):
+            self.breaker.call(lambda: None)
+            self.fail()
+
+        self.assertEqual(self.breaker.state, breaker.OPEN)
+
+    def test_retryable_failures(self):
+        # Transient errors in a row do not open the circuit...
+        for _ in range(3):
+            self.fail(ServiceError(503))
+
+        self.assertEqual(self.breaker.state, breaker.CLOSED)
+
+        # ...but count towards the error rate
+        self.fail(ServiceError(429))
+
+        self.assertEqual(self.breaker.state, breaker.OPEN)
+        self.assertEqual(self.breaker.failures, 4)
+
+    def test_retry_after(self):
+        for _ in range(3):
+            self.fail()
+
+        self.clock.now += 20
+
+        with self.assertRaises(breaker.CircuitOpenError) as cm:
+            self.breaker.call(lambda: None)
+
+        self.assertEqual(cm.exception.retry_after, 40)
+
+        self.clock.now += 40
+
+        self.assertEqual(self.breaker.retry_after(), 0)
+
+    def test_slow_calls(self):
+        def slow():
+            self.clock.now += 15
+
+        for _ in range(4):
+            self.breaker.call(slow)
+
+        self.assertEqual(self.breaker.state, breaker.OPEN)
+        self.assertEqual(self.breaker.failures, 0)
+
+    def test_probe(self):
+        for _ in range(3):
+            self.fail()
+
+        self.clock.now += 60
+
+        self.assertEqual(self.breaker.state, breaker.HALF_OPEN)
+
+        # Only one probe at a time
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record_success()
+
+        self.assertEqual(self.breaker.state, breaker.CLOSED)
+        self.assertEqual(self.transitions, [
+            (breaker.CLOSED, breaker.OPEN),
+            (breaker.OPEN, breaker.HALF_OPEN),
+            (breaker.HALF_OPEN, breaker.CLOSED),
+        ])
+
+    def test_failed_probe_reopens(self):
+        for _ in range(3):
+            self.fail()
+
+        self.clock.now += 60
+
+        self.fail()
+
+        self.assertEqual(self.breaker.state, breaker.OPEN)
+
+        with self.assertRaises(breaker.CircuitOpenError):
+            self.breaker.call(lambda: None)
+
+    def test_client_errors_ignored(self):
+        def func():
+            raise ServiceError(400)
+
+        for _ in range(10):
+            with self.assertRaises(ServiceError):
+                self.breaker.call(func)
+
+        self.assertEqual(self.breaker.state, breaker.CLOSED)
+
+
+class TestBreakerSet(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+        self.breakers = breaker.BreakerSet(
+            'us-phoenix-1/compartment', clock=self.clock,
+            failure_threshold=1)
+
+    def test_operations_are_isolated(self):
+        self.breakers.get('get_instance').record_failure()
+
+        self.assertEqual(self.breakers.state('get_instance'), breaker.OPEN)
+        self.assertEqual(self.breakers.state('launch_instance'),
+                         breaker.CLOSED)
+
+        self.assertEqual(self.breakers.call('launch_instance', lambda: 1), 1)
+
+        health = self.breakers.health()
+
+        self.assertEqual(health['status'], breaker.DEGRADED)
+        self.assertEqual(
+            health['operations']['get_instance']['state'], breaker.OPEN)
+
+    def test_launch_failure_is_unavailable(self):
+        self.assertEqual(self.breakers.health()['status'], breaker.HEALTHY)
+
+        self.breakers.get('launch_instance').record_failure()
+
+        self.assertEqual(self.breakers.health()['status'],
+                         breaker.UNAVAILABLE)
+
+    def test_worst_status(self):
+        self.assertEqual(breaker.worst_status([]), breaker.HEALTHY)
+        self.assertEqual(
+            breaker.worst_status([breaker.HEALTHY, breaker.DEGRADED]),
+            breaker.DEGRADED)
+
+
+class TestHealthFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_write(self):
+        path = os.path.join(self.tmpdir, 'run', 'health.json')
+
+        breaker.write_health_file(path, {'status': breaker.HEALTHY})
+
+        with open(path) as fp:
+            self.assertEqual(json.load(fp), {'status': breaker.HEALTHY})
+
+        self.assertEqual(os.listdir(os.path.dirname(path)), ['health.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud import capacity
+
+
+class FakeServiceError(Exception):
+    def __init__(self, code, message):
+        super(FakeServiceError, self).__init__(message)
+        self.code = code
+        self.message = message
+
+
+class TestCapacityPlan(unittest.TestCase):
+    def testDefault(self):
+        self.assertEqual(
+            capacity.CapacityPlan.from_config({}).modes,
+            [capacity.ON_DEMAND]
+        )
+
+    def testPreemptibleFallback(self):
+        plan = capacity.CapacityPlan.from_config({
+            'preemptible': True,
+            'capacity_fallback': True,
+        })
+
+        self.assertEqual(plan.modes,
+                         [capacity.PREEMPTIBLE, capacity.ON_DEMAND])
+
+        plan.exhaust(capacity.PREEMPTIBLE, 'Out of host capacity.')
+
+        self.assertEqual(plan.modes, [capacity.ON_DEMAND])
+        self.assertIn(capacity.PREEMPTIBLE, plan.exhausted)
+
+    def testReservationWithoutFallback(self):
+        plan = capacity.CapacityPlan.from_config({
+            'capacity_reservation_id': 'ocid1.capacityreservation',
+            'capacity_fallback': False,
+        })
+
+        self.assertEqual(plan.modes, [capacity.RESERVED])
+
+        plan.exhaust(capacity.RESERVED)
+
+        self.assertEqual(plan.modes, [])
+
+    def testIsCapacityError(self):
+        self.assertTrue(capacity.is_capacity_error(
+            FakeServiceError('InternalError', 'Out of host capacity.')))
+        self.assertTrue(capacity.is_capacity_error(
+            FakeServiceError('LimitExceeded', 'limit reached')))
+        self.assertFalse(capacity.is_capacity_error(
+            FakeServiceError('NotAuthorizedOrNotFound', 'not found')))
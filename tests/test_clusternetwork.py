@@ -0,0 +1,249 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import types
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud.clusternetwork import \
+    ClusterNetworkError, ClusterNetworkOrchestrator
+
+
+class _Model(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+# Stand-in for oci.core.models
+models = types.SimpleNamespace(**{
+    name: type(name, (_Model,), {}) for name in (
+        'CreateInstanceConfigurationDetails',
+        'ComputeInstanceDetails',
+        'InstanceConfigurationLaunchInstanceDetails',
+        'InstanceConfigurationInstanceSourceViaImageDetails',
+        'InstanceConfigurationCreateVnicDetails',
+        'CreateClusterNetworkDetails',
+        'CreateClusterNetworkInstancePoolDetails',
+        'ClusterNetworkPlacementConfigurationDetails',
+        'UpdateClusterNetworkDetails',
+        'UpdateClusterNetworkInstancePoolDetails',
+        'DetachInstancePoolInstanceDetails',
+    )
+})
+
+
+class _Response(object):
+    def __init__(self, data, next_page=None):
+        self.data = data
+        self.next_page = next_page
+
+
+class FakeComputeManagementClient(object):
+    """
+    Local stand-in for the OCI compute management API.  Cluster networks
+    take 'provision_polls' polls to reach RUNNING after a change.
+    """
+    def __init__(self, provision_polls=2, fail=False):
+        self.provision_polls = provision_polls
+        self.fail = fail
+        self.networks = {}
+        self.calls = []
+        self.__ids = itertools.count()
+
+    def __network(self, network_id):
+        network = self.networks[network_id]
+
+        if network['polls'] > 0:
+            network['polls'] -= 1
+            network['obj'].lifecycle_state = 'PROVISIONING'
+        else:
+            network['obj'].lifecycle_state = \
+                'TERMINATED' if self.fail else 'RUNNING'
+
+        return network
+
+    def __set_size(self, network, size):
+        while len(network['instances']) < size:
+            network['instances'].append(
+                _Model(id='instance-%d' % next(self.__ids), state='Running'))
+
+        network['obj'].instance_pools[0].size = size
+        network['polls'] = self.provision_polls
+
+    def create_instance_configuration(self, details):
+        self.calls.append('create_instance_configuration')
+
+        return _Response(_Model(id='instance-configuration'))
+
+    def create_cluster_network(self, details):
+        self.calls.append('create_cluster_network')
+
+        network_id = 'cluster-network-%d' % next(self.__ids)
+
+        pool = _Model(id='pool-%s' % network_id, size=0)
+
+        network = {
+            'obj': _Model(id=network_id, instance_pools=[pool],
+                          lifecycle_state='PROVISIONING'),
+            'instances': [],
+            'polls': 0,
+        }
+
+        self.networks[network_id] = network
+
+        self.__set_size(network, details.instance_pools[0].size)
+
+        return _Response(network['obj'])
+
+    def update_cluster_network(self, network_id, details):
+        self.calls.append('update_cluster_network')
+
+        self.__set_size(self.networks[network_id],
+                        details.instance_pools[0].size)
+
+    def get_cluster_network(self, network_id):
+        self.calls.append('get_cluster_network')
+
+        return _Response(self.__network(network_id)['obj'])
+
+    def list_cluster_network_instances(self, compartment_id, network_id,
+                                       page=None):
+        self.calls.append('list_cluster_network_instances')
+
+        instances = self.networks[network_id]['instances']
+
+        # Two instances per page
+        start = int(page or 0)
+
+        return _Response(
+            instances[start:start + 2],
+            next_page=str(start + 2) if start + 2 < len(instances) else None
+        )
+
+    def terminate_cluster_network(self, network_id):
+        self.calls.append('terminate_cluster_network')
+
+        self.networks[network_id]['obj'].lifecycle_state = 'TERMINATING'
+
+    def detach_instance_pool_instance(self, pool_id, details):
+        self.calls.append('detach_instance_pool_instance')
+
+        for network in self.networks.values():
+            pool = network['obj'].instance_pools[0]
+
+            if pool.id == pool_id:
+                network['instances'] = [
+                    instance for instance in network['instances']
+                    if instance.id != details.instance_id
+                ]
+
+                pool.size -= 1
+
+
+class TestClusterNetworkOrchestrator(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeComputeManagementClient()
+        self.sleeps = []
+        self.orchestrator = ClusterNetworkOrchestrator(
+            self.client, models=models, sleep=self.sleeps.append,
+            clock=lambda: sum(self.sleeps))
+
+    def testCreate(self):
+        placement = self.orchestrator.launch(
+            'compartment', 'AD-1', 'subnet', 'instance-configuration', 5,
+            display_name='tortuga-session')
+
+        self.assertEqual(len(placement.instance_ids), 5)
+        self.assertEqual(placement.instance_pool_id,
+                         'pool-%s' % placement.cluster_network_id)
+        self.assertEqual(len(self.sleeps), 2)
+
+    def testExtend(self):
+        first = self.orchestrator.launch(
+            'compartment', 'AD-1', 'subnet', 'instance-configuration', 3)
+
+        second = self.orchestrator.launch(
+            'compartment', 'AD-1', 'subnet', 'instance-configuration', 2,
+            cluster_network_id=first.cluster_network_id)
+
+        self.assertEqual(second.cluster_network_id, first.cluster_network_id)
+        self.assertEqual(len(second.instance_ids), 2)
+        self.assertFalse(set(first.instance_ids) & set(second.instance_ids))
+        self.assertEqual(self.client.calls.count('create_cluster_network'), 1)
+        self.assertEqual(self.client.calls.count('update_cluster_network'), 1)
+
+    def testFailure(self):
+        self.client.fail = True
+
+        with self.assertRaises(ClusterNetworkError):
+            self.orchestrator.launch(
+                'compartment', 'AD-1', 'subnet', 'instance-configuration', 1)
+
+    def testFailedCreateIsTerminated(self):
+        self.client.fail = True
+
+        with self.assertRaises(ClusterNetworkError):
+            self.orchestrator.launch(
+                'compartment', 'AD-1', 'subnet', 'instance-configuration', 1)
+
+        self.assertEqual(
+            self.client.calls.count('terminate_cluster_network'), 1)
+
+    def testTimeout(self):
+        self.client.provision_polls = 100
+
+        with self.assertRaises(ClusterNetworkError):
+            self.orchestrator.launch(
+                'compartment', 'AD-1', 'subnet', 'instance-configuration', 2,
+                timeout=60)
+
+        self.assertEqual(sum(self.sleeps), 60)
+        self.assertEqual(
+            self.client.calls.count('terminate_cluster_network'), 1)
+
+    def testTimedOutExtendIsShrunk(self):
+        first = self.orchestrator.launch(
+            'compartment', 'AD-1', 'subnet', 'instance-configuration', 3)
+
+        self.client.provision_polls = 100
+
+        with self.assertRaises(ClusterNetworkError):
+            self.orchestrator.launch(
+                'compartment', 'AD-1', 'subnet', 'instance-configuration', 2,
+                cluster_network_id=first.cluster_network_id, timeout=60)
+
+        network = self.client.networks[first.cluster_network_id]
+
+        self.assertEqual(network['obj'].instance_pools[0].size, 3)
+        self.assertEqual([instance.id for instance in network['instances']],
+                         first.instance_ids)
+        self.assertEqual(
+            self.client.calls.count('detach_instance_pool_instance'), 2)
+
+    def testInstanceConfiguration(self):
+        self.assertEqual(
+            self.orchestrator.create_instance_configuration(
+                'compartment', 'tortuga-execd', {
+                    'availability_domain': 'AD-1',
+                    'shape': 'BM.HPC2.36',
+                    'image_id': 'image',
+                    'subnet_id': 'subnet',
+                }),
+            'instance-configuration'
+        )
+
+    def testDetach(self):
+        self.orchestrator.detach_instance('pool', 'instance')
+
+        self.assertEqual(self.client.calls, ['detach_instance_pool_instance'])
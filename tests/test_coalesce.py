@@ -0,0 +1,108 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import gevent
+import gevent.event
+
+from tortuga.resourceAdapter.oraclecloud.coalesce import \
+    LaunchCoalescer, LaunchRequest
+
+
+class TestLaunchCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+
+    def execute(self, requests):
+        self.batches.append(len(requests))
+
+        for request in requests:
+            request.nodes = [
+                '%s-%d' % (request.node_spec['caller'], idx)
+                for idx in range(request.count)
+            ]
+
+    def testNoWindow(self):
+        coalescer = LaunchCoalescer()
+
+        nodes = coalescer.submit(
+            'key', LaunchRequest(2, {'caller': 'a'}), self.execute, 0)
+
+        self.assertEqual(nodes, ['a-0', 'a-1'])
+        self.assertEqual(self.batches, [1])
+
+    def testCoalesce(self):
+        followers_queued = gevent.event.Event()
+
+        coalescer = LaunchCoalescer(
+            sleep=lambda window: followers_queued.wait(5))
+
+        results = {}
+
+        def caller(name, count):
+            results[name] = coalescer.submit(
+                'key', LaunchRequest(count, {'caller': name}),
+                self.execute, 1)
+
+        greenlets = [
+            gevent.spawn(caller, name, count)
+            for name, count in (('a', 1), ('b', 2), ('c', 3))
+        ]
+
+        while coalescer.pending('key') < 3:
+            gevent.sleep(0.01)
+
+        followers_queued.set()
+
+        gevent.joinall(greenlets, timeout=5)
+
+        self.assertEqual(self.batches, [3])
+        self.assertEqual(results['a'], ['a-0'])
+        self.assertEqual(results['b'], ['b-0', 'b-1'])
+        self.assertEqual(results['c'], ['c-0', 'c-1', 'c-2'])
+
+    def testFollowerReceivesError(self):
+        followers_queued = gevent.event.Event()
+
+        coalescer = LaunchCoalescer(
+            sleep=lambda window: followers_queued.wait(5))
+
+        errors = {}
+
+        def execute(requests):
+            raise RuntimeError('launch failed')
+
+        def caller(name):
+            try:
+                coalescer.submit(
+                    'key', LaunchRequest(1, {'caller': name}), execute, 1)
+            except RuntimeError as exc:
+                errors[name] = exc
+
+        greenlets = [gevent.spawn(caller, 'a')]
+
+        while coalescer.pending('key') < 1:
+            gevent.sleep(0.01)
+
+        greenlets.append(gevent.spawn(caller, 'b'))
+
+        while coalescer.pending('key') < 2:
+            gevent.sleep(0.01)
+
+        followers_queued.set()
+
+        gevent.joinall(greenlets, timeout=5)
+
+        self.assertEqual(sorted(errors.keys()), ['a', 'b'])
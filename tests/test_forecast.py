@@ -0,0 +1,202 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud.forecast import DAY, WEEK, \
+    RequestHistory, SeasonalForecaster, WarmPoolPlanner, main, replay
+
+
+class FakeClock(object):
+    def __init__(self, now=0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def daily_pattern(history, days, hour=9, count=4):
+    """
+    Record 'count' nodes requested every day at 'hour'.
+    """
+    for day in range(days):
+        history.record('compute', added=count,
+                       timestamp=day * DAY + hour * 3600)
+
+
+class TestRequestHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.clock = FakeClock(10 * DAY)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_buckets(self):
+        history = RequestHistory(bucket=900, clock=self.clock)
+
+        history.record('compute', added=2, timestamp=100)
+        history.record('compute', added=3, timestamp=800)
+        history.record('compute', deleted=1, timestamp=1000)
+
+        self.assertEqual(history.series('compute'),
+                         [(0, 5, 0), (900, 0, 1)])
+        self.assertEqual(history.added('compute', 0), 5)
+        self.assertEqual(history.first('compute'), 0)
+        self.assertIsNone(history.first('gpu'))
+
+    def test_save_load_and_prune(self):
+        path = os.path.join(self.tmpdir, 'history.json')
+
+        history = RequestHistory(bucket=600, retention=2 * DAY,
+                                 clock=self.clock)
+
+        history.record('compute', added=1, timestamp=DAY)
+        history.record('compute', added=2, timestamp=9 * DAY)
+        history.charge('compute', 1.5, timestamp=9 * DAY)
+
+        history.save(path)
+
+        loaded = RequestHistory()
+        loaded.load(path)
+
+        self.assertEqual(loaded.bucket, 600)
+        self.assertEqual(loaded.series('compute'), [(9 * DAY, 2, 0)])
+        self.assertEqual(loaded.spent('compute', 9 * DAY + 60), 1.5)
+
+        # Missing file is ignored
+        RequestHistory().load(os.path.join(self.tmpdir, 'missing.json'))
+
+
+class TestForecast(unittest.TestCase):
+    def test_daily_pattern(self):
+        history = RequestHistory(bucket=900)
+
+        daily_pattern(history, 14)
+
+        forecaster = SeasonalForecaster(history)
+
+        self.assertAlmostEqual(
+            forecaster.forecast('compute', 14 * DAY + 8.5 * 3600, 3600),
+            4.0)
+        self.assertEqual(
+            forecaster.forecast('compute', 14 * DAY + 12 * 3600, 3600),
+            0.0)
+        self.assertEqual(
+            forecaster.forecast('gpu', 14 * DAY + 8.5 * 3600, 3600), 0.0)
+
+    def test_weekly_pattern_dominates(self):
+        history = RequestHistory(bucket=900)
+
+        # Demand on the same weekday only
+        for week in range(4):
+            history.record('compute', added=10,
+                           timestamp=week * WEEK + 9 * 3600)
+
+        forecaster = SeasonalForecaster(history, daily_weight=0.3)
+
+        self.assertAlmostEqual(
+            forecaster.rate('compute', 4 * WEEK + 9 * 3600),
+            0.7 * 10 + 0.3 * 10 / 7)
+
+
+class TestWarmPoolPlanner(unittest.TestCase):
+    def test_plan(self):
+        planner = WarmPoolPlanner(max_nodes=5, budget=4, lead_time=3600)
+
+        self.assertEqual(planner.plan(3.4, 0, 0), 3)
+        self.assertEqual(planner.plan(3.4, 2, 0), 1)
+        self.assertEqual(planner.plan(20, 0, 0), 4)
+        self.assertEqual(planner.plan(20, 0, 3.5), 0)
+        self.assertEqual(planner.plan(0.2, 0, 0), 0)
+
+        self.assertEqual(
+            WarmPoolPlanner(max_nodes=5, budget=100).plan(20, 0, 0), 5)
+
+
+class TestReplay(unittest.TestCase):
+    def test_replay_daily_pattern(self):
+        history = RequestHistory(bucket=900)
+
+        daily_pattern(history, 14)
+
+        result = replay(
+            history, 'compute', SeasonalForecaster(history),
+            WarmPoolPlanner(max_nodes=10, budget=24, lead_time=1800),
+            launch_latency=600)
+
+        self.assertEqual(result['nodes_requested'], 13 * 4)
+        self.assertEqual(result['hits'], 13 * 4)
+        self.assertEqual(result['hit_rate'], 1.0)
+        self.assertEqual(result['latency_saved_seconds'], 13 * 4 * 600)
+        self.assertEqual(result['wasted_node_hours'], 0)
+        self.assertGreater(result['warm_node_hours'], 0)
+
+    def test_replay_respects_budget(self):
+        history = RequestHistory(bucket=900)
+
+        daily_pattern(history, 14)
+
+        result = replay(
+            history, 'compute', SeasonalForecaster(history),
+            WarmPoolPlanner(max_nodes=10, budget=1, lead_time=1800),
+            launch_latency=600)
+
+        self.assertEqual(result['hits'], 13 * 2)
+        self.assertAlmostEqual(result['hit_rate'], 0.5)
+
+    def test_replay_without_history(self):
+        history = RequestHistory()
+
+        result = replay(history, 'compute', SeasonalForecaster(history),
+                        WarmPoolPlanner(), launch_latency=600)
+
+        self.assertEqual(result['nodes_requested'], 0)
+        self.assertIsNone(result['hit_rate'])
+
+    def test_main(self):
+        tmpdir = tempfile.mkdtemp()
+
+        try:
+            path = os.path.join(tmpdir, 'history.json')
+
+            history = RequestHistory(bucket=900, retention=float('inf'))
+
+            daily_pattern(history, 14)
+
+            history.save(path)
+
+            output = io.StringIO()
+
+            with contextlib.redirect_stdout(output):
+                main(['--history', path, '--launch-latency', '600',
+                      '--json'])
+
+            results = json.loads(output.getvalue())
+
+            self.assertEqual(results[0]['profile'], 'compute')
+            self.assertEqual(results[0]['hit_rate'], 1.0)
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,204 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud.hibernation import \
+    HibernationError, ResumeOrchestrator, parked_key, parked_name, \
+    split_parked
+
+
+class _Model(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class _Response(object):
+    def __init__(self, data, next_page=None):
+        self.data = data
+        self.next_page = next_page
+
+
+class ServiceError(Exception):
+    def __init__(self, status):
+        super(ServiceError, self).__init__(status)
+
+        self.status = status
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeComputeClient(object):
+    """
+    Stopped instances are RUNNING 'start_polls' listings after their
+    START action.  Instances in 'stopping' reject the first START.
+    """
+    def __init__(self, instances, start_polls=2, stopping=(), page_size=3):
+        self.states = dict(instances)
+        self.start_polls = start_polls
+        self.stopping = set(stopping)
+        self.page_size = page_size
+        self.starting = {}
+        self.actions = []
+        self.listings = 0
+
+    def instance_action(self, instance_id, action):
+        self.actions.append((instance_id, action))
+
+        if instance_id not in self.states:
+            raise ServiceError(404)
+
+        if instance_id in self.stopping:
+            self.stopping.discard(instance_id)
+
+            raise ServiceError(409)
+
+        if self.states[instance_id] == 'STOPPED':
+            self.states[instance_id] = 'STARTING'
+            self.starting[instance_id] = self.start_polls
+
+        return _Response(None)
+
+    def list_instances(self, compartment_id, page=None):
+        if page is None:
+            self.listings += 1
+
+            for instance_id in list(self.starting):
+                self.starting[instance_id] -= 1
+
+                if not self.starting[instance_id]:
+                    del self.starting[instance_id]
+
+                    self.states[instance_id] = 'RUNNING'
+
+        instances = [
+            _Model(id=instance_id, lifecycle_state=lifecycle_state)
+            for instance_id, lifecycle_state in sorted(self.states.items())
+        ]
+
+        start = int(page or 0)
+        end = start + self.page_size
+
+        return _Response(instances[start:end],
+                         str(end) if end < len(instances) else None)
+
+
+class TestSplitParked(unittest.TestCase):
+    def test_split(self):
+        entries = {
+            'a': {'parked_since': '100', 'parked_profile': 'hp/sp'},
+            'b': {'parked_since': '50', 'parked_profile': 'hp/sp'},
+            'c': {'parked_since': '10', 'parked_profile': 'hp/sp'},
+            'd': {'parked_since': '90', 'parked_profile': 'other/sp'},
+            'e': {'parked_since': '', 'parked_profile': 'hp/sp'},
+            'f': {},
+        }
+
+        resumable, expired = split_parked(entries, 'hp/sp', 150, 120)
+
+        self.assertEqual([name for name, _ in resumable], ['b', 'a'])
+        self.assertEqual([name for name, _ in expired], ['c'])
+
+        resumable, expired = split_parked(entries, None, 150, 0)
+
+        self.assertEqual([name for name, _ in resumable],
+                         ['c', 'b', 'd', 'a'])
+        self.assertEqual(expired, [])
+
+    def test_parked_name(self):
+        key = parked_key('ocid1.instance.oc1.phx.a')
+
+        self.assertEqual(key, 'parked:ocid1.instance.oc1.phx.a')
+        self.assertEqual(parked_name(key, {'name': 'node01.example.com'}),
+                         'node01.example.com')
+
+        # Entries parked under the node name
+        self.assertEqual(parked_name('node01.example.com', {}),
+                         'node01.example.com')
+
+
+class TestResumeOrchestrator(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def orchestrator(self, client, timeout=600):
+        return ResumeOrchestrator(client, sleep=self.clock.sleep,
+                                  interval=5, timeout=timeout,
+                                  clock=self.clock)
+
+    def test_resume_bulk(self):
+        instances = {'i-%03d' % idx: 'STOPPED' for idx in range(50)}
+
+        client = FakeComputeClient(instances)
+
+        orchestrator = self.orchestrator(client)
+
+        results = orchestrator.resume(
+            [(instance_id, 'compartment') for instance_id in instances])
+
+        self.assertEqual(results, {instance_id: None
+                                   for instance_id in instances})
+
+        # One START per instance and one listing per poll, however many
+        # instances are resumed
+        self.assertEqual(len(client.actions), 50)
+        self.assertEqual(client.listings, 2)
+        self.assertEqual(self.clock.now, 10)
+
+    def test_conflict_retried(self):
+        client = FakeComputeClient(
+            {'i-1': 'STOPPED', 'i-2': 'STOPPED'}, stopping=['i-2'])
+
+        results = self.orchestrator(client).resume(
+            [('i-1', 'compartment'), ('i-2', 'compartment')])
+
+        self.assertEqual(results, {'i-1': None, 'i-2': None})
+        self.assertEqual(
+            [action for action in client.actions if action[0] == 'i-2'],
+            [('i-2', 'START'), ('i-2', 'START')])
+
+    def test_failures(self):
+        client = FakeComputeClient(
+            {'i-1': 'STOPPED', 'i-2': 'TERMINATED'})
+
+        results = self.orchestrator(client).resume(
+            [('i-1', 'compartment'), ('i-2', 'compartment'),
+             ('i-3', 'compartment')])
+
+        self.assertIsNone(results['i-1'])
+        self.assertIsInstance(results['i-2'], HibernationError)
+        self.assertEqual(results['i-3'].status, 404)
+
+    def test_timeout(self):
+        client = FakeComputeClient({'i-1': 'STOPPED'}, start_polls=100)
+
+        results = self.orchestrator(client, timeout=30).resume(
+            [('i-1', 'compartment')])
+
+        self.assertIsInstance(results['i-1'], HibernationError)
+        self.assertEqual(self.clock.now, 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import types
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud import images
+
+
+def image(ocid, name, day, tags=None):
+    return types.SimpleNamespace(
+        id=ocid,
+        display_name=name,
+        time_created=datetime.datetime(2018, 1, day),
+        freeform_tags=tags,
+    )
+
+
+class TestImageIndex(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.calls = []
+        self.images = [
+            image('ocid1.image.a', 'compute-2018.01.01', 1),
+            image('ocid1.image.b', 'compute-2018.01.03', 3,
+                  {'stage': 'testing'}),
+            image('ocid1.image.c', 'compute-2018.01.02', 2,
+                  {'stage': 'production'}),
+            image('ocid1.image.d', 'Oracle-Linux-7.5', 5),
+        ]
+
+        def list_images(compartment_id):
+            self.calls.append(compartment_id)
+
+            return self.images
+
+        self.index = images.ImageIndex(
+            list_images, ttl=300, clock=lambda: self.now)
+
+    def test_newest_match(self):
+        self.assertEqual(
+            self.index.resolve('c1', 'compute-*'), 'ocid1.image.b')
+
+    def test_tags(self):
+        self.assertEqual(
+            self.index.resolve('c1', 'compute-*',
+                               tags={'stage': 'production'}),
+            'ocid1.image.c')
+
+    def test_ocid_passthrough(self):
+        self.assertEqual(
+            self.index.resolve('c1', 'ocid1.image.z'), 'ocid1.image.z')
+
+        self.assertEqual(self.calls, [])
+
+    def test_not_found(self):
+        with self.assertRaises(images.ImageNotFoundError):
+            self.index.resolve('c1', 'Ubuntu-*')
+
+    def test_cached_until_ttl(self):
+        for _ in range(5):
+            self.index.resolve('c1', 'compute-*')
+
+        self.assertEqual(self.calls, ['c1'])
+
+        self.images.append(image('ocid1.image.e', 'compute-2018.01.04', 4))
+
+        self.assertEqual(
+            self.index.resolve('c1', 'compute-*'), 'ocid1.image.b')
+
+        self.now = 300
+
+        self.assertEqual(
+            self.index.resolve('c1', 'compute-*'), 'ocid1.image.e')
+        self.assertEqual(self.calls, ['c1', 'c1'])
+
+    def test_compartments_cached_separately(self):
+        self.index.resolve('c1', 'compute-*')
+        self.index.resolve('c2', 'compute-*')
+
+        self.assertEqual(self.calls, ['c1', 'c2'])
+
+
+class TestParse(unittest.TestCase):
+    def test_profile_images(self):
+        self.assertEqual(
+            images.parse_profile_images(
+                ['Compute=compute-*', 'GPU=ocid1.image.gpu']),
+            {'Compute': 'compute-*', 'GPU': 'ocid1.image.gpu'})
+
+        with self.assertRaises(ValueError):
+            images.parse_profile_images(['Compute'])
+
+    def test_tags(self):
+        self.assertEqual(images.parse_tags(['stage=production']),
+                         {'stage': 'production'})
+        self.assertEqual(images.parse_tags(None), {})
+
+        with self.assertRaises(ValueError):
+            images.parse_tags(['stage'])
+
+
+if __name__ == '__main__':
+    unittest.main()
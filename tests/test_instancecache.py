@@ -0,0 +1,87 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud.instancecache import \
+    InstanceCacheIndex
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestInstanceCacheIndex(unittest.TestCase):
+    def setUp(self):
+        self.entries = {
+            'node-01': {'id': 'ocid1.instance.1', 'vcpus': '2'},
+            'node-02': {'id': 'ocid1.instance.2', 'vcpus': '4'},
+        }
+        self.clock = FakeClock()
+        self.index = InstanceCacheIndex(
+            lambda: self.entries, reload_interval=5, clock=self.clock)
+
+    def testLoadsOnce(self):
+        self.assertEqual(self.index.get('node-01')['vcpus'], '2')
+        self.assertEqual(self.index.get('node-02')['vcpus'], '4')
+
+        self.assertEqual(
+            sorted(self.index.get_many(['node-01', 'node-02'])),
+            ['node-01', 'node-02'])
+
+        self.assertEqual(self.index.loads, 1)
+
+    def testMissReloadIsRateLimited(self):
+        self.assertIsNone(self.index.get('node-03'))
+        self.assertEqual(self.index.loads, 1)
+
+        self.entries['node-03'] = {'id': 'ocid1.instance.3'}
+
+        self.assertIsNone(self.index.get('node-03'))
+        self.assertEqual(self.index.loads, 1)
+
+        self.clock.now = 5
+
+        self.assertEqual(self.index.get('node-03')['id'], 'ocid1.instance.3')
+        self.assertEqual(self.index.loads, 2)
+
+    def testWriteThrough(self):
+        self.index.set('node-03', {'id': 'ocid1.instance.3', 'vcpus': 8})
+
+        self.assertEqual(self.index.get('node-03')['vcpus'], '8')
+
+        self.index.delete('node-01')
+
+        self.assertIsNone(self.index.get('node-01'))
+        self.assertEqual(len(self.index), 2)
+
+    def testFind(self):
+        self.assertEqual(
+            list(self.index.find(lambda entry: entry['vcpus'] == '4')),
+            ['node-02'])
+
+        self.assertEqual(self.index.find(lambda entry: False), {})
+
+    def testReturnsCopies(self):
+        self.index.get('node-01')['vcpus'] = '16'
+
+        self.assertEqual(self.index.get('node-01')['vcpus'], '2')
+
+
+if __name__ == '__main__':
+    unittest.main()
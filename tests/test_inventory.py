@@ -0,0 +1,245 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud import inventory, telemetry
+
+
+class FakeClock(object):
+    def __init__(self, now=1000):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestInventory(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'var', 'inventory.db')
+        self.clock = FakeClock()
+        self.inventory = inventory.Inventory(self.path, clock=self.clock)
+
+    def tearDown(self):
+        self.inventory.close()
+        shutil.rmtree(self.tmpdir)
+
+    def launch(self, launch_id, shape='VM.Standard2.1', running=30,
+               provisioned=120, name=None):
+        requested = self.clock.now
+
+        self.inventory.begin(launch_id, shape=shape, session='s1',
+                             hardware_profile='hp')
+
+        self.clock.now = requested + running
+        self.inventory.update(launch_id, instance_id='ocid1.' + launch_id,
+                              state=inventory.RUNNING)
+
+        if provisioned is not None:
+            self.clock.now = requested + provisioned
+            self.inventory.update_many([
+                (launch_id, {'state': inventory.PROVISIONED,
+                             'name': name or launch_id + '.example'})
+            ])
+
+        self.clock.now = requested + 1000
+
+    def test_lifecycle(self):
+        self.launch('a', name='compute-01')
+
+        row, = self.inventory.query(name='compute-01')
+
+        self.assertEqual(row['state'], inventory.PROVISIONED)
+        self.assertEqual(row['requested'], 1000)
+        self.assertEqual(row['running'], 1030)
+        self.assertEqual(row['provisioned'], 1120)
+        self.assertEqual(row['tags'], {})
+
+        self.assertEqual(
+            self.inventory.terminate(['compute-01', 'unknown'], 5000), 1)
+
+        row, = self.inventory.query(instance_id='ocid1.a')
+
+        self.assertEqual(row['state'], inventory.TERMINATED)
+        self.assertEqual(row['terminated'], 5000)
+
+        # Terminated launches are not terminated again
+        self.assertEqual(self.inventory.terminate(['compute-01']), 0)
+
+    def test_record_phases(self):
+        self.launch('a')
+
+        self.inventory.record_phases('ocid1.a', {'boot': 5, 'ready': 9})
+        self.inventory.record_phases('ocid1.a', {'boot': 7, 'puppet': 8})
+        self.inventory.record_phases('ocid1.unknown', {'boot': 1})
+
+        row, = self.inventory.query(instance_id='ocid1.a')
+
+        self.assertEqual(row['phases'], {'boot': 5, 'puppet': 8, 'ready': 9})
+
+    def test_query_filters(self):
+        self.launch('a', shape='VM.Standard2.1')
+        self.launch('b', shape='VM.Standard2.2', provisioned=None)
+        self.launch('c', shape='VM.Standard2.1')
+
+        self.assertEqual(
+            [row['launch_id'] for row in self.inventory.query()],
+            ['c', 'b', 'a'])
+        self.assertEqual(
+            [row['launch_id']
+             for row in self.inventory.query(shape='VM.Standard2.1')],
+            ['c', 'a'])
+        self.assertEqual(
+            [row['launch_id']
+             for row in self.inventory.query(state=inventory.RUNNING)],
+            ['b'])
+        self.assertEqual(
+            [row['launch_id']
+             for row in self.inventory.query(since=2000, until=3000)],
+            ['b'])
+        self.assertEqual(len(self.inventory.query(limit=2)), 2)
+
+    def test_durations(self):
+        self.launch('a', running=20, provisioned=100)
+        self.launch('b', running=40, provisioned=200)
+        self.launch('c', shape='VM.Standard2.2')
+
+        self.inventory.begin('d', shape='VM.Standard2.2')
+        self.inventory.update('d', state=inventory.FAILED)
+
+        result = self.inventory.durations()
+
+        small = result['VM.Standard2.1']
+
+        self.assertEqual(small['launches'], 2)
+        self.assertEqual(small['failed'], 0)
+        self.assertEqual(small['to_running']['mean'], 30)
+        self.assertEqual(small['to_running']['max'], 40)
+        self.assertEqual(small['to_provisioned']['count'], 2)
+
+        large = result['VM.Standard2.2']
+
+        self.assertEqual(large['launches'], 2)
+        self.assertEqual(large['failed'], 1)
+        self.assertEqual(large['to_running']['count'], 1)
+
+        self.assertEqual(
+            sorted(self.inventory.durations(group_by='session')),
+            ['s1', 'unknown'])
+
+        with self.assertRaises(ValueError):
+            self.inventory.durations(group_by='phases')
+
+    def test_main(self):
+        self.launch('a', name='compute-01')
+
+        stdout = io.StringIO()
+
+        with contextlib.redirect_stdout(stdout):
+            inventory.main(['--index', self.path, '--json', 'show',
+                            'compute-01'])
+
+        rows = json.loads(stdout.getvalue())
+
+        self.assertEqual([row['instance_id'] for row in rows], ['ocid1.a'])
+
+        stdout = io.StringIO()
+
+        with contextlib.redirect_stdout(stdout):
+            inventory.main(['--index', self.path, 'durations', '--by',
+                            'hardware_profile'])
+
+        self.assertTrue(stdout.getvalue().startswith('hp: 1 launch(es)'))
+
+
+    def test_readonly(self):
+        self.launch('a', name='compute-01')
+
+        readonly = inventory.Inventory(self.path, readonly=True)
+
+        try:
+            self.assertEqual(
+                [row['name'] for row in readonly.query()], ['compute-01'])
+
+            with self.assertRaises(sqlite3.OperationalError):
+                readonly.begin('b')
+        finally:
+            readonly.close()
+
+        with self.assertRaises(sqlite3.OperationalError):
+            inventory.Inventory(
+                os.path.join(self.tmpdir, 'missing.db'), readonly=True)
+
+
+class TestParseTime(unittest.TestCase):
+    def test_parse_time(self):
+        self.assertEqual(inventory.parse_time('12h', now=100000), 56800)
+        self.assertEqual(inventory.parse_time('30m', now=100000), 98200)
+        self.assertEqual(inventory.parse_time('1528000000'), 1528000000)
+        self.assertIsInstance(
+            inventory.parse_time('2018-06-01T18:00'), float)
+
+        with self.assertRaises(ValueError):
+            inventory.parse_time('yesterday')
+
+
+class TestTelemetryInventory(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.inventory = inventory.Inventory(
+            os.path.join(self.tmpdir, 'inventory.db'))
+
+    def tearDown(self):
+        self.inventory.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_phases_recorded(self):
+        instance_id = 'ocid1.instance.oc1.phx.abc'
+
+        self.inventory.begin('a', instance_id=instance_id)
+
+        app = telemetry.make_app(
+            telemetry.TelemetryStore(self.tmpdir), self.inventory)
+
+        body = json.dumps({
+            'instance_id': instance_id,
+            'phase': 'ready',
+            'timestamp': 12.5,
+        }).encode()
+
+        status = []
+
+        app({
+            'REQUEST_METHOD': 'POST',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+        }, lambda s, headers: status.append(s))
+
+        self.assertEqual(status, ['200 OK'])
+        self.assertEqual(
+            self.inventory.query(instance_id=instance_id)[0]['phases'],
+            {'ready': 12.5})
+
+
+if __name__ == '__main__':
+    unittest.main()
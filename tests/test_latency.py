@@ -0,0 +1,98 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud.latency import LaunchStats
+
+
+class TestLaunchStats(unittest.TestCase):
+    def setUp(self):
+        self.stats = LaunchStats(min_samples=10, percentile=0.9,
+                                 timeout_factor=2, min_timeout=60,
+                                 max_timeout=3600)
+
+    def test_default_until_enough_samples(self):
+        for duration in range(9):
+            self.stats.record('VM.Standard2.1', 'AD-1', 30)
+
+        self.assertIsNone(self.stats.expected('VM.Standard2.1', 'AD-1'))
+        self.assertEqual(
+            self.stats.timeout('VM.Standard2.1', 'AD-1', 300), 300)
+
+    def test_derived_per_shape_and_ad(self):
+        for duration in range(1, 101):
+            self.stats.record('VM.Standard2.1', 'AD-1', duration)
+            self.stats.record('BM.HPC2.36', 'AD-1', duration * 10)
+
+        self.assertEqual(self.stats.expected('VM.Standard2.1', 'AD-1'), 91)
+        self.assertEqual(
+            self.stats.timeout('VM.Standard2.1', 'AD-1', 300), 182)
+
+        # Bare metal may exceed the default timeout
+        self.assertEqual(self.stats.timeout('BM.HPC2.36', 'AD-1', 300), 1820)
+
+        # Other availability domain has no samples
+        self.assertEqual(
+            self.stats.timeout('VM.Standard2.1', 'AD-2', 300), 300)
+
+    def test_timeout_bounds(self):
+        for _ in range(10):
+            self.stats.record('VM.Standard2.1', 'AD-1', 5)
+            self.stats.record('BM.HPC2.36', 'AD-1', 5000)
+
+        self.assertEqual(
+            self.stats.timeout('VM.Standard2.1', 'AD-1', 300), 60)
+        self.assertEqual(self.stats.timeout('BM.HPC2.36', 'AD-1', 300), 3600)
+
+    def test_window(self):
+        stats = LaunchStats(max_samples=10, min_samples=10, percentile=0.5)
+
+        for _ in range(10):
+            stats.record('VM.Standard2.1', 'AD-1', 500)
+
+        for _ in range(10):
+            stats.record('VM.Standard2.1', 'AD-1', 50)
+
+        self.assertEqual(stats.expected('VM.Standard2.1', 'AD-1'), 50)
+
+    def test_save_load(self):
+        tmpdir = tempfile.mkdtemp()
+
+        try:
+            path = os.path.join(tmpdir, 'var', 'stats.json')
+
+            for duration in range(10):
+                self.stats.record('VM.Standard2.1', 'AD-1', duration)
+
+            self.stats.save(path)
+
+            stats = LaunchStats(min_samples=10, percentile=0.9)
+            stats.load(path)
+
+            self.assertEqual(stats.summary(), {
+                'VM.Standard2.1/AD-1': {'samples': 10, 'expected': 9},
+            })
+
+            # Missing file is ignored
+            stats.load(os.path.join(tmpdir, 'missing.json'))
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
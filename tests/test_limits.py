@@ -0,0 +1,92 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import types
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud.limits import \
+    LimitsPreflight, core_limit_names
+
+
+class FakeLimitsClient(object):
+    def __init__(self, available):
+        self.available = available
+        self.calls = []
+
+    def list_limit_definitions(self, tenancy_id, service_name=None,
+                               page=None):
+        self.calls.append('list_limit_definitions')
+
+        return types.SimpleNamespace(
+            data=[
+                types.SimpleNamespace(name='standard2-core-count',
+                                      scope_type='AD'),
+            ],
+            next_page=None
+        )
+
+    def get_resource_availability(self, service_name, limit_name,
+                                  compartment_id, availability_domain=None):
+        self.calls.append('get_resource_availability')
+
+        return types.SimpleNamespace(
+            data=types.SimpleNamespace(available=self.available))
+
+
+class TestLimitsPreflight(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.client = FakeLimitsClient(available=10)
+        self.preflight = LimitsPreflight(
+            self.client, 'tenancy', ttl=60, clock=lambda: self.now)
+
+    def testLimitNames(self):
+        self.assertIn('standard2-core-count',
+                      core_limit_names('VM.Standard2.4'))
+        self.assertIn('standard-e3-core-ad-count',
+                      core_limit_names('BM.Standard.E3.128'))
+
+    def testClamp(self):
+        result = self.preflight.check(
+            'compartment', 'AD-1', 'VM.Standard2.4', 5, 4)
+
+        self.assertEqual(result.allowed, 2)
+        self.assertEqual(result.limit_name, 'standard2-core-count')
+
+    def testCachedAndDeducted(self):
+        self.assertEqual(self.preflight.check(
+            'compartment', 'AD-1', 'VM.Standard2.2', 3, 2).allowed, 3)
+
+        # 4 cores left in cached availability
+        self.assertEqual(self.preflight.check(
+            'compartment', 'AD-1', 'VM.Standard2.2', 3, 2).allowed, 2)
+
+        self.assertEqual(
+            self.client.calls.count('get_resource_availability'), 1)
+
+        # Expired; availability is looked up again
+        self.now += 61
+
+        self.assertEqual(self.preflight.check(
+            'compartment', 'AD-1', 'VM.Standard2.2', 3, 2).allowed, 3)
+
+        self.assertEqual(
+            self.client.calls.count('get_resource_availability'), 2)
+
+    def testUnknownLimit(self):
+        result = self.preflight.check(
+            'compartment', 'AD-1', 'VM.GPU3.1', 5, 1)
+
+        self.assertEqual(result.allowed, 5)
+        self.assertIsNone(result.limit_name)
@@ -0,0 +1,135 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import types
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud import maintenance
+
+
+def node(name):
+    return types.SimpleNamespace(name=name)
+
+
+def hardware_profile(name, nodes=(), software_profiles=('compute',)):
+    return types.SimpleNamespace(
+        name=name,
+        nodes=[node(node_name) for node_name in nodes],
+        mappedsoftwareprofiles=[
+            types.SimpleNamespace(name=software_profile)
+            for software_profile in software_profiles
+        ]
+    )
+
+
+class FakeAdapter(object):
+    def __init__(self):
+        self.calls = []
+
+    def handle_preempted_nodes(self, nodes):
+        self.calls.append(
+            ('handle_preempted_nodes', [node.name for node in nodes]))
+
+        return [node.name for node in nodes if 'spot' in node.name]
+
+    def release_idle_nodes(self, nodes, now=None):
+        self.calls.append(
+            ('release_idle_nodes', [node.name for node in nodes]))
+
+        return [node.name for node in nodes if 'idle' in node.name]
+
+    def release_parked_nodes(self, now=None):
+        self.calls.append(('release_parked_nodes',))
+
+        return ['parked-1']
+
+    def release_user_data_includes(self, nodes, now=None):
+        self.calls.append(
+            ('release_user_data_includes', [node.name for node in nodes]))
+
+        return []
+
+    def prescale(self, session, hardware_profile, software_profile,
+                 now=None):
+        self.calls.append(
+            ('prescale', hardware_profile.name, software_profile.name))
+
+        if hardware_profile.name == 'broken':
+            raise RuntimeError('prescale failed')
+
+        return [node('%s-warm' % (hardware_profile.name))]
+
+
+class TestMaintenance(unittest.TestCase):
+    def setUp(self):
+        self.adapter = FakeAdapter()
+
+    def testPrescale(self):
+        result = maintenance.run(self.adapter, 'session', [
+            hardware_profile('hp1'),
+            hardware_profile('hp2', software_profiles=('a', 'b')),
+            hardware_profile('hp3', software_profiles=()),
+        ], tasks=[maintenance.PRESCALE])
+
+        self.assertEqual(result, {maintenance.PRESCALE: ['hp1-warm']})
+        self.assertEqual(self.adapter.calls,
+                         [('prescale', 'hp1', 'compute')])
+
+    def testPreempted(self):
+        result = maintenance.run(self.adapter, 'session', [
+            hardware_profile('hp1', ['hp1-spot-1', 'hp1-1']),
+            hardware_profile('hp2', ['hp2-1']),
+        ], tasks=[maintenance.PREEMPTED])
+
+        self.assertEqual(result, {maintenance.PREEMPTED: ['hp1-spot-1']})
+        self.assertEqual(self.adapter.calls, [
+            ('handle_preempted_nodes', ['hp1-spot-1', 'hp1-1', 'hp2-1'])])
+
+    def testAll(self):
+        result = maintenance.run(self.adapter, 'session', [
+            hardware_profile('hp1', ['hp1-spot-idle', 'hp1-idle', 'hp1-1']),
+        ], now=100)
+
+        self.assertEqual(result, {
+            maintenance.PREEMPTED: ['hp1-spot-idle'],
+            maintenance.IDLE: ['hp1-idle'],
+            maintenance.PARKED: ['parked-1'],
+            maintenance.PRESCALE: ['hp1-warm'],
+            maintenance.USER_DATA: [],
+        })
+
+        # Preempted nodes are not released again as idle
+        self.assertEqual(self.adapter.calls[1],
+                         ('release_idle_nodes', ['hp1-idle', 'hp1-1']))
+
+    def testFailedTask(self):
+        with self.assertLogs(maintenance.logger, 'ERROR'):
+            result = maintenance.run(
+                self.adapter, 'session', [hardware_profile('broken')])
+
+        # The other tasks still run
+        self.assertEqual(result[maintenance.PREEMPTED], [])
+        self.assertEqual(result[maintenance.PARKED], ['parked-1'])
+        self.assertEqual(result[maintenance.PRESCALE], [])
+
+    def testTasks(self):
+        self.assertEqual(
+            maintenance.run(self.adapter, 'session',
+                            [hardware_profile('hp1')], tasks=[]),
+            {})
+        self.assertEqual(self.adapter.calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import types
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud.privatedns import \
+    DnsBackendError, DnsRecord, MemoryBackend, OciDnsBackend, \
+    load_backend, make_records, reverse_name
+
+
+class _Model(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+# Stand-in for oci.dns.models
+models = types.SimpleNamespace(**{
+    name: type(name, (_Model,), {}) for name in (
+        'RecordOperation',
+        'PatchZoneRecordsDetails',
+    )
+})
+
+
+class FakeDnsClient(object):
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def patch_zone_records(self, zone, details, **kwargs):
+        if self.fail:
+            raise Exception('service unavailable')
+
+        self.calls.append((zone, details.items, kwargs))
+
+
+class CustomBackend(MemoryBackend):
+    pass
+
+
+class TestRecords(unittest.TestCase):
+    def test_make_records(self):
+        records = make_records(
+            [('node-01.cluster.local', '10.2.3.4')], 'cluster.local')
+
+        self.assertEqual(records, [
+            DnsRecord('cluster.local', 'node-01.cluster.local', 'A',
+                      '10.2.3.4'),
+            DnsRecord('3.2.10.in-addr.arpa', '4.3.2.10.in-addr.arpa',
+                      'PTR', 'node-01.cluster.local.'),
+        ])
+
+        records = make_records(
+            [('node-01.cluster.local.', '10.2.3.4')], 'cluster.local',
+            reverse_zone='10.in-addr.arpa')
+
+        self.assertEqual(records[0].domain, 'node-01.cluster.local')
+        self.assertEqual(records[1].zone, '10.in-addr.arpa')
+
+    def test_reverse_name(self):
+        self.assertEqual(reverse_name('192.168.0.1'),
+                         '1.0.168.192.in-addr.arpa')
+
+
+class TestMemoryBackend(unittest.TestCase):
+    def test_add_and_remove_in_bulk(self):
+        backend = MemoryBackend()
+
+        hosts = [
+            ('node-%02d.cluster.local' % idx, '10.0.0.%d' % idx)
+            for idx in range(1, 51)
+        ]
+
+        backend.add(make_records(hosts, 'cluster.local'))
+
+        self.assertEqual(backend.batches, 1)
+        self.assertEqual(
+            backend.lookup('node-07.cluster.local', 'A'), ['10.0.0.7'])
+        self.assertEqual(
+            backend.lookup(reverse_name('10.0.0.7'), 'PTR'),
+            ['node-07.cluster.local.'])
+
+        backend.remove(make_records(hosts[:25], 'cluster.local'))
+
+        self.assertEqual(backend.batches, 2)
+        self.assertEqual(backend.lookup('node-07.cluster.local', 'A'), [])
+        self.assertEqual(len(backend.records), 50)
+
+
+class TestOciDnsBackend(unittest.TestCase):
+    def test_one_patch_per_zone(self):
+        client = FakeDnsClient()
+
+        backend = OciDnsBackend(client, models=models, ttl=60,
+                                scope='PRIVATE', view_id='ocid1.view.1')
+
+        hosts = [
+            ('node-01.cluster.local', '10.0.1.1'),
+            ('node-02.cluster.local', '10.0.1.2'),
+            ('node-03.cluster.local', '10.0.2.1'),
+        ]
+
+        backend.add(make_records(hosts, 'cluster.local'))
+
+        zones = {zone: items for zone, items, _ in client.calls}
+
+        self.assertEqual(sorted(zones), [
+            '1.0.10.in-addr.arpa', '2.0.10.in-addr.arpa', 'cluster.local'])
+        self.assertEqual(len(zones['cluster.local']), 3)
+        self.assertEqual(len(zones['1.0.10.in-addr.arpa']), 2)
+        self.assertEqual(zones['cluster.local'][0].operation, 'ADD')
+        self.assertEqual(zones['cluster.local'][0].ttl, 60)
+        self.assertEqual(
+            client.calls[0][2],
+            {'scope': 'PRIVATE', 'view_id': 'ocid1.view.1'})
+
+        client.calls = []
+
+        backend.remove(make_records(hosts, 'cluster.local'))
+
+        self.assertEqual(len(client.calls), 3)
+        self.assertEqual(client.calls[0][1][0].operation, 'REMOVE')
+
+    def test_batch_size(self):
+        client = FakeDnsClient()
+
+        backend = OciDnsBackend(client, models=models, batch_size=2)
+
+        backend.add(make_records(
+            [('node-%d.cluster.local' % idx, '10.0.0.%d' % idx)
+             for idx in range(5)], 'cluster.local', '10.in-addr.arpa'))
+
+        self.assertEqual(len(client.calls), 6)
+        self.assertEqual(client.calls[0][2], {})
+
+    def test_failure(self):
+        backend = OciDnsBackend(FakeDnsClient(fail=True), models=models)
+
+        with self.assertRaises(DnsBackendError):
+            backend.add(make_records(
+                [('node-01.cluster.local', '10.0.0.1')], 'cluster.local'))
+
+
+class TestLoadBackend(unittest.TestCase):
+    def test_load_backend(self):
+        self.assertIsInstance(load_backend('memory', {}), MemoryBackend)
+
+        self.assertIsInstance(
+            load_backend('%s:CustomBackend' % __name__, {}), CustomBackend)
+
+        for name in ('unknown', 'no.such.module:Backend',
+                     '%s:NoSuchBackend' % __name__):
+            with self.assertRaises(DnsBackendError):
+                load_backend(name, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
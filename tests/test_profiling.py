@@ -0,0 +1,89 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud import profiling
+
+
+def _busy():
+    return sum(idx * idx for idx in range(10000))
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def testNullProfiler(self):
+        with profiling.NULL_PROFILER.phase('start'):
+            pass
+
+        self.assertIsNone(profiling.NULL_PROFILER.dump())
+
+    def testSessionProfile(self):
+        profiler = profiling.SessionProfiler(
+            os.path.join(self.tmpdir, 'session'))
+
+        with profiler.phase('start'):
+            _busy()
+
+            with profiler.phase('launch'):
+                _busy()
+
+        summary = profiler.summary()
+
+        self.assertEqual(sorted(summary.keys()), ['launch', 'start'])
+        self.assertEqual(summary['launch'][0], 1)
+
+        path = profiler.dump()
+
+        self.assertEqual(path, os.path.join(self.tmpdir, 'session.prof'))
+
+        stats = pstats.Stats(path)
+
+        self.assertTrue(
+            any(func[2] == '_busy' for func in stats.stats.keys()))
+
+        self.assertTrue(os.path.exists(
+            os.path.join(self.tmpdir, 'session.txt')))
+
+    def testEmptyDump(self):
+        profiler = profiling.SessionProfiler(
+            os.path.join(self.tmpdir, 'session'))
+
+        self.assertIsNone(profiler.dump())
+
+    def testIsEnabled(self):
+        saved = os.environ.pop(profiling.PROFILE_ENV, None)
+
+        try:
+            self.assertFalse(profiling.is_enabled({}))
+            self.assertFalse(profiling.is_enabled(None))
+            self.assertTrue(profiling.is_enabled({'profile': True}))
+
+            os.environ[profiling.PROFILE_ENV] = '1'
+
+            self.assertTrue(profiling.is_enabled({}))
+        finally:
+            os.environ.pop(profiling.PROFILE_ENV, None)
+
+            if saved is not None:
+                os.environ[profiling.PROFILE_ENV] = saved
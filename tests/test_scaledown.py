@@ -0,0 +1,98 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud.scaledown import \
+    Candidate, ScaleDownPolicy
+
+
+class TestScaleDownPolicy(unittest.TestCase):
+    def setUp(self):
+        self.policy = ScaleDownPolicy(
+            billing_granularity=3600,
+            release_window=300,
+            min_lifetime=900
+        )
+        self.now = 100000
+
+    def testBusyNodeKept(self):
+        candidate = Candidate('busy', False, self.now - 3500)
+
+        self.assertEqual(self.policy.select([candidate], now=self.now), [])
+
+    def testUnknownLaunchTimeKept(self):
+        candidate = Candidate('unknown', True, None)
+
+        self.assertEqual(self.policy.select([candidate], now=self.now), [])
+
+    def testMinLifetime(self):
+        policy = ScaleDownPolicy(billing_granularity=0, min_lifetime=900)
+
+        self.assertEqual(
+            policy.select([
+                Candidate('young', True, self.now - 100),
+                Candidate('old', True, self.now - 1000),
+            ], now=self.now),
+            ['old']
+        )
+
+    def testBillingAlignment(self):
+        candidates = [
+            # 100 seconds into the billing hour
+            Candidate('early', True, self.now - 3700),
+            # 200 seconds left in the billing hour
+            Candidate('late', True, self.now - 3400),
+            # 60 seconds left in the billing hour
+            Candidate('later', True, self.now - 7140),
+        ]
+
+        self.assertEqual(
+            self.policy.select(candidates, now=self.now),
+            ['later', 'late']
+        )
+
+    def testMinNodes(self):
+        policy = ScaleDownPolicy(billing_granularity=0, min_lifetime=0,
+                                 min_nodes=2)
+
+        candidates = [
+            Candidate('node-%d' % idx, True, self.now - 1000)
+            for idx in range(3)
+        ]
+
+        self.assertEqual(len(policy.select(candidates, now=self.now)), 1)
+
+    def testBatches(self):
+        policy = ScaleDownPolicy(batch_size=2)
+
+        self.assertEqual(
+            list(policy.batches(['a', 'b', 'c'])),
+            [['a', 'b'], ['c']]
+        )
+
+        self.assertEqual(list(self.policy.batches([])), [])
+        self.assertEqual(list(self.policy.batches(['a'])), [['a']])
+
+    def testLargeEvaluation(self):
+        candidates = [
+            Candidate('node-%d' % idx, idx % 2 == 0, self.now - idx)
+            for idx in range(10000)
+        ]
+
+        selected = self.policy.select(candidates, now=self.now)
+
+        self.assertTrue(selected)
+        self.assertTrue(all(int(name.split('-')[1]) % 2 == 0
+                            for name in selected))
@@ -0,0 +1,57 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import subprocess
+import sys
+import types
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud import sdk
+
+
+class TestDeferredSDK(unittest.TestCase):
+    def testModulesDoNotLoadSdk(self):
+        code = (
+            'import sys\n'
+            'from tortuga.resourceAdapter.oraclecloud import breaker,'
+            ' capacity, clusternetwork, images, instancecache, latency,'
+            ' limits, scaledown, sdk, sharding, telemetry, userdata\n'
+            'print("oci" in sys.modules)\n'
+        )
+
+        output = subprocess.check_output([sys.executable, '-c', code])
+
+        self.assertEqual(output.decode().strip(), 'False')
+
+    def testLoadsOnAttributeAccess(self):
+        saved = sys.modules.get('oci')
+
+        fake = types.ModuleType('oci')
+        fake.core = types.SimpleNamespace(models='models')
+
+        sys.modules['oci'] = fake
+
+        try:
+            self.assertTrue(sdk.is_loaded())
+            self.assertIs(sdk.load(), fake)
+            self.assertEqual(sdk.oci.core.models, 'models')
+        finally:
+            if saved is None:
+                del sys.modules['oci']
+            else:
+                sys.modules['oci'] = saved
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,250 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import types
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud import breaker
+from tortuga.resourceAdapter.oraclecloud.sharding import PlacementPolicy, \
+    RateLimiter, ShardPool, parse_shards
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ServiceError(Exception):
+    def __init__(self, status):
+        super(ServiceError, self).__init__('status %d' % (status))
+
+        self.status = status
+
+
+class FakeComputeClient(object):
+    def __init__(self, region):
+        self.region = region
+        self.calls = 0
+        self.error = None
+
+    def get_instance(self, instance_id):
+        self.calls += 1
+
+        if self.error:
+            raise self.error
+
+        return types.SimpleNamespace(
+            data=types.SimpleNamespace(id=instance_id, region=self.region))
+
+
+class TestParseShards(unittest.TestCase):
+    def test_parse(self):
+        shards = parse_shards([
+            'region=us-phoenix-1,compartment_id=ocid1.compartment.a',
+            'region=us-ashburn-1,compartment_id=ocid1.compartment.b,'
+            'availability_domain=Uocm:IAD-AD-1,subnet_id=ocid1.subnet.b',
+        ])
+
+        self.assertEqual(len(shards), 2)
+        self.assertEqual(shards[0], {
+            'region': 'us-phoenix-1',
+            'compartment_id': 'ocid1.compartment.a',
+        })
+        self.assertEqual(shards[1]['availability_domain'], 'Uocm:IAD-AD-1')
+
+    def test_empty(self):
+        self.assertEqual(parse_shards(None), [])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_shards(['region=us-phoenix-1'])
+
+        with self.assertRaises(ValueError):
+            parse_shards(['region=us-phoenix-1,compartment_id=x,shape=y'])
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+
+        limiter = RateLimiter(2, burst=2, clock=clock, sleep=clock.sleep)
+
+        self.assertEqual(limiter.acquire(), 0)
+        self.assertEqual(limiter.acquire(), 0)
+        self.assertAlmostEqual(limiter.acquire(), 0.5)
+        self.assertAlmostEqual(clock.now, 0.5)
+        self.assertEqual(limiter.delayed, 1)
+
+    def test_disabled(self):
+        limiter = RateLimiter(0)
+
+        for _ in range(100):
+            self.assertEqual(limiter.acquire(), 0)
+
+
+class TestShardPool(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.clients = {}
+
+        def factory(kind, region):
+            client = FakeComputeClient(region)
+            self.clients[(kind, region)] = client
+            return client
+
+        self.pool = ShardPool(factory, rate=0, failure_threshold=2,
+                              reset_timeout=30, clock=self.clock,
+                              sleep=self.clock.sleep)
+
+    def test_routes_to_regional_client(self):
+        phx = self.pool.get('us-phoenix-1', 'ocid1.compartment.a')
+        iad = self.pool.get('us-ashburn-1', 'ocid1.compartment.a')
+
+        self.assertIs(self.pool.get('us-phoenix-1', 'ocid1.compartment.a'),
+                      phx)
+
+        self.assertEqual(
+            phx.client('compute').get_instance('i1').data.region,
+            'us-phoenix-1')
+        self.assertEqual(
+            iad.client('compute').get_instance('i2').data.region,
+            'us-ashburn-1')
+
+    def test_shards_share_regional_client(self):
+        a = self.pool.get('us-phoenix-1', 'ocid1.compartment.a')
+        b = self.pool.get('us-phoenix-1', 'ocid1.compartment.b')
+
+        a.client('compute').get_instance('i1')
+        b.client('compute').get_instance('i2')
+
+        self.assertEqual(len(self.clients), 1)
+        self.assertIsNot(a.breakers, b.breakers)
+
+    def test_breaker_opens_per_shard(self):
+        a = self.pool.get('us-phoenix-1', 'ocid1.compartment.a')
+        b = self.pool.get('us-ashburn-1', 'ocid1.compartment.a')
+
+        a.client('compute').get_instance('i1')
+
+        self.clients[('compute', 'us-phoenix-1')].error = \
+            ConnectionError('reset')
+
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                a.client('compute').get_instance('i1')
+
+        with self.assertRaises(breaker.CircuitOpenError):
+            a.client('compute').get_instance('i1')
+
+        self.assertEqual(self.clients[('compute', 'us-phoenix-1')].calls, 3)
+
+        # Other shard is unaffected
+        b.client('compute').get_instance('i2')
+
+        # Probe after reset timeout closes the circuit again
+        self.clients[('compute', 'us-phoenix-1')].error = None
+        self.clock.now += 30
+
+        a.client('compute').get_instance('i1')
+
+        self.assertEqual(a.breakers.state('get_instance'), breaker.CLOSED)
+
+    def test_client_errors_do_not_open_circuit(self):
+        a = self.pool.get('us-phoenix-1', 'ocid1.compartment.a')
+
+        a.client('compute').get_instance('i1')
+
+        self.clients[('compute', 'us-phoenix-1')].error = ServiceError(404)
+
+        for _ in range(5):
+            with self.assertRaises(ServiceError):
+                a.client('compute').get_instance('i1')
+
+        self.assertEqual(a.breakers.state('get_instance'), breaker.CLOSED)
+
+    def test_rate_limit_wait_is_not_slow(self):
+        pool = ShardPool(lambda kind, region: FakeComputeClient(region),
+                         rate=1, burst=1,
+                         slow_call_duration=0.5, failure_threshold=2,
+                         window=4, min_calls=2, clock=self.clock,
+                         sleep=self.clock.sleep)
+
+        shard = pool.get('us-phoenix-1', 'ocid1.compartment.a')
+
+        # Every call after the first waits a second for a token
+        for _ in range(10):
+            shard.client('compute').get_instance('i1')
+
+        self.assertEqual(shard.limiter.delayed, 9)
+        self.assertEqual(shard.breakers.state('get_instance'), breaker.CLOSED)
+
+    def test_apply(self):
+        shard = self.pool.get('us-ashburn-1', 'ocid1.compartment.b')
+
+        config = shard.apply(
+            {'compartment_id': 'ocid1.compartment.a', 'shape': 'VM.X.1'},
+            {'subnet_id': 'ocid1.subnet.b'})
+
+        self.assertEqual(config, {
+            'region': 'us-ashburn-1',
+            'compartment_id': 'ocid1.compartment.b',
+            'subnet_id': 'ocid1.subnet.b',
+            'shape': 'VM.X.1',
+        })
+
+
+class TestPlacementPolicy(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.pool = ShardPool(lambda kind, region: None, rate=0,
+                              failure_threshold=1, clock=self.clock)
+        self.shards = [
+            self.pool.get(region, 'ocid1.compartment.a')
+            for region in ('r1', 'r2', 'r3')
+        ]
+
+    def test_spread_evenly(self):
+        placement = PlacementPolicy().spread(10, self.shards)
+
+        self.assertEqual(
+            [(shard.region, count) for shard, count in placement],
+            [('r1', 4), ('r2', 3), ('r3', 3)])
+
+    def test_remainder_rotates(self):
+        policy = PlacementPolicy()
+
+        regions = [
+            policy.spread(1, self.shards)[0][0].region for _ in range(3)
+        ]
+
+        self.assertEqual(regions, ['r1', 'r2', 'r3'])
+
+    def test_skips_open_circuit(self):
+        self.shards[1].breakers.get('launch_instance').record_failure()
+
+        placement = PlacementPolicy().spread(4, self.shards)
+
+        self.assertEqual(
+            [(shard.region, count) for shard, count in placement],
+            [('r1', 2), ('r3', 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
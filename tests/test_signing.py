@@ -0,0 +1,154 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud.signing import CachedSigner, \
+    SignerCache
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSigner(object):
+    def __init__(self, generation):
+        self.generation = generation
+        self.api_key = 'key-%d' % generation
+
+    def __call__(self, request, enforce_content_headers=True):
+        request['signed_by'] = self.generation
+        request['content_headers'] = enforce_content_headers
+
+        return request
+
+
+class TestSigning(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.key_file = os.path.join(self.tmpdir, 'key.pem')
+
+        with open(self.key_file, 'w') as fp:
+            fp.write('key')
+
+        self.clock = FakeClock()
+        self.generations = 0
+
+        self.config = {
+            'tenancy': 'ocid1.tenancy.1',
+            'user': 'ocid1.user.1',
+            'fingerprint': 'aa:bb',
+            'key_file': self.key_file,
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def factory(self):
+        self.generations += 1
+
+        return FakeSigner(self.generations)
+
+    def test_key_loaded_once(self):
+        signer = CachedSigner(self.factory, self.key_file, clock=self.clock)
+
+        for _ in range(10):
+            self.assertEqual(signer({})['signed_by'], 1)
+
+        self.assertEqual(signer.api_key, 'key-1')
+
+        metrics = signer.metrics()
+
+        self.assertEqual(metrics['signatures'], 10)
+        self.assertEqual(metrics['key_loads'], 1)
+
+    def test_reload_on_key_change(self):
+        signer = CachedSigner(self.factory, self.key_file,
+                              check_interval=60, clock=self.clock)
+
+        signer({})
+
+        mtime = os.path.getmtime(self.key_file) + 10
+        os.utime(self.key_file, (mtime, mtime))
+
+        # Not checked again until the interval has passed
+        self.clock.now = 30
+        self.assertEqual(signer({})['signed_by'], 1)
+
+        self.clock.now = 60
+        self.assertEqual(signer({})['signed_by'], 2)
+
+        self.clock.now = 120
+        self.assertEqual(signer({})['signed_by'], 2)
+
+        self.assertEqual(signer.key_loads, 2)
+
+    def test_without_content_headers(self):
+        signer = CachedSigner(self.factory, self.key_file,
+                              check_interval=60, clock=self.clock)
+
+        request = signer.without_content_headers({})
+
+        self.assertEqual(request['signed_by'], 1)
+        self.assertFalse(request['content_headers'])
+        self.assertEqual(signer.signatures, 1)
+
+        # Uses the reloaded key, as requests signed with content headers
+        mtime = os.path.getmtime(self.key_file) + 10
+        os.utime(self.key_file, (mtime, mtime))
+
+        self.clock.now = 60
+        self.assertEqual(signer.without_content_headers({})['signed_by'], 2)
+
+    def test_cache_shares_signer_per_credentials(self):
+        cache = SignerCache(clock=self.clock)
+
+        first = cache.get(self.config, self.factory)
+        second = cache.get(dict(self.config), self.factory)
+
+        self.assertIs(first, second)
+
+        other = cache.get(dict(self.config, fingerprint='cc:dd'),
+                          self.factory)
+
+        self.assertIsNot(first, other)
+
+        first({})
+        second({})
+
+        metrics = cache.metrics()
+
+        self.assertEqual(metrics['aa:bb']['signatures'], 2)
+        self.assertEqual(metrics['aa:bb']['key_loads'], 1)
+        self.assertEqual(metrics['cc:dd']['signatures'], 0)
+
+    def test_pass_phrase_is_part_of_key(self):
+        cache = SignerCache(clock=self.clock)
+
+        first = cache.get(dict(self.config, pass_phrase='a'), self.factory)
+        second = cache.get(dict(self.config, pass_phrase='b'), self.factory)
+
+        self.assertIsNot(first, second)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,293 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import time
+import unittest
+
+import gevent
+import gevent.pool
+
+from simulation import Deadlock, SimulatedCloud, VirtualClock
+from tortuga.resourceAdapter.oraclecloud.batching import BatchAggregator
+from tortuga.resourceAdapter.oraclecloud.sharding import RateLimiter
+
+
+class _Details(object):
+    def __init__(self, **kwargs):
+        self.compartment_id = 'compartment'
+        self.availability_domain = 'AD-1'
+        self.subnet_id = 'subnet'
+        self.shape = 'VM.Standard2.1'
+        self.__dict__.update(kwargs)
+
+
+class TestVirtualClock(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start=0)
+
+    def test_sleep_order(self):
+        events = []
+
+        def sleeper(name, seconds):
+            gevent.sleep(seconds)
+
+            events.append((name, time.time()))
+
+        def main():
+            gevent.joinall([
+                gevent.spawn(sleeper, 'b', 3600),
+                gevent.spawn(sleeper, 'a', 60),
+                gevent.spawn(sleeper, 'c', 3600),
+            ])
+
+        started = time.monotonic()
+
+        with self.clock.patch():
+            self.clock.run(main)
+
+        self.assertEqual(events, [('a', 60), ('b', 3600), ('c', 3600)])
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_timeout(self):
+        def main():
+            try:
+                with gevent.Timeout(30, TimeoutError):
+                    gevent.sleep(60)
+            except TimeoutError:
+                return time.time()
+
+        with self.clock.patch():
+            self.assertEqual(self.clock.run(main), 30)
+
+            # Cancelled timeouts do not fire
+            def quick():
+                with gevent.Timeout(30, TimeoutError):
+                    gevent.sleep(10)
+
+                gevent.sleep(60)
+
+                return time.time()
+
+            self.assertEqual(self.clock.run(quick), 100)
+
+    def test_spawn_later(self):
+        def main():
+            greenlet = gevent.spawn_later(5, time.time)
+
+            return greenlet.get()
+
+        with self.clock.patch():
+            self.assertEqual(self.clock.run(main), 5)
+
+    def test_deadlock(self):
+        def main():
+            gevent.event.Event().wait()
+
+        with self.clock.patch():
+            with self.assertRaises(Deadlock):
+                self.clock.run(main)
+
+    def test_rate_limiter(self):
+        """
+        Shard rate limiting runs on virtual time
+        """
+        def main():
+            limiter = RateLimiter(10, clock=time.time, sleep=gevent.sleep)
+
+            pool = gevent.pool.Pool()
+
+            for _ in range(1000):
+                pool.spawn(limiter.acquire)
+
+            pool.join()
+
+            return limiter.delayed
+
+        with self.clock.patch():
+            delayed = self.clock.run(main)
+
+        self.assertEqual(delayed, 990)
+        self.assertAlmostEqual(self.clock.elapsed, 99, places=3)
+
+    def test_batch_aggregator(self):
+        flushed = []
+
+        def flush(items):
+            flushed.append((time.time(), len(items)))
+
+            return items
+
+        def main():
+            aggregator = BatchAggregator(flush, window=0.5, max_size=100)
+
+            def submit(idx):
+                gevent.sleep(idx)
+
+                return aggregator.submit(idx)
+
+            return [greenlet.get() for greenlet in gevent.joinall(
+                [gevent.spawn(submit, idx % 3) for idx in range(30)])]
+
+        with self.clock.patch():
+            self.clock.run(main)
+
+        self.assertEqual(flushed, [(0.5, 10), (1.5, 10), (2.5, 10)])
+
+
+class TestSimulatedCloud(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start=0)
+
+    def test_lifecycle(self):
+        cloud = SimulatedCloud(self.clock, launch_delay=(10, 20),
+                               terminate_delay=(5, 5))
+
+        compute = cloud.client('compute')
+
+        def main():
+            instance = compute.launch_instance(_Details()).data
+
+            self.assertEqual(instance.lifecycle_state, 'PROVISIONING')
+
+            while compute.get_instance(instance.id).data.lifecycle_state \
+                    != 'RUNNING':
+                gevent.sleep(1)
+
+            running = time.time()
+
+            compute.terminate_instance(instance.id)
+
+            gevent.sleep(5)
+
+            return running, compute.get_instance(
+                instance.id).data.lifecycle_state
+
+        with self.clock.patch():
+            running, state = self.clock.run(main)
+
+        self.assertTrue(10 <= running <= 21)
+        self.assertEqual(state, 'TERMINATED')
+        self.assertEqual(cloud.calls['launch_instance'], 1)
+        self.assertEqual(cloud.calls['terminate_instance'], 1)
+
+    def test_deterministic(self):
+        def scenario(seed):
+            clock = VirtualClock(start=0)
+
+            cloud = SimulatedCloud(clock, seed=seed)
+
+            compute = cloud.client('compute')
+
+            def main():
+                for _ in range(500):
+                    compute.launch_instance(_Details())
+
+                running = []
+
+                while cloud.count('RUNNING') < 500:
+                    gevent.sleep(5)
+
+                    running.append(cloud.count('RUNNING'))
+
+                return running
+
+            with clock.patch():
+                return clock.run(main)
+
+        self.assertEqual(scenario(1), scenario(1))
+        self.assertNotEqual(scenario(1), scenario(2))
+
+    def test_failures_and_throttling(self):
+        cloud = SimulatedCloud(self.clock, rate_limit=5)
+
+        compute = cloud.client('compute')
+
+        cloud.fail('launch_instance', status=500, count=2)
+
+        statuses = []
+
+        def main():
+            for _ in range(10):
+                try:
+                    compute.launch_instance(_Details())
+
+                    statuses.append(200)
+                except Exception as exc:
+                    statuses.append(exc.status)
+
+        with self.clock.patch():
+            self.clock.run(main)
+
+        self.assertEqual(statuses,
+                         [500, 500, 200, 200, 200, 429, 429, 429, 429, 429])
+        self.assertEqual(cloud.errors[429], 5)
+
+    def test_hang(self):
+        cloud = SimulatedCloud(self.clock, launch_delay=(1, 2))
+
+        cloud.hang()
+
+        compute = cloud.client('compute')
+
+        def main():
+            hung = compute.launch_instance(_Details()).data
+            compute.launch_instance(_Details())
+
+            gevent.sleep(3600)
+
+            return hung.lifecycle_state
+
+        with self.clock.patch():
+            self.assertEqual(self.clock.run(main), 'PROVISIONING')
+
+        self.assertEqual(cloud.count('RUNNING'), 1)
+
+    def test_vnic_listings(self):
+        cloud = SimulatedCloud(self.clock, launch_delay=(1, 1), page_size=7)
+
+        compute = cloud.client('compute')
+        network = cloud.client('network')
+
+        def main():
+            for _ in range(20):
+                compute.launch_instance(_Details())
+
+            gevent.sleep(2)
+
+        with self.clock.patch():
+            self.clock.run(main)
+
+        attachments = []
+        page = None
+
+        while True:
+            response = compute.list_vnic_attachments('compartment', page=page)
+
+            attachments.extend(response.data)
+
+            page = response.next_page
+            if not response.has_next_page:
+                break
+
+        self.assertEqual(len(attachments), 20)
+        self.assertEqual(cloud.calls['list_vnic_attachments'], 3)
+        self.assertTrue(all(attachment.lifecycle_state == 'ATTACHED'
+                            for attachment in attachments))
+        self.assertEqual(
+            len(network.list_private_ips(subnet_id='subnet').data), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
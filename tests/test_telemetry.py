@@ -0,0 +1,147 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import shutil
+import tempfile
+import unittest
+
+from tortuga.resourceAdapter.oraclecloud import telemetry
+
+
+INSTANCE_ID = 'ocid1.instance.oc1.phx.abc'
+
+
+class TestTelemetryStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = telemetry.TelemetryStore(self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def report(self, phase, timestamp, instance_id=INSTANCE_ID, **kwargs):
+        report = {
+            'instance_id': instance_id,
+            'phase': phase,
+            'timestamp': timestamp,
+        }
+        report.update(kwargs)
+
+        return self.store.record(report)
+
+    def test_record_merges_phases(self):
+        self.report('launched', 100, image_id='img', shape='VM.X.2')
+        self.report('boot', 130)
+        self.report('ready', 400)
+
+        # Repeated report does not move timestamp
+        self.report('boot', 150)
+
+        record = self.store.get(INSTANCE_ID)
+
+        self.assertEqual(record['phases'],
+                         {'launched': 100, 'boot': 130, 'ready': 400})
+        self.assertEqual(record['shape'], 'VM.X.2')
+
+        self.assertEqual(telemetry.phase_durations(record), {
+            'launched->boot': 30,
+            'boot->ready': 270,
+            'time_to_ready': 300,
+        })
+
+    def test_invalid_reports(self):
+        with self.assertRaises(telemetry.TelemetryError):
+            self.report('boot', 1, instance_id='../../etc/passwd')
+
+        with self.assertRaises(telemetry.TelemetryError):
+            self.report('unknown', 1)
+
+        with self.assertRaises(telemetry.TelemetryError):
+            self.report('boot', 'soon')
+
+    def test_summarize(self):
+        for idx, ready in enumerate((300, 400, 500)):
+            instance_id = '%s%d' % (INSTANCE_ID, idx)
+
+            self.report('launched', 0, instance_id=instance_id,
+                        image_id='img', shape='VM.X.2')
+            self.report('packages_installed', 100, instance_id=instance_id)
+            self.report('ready', ready, instance_id=instance_id)
+
+        summary = telemetry.summarize(self.store.records())
+
+        group = summary['img/VM.X.2']
+
+        self.assertEqual(group['nodes'], 3)
+        self.assertEqual(
+            group['durations']['packages_installed->ready']['mean'], 300)
+        self.assertEqual(group['durations']['time_to_ready']['max'], 500)
+        self.assertEqual(group['durations']['time_to_ready']['p50'], 400)
+
+    def test_retention(self):
+        self.report('boot', 1)
+
+        store = telemetry.TelemetryStore(
+            self.tmpdir, retention=10, clock=lambda: 10 ** 12)
+
+        self.assertEqual(store.records(), [])
+        self.assertIsNone(store.get(INSTANCE_ID))
+
+
+class TestTelemetryApp(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = telemetry.TelemetryStore(self.tmpdir)
+        self.app = telemetry.make_app(self.store)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def post(self, body, method='POST'):
+        status = []
+
+        environ = {
+            'REQUEST_METHOD': method,
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+        }
+
+        self.app(environ, lambda s, headers: status.append(s))
+
+        return status[0]
+
+    def test_post(self):
+        body = json.dumps({
+            'instance_id': INSTANCE_ID,
+            'phase': 'ready',
+            'timestamp': 12.5,
+        }).encode()
+
+        self.assertEqual(self.post(body), '200 OK')
+        self.assertEqual(self.store.get(INSTANCE_ID)['phases'],
+                         {'ready': 12.5})
+
+    def test_rejects(self):
+        self.assertTrue(self.post(b'{}').startswith('400'))
+        self.assertTrue(self.post(b'not json').startswith('400'))
+        self.assertTrue(self.post(b'', method='GET').startswith('405'))
+        self.assertTrue(
+            self.post(b'x' * (telemetry.MAX_REPORT_SIZE + 1)).startswith(
+                '400'))
+
+
+if __name__ == '__main__':
+    unittest.main()
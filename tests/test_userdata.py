@@ -0,0 +1,147 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from base64 import b64decode
+
+from tortuga.resourceAdapter.oraclecloud import userdata
+
+
+class TestUserData(unittest.TestCase):
+    def testPlainPayload(self):
+        self.assertEqual(
+            userdata.build_payload('#!/bin/sh\n'),
+            '#!/bin/sh\n',
+            'Script without FQDN should not be wrapped.'
+        )
+
+    def testMultipartPayload(self):
+        payload = userdata.build_payload('#!/bin/sh\n', fqdn='foo.example')
+
+        self.assertIn('text/cloud-config', payload)
+        self.assertIn('text/x-shellscript', payload)
+
+    def testCompressedRoundTrip(self):
+        script = '#!/bin/sh\n' + 'echo hello\n' * 1000
+
+        encoded = userdata.encode(userdata.compress_payload(script))
+
+        self.assertLess(len(encoded), len(script))
+        self.assertEqual(
+            gzip.decompress(b64decode(encoded)).decode(),
+            script
+        )
+
+    def testCompressionIsDeterministic(self):
+        self.assertEqual(
+            userdata.compress_payload('foo'),
+            userdata.compress_payload('foo'),
+            'Identical payloads should produce identical blobs.'
+        )
+
+    def testUncompressed(self):
+        self.assertEqual(
+            userdata.compress_payload('foo', compress=False),
+            b'foo'
+        )
+
+    def testIncludePayload(self):
+        self.assertEqual(
+            userdata.include_payload('http://installer:8008/x'),
+            '#include\nhttp://installer:8008/x\n'
+        )
+
+    def testWriteIncludeFile(self):
+        tmpdir = tempfile.mkdtemp()
+
+        try:
+            directory = os.path.join(tmpdir, 'oci-user-data')
+
+            filename = userdata.write_include_file(b'foo', directory)
+
+            # Every launch gets its own unguessable name
+            self.assertNotEqual(
+                filename,
+                userdata.write_include_file(b'foo', directory)
+            )
+            self.assertGreaterEqual(len(filename), 43)
+
+            with open(os.path.join(directory, filename), 'rb') as fp:
+                self.assertEqual(fp.read(), b'foo')
+
+            # Directory cannot be listed by other users
+            self.assertEqual(os.stat(directory).st_mode & 0o777, 0o711)
+            self.assertEqual(
+                os.stat(os.path.join(directory, filename)).st_mode & 0o777,
+                0o644)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def testRemoveIncludeFiles(self):
+        tmpdir = tempfile.mkdtemp()
+
+        try:
+            first = userdata.write_include_file(b'foo', tmpdir)
+            second = userdata.write_include_file(b'bar', tmpdir)
+
+            userdata.remove_include_files([first, 'missing'], tmpdir)
+
+            self.assertEqual(os.listdir(tmpdir), [second])
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def testExpireIncludeFiles(self):
+        tmpdir = tempfile.mkdtemp()
+
+        try:
+            old = userdata.write_include_file(b'foo', tmpdir)
+            template = userdata.write_include_file(
+                b'bar', tmpdir, suffix='.template')
+
+            for filename in (old, template):
+                os.utime(os.path.join(tmpdir, filename), (1000, 1000))
+
+            new = userdata.write_include_file(b'baz', tmpdir)
+
+            self.assertEqual(
+                userdata.expire_include_files(tmpdir, 3600), [old])
+            self.assertEqual(sorted(os.listdir(tmpdir)),
+                             sorted([template, new]))
+
+            self.assertEqual(userdata.expire_include_files(
+                os.path.join(tmpdir, 'missing'), 3600), [])
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+class TestUserDataCache(unittest.TestCase):
+    def testEviction(self):
+        cache = userdata.UserDataCache(maxsize=2)
+
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        # Touch 'a' so 'b' becomes least recently used
+        self.assertEqual(cache.get('a'), 1)
+
+        cache.set('c', 3)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
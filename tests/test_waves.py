@@ -0,0 +1,155 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import subprocess
+import sys
+import textwrap
+import tracemalloc
+import unittest
+
+from simulation import ADAPTER_AVAILABLE, AdapterHarness
+from tortuga.resourceAdapter.oraclecloud.waves import iter_waves, \
+    run_in_waves
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#: Launches 'count' fake nodes, each holding 'payload' bytes of
+#: transient state (user-data, launch details, API responses) until it
+#: is committed, and prints the peak RSS in kilobytes
+RSS_SCRIPT = textwrap.dedent('''
+    import sys
+
+    sys.path.insert(0, sys.argv[1])
+
+    from tortuga.resourceAdapter.oraclecloud.waves import run_in_waves
+
+    count, wave_size, payload = [int(arg) for arg in sys.argv[2:5]]
+
+    def execute(wave):
+        pending = [(task, bytearray(payload)) for task in wave]
+
+        for task, state in pending:
+            yield task, len(state)
+
+    nodes = []
+
+    run_in_waves(range(count), wave_size, execute,
+                 lambda task, result: nodes.append(task))
+
+    # Unlike ru_maxrss, VmHWM is not inherited from the parent process
+    # across fork() and exec()
+    with open('/proc/self/status') as fp:
+        for line in fp:
+            if line.startswith('VmHWM:'):
+                print(line.split()[1])
+''')
+
+
+def peak_rss(count, wave_size, payload=32 * 1024):
+    output = subprocess.check_output([
+        sys.executable, '-c', RSS_SCRIPT, ROOT,
+        str(count), str(wave_size), str(payload)])
+
+    return int(output.decode().strip())
+
+
+def transient_peak(count, wave_size):
+    """
+    Start 'count' nodes through the adapter against a simulated cloud and
+    return the peak traced memory, in bytes, above what is still held
+    once the launch returns (nodes, instance cache, simulated instances)
+    """
+    with AdapterHarness(seed=3, config={
+            'launch_wave_size': wave_size,
+            'shard_rate_limit': 100}) as harness:
+        tracemalloc.start()
+
+        try:
+            nodes = harness.start(count)
+
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    assert len(nodes) == count
+
+    return peak - current
+
+
+class TestWaves(unittest.TestCase):
+    def test_iter_waves(self):
+        self.assertEqual(
+            list(iter_waves(range(7), 3)), [[0, 1, 2], [3, 4, 5], [6]])
+
+        self.assertEqual(list(iter_waves(range(4), 0)), [[0, 1, 2, 3]])
+        self.assertEqual(list(iter_waves([], 3)), [])
+
+    def test_waves_are_consumed_lazily(self):
+        consumed = []
+
+        def tasks():
+            for idx in range(6):
+                consumed.append(idx)
+
+                yield idx
+
+        def execute(wave):
+            # Next wave is not built before this one completes
+            self.assertEqual(consumed, list(range(wave[-1] + 1)))
+
+            return [(task, task * 2) for task in wave]
+
+        results = []
+
+        stats = run_in_waves(
+            tasks(), 2, execute,
+            lambda task, result: results.append(result))
+
+        self.assertEqual(results, [0, 2, 4, 6, 8, 10])
+        self.assertEqual(stats.waves, 3)
+        self.assertEqual(stats.tasks, 6)
+        self.assertEqual(stats.largest, 2)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'),
+                         'reads peak RSS from /proc/self/status')
+    def test_peak_rss_is_flat(self):
+        small = peak_rss(500, 100)
+        large = peak_rss(4000, 100)
+
+        # 3500 more nodes would hold ~110 MB of transient state at once
+        self.assertLess(large - small, 8 * 1024)
+
+        # Without waves, peak memory grows with the request size
+        self.assertGreater(peak_rss(4000, 0) - large, 64 * 1024)
+
+
+@unittest.skipUnless(ADAPTER_AVAILABLE,
+                     'requires Tortuga core and the OCI SDK')
+class TestAdapterWaves(unittest.TestCase):
+    def test_peak_memory_is_bounded(self):
+        small = transient_peak(200, 50)
+        large = transient_peak(1000, 50)
+
+        # Launch state is released wave by wave
+        self.assertLess(large - small, 256 * 1024)
+
+        # Without waves, it is held for every node until all complete
+        self.assertGreater(transient_peak(1000, 0) - large, 4 * 1024 * 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
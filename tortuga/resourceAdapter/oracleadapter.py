@@ -12,24 +12,30 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import ipaddress
 import itertools
 import json
 import logging
 import os
-import sys
-from base64 import b64encode
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+import time
+import uuid
+from collections import defaultdict
 from urllib.request import urlopen
 
 import gevent
+import gevent.pool
 
-import oci
 from tortuga.db.models.nic import Nic
 from tortuga.db.models.node import Node
 from tortuga.exceptions.resourceNotFound import ResourceNotFound
 from tortuga.node import state
 from tortuga.os_utility import osUtility
+from tortuga.resourceAdapter.oraclecloud import addressing, attachments, \
+    batching, breaker, capacity, clusternetwork, coalesce, forecast, \
+    hibernation, images, instancecache, inventory, latency, limits, \
+    privatedns, profiling, scaledown, sharding, signing, telemetry, \
+    userdata, waiter, waves
+from tortuga.resourceAdapter.oraclecloud.sdk import oci
 from tortuga.resourceAdapter.resourceAdapter import ResourceAdapter
 from tortuga.resourceAdapter.utility import StopWatch, get_random_sleep_time
 from tortuga.resourceAdapterConfiguration import settings
@@ -122,7 +128,17 @@ class Oracleadapter(ResourceAdapter):
         'shape': settings.StringSetting(default='VM.Standard1.1'),
         'vcpus': settings.IntegerSetting(),
         'subnet_id': settings.StringSetting(required=True),
-        'image_id': settings.StringSetting(required=True),
+        'image_id': settings.StringSetting(),
+        'image_name': settings.StringSetting(),
+        'image_tags': settings.StringSetting(
+            list=True,
+            list_separator=' '
+        ),
+        'software_profile_images': settings.StringSetting(
+            list=True,
+            list_separator=' '
+        ),
+        'image_cache_ttl': settings.IntegerSetting(default='300'),
         'user_data_script_template': settings.FileSetting(
             base_path='/tortuga/config/',
             default='oci_bootstrap.tmpl'
@@ -133,9 +149,140 @@ class Oracleadapter(ResourceAdapter):
         'dns_nameservers': settings.StringSetting(
             list=True,
             list_separator=' '
-        )
+        ),
+        'dns_backend': settings.StringSetting(),
+        'dns_zone': settings.StringSetting(),
+        'dns_reverse_zone': settings.StringSetting(),
+        'dns_view_id': settings.StringSetting(),
+        'dns_ttl': settings.IntegerSetting(default='300'),
+        'use_instance_hostname': settings.BooleanSetting(default='True'),
+        'address_mode': settings.StringSetting(
+            default=addressing.PRIVATE,
+            values=list(addressing.MODES)
+        ),
+        'user_data_compress': settings.BooleanSetting(default='True'),
+        'user_data_max_size': settings.IntegerSetting(
+            default=str(userdata.DEFAULT_MAX_SIZE)),
+        # Oversized user-data, including installer credentials, is
+        # served unauthenticated from the installer internal web server
+        # under an unguessable name until the node checks in
+        'user_data_include': settings.BooleanSetting(default='False'),
+        'user_data_include_url': settings.StringSetting(),
+        'user_data_include_max_age': settings.IntegerSetting(
+            default='86400'),
+        'scale_down_billing_granularity': settings.IntegerSetting(
+            default='3600'),
+        'scale_down_release_window': settings.IntegerSetting(default='300'),
+        'scale_down_min_lifetime': settings.IntegerSetting(default='900'),
+        'scale_down_min_nodes': settings.IntegerSetting(default='0'),
+        'scale_down_batch_size': settings.IntegerSetting(default='0'),
+        'profile': settings.BooleanSetting(default='False'),
+        'profile_dir': settings.StringSetting(),
+        'log_sample_rate': settings.IntegerSetting(default='10'),
+        'coalesce_window_ms': settings.IntegerSetting(default='0'),
+        'inventory': settings.BooleanSetting(default='True'),
+        'inventory_file': settings.StringSetting(),
+        'request_history': settings.BooleanSetting(default='True'),
+        'request_history_file': settings.StringSetting(),
+        'prescale': settings.BooleanSetting(default='False'),
+        'prescale_lead_time': settings.IntegerSetting(default='1800'),
+        'prescale_max_nodes': settings.IntegerSetting(default='10'),
+        'prescale_budget': settings.IntegerSetting(default='24'),
+        'hibernate': settings.BooleanSetting(default='False'),
+        'hibernate_max_idle': settings.IntegerSetting(default='86400'),
+        'resume_timeout': settings.IntegerSetting(default='600'),
+        'launch_concurrency': settings.IntegerSetting(default='0'),
+        'launch_wave_size': settings.IntegerSetting(default='0'),
+        'secondary_vnics': settings.StringSetting(
+            list=True,
+            list_separator=' '
+        ),
+        'block_volumes': settings.StringSetting(
+            list=True,
+            list_separator=' '
+        ),
+        'state_poll_interval': settings.IntegerSetting(default='5'),
+        'capacity_reservation_id': settings.StringSetting(),
+        'preemptible': settings.BooleanSetting(default='False'),
+        'capacity_fallback': settings.BooleanSetting(default='True'),
+        'cluster_network': settings.BooleanSetting(default='False'),
+        'cluster_network_id': settings.StringSetting(),
+        'cluster_network_timeout': settings.IntegerSetting(default='3600'),
+        'instance_configuration_id': settings.StringSetting(),
+        'preflight_check': settings.BooleanSetting(default='True'),
+        'preflight_action': settings.StringSetting(
+            default='clamp',
+            values=['clamp', 'reject']
+        ),
+        'preflight_cache_ttl': settings.IntegerSetting(default='60'),
+        'post_launch_window_ms': settings.IntegerSetting(default='500'),
+        'post_launch_batch_size': settings.IntegerSetting(default='100'),
+        'shards': settings.StringSetting(
+            list=True,
+            list_separator=' '
+        ),
+        'shard_rate_limit': settings.IntegerSetting(default='10'),
+        'shard_failure_threshold': settings.IntegerSetting(default='5'),
+        'shard_reset_timeout': settings.IntegerSetting(default='60'),
+        'breaker_error_rate': settings.IntegerSetting(default='50'),
+        'breaker_slow_call_seconds': settings.IntegerSetting(default='30'),
+        'breaker_window': settings.IntegerSetting(default='20'),
+        'health_file': settings.StringSetting(),
+        'bootstrap_telemetry': settings.BooleanSetting(default='False'),
+        'bootstrap_telemetry_url': settings.StringSetting(),
+        'bootstrap_telemetry_dir': settings.StringSetting(),
+        'adaptive_launch_timeout': settings.BooleanSetting(default='False'),
+        'launch_timeout_factor': settings.IntegerSetting(default='200'),
+        'speculative_launch': settings.BooleanSetting(default='False'),
+        'launch_stats_file': settings.StringSetting(),
     }
 
+    # Rendered bootstrap scripts and encoded user-data blobs, shared by
+    # all adapter instances in this process
+    _user_data_cache = userdata.UserDataCache()
+
+    # Merges concurrent start() requests for identical launch templates
+    _launch_coalescer = coalesce.LaunchCoalescer(sleep=gevent.sleep)
+
+    # Instance configurations created for cluster network launches, keyed
+    # by launch template
+    _instance_configurations = {}
+
+    # Limits/quota pre-flight lookups, keyed by tenancy and region
+    _preflights = {}
+
+    # In-memory index of instance cache entries for this adapter; loaded
+    # on first use
+    _instance_cache_index = None
+
+    # Regional clients, rate limiters and circuit breakers, keyed by API
+    # credentials
+    _shard_pools = {}
+
+    # Spreads launch requests across shards
+    _placement_policy = sharding.PlacementPolicy()
+
+    # Available images, keyed by shard
+    _image_indexes = {}
+
+    # Observed launch durations per shape and availability domain;
+    # loaded on first use
+    _launch_stats = None
+
+    # Request signers, keyed by API credentials; each private key is
+    # loaded once and shared by all clients
+    _signers = signing.SignerCache()
+
+    # DNS backends, keyed by backend name and zone settings
+    _dns_backends = {}
+
+    # Add/delete node request history per hardware profile; loaded on
+    # first use
+    _request_history = None
+
+    # Local launch inventories, keyed by path
+    _inventories = {}
+
     def __init__(self, addHostSession=None):
         """
         Upon instantiation, read and validate config file.
@@ -164,14 +311,199 @@ class Oracleadapter(ResourceAdapter):
                 'launch_timeout' in override_config else 300
         }
 
-        oci.config.validate_config(config)
+        self.__profile_enabled = profiling.is_enabled(override_config)
+        self.__profile_dir = override_config.get('profile_dir') \
+            if override_config else None
+        self._profiler = profiling.NULL_PROFILER
+
+        self.__log_sampler = LogSampler(
+            override_config.get('log_sample_rate') or 1
+            if override_config else 1)
+
         self.__vcpus = None
         self.__installer_ip = None
-        self.__client = oci.core.compute_client.ComputeClient(config)
-        self.__net_client = \
-            oci.core.virtual_network_client.VirtualNetworkClient(config)
-        self.__identity_client = \
-            oci.identity.identity_client.IdentityClient(config)
+        self.__tenancy_id = config['tenancy']
+        self.__region = config['region']
+        self.__compartment_id = override_config.get('compartment_id') \
+            if override_config else None
+        self.__shard_pool = self.__get_shard_pool(
+            config, override_config or {})
+
+        # Instance state watchers shared by the terminations of one
+        # deleteNode() call, keyed by shard
+        self.__delete_watchers = None
+
+    @staticmethod
+    def __create_client(oci_config, kind, region):
+        """
+        Create OCI client for a region.
+
+        :param oci_config: Dictionary OCI SDK configuration
+        :param kind: String 'compute', 'network', 'identity',
+                     'management', 'limits', 'blockstorage' or 'dns'
+        :param region: String region name
+        :return: OCI client
+        """
+        # Validated here rather than on instantiation, so that the OCI SDK
+        # is only loaded once an operation needs it
+        oci_config = dict(oci_config, region=region)
+
+        oci.config.validate_config(oci_config)
+
+        client_classes = {
+            'compute': oci.core.compute_client.ComputeClient,
+            'network': oci.core.virtual_network_client.VirtualNetworkClient,
+            'identity': oci.identity.identity_client.IdentityClient,
+            'management':
+                oci.core.compute_management_client.ComputeManagementClient,
+            'limits': oci.limits.LimitsClient,
+            'blockstorage':
+                oci.core.blockstorage_client.BlockstorageClient,
+            'dns': oci.dns.DnsClient,
+        }
+
+        signer = Oracleadapter._signers.get(
+            oci_config,
+            lambda: oci.signer.Signer(
+                tenancy=oci_config['tenancy'],
+                user=oci_config['user'],
+                fingerprint=oci_config['fingerprint'],
+                private_key_file_location=oci_config['key_file'],
+                pass_phrase=oci_config.get('pass_phrase')
+            )
+        )
+
+        return client_classes[kind](oci_config, signer=signer)
+
+    def __get_shard_pool(self, oci_config, config):
+        """
+        Shard pool shared by all adapter instances using the same API
+        credentials and rate limit and circuit breaker settings, so rate
+        limits and circuit breaker state persist between requests.  A
+        change to those settings takes effect with a new pool.
+
+        :return: ShardPool
+        """
+        options = {
+            'rate': config.get('shard_rate_limit', 10),
+            'failure_threshold': config.get('shard_failure_threshold') or 5,
+            'reset_timeout': config.get('shard_reset_timeout') or 60,
+            'error_rate': (config.get('breaker_error_rate') or 50) / 100.0,
+            'slow_call_duration':
+                config.get('breaker_slow_call_seconds') or None,
+            'window': config.get('breaker_window') or 20,
+        }
+
+        health_path = self.__get_health_path(config)
+
+        key = (oci_config['tenancy'], oci_config['user'],
+               oci_config['fingerprint'], oci_config['key_file'],
+               health_path) + tuple(sorted(options.items()))
+
+        pool = self._shard_pools.get(key)
+
+        if pool is None:
+            pool = self._shard_pools[key] = sharding.ShardPool(
+                lambda kind, region: Oracleadapter.__create_client(
+                    oci_config, kind, region),
+                clock=time.time,
+                sleep=gevent.sleep,
+                listener=self.__get_health_listener(health_path),
+                **options
+            )
+
+        return pool
+
+    def __get_health_path(self, config):
+        return config.get('health_file') or os.path.join(
+            self._cm.getRoot(), 'var', 'run', 'oci-api-health.json')
+
+    def __get_health_listener(self, path):
+        """
+        Circuit state change listener which logs the change and writes
+        the API health report to 'path'.
+
+        :return: Callable
+        """
+        logger = self.getLogger()
+
+        def listener(pool, circuit, old, new):
+            log = logger.warning if new == breaker.OPEN else logger.info
+
+            log('Circuit [%s]: %s -> %s', circuit.name, old, new)
+
+            try:
+                breaker.write_health_file(path, pool.health())
+            except EnvironmentError as exc:
+                logger.warning(
+                    'Unable to write API health to [%s]: %s', path, exc)
+
+        return listener
+
+    def get_api_health(self):
+        """
+        Health of the OCI API as seen by this process, for autoscaling
+        decisions.  The overall 'status' is 'healthy', 'degraded' (some
+        API operations are failing) or 'unavailable' (launches fail
+        immediately).  The same report is written to 'health_file'
+        whenever a circuit changes state.
+
+        :return: Dictionary
+        """
+        return self.__shard_pool.health()
+
+    def get_signing_metrics(self):
+        """
+        Request signing counters per API key fingerprint: number of
+        signed requests, time spent signing and private key loads.
+
+        :return: Dictionary
+        """
+        return self._signers.metrics()
+
+    def __get_shard(self, region=None, compartment_id=None):
+        """
+        :param region: String region name (defaults to adapter region)
+        :param compartment_id: String compartment OCID (optional)
+        :return: Shard
+        """
+        return self.__shard_pool.get(
+            region or self.__region, compartment_id or self.__compartment_id)
+
+    def __get_shards(self, config):
+        """
+        Shards a hardware profile launches into.  Without the 'shards'
+        setting, this is the adapter region and configured compartment.
+
+        :param config: Dictionary
+        :return: List of (Shard, Dictionary shard settings)
+        """
+        specs = sharding.parse_shards(config.get('shards'))
+
+        if not specs:
+            return [(self.__get_shard(
+                compartment_id=config.get('compartment_id')), {})]
+
+        return [
+            (self.__get_shard(spec['region'], spec['compartment_id']),
+             {key: value for key, value in spec.items()
+              if key not in ('region', 'compartment_id')})
+            for spec in specs
+        ]
+
+    def __get_node_spec_shard(self, node_spec):
+        return node_spec.get('shard') or self.__get_shard(
+            compartment_id=node_spec['configDict'].get('compartment_id'))
+
+    def __get_instance_shard(self, instance_cache):
+        """
+        Shard an instance was launched into, from its instance cache
+        entry.
+
+        :return: Shard
+        """
+        return self.__get_shard(instance_cache.get('region'),
+                                instance_cache.get('compartment_id'))
 
     def __validate_keys(self, config):
         """
@@ -229,7 +561,7 @@ class Oracleadapter(ResourceAdapter):
         compute = self.__cloud_instance_metadata()
         vnic = self.__cloud_vnic_metadata()
 
-        full_vnic = self.__net_client.get_vnic(
+        full_vnic = self.__get_shard().client('network').get_vnic(
             vnic['vnicId']
         ).data
 
@@ -244,6 +576,25 @@ class Oracleadapter(ResourceAdapter):
             'shape': compute['shape']
         }
 
+    def __get_profiler(self, label):
+        """
+        Return profiler for an operation; the no-op profiler is returned
+        unless profiling is enabled.
+
+        :param label: String used to name the profile
+        :return: SessionProfiler or NullProfiler
+        """
+        if not self.__profile_enabled:
+            return profiling.NULL_PROFILER
+
+        directory = self.__profile_dir or \
+            os.path.join(self._cm.getRoot(), 'var', 'oci-profiles')
+
+        return profiling.SessionProfiler(
+            os.path.join(directory, 'oci-%s-%d' % (label, int(time.time()))),
+            logger=self.getLogger()
+        )
+
     def start(self, addNodesRequest, dbSession, dbHardwareProfile,
               dbSoftwareProfile=None):
         """
@@ -251,40 +602,65 @@ class Oracleadapter(ResourceAdapter):
 
         :return: List Instance objects
         """
+        self._profiler = self.__get_profiler(
+            'session-%s' % (self.addHostSession))
+
+        try:
+            with self._profiler.phase('start'):
+                return self.__start(addNodesRequest, dbSession,
+                                    dbHardwareProfile, dbSoftwareProfile)
+        finally:
+            self._profiler.dump()
+
+    def __start(self, addNodesRequest, dbSession, dbHardwareProfile,
+                dbSoftwareProfile):
         self.getLogger().debug(
             'start(): addNodesRequest=[%s], dbSession=[%s],'
-            ' dbHardwareProfile=[%s], dbSoftwareProfile=[%s]' % (
-                addNodesRequest,
-                dbSession,
-                dbHardwareProfile,
-                dbSoftwareProfile
-            )
+            ' dbHardwareProfile=[%s], dbSoftwareProfile=[%s]',
+            addNodesRequest,
+            dbSession,
+            dbHardwareProfile,
+            dbSoftwareProfile
         )
 
+        config = self.getResourceAdapterConfig()
+
+        self.__record_request(config, dbHardwareProfile.name,
+                              added=addNodesRequest['count'])
+
         with StopWatch() as stop_watch:
-            nodes = self.__add_nodes(
-                addNodesRequest,
-                dbSession,
-                dbHardwareProfile,
-                dbSoftwareProfile
-            )
+            nodes = self.__claim_warm_nodes(
+                dbSession, dbHardwareProfile, dbSoftwareProfile,
+                addNodesRequest['count'])
+
+            if len(nodes) < addNodesRequest['count']:
+                nodes += self.__resume_parked_nodes(
+                    dbSession, dbHardwareProfile, dbSoftwareProfile,
+                    addNodesRequest['count'] - len(nodes))
+
+            if len(nodes) < addNodesRequest['count']:
+                nodes += self.__add_nodes(
+                    dict(addNodesRequest,
+                         count=addNodesRequest['count'] - len(nodes)),
+                    dbSession,
+                    dbHardwareProfile,
+                    dbSoftwareProfile
+                )
 
         if len(nodes) < addNodesRequest['count']:
             self.getLogger().warning(
                 '%s node(s) requested, only %s launched'
-                ' successfully' % (
-                    addNodesRequest['count'],
-                    len(nodes)
-                )
+                ' successfully',
+                addNodesRequest['count'],
+                len(nodes)
             )
 
         self.getLogger().debug(
             'start() session [%s] completed in'
-            ' %0.2f seconds' % (
-                self.addHostSession,
-                stop_watch.result.seconds +
-                stop_watch.result.microseconds / 1000000.0
-            )
+            ' %0.2f seconds',
+            self.addHostSession,
+            stop_watch.result.seconds +
+            stop_watch.result.microseconds / 1000000.0
         )
 
         self.addHostApi.clear_session_nodes(nodes)
@@ -292,457 +668,2808 @@ class Oracleadapter(ResourceAdapter):
         return nodes
 
     def __add_nodes(self, add_nodes_request, db_session, db_hardware_profile,
-                    db_software_profile):
+                    db_software_profile, warm=False, config=None):
         """
-        Add nodes to the infrastructure.
+        Add nodes to the infrastructure.  Concurrent requests with an
+        identical launch template arriving within 'coalesce_window_ms'
+        are merged into a single fan-out.
 
+        :param warm: Boolean launch warm nodes, claimed by later requests
+        :param config: Dictionary resource adapter configuration
+                       (optional)
         :return: List Nodes objects
         """
 
         # TODO: this validation needs to be moved
         # self.__validate_keys(session.config)
 
+        config = config or self.getResourceAdapterConfig()
+
         node_spec = {
             'db_hardware_profile': db_hardware_profile,
             'db_software_profile': db_software_profile,
             'db_session': db_session,
-            'configDict': self.getResourceAdapterConfig(),
+            'configDict': config,
+            'add_host_session': self.addHostSession,
+            'warm': warm,
         }
 
-        return [result for result in self.__oci_add_nodes(
-            count=int(add_nodes_request['count']),
-            node_spec=node_spec)]
+        request = coalesce.LaunchRequest(
+            int(add_nodes_request['count']), node_spec)
 
-    def __oci_add_nodes(self, count=1, node_spec=None):
-        """
-        Wrapper around __oci_add_node() method. Launches Greenlets to
-        perform add nodes operation in parallel using gevent.
+        return self._launch_coalescer.submit(
+            self.__get_launch_key(
+                db_hardware_profile, db_software_profile, config),
+            request,
+            self.__oci_add_nodes,
+            (config.get('coalesce_window_ms') or 0) / 1000.0
+        )
 
-        :param count: number of nodes to add
-        :param node_spec: dict containing instance launch specification
-        :return: list of Nodes
+    @staticmethod
+    def __get_launch_key(db_hardware_profile, db_software_profile, config):
         """
-        greenlets = []
-        for _ in range(count):
-            greenlets.append(gevent.spawn(self.__oci_add_node, node_spec))
+        Key identifying requests which can share a launch batch.
 
-        for result in gevent.iwait(greenlets):
-            if result.value:
-                yield result.value
+        :return: Tuple
+        """
+        return (
+            db_hardware_profile.id,
+            db_software_profile.id if db_software_profile else None,
+            json.dumps(config, sort_keys=True, default=str),
+        )
 
-    def __oci_add_node(self, node_spec):
+    def __list_instance_states(self, shard, availability_domain=None):
         """
-        Add one node and backing instance to Tortuga.
+        Lifecycle state of all instances in the compartment of a shard,
+        using one (paginated) list call.
 
-        :param node_spec: instance launch specification
-        :return: Nodes object (or None, on failure)
+        :param shard: Shard
+        :param availability_domain: String (optional)
+        :return: Dictionary instance OCID: lifecycle state
         """
-        with gevent.Timeout(self._timeouts['launch'], TimeoutError):
-            node_dict = self.__oci_pre_launch_instance(node_spec=node_spec)
+        kwargs = {}
 
-            try:
-                instance = self._launch_instance(node_dict=node_dict,
-                                                 node_spec=node_spec)
-            except Exception as exc:
-                if 'node' in node_dict:
-                    self.__client.terminate_instance(
-                        node_dict['instance_ocid'])
-                    self._wait_for_instance_state(
-                        node_dict['instance_ocid'], 'TERMINATED')
-                    node_spec['db_session'].delete(node_dict['node'])
-                    node_spec['db_session'].commit()
+        if availability_domain:
+            kwargs['availability_domain'] = availability_domain
 
-                self.getLogger().error(
-                    'Error launching instance: [{}]'.format(exc)
-                )
+        instances = oci.pagination.list_call_get_all_results(
+            shard.client('compute').list_instances, shard.compartment_id,
+            **kwargs).data
 
-                return
+        return {
+            instance.id: instance.lifecycle_state for instance in instances
+        }
 
-            return self._instance_post_launch(
-                instance, node_dict=node_dict, node_spec=node_spec)
+    def __get_state_watcher(self, config, shard):
+        """
+        Instance state watcher shared by all launches in a batch into
+        one shard and availability domain.
 
-    def __oci_pre_launch_instance(self, node_spec=None):
+        :param config: Dictionary
+        :param shard: Shard
+        :return: InstanceStateWatcher
         """
-        Creates Nodes object if Tortuga-generated host names are enabled,
-        otherwise returns empty node dict.
+        return waiter.InstanceStateWatcher(
+            lambda: self.__list_instance_states(
+                shard, config['availability_domain']),
+            interval=config.get('state_poll_interval') or 5
+        )
 
-        :param node_spec: dict containing instance launch specification
-        :return: node dict
+    def __oci_add_nodes(self, requests):
         """
-        if node_spec['db_hardware_profile'].nameFormat == '*':
-            return {}
+        Wrapper around __oci_add_node() method. Launches Greenlets to
+        perform add nodes operation in parallel using gevent.  All
+        requests in the batch share the launch concurrency limit, and
+        one instance state watcher per shard and availability domain.
+        Nodes are spread across the configured shards.
 
-        result = {}
+        :param requests: List LaunchRequest
+        :return: None
+        """
+        config = requests[0].node_spec['configDict']
 
-        # Generate node name
-        hostname, _ = self.addHostApi.generate_node_name(
-            node_spec['db_session'],
-            node_spec['db_hardware_profile'].nameFormat,
-            dns_zone=self.private_dns_zone).split('.', 1)
+        shards = [
+            (shard, overrides)
+            for shard, overrides in self.__get_shards(config)
+            if shard.available
+        ]
 
-        _, domain = self.installer_public_hostname.split('.', 1)
+        if not shards:
+            # Fail fast instead of creating nodes that cannot launch
+            self.getLogger().error(
+                'OCI launch API unavailable (circuit open);'
+                ' not launching %d node(s)',
+                sum(request.count for request in requests))
 
-        name = '%s.%s' % (hostname, domain)
+            return
 
-        # Create Nodes object
-        node = self.__initialize_node(
-            name,
-            node_spec['db_hardware_profile'],
-            node_spec['db_software_profile']
-        )
+        primary_shard, primary_overrides = shards[0]
 
-        node.state = state.NODE_STATE_LAUNCHING
+        capacity_plan = capacity.CapacityPlan.from_config(config)
 
-        result['node'] = node
+        if len(shards) == 1:
+            # Limits are looked up per region; multi-shard launches rely
+            # on spreading and capacity fallback instead
+            self.__preflight(
+                requests, primary_shard.apply(config, primary_overrides),
+                capacity_plan, primary_shard)
 
-        # Add to database and commit database session
-        node_spec['db_session'].add(node)
-        node_spec['db_session'].commit()
+        aggregator = self.__get_post_launch_aggregator(config)
 
-        return result
+        for request in requests:
+            request.node_spec['post_launch_aggregator'] = aggregator
 
-    def __initialize_node(self, name, db_hardware_profile,
-                          db_software_profile):
-        node = Node(name=name)
-        node.softwareprofile = db_software_profile
-        node.hardwareprofile = db_hardware_profile
-        node.isIdle = False
-        node.addHostSession = self.addHostSession
+        if config.get('cluster_network'):
+            # Cluster networks are placed in a single availability domain
+            for request in requests:
+                request.node_spec['shard'] = primary_shard
+                request.node_spec['configDict'] = self.__get_shard_config(
+                    request.node_spec, primary_shard, primary_overrides)
 
-        return node
+            gevent.joinall([
+                gevent.spawn(self.__oci_add_cluster_network_nodes, request)
+                for request in requests
+            ])
 
-    def _launch_instance(self, node_dict=None, node_spec=None):
-        """
-        Launch instance and wait for it to reach RUNNING state.
+            return
 
-        :param node_dict: Dictionary
-        :param node_spec: Object
-        :return: Instance object
-        """
+        overrides = {shard.key: values for shard, values in shards}
+        watchers = {}
+        capacity_plans = {primary_shard.key: capacity_plan}
 
-        session = OciSession(node_spec['configDict'])
-        session.config['metadata']['user_data'] = \
-            self.__get_user_data(session.config)
+        pool = gevent.pool.Pool(config.get('launch_concurrency') or None)
 
-        # TODO: this is a temporary workaround until the OciSession
-        # functionality is validated for this workflow
-        launch_config = session.launch_config
+        def launches():
+            for request in requests:
+                placement = self._placement_policy.spread(
+                    request.count, [shard for shard, _ in shards])
 
-        # TODO: make this work better.  Need to
-        # find a way of injecting this into the
-        # `get_node_vcpus` method.
-        self.__vcpus = session.config['vcpus'] if \
-            session.config['vcpus'] else \
-            session.cores_from_shape
-        self.getLogger().debug(
-            'setting vcpus to %d' % (
-                self.__vcpus
-            )
+                for shard, count in placement:
+                    node_spec = self.__get_shard_node_spec(
+                        request.node_spec, shard, overrides[shard.key],
+                        watchers, capacity_plans)
+
+                    for _ in range(count):
+                        yield request, node_spec
+
+        def on_result(launch, node):
+            if node:
+                launch[0].nodes.append(node)
+
+        stats = waves.run_in_waves(
+            launches(),
+            config.get('launch_wave_size') or None,
+            lambda wave: self.__launch_wave(pool, wave),
+            on_result
         )
 
-        if 'node' in node_dict:
-            node = node_dict['node']
+        self.__save_launch_stats(config)
 
+        if len(requests) > 1 or len(shards) > 1 or stats.waves > 1:
             self.getLogger().debug(
-                'overriding instance name [%s]' % (
-                    node.name)
+                'Launched %d node(s) for %d request(s) across %d shard(s)'
+                ' in %d wave(s); %d state poll(s)',
+                stats.tasks, len(requests), len(capacity_plans),
+                stats.waves,
+                sum(watcher.polls for watcher in watchers.values())
             )
 
-            launch_config.display_name = node.name
-            launch_config.hostname_label = node.name.split('.', 1)[0]
+    def __launch_wave(self, pool, wave):
+        """
+        Launch one wave of nodes and yield results as nodes complete.
+        Greenlets are dropped as soon as their result has been handed
+        on, so nothing of a finished launch outlives the wave.
 
-        launch_instance = self.__client.launch_instance(launch_config)
+        :param pool: gevent.pool.Pool bounding launch concurrency
+        :param wave: List of (LaunchRequest, node_spec)
+        :return: Generator of ((LaunchRequest, node_spec), Nodes or None)
+        """
+        greenlets = {}
 
-        instance_ocid = launch_instance.data.id
+        for launch in wave:
+            greenlets[pool.spawn(self.__oci_add_node, launch[1])] = launch
 
-        node_dict['instance_ocid'] = instance_ocid
+        for greenlet in gevent.iwait(list(greenlets.keys())):
+            yield greenlets.pop(greenlet), greenlet.value
 
-        log_adapter = CustomAdapter(
-            self.getLogger(), {'instance_ocid': instance_ocid})
+    def __get_shard_node_spec(self, node_spec, shard, overrides, watchers,
+                              capacity_plans):
+        """
+        Launch specification for nodes of a request placed in a shard.
 
-        log_adapter.debug('launched')
+        :param node_spec: Dictionary launch specification of request
+        :param shard: Shard
+        :param overrides: Dictionary shard settings
+        :param watchers: Dictionary of state watchers in the batch
+        :param capacity_plans: Dictionary of capacity plans in the batch
+        :return: Dictionary
+        """
+        config = self.__get_shard_config(node_spec, shard, overrides)
 
-        # TODO: implement a timeout waiting for an instance to start; this
-        # will currently wait forever
-        # TODO: check for launch error
-        def logging_callback(instance, state):
-            log_adapter.debug('state: %s; waiting...' % state)
+        watcher_key = (shard.key, config['availability_domain'])
 
-        self._wait_for_instance_state(
-            instance_ocid, 'RUNNING', callback=logging_callback)
+        if watcher_key not in watchers:
+            watchers[watcher_key] = self.__get_state_watcher(config, shard)
 
-        log_adapter.debug('state: RUNNING')
+        if shard.key not in capacity_plans:
+            capacity_plans[shard.key] = \
+                capacity.CapacityPlan.from_config(config)
 
-        return self.__client.get_instance(instance_ocid).data
+        result = dict(node_spec)
+        result.update({
+            'configDict': config,
+            'shard': shard,
+            'state_watcher': watchers[watcher_key],
+            'capacity_plan': capacity_plans[shard.key],
+        })
 
-    def get_node_vcpus(self, name):
+        return result
+
+    def __get_shard_config(self, node_spec, shard, overrides):
         """
-        Return resolved number of VCPUs.
+        Configuration for launching nodes of a request into a shard,
+        with the image resolved for the shard and software profile.
 
-        :param name: String node hostname
-        :return: Integer vcpus
+        :return: Dictionary
         """
-        instance_cache = self.instanceCacheGet(name)
-        if 'vcpus' in list(instance_cache.keys()):
-            return int(instance_cache['vcpus'])
-        return self.__vcpus
+        config = shard.apply(node_spec['configDict'], overrides)
 
-    def _instance_post_launch(self, instance, node_dict=None, node_spec=None):
+        config['image_id'] = self.__resolve_image(
+            config, shard, node_spec['db_software_profile'])
+
+        return config
+
+    def __resolve_image(self, config, shard, db_software_profile):
         """
-        Called after instance has launched successfully.
+        Image for a launch: the image selected for the software profile
+        in 'software_profile_images', otherwise 'image_name', otherwise
+        'image_id'.  Name patterns resolve to the newest available image
+        with matching display name and 'image_tags'.
 
-        :param instance: Oracle instance
-        :param node_dict: instance/node mapping dict
-        :param node_spec: instance launch specification
-        :return: Nodes object
+        :return: String image OCID
+        :raises ImageNotFoundError:
         """
-        self.getLogger().debug(
-            'Instance post-launch action for instance [%s]' % (
-                instance.id)
-        )
+        profile_images = images.parse_profile_images(
+            config.get('software_profile_images'))
 
-        if 'node' not in node_dict:
-            domain = self.installer_public_hostname.split('.')[1:]
-            fqdn = '.'.join([instance.display_name] + domain)
+        selector = (
+            profile_images.get(db_software_profile.name)
+            if db_software_profile else None
+        ) or config.get('image_name') or config.get('image_id')
 
-            node = self.__initialize_node(
-                fqdn,
-                node_spec['db_hardware_profile'],
-                node_spec['db_software_profile']
-            )
+        if not selector:
+            raise images.ImageNotFoundError(
+                'No image configured; set image_id, image_name or'
+                ' software_profile_images')
 
-            node_spec['db_session'].add(node)
+        if images.is_image_ocid(selector):
+            return selector
 
-            node_dict['node'] = node
-        else:
-            node = node_dict['node']
+        image_id = self.__get_image_index(config, shard).resolve(
+            shard.compartment_id, selector,
+            tags=images.parse_tags(config.get('image_tags')))
 
-        node.state = state.NODE_STATE_PROVISIONED
+        self.getLogger().debug(
+            'Resolved image [%s] to [%s]', selector, image_id)
 
-        # Get ip address from instance
-        nics = []
-        for ip in self.__get_instance_private_ips(
-                instance.id, instance.compartment_id):
-            nics.append(
-                Nic(ip=ip, boot=True)
-            )
-        node.nics = nics
+        return image_id
 
-        node_spec['db_session'].commit()
+    def __get_image_index(self, config, shard):
+        index = self._image_indexes.get(shard.key)
 
-        self.instanceCacheSet(
-            node.name,
-            {
-                'id': instance.id,
-                'compartment_id': instance.id,
-                'shape': node_spec['configDict']['shape'],
-                'vcpus': str(node_spec['configDict']['shape'].split('.')[-1])
-            }
-        )
+        if index is None:
+            client = shard.client('compute')
 
-        ip = [nic for nic in node.nics if nic.boot][0].ip
+            index = self._image_indexes[shard.key] = images.ImageIndex(
+                lambda compartment_id:
+                    oci.pagination.list_call_get_all_results(
+                        client.list_images, compartment_id,
+                        lifecycle_state='AVAILABLE').data,
+                ttl=config.get('image_cache_ttl') or 300
+            )
 
-        self._pre_add_host(
-            node.name,
-            node.hardwareprofile.name,
-            node.softwareprofile.name,
-            ip)
+        return index
 
-        self.getLogger().debug(
-            '_instance_post_launch(): node=[%s]' % (
-                node)
-        )
+    def __get_launch_stats(self, config):
+        """
+        Launch duration statistics shared by all adapter instances in
+        this process, initially loaded from 'launch_stats_file'.
+
+        :return: LaunchStats
+        """
+        cls = Oracleadapter
+
+        if cls._launch_stats is None:
+            stats = latency.LaunchStats(
+                timeout_factor=(
+                    config.get('launch_timeout_factor') or 200) / 100.0)
+
+            stats.load(self.__get_launch_stats_path(config))
+
+            cls._launch_stats = stats
+
+        return cls._launch_stats
+
+    def __get_launch_stats_path(self, config):
+        return config.get('launch_stats_file') or os.path.join(
+            self._cm.getRoot(), 'var', 'oci-launch-stats.json')
+
+    def __save_launch_stats(self, config):
+        try:
+            self.__get_launch_stats(config).save(
+                self.__get_launch_stats_path(config))
+        except EnvironmentError as exc:
+            self.getLogger().warning(
+                'Unable to save launch statistics: %s', exc)
+
+    def get_launch_stats(self):
+        """
+        :return: Dictionary '<shape>/<availability domain>':
+                 {'samples', 'expected'}
+        """
+        return self.__get_launch_stats(
+            self.getResourceAdapterConfig()).summary()
+
+    def __get_running_timeout(self, config):
+        """
+        Time allowed for a launched instance to reach RUNNING, derived
+        from observed launch durations for the shape and availability
+        domain when 'adaptive_launch_timeout' is enabled.  Never less
+        than 'launch_timeout'.
+
+        :param config: Dictionary
+        :return: Number seconds, or None if not enabled
+        """
+        if not config.get('adaptive_launch_timeout'):
+            return None
+
+        return max(
+            self.__get_launch_stats(config).timeout(
+                config['shape'], config['availability_domain'],
+                self._timeouts['launch']),
+            self._timeouts['launch'])
+
+    def __get_preflight(self, config, shard):
+        key = (self.__tenancy_id, shard.region)
+
+        preflight = self._preflights.get(key)
+
+        if preflight is None:
+            preflight = self._preflights[key] = limits.LimitsPreflight(
+                shard.client('limits'),
+                self.__tenancy_id,
+                ttl=config.get('preflight_cache_ttl') or 60
+            )
+
+        return preflight
+
+    def __preflight(self, requests, config, capacity_plan, shard):
+        """
+        Check service limits and compartment quota before any launch
+        request is made.  Requests which cannot be satisfied are clamped
+        (or rejected, depending on 'preflight_action').  When other
+        capacity types are configured, exhausted on-demand capacity is
+        recorded in the capacity plan instead.
+
+        :param requests: List LaunchRequest; counts may be reduced
+        :param config: Dictionary
+        :param capacity_plan: CapacityPlan
+        :param shard: Shard
+        :return: None
+        :raises CapacityError: request rejected
+        """
+        if not config.get('preflight_check', True) or \
+                capacity.ON_DEMAND not in capacity_plan.modes or \
+                capacity_plan.modes[0] == capacity.RESERVED:
+            # Reserved capacity is already accounted for in limits
+            return
+
+        try:
+            cores_per_node = int(config['shape'].split('.')[-1])
+        except ValueError:
+            # Flexible shapes
+            cores_per_node = config.get('vcpus') or 1
+
+        total = sum(request.count for request in requests)
+
+        try:
+            result = self.__get_preflight(config, shard).check(
+                config['compartment_id'],
+                config['availability_domain'],
+                config['shape'],
+                total,
+                cores_per_node
+            )
+        except Exception as exc:
+            self.getLogger().warning('Pre-flight check skipped: %s', exc)
+
+            return
+
+        if result.allowed >= total:
+            return
+
+        reason = '%d node(s) requested, limit [%s] allows %d' % (
+            total, result.limit_name, result.allowed)
+
+        self.getLogger().warning('Pre-flight: %s', reason)
+
+        if capacity_plan.modes != [capacity.ON_DEMAND]:
+            # Let preemptible capacity absorb the request
+            if not result.allowed:
+                capacity_plan.exhaust(capacity.ON_DEMAND, reason)
+
+            return
+
+        if config.get('preflight_action') == 'reject':
+            raise capacity.CapacityError(reason)
+
+        remaining = result.allowed
+
+        for request in requests:
+            request.count = min(request.count, remaining)
+
+            remaining -= request.count
+
+    def __get_cluster_network_orchestrator(self, config, shard):
+        return clusternetwork.ClusterNetworkOrchestrator(
+            shard.client('management'),
+            sleep=gevent.sleep,
+            interval=config.get('state_poll_interval') or 5
+        )
+
+    def __get_attachment_orchestrator(self, config, shard):
+        return attachments.AttachmentOrchestrator(
+            shard.client('compute'),
+            shard.client('blockstorage'),
+            sleep=gevent.sleep,
+            interval=config.get('state_poll_interval') or 5
+        )
+
+    def __delete_volumes(self, volume_ids, config, shard):
+        """
+        Delete block volumes of terminated (or failed) instances in one
+        pass, logging volumes which could not be deleted.
+
+        :param volume_ids: List String volume OCIDs
+        :param config: Dictionary
+        :param shard: Shard the volumes were created in
+        :return: None
+        """
+        failed = self.__get_attachment_orchestrator(
+            config, shard).delete_volumes(volume_ids)
+
+        for volume_id, exc in failed.items():
+            self.getLogger().warning(
+                'Unable to delete block volume [%s]: %s', volume_id, exc)
+
+    def __get_instance_configuration(self, orchestrator, node_spec):
+        """
+        Return configured instance configuration, or create (once per
+        launch template) one from the adapter configuration.
+
+        :return: String instance configuration OCID
+        """
+        config = node_spec['configDict']
+
+        if config.get('instance_configuration_id'):
+            return config['instance_configuration_id']
+
+        session = OciSession(config)
+
+        key = json.dumps(session.config, sort_keys=True, default=str)
+
+        if key not in self._instance_configurations:
+            session.config['metadata']['user_data'] = \
+                self.__get_user_data(session.config)
+
+            self._instance_configurations[key] = \
+                orchestrator.create_instance_configuration(
+                    config['compartment_id'],
+                    'tortuga-%s' % (node_spec['db_hardware_profile'].name),
+                    session.config
+                )
+
+        return self._instance_configurations[key]
+
+    def __oci_add_cluster_network_nodes(self, request):
+        """
+        Launch all nodes of a request into one cluster network, so they
+        share an RDMA placement group.  Node names are taken from the
+        instance display names.
+
+        :param request: LaunchRequest
+        :return: None
+        """
+        node_spec = request.node_spec
+        config = node_spec['configDict']
+
+        if not config['shape'].startswith('BM.'):
+            self.getLogger().warning(
+                'Cluster networks require a bare metal HPC shape;'
+                ' shape [%s] may not be supported', config['shape'])
+
+        orchestrator = self.__get_cluster_network_orchestrator(
+            config, self.__get_node_spec_shard(node_spec))
+
+        try:
+            # Bare metal cluster networks take much longer than
+            # 'launch_timeout'; a failed launch is rolled back
+            with self._profiler.phase('launch'):
+                placement = orchestrator.launch(
+                    config['compartment_id'],
+                    config['availability_domain'],
+                    config['subnet_id'],
+                    self.__get_instance_configuration(
+                        orchestrator, node_spec),
+                    request.count,
+                    cluster_network_id=config.get('cluster_network_id'),
+                    display_name='tortuga-%s' % (
+                        node_spec['add_host_session']),
+                    timeout=config.get('cluster_network_timeout') or 3600
+                )
+        except Exception as exc:
+            self.getLogger().error(
+                'Error launching cluster network: [%s]', exc)
+
+            return
+
+        self.getLogger().info(
+            'Cluster network [%s] placed %d instance(s)',
+            placement.cluster_network_id, len(placement.instance_ids))
+
+        greenlets = [
+            gevent.spawn(self.__cluster_network_post_launch,
+                         instance_ocid, placement, node_spec)
+            for instance_ocid in placement.instance_ids
+        ]
+
+        for result in gevent.iwait(greenlets):
+            if result.value:
+                request.nodes.append(result.value)
+
+    def __cluster_network_post_launch(self, instance_ocid, placement,
+                                      node_spec):
+        try:
+            instance = self.__get_node_spec_shard(node_spec).client(
+                'compute').get_instance(instance_ocid).data
+        except Exception as exc:
+            self._get_log_adapter(instance_ocid).error(
+                'Error adding cluster network instance: [%s]', exc)
+
+            return
+
+        try:
+            with self._profiler.phase('post_launch'):
+                return self.__post_launch(
+                    instance, {'placement': placement}, node_spec)
+        except Exception:
+            # Logged by post-launch batch
+            return
+
+    def __oci_add_node(self, node_spec):
+        """
+        Add one node and backing instance to Tortuga.
+
+        :param node_spec: instance launch specification
+        :return: Nodes object (or None, on failure)
+        """
+        # A derived RUNNING timeout longer than 'launch_timeout' extends
+        # the timeout of the launch as a whole by the difference
+        timeout = max(
+            self.__get_running_timeout(node_spec['configDict']) or 0,
+            self._timeouts['launch'])
+
+        with gevent.Timeout(timeout, TimeoutError), \
+                self._profiler.phase('add_node'):
+            node_dict = self.__oci_pre_launch_instance(node_spec=node_spec)
+
+            try:
+                with self._profiler.phase('launch'):
+                    instance = self.__launch_instance(node_dict, node_spec)
+            except Exception as exc:
+                self.__terminate_failed_launch(
+                    node_dict, node_spec['configDict'],
+                    self.__get_node_spec_shard(node_spec))
+
+                if 'node' in node_dict:
+                    node_spec['db_session'].delete(node_dict['node'])
+                    node_spec['db_session'].commit()
+
+                self.__remove_include_files(
+                    node_dict.get('user_data_includes'))
+
+                self._get_log_adapter(node_dict.get('instance_ocid')).error(
+                    'Error launching instance: [%s]', exc
+                )
+
+                if node_dict.get('launch_id'):
+                    self.__update_inventory(
+                        node_spec['configDict'], 'update',
+                        node_dict['launch_id'], state=inventory.FAILED,
+                        error=str(exc))
+
+                return
+
+            try:
+                with self._profiler.phase('post_launch'):
+                    return self.__post_launch(instance, node_dict, node_spec)
+            except Exception:
+                # Logged by post-launch batch
+                return
+
+    def __launch_instance(self, node_dict, node_spec):
+        """
+        Launch instance for a node.  With 'speculative_launch', a launch
+        still running past the expected launch duration for its shape
+        and availability domain is raced against a replacement launch;
+        the instance of the launch that loses is terminated.  The
+        replacement has a suffixed host name; if it wins, the node is
+        renamed to match.
+
+        :param node_dict: Dictionary; updated from the winning launch
+        :param node_spec: Dictionary instance launch specification
+        :return: Instance object
+        """
+        config = node_spec['configDict']
+
+        threshold = self.__get_launch_stats(config).expected(
+            config['shape'], config['availability_domain']) \
+            if config.get('speculative_launch') else None
+
+        if threshold is None:
+            return self._launch_instance(node_dict=node_dict,
+                                         node_spec=node_spec)
+
+        shard = self.__get_node_spec_shard(node_spec)
+
+        launches = []
+
+        def launch(**kwargs):
+            launch_dict = dict(node_dict, **kwargs)
+
+            greenlet = gevent.spawn(self._launch_instance,
+                                    node_dict=launch_dict,
+                                    node_spec=node_spec)
+
+            launches.append((greenlet, launch_dict))
+
+            return greenlet
+
+        winner = None
+
+        try:
+            greenlet = launch()
+
+            with gevent.Timeout(threshold, False):
+                greenlet.join()
+
+            if not launches[0][0].ready():
+                self._get_log_adapter(
+                    launches[0][1].get('instance_ocid')).warning(
+                        'Launch exceeded expected %0.0f seconds; launching'
+                        ' replacement', threshold)
+
+                # Hostname labels must be unique within the subnet
+                launch(hostname_suffix='-r')
+
+            for greenlet in gevent.iwait(
+                    [greenlet for greenlet, _ in launches]):
+                if greenlet.successful():
+                    winner = greenlet
+
+                    break
+        except BaseException:
+            for greenlet, launch_dict in launches:
+                gevent.spawn(
+                    self.__discard_launch, greenlet, launch_dict, shard)
+
+            raise
+
+        for greenlet, launch_dict in launches:
+            if greenlet is winner:
+                node_dict.update(launch_dict)
+            else:
+                gevent.spawn(
+                    self.__discard_launch, greenlet, launch_dict, shard)
+
+        if winner is None:
+            raise launches[0][0].exception
+
+        if 'node' in node_dict and \
+                node_dict['node'].name != node_dict['node_name']:
+            # The replacement won; register the node under the host name
+            # its instance resolves to
+            self._get_log_adapter(node_dict['instance_ocid']).info(
+                'Renaming node [%s] to [%s]', node_dict['node'].name,
+                node_dict['node_name'])
+
+            node_dict['node'].name = node_dict['node_name']
+
+        return winner.value
+
+    def __terminate_failed_launch(self, launch_dict, config, shard):
+        """
+        Terminate the instance of a failed (or discarded) launch, if it
+        was created, then delete its block volumes.  Volumes cannot be
+        deleted while attached, so they are kept if termination of the
+        instance could not be confirmed.
+
+        :param launch_dict: node_dict of the launch
+        :param config: Dictionary
+        :param shard: Shard of the launch
+        :return: None
+        """
+        instance_ocid = launch_dict.get('instance_ocid')
+
+        if instance_ocid is not None:
+            log_adapter = self._get_log_adapter(instance_ocid)
+
+            try:
+                self.__terminate_instance(instance_ocid, shard)
+
+                log_adapter.info('Terminated instance of failed launch')
+            except Exception as exc:
+                log_adapter.warning(
+                    'Unable to terminate instance of failed launch;'
+                    ' keeping its block volumes: %s', exc)
+
+                return
+
+        if launch_dict.get('volume_ids'):
+            self.__delete_volumes(launch_dict['volume_ids'], config, shard)
+
+    def __discard_launch(self, greenlet, launch_dict, shard):
+        """
+        Stop a launch that lost the race (or was abandoned), terminate
+        its instance and delete its block volumes.  A launch request in
+        flight is allowed to complete first, so its instance is not
+        orphaned.
+        """
+        while not greenlet.ready() and 'instance_ocid' not in launch_dict:
+            gevent.sleep(1)
+
+        greenlet.kill()
+
+        self.__terminate_failed_launch(
+            launch_dict, self.getResourceAdapterConfig(), shard)
+
+        self.__remove_include_files(launch_dict.get('user_data_includes'))
+
+        if launch_dict.get('launch_id'):
+            self.__update_inventory(
+                self.getResourceAdapterConfig(), 'update',
+                launch_dict['launch_id'], state=inventory.TERMINATED,
+                error='Lost speculative launch race')
+
+    def __oci_pre_launch_instance(self, node_spec=None):
+        """
+        Creates Nodes object if Tortuga-generated host names are enabled,
+        otherwise returns empty node dict.
+
+        :param node_spec: dict containing instance launch specification
+        :return: node dict
+        """
+        if node_spec['db_hardware_profile'].nameFormat == '*':
+            return {}
+
+        result = {}
+
+        # Generate node name
+        hostname, _ = self.addHostApi.generate_node_name(
+            node_spec['db_session'],
+            node_spec['db_hardware_profile'].nameFormat,
+            dns_zone=self.private_dns_zone).split('.', 1)
+
+        _, domain = self.installer_public_hostname.split('.', 1)
+
+        name = '%s.%s' % (hostname, domain)
+
+        # Create Nodes object
+        node = self.__initialize_node(
+            name,
+            node_spec['db_hardware_profile'],
+            node_spec['db_software_profile'],
+            node_spec['add_host_session']
+        )
+
+        node.state = state.NODE_STATE_LAUNCHING
+
+        result['node'] = node
+
+        # Add to database and commit database session
+        node_spec['db_session'].add(node)
+        node_spec['db_session'].commit()
+
+        return result
+
+    @staticmethod
+    def __initialize_node(name, db_hardware_profile, db_software_profile,
+                          add_host_session):
+        node = Node(name=name)
+        node.softwareprofile = db_software_profile
+        node.hardwareprofile = db_hardware_profile
+        node.isIdle = False
+        node.addHostSession = add_host_session
+
+        return node
+
+    def _launch_instance(self, node_dict=None, node_spec=None):
+        """
+        Launch instance and wait for it to reach RUNNING state.
+
+        Block volumes are created before the launch request is issued;
+        secondary VNICs and volumes are attached while the instance is
+        provisioning and booting.  Created volumes are recorded in
+        'volume_ids' of node_dict.
+
+        :param node_dict: Dictionary
+        :param node_spec: Object
+        :return: Instance object
+        """
+
+        shard = self.__get_node_spec_shard(node_spec)
+
+        if 'node' in node_dict:
+            hostname, sep, domain = node_dict['node'].name.partition('.')
+
+            # A replacement launch gets its own hostname label (labels
+            # are unique within a subnet) and a matching host name
+            node_dict['node_name'] = hostname + \
+                node_dict.get('hostname_suffix', '') + sep + domain
+
+        session = OciSession(node_spec['configDict'])
+        session.config['metadata']['user_data'] = \
+            self.__get_user_data(
+                session.config,
+                node=node_dict.get('node'),
+                name=node_dict.get('node_name'),
+                includes=node_dict.setdefault('user_data_includes', []))
+
+        # TODO: this is a temporary workaround until the OciSession
+        # functionality is validated for this workflow
+        launch_config = session.launch_config
+
+        # TODO: make this work better.  Need to
+        # find a way of injecting this into the
+        # `get_node_vcpus` method.
+        self.__vcpus = session.config['vcpus'] if \
+            session.config['vcpus'] else \
+            session.cores_from_shape
+        log_adapter = self._get_log_adapter()
+
+        log_adapter.sampled(
+            logging.DEBUG, 'setting vcpus to %d', self.__vcpus)
+
+        if 'node' in node_dict:
+            log_adapter.debug(
+                'overriding instance name [%s]', node_dict['node_name'])
+
+            launch_config.display_name = node_dict['node_name']
+            launch_config.hostname_label = \
+                node_dict['node_name'].split('.', 1)[0]
+
+        vnic_specs = attachments.parse_vnic_specs(
+            session.config.get('secondary_vnics'))
+        volume_specs = attachments.parse_volume_specs(
+            session.config.get('block_volumes'))
+
+        orchestrator = self.__get_attachment_orchestrator(
+            session.config, shard) if vnic_specs or volume_specs else None
+
+        display_name = launch_config.display_name or \
+            node_spec['db_hardware_profile'].name
+
+        node_dict['launch_id'] = uuid.uuid4().hex
+
+        self.__update_inventory(
+            session.config, 'begin', node_dict['launch_id'],
+            name=node_dict['node'].name if 'node' in node_dict else None,
+            session=str(node_spec['add_host_session'])
+            if node_spec.get('add_host_session') else None,
+            hardware_profile=node_spec['db_hardware_profile'].name,
+            software_profile=node_spec['db_software_profile'].name
+            if node_spec['db_software_profile'] else None,
+            shape=session.config['shape'],
+            availability_domain=session.config['availability_domain'],
+            region=shard.region
+        )
+
+        if volume_specs:
+            node_dict['volume_ids'] = orchestrator.create_volumes(
+                session.config['compartment_id'],
+                session.config['availability_domain'],
+                volume_specs,
+                display_name
+            )
+
+        launch_started = time.time()
+
+        launch_instance = self.__launch_with_capacity_plan(
+            launch_config,
+            session.config,
+            node_dict,
+            node_spec.get('capacity_plan') or
+            capacity.CapacityPlan.from_config(session.config),
+            shard
+        )
+
+        instance_ocid = launch_instance.data.id
+
+        node_dict['instance_ocid'] = instance_ocid
+
+        self.__update_inventory(
+            session.config, 'update', node_dict['launch_id'],
+            instance_id=instance_ocid,
+            capacity_type=node_dict.get('capacity_type'))
+
+        log_adapter = self._get_log_adapter(instance_ocid)
+
+        log_adapter.debug('launched')
+
+        attach = gevent.spawn(
+            orchestrator.attach, instance_ocid, vnic_specs,
+            node_dict.get('volume_ids', []), volume_specs, display_name) \
+            if orchestrator else None
+
+        # Log state transitions; repeated polls in an unchanged state are
+        # sampled
+        last_state = [None]
+
+        # TODO: implement a timeout waiting for an instance to start; this
+        # will currently wait forever
+        # TODO: check for launch error
+        def logging_callback(instance, state):
+            if state != last_state[0]:
+                last_state[0] = state
+
+                log_adapter.debug('state: %s; waiting...', state)
+            else:
+                log_adapter.sampled(
+                    logging.DEBUG, 'state: %s; still waiting...', state)
+
+        try:
+            with gevent.Timeout(
+                    self.__get_running_timeout(session.config),
+                    TimeoutError):
+                if node_spec.get('state_watcher'):
+                    node_spec['state_watcher'].wait(
+                        instance_ocid, 'RUNNING', callback=logging_callback)
+                else:
+                    self._wait_for_instance_state(
+                        instance_ocid, 'RUNNING',
+                        callback=logging_callback, shard=shard)
+
+            log_adapter.debug('state: RUNNING')
+
+            self.__update_inventory(
+                session.config, 'update', node_dict['launch_id'],
+                state=inventory.RUNNING)
+
+            if attach is not None:
+                attach.get()
+
+                log_adapter.debug(
+                    'attached %d VNIC(s), %d volume(s)',
+                    len(vnic_specs), len(volume_specs))
+        finally:
+            if attach is not None:
+                attach.kill(block=False)
+
+        self.__get_launch_stats(session.config).record(
+            session.config['shape'],
+            session.config['availability_domain'],
+            time.time() - launch_started)
+
+        instance = shard.client('compute').get_instance(instance_ocid).data
+
+        self.__update_inventory(
+            session.config, 'update', node_dict['launch_id'],
+            image_id=getattr(instance, 'image_id', None),
+            tags=dict(getattr(instance, 'freeform_tags', None) or {}))
+
+        return instance
+
+    def __launch_with_capacity_plan(self, launch_config, config, node_dict,
+                                    capacity_plan, shard):
+        """
+        Issue launch request, trying capacity types in order of
+        preference.  Capacity types that run out are marked exhausted on
+        the (batch-wide) plan and the next type is tried.
+
+        :param launch_config: LaunchInstanceDetails
+        :param config: Dictionary
+        :param node_dict: Dictionary; 'capacity_type' is set on success
+        :param capacity_plan: CapacityPlan
+        :param shard: Shard to launch into
+        :return: launch_instance() response
+        :raises CapacityError: no capacity type left
+        """
+        preemptible_config = \
+            oci.core.models.PreemptibleInstanceConfigDetails(
+                preemption_action=oci.core.models.TerminatePreemptionAction(
+                    preserve_boot_volume=False))
+
+        for mode in capacity_plan.modes:
+            launch_config.capacity_reservation_id = \
+                config['capacity_reservation_id'] \
+                if mode == capacity.RESERVED else None
+
+            launch_config.preemptible_instance_config = preemptible_config \
+                if mode == capacity.PREEMPTIBLE else None
+
+            try:
+                response = self.__call_when_closed(
+                    shard.client('compute').launch_instance, launch_config)
+            except oci.exceptions.ServiceError as exc:
+                if not capacity.is_capacity_error(exc):
+                    raise
+
+                capacity_plan.exhaust(mode, exc.message)
+
+                self.getLogger().warning(
+                    'Capacity type [%s] exhausted: %s', mode, exc.message)
+
+                continue
+
+            node_dict['capacity_type'] = mode
+
+            return response
+
+        raise capacity.CapacityError(
+            'No capacity available; exhausted: %s' % (
+                ', '.join(capacity_plan.exhausted.keys())))
+
+    def __call_when_closed(self, func, *args, **kwargs):
+        """
+        Call API operation.  A call rejected by an open circuit waits
+        until the circuit lets a probe call through and is then retried,
+        so that a burst of failures does not fail the rest of a batch.
+        The wait is bounded by the launch timeout of the caller.
+
+        :param func: ShardClient method
+        :return: result of func
+        """
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except breaker.CircuitOpenError as exc:
+                self.getLogger().debug(
+                    '%s; retrying in %0.0f seconds', exc,
+                    max(exc.retry_after, 1))
+
+                gevent.sleep(max(exc.retry_after, 1))
+
+    def get_node_vcpus(self, name):
+        """
+        Return resolved number of VCPUs.
+
+        :param name: String node hostname
+        :return: Integer vcpus
+        """
+        return self.get_nodes_vcpus([name])[name]
+
+    def get_nodes_vcpus(self, names):
+        """
+        Return resolved number of VCPUs for many nodes, from the
+        in-memory instance cache index.
+
+        :param names: List String node hostnames
+        :return: Dictionary node hostname: Integer vcpus
+        """
+        entries = self.__get_instance_cache_index().get_many(names)
+
+        result = {}
+
+        for name in names:
+            vcpus = entries.get(name, {}).get('vcpus')
+
+            result[name] = int(vcpus) if vcpus else self.__vcpus
+
+        return result
+
+    def __get_instance_cache_index(self):
+        """
+        Instance cache index shared by all adapter instances in this
+        process.
+
+        :return: InstanceCacheIndex
+        """
+        cls = Oracleadapter
+
+        if cls._instance_cache_index is None:
+            cls._instance_cache_index = instancecache.InstanceCacheIndex(
+                self.__load_instance_cache)
+
+        return cls._instance_cache_index
+
+    def __load_instance_cache(self):
+        """
+        Read all instance cache entries belonging to OCI instances with a
+        single read of the instance cache.
+
+        :return: Dictionary node name: entry
+        """
+        cfg = self.instanceCacheRefresh()
+
+        result = {}
+
+        for name in cfg.sections():
+            entry = dict(cfg.items(name))
+
+            if entry.get('id', '').startswith('ocid1.instance'):
+                result[name] = entry
+
+        return result
+
+    def instanceCacheGet(self, nodeName):
+        """
+        Look up instance cache entry in the in-memory index.
+
+        :raises ResourceNotFound:
+        """
+        entry = self.__get_instance_cache_index().get(nodeName)
+
+        if entry is None:
+            raise ResourceNotFound(
+                'No instance cache entry for [{0}]'.format(nodeName))
+
+        return entry
+
+    def instanceCacheSet(self, name, metadata=None):
+        super(Oracleadapter, self).instanceCacheSet(name, metadata)
+
+        self.__get_instance_cache_index().set(name, metadata or {})
+
+    def instanceCacheDelete(self, name):
+        super(Oracleadapter, self).instanceCacheDelete(name)
+
+        self.__get_instance_cache_index().delete(name)
+
+    def _instance_post_launch(self, instance, node_dict=None, node_spec=None):
+        """
+        Called after instance has launched successfully.
+
+        :param instance: Oracle instance
+        :param node_dict: instance/node mapping dict
+        :param node_spec: instance launch specification
+        :return: Nodes object
+        """
+        result = self.__post_launch_batch(
+            [(instance, node_dict, node_spec)])[0]
+
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+    def __post_launch(self, instance, node_dict, node_spec):
+        """
+        Run post-launch actions, through the batch aggregator of the
+        launch batch if there is one.
+
+        :return: Nodes object
+        """
+        aggregator = node_spec.get('post_launch_aggregator')
+
+        if aggregator is None:
+            return self._instance_post_launch(
+                instance, node_dict=node_dict, node_spec=node_spec)
+
+        return aggregator.submit((instance, node_dict, node_spec))
+
+    def __get_post_launch_aggregator(self, config):
+        """
+        :param config: Dictionary
+        :return: BatchAggregator or None, if batching is disabled
+        """
+        window = config.get('post_launch_window_ms')
+
+        if window is None:
+            window = 500
+
+        if window <= 0:
+            return None
+
+        return batching.BatchAggregator(
+            self.__post_launch_batch,
+            window=window / 1000.0,
+            max_size=config.get('post_launch_batch_size') or 100
+        )
+
+    def __post_launch_batch(self, items):
+        """
+        Post-launch actions for a batch of instances.  Database changes
+        are committed once per database session, followed by one DNS
+        update for the batch, instance cache writes, host registration
+        and provisioned events.  A failure only affects the node it
+        occurred for.  The outcome of the batch is recorded in the launch
+        inventory in one transaction.
+
+        :param items: List of (instance, node_dict, node_spec)
+        :return: List of Nodes objects or exceptions, in order of items
+        """
+        results = [None] * len(items)
+        prepared = {}
+
+        self.__resolve_addresses(items)
+
+        for idx, (instance, node_dict, node_spec) in enumerate(items):
+            try:
+                prepared[idx] = self.__prepare_post_launch(
+                    instance, node_dict, node_spec)
+            except Exception as exc:
+                results[idx] = exc
+
+        for idx, exc in self.__commit_nodes(items, prepared).items():
+            del prepared[idx]
+            results[idx] = exc
+
+        if prepared:
+            # Nodes of the batch resolve before they are announced
+            self.__register_dns(
+                items[0][2]['configDict'],
+                [prepared[idx] for idx in sorted(prepared.keys())],
+                {
+                    prepared[idx].name:
+                    addressing.get_private_address(items[idx][1].get('vnics'))
+                    for idx in prepared
+                })
+
+        for step in (self.__cache_instance, self.__record_launch_telemetry,
+                     self.__register_node, self.__fire_provisioned_event):
+            for idx in sorted(prepared.keys()):
+                try:
+                    step(prepared[idx], *items[idx])
+                except Exception as exc:
+                    del prepared[idx]
+                    results[idx] = exc
+
+        for idx, node in prepared.items():
+            results[idx] = node
+
+        for idx, result in enumerate(results):
+            if isinstance(result, Exception):
+                self._get_log_adapter(items[idx][0].id).error(
+                    'Post-launch action failed: [%s]', result)
+
+        self.__update_inventory(items[0][2]['configDict'], 'update_many', [
+            (items[idx][1]['launch_id'],
+             {'state': inventory.FAILED, 'error': str(result)}
+             if isinstance(result, Exception) else
+             {'state': inventory.PROVISIONED, 'name': result.name})
+            for idx, result in enumerate(results)
+            if items[idx][1].get('launch_id')
+        ])
+
+        if len(items) > 1:
+            self.getLogger().debug(
+                'Post-launch batch: %d instance(s), %d succeeded',
+                len(items), len(prepared))
+
+        return results
+
+    def __prepare_post_launch(self, instance, node_dict, node_spec):
+        """
+        Create or update node for instance, without committing.
+
+        :return: Nodes object
+        """
+        log_adapter = self._get_log_adapter(instance.id)
+
+        log_adapter.debug('post-launch action')
+
+        if 'node' not in node_dict:
+            domain = self.installer_public_hostname.split('.')[1:]
+            fqdn = '.'.join([instance.display_name] + domain)
+
+            node = self.__initialize_node(
+                fqdn,
+                node_spec['db_hardware_profile'],
+                node_spec['db_software_profile'],
+                node_spec['add_host_session']
+            )
+
+            node_dict['node'] = node
+        else:
+            node = node_dict['node']
+
+        node_spec['db_session'].add(node)
+
+        node.state = state.NODE_STATE_PROVISIONED
+
+        # Secondary VNICs are attached by now
+        if node_dict.get('vnics') is None:
+            self.__resolve_addresses([(instance, node_dict, node_spec)])
+
+        node.nics = [
+            Nic(ip=ip, boot=boot)
+            for ip, boot in addressing.get_nic_addresses(
+                node_dict.get('vnics'),
+                node_spec['configDict'].get('address_mode') or
+                addressing.PRIVATE)
+        ]
+
+        return node
+
+    def __resolve_addresses(self, items):
+        """
+        Resolve the VNIC addresses of post-launch items with one batched
+        lookup per shard, storing them as node_dict['vnics'].  Items
+        whose lookup fails are left unresolved.
+
+        :param items: List of (instance, node_dict, node_spec)
+        :return: None
+        """
+        shards = {}
+
+        for instance, node_dict, node_spec in items:
+            shard = self.__get_node_spec_shard(node_spec)
+
+            shards.setdefault(id(shard), (shard, []))[1].append(
+                (instance, node_dict, node_spec))
+
+        for shard, shard_items in shards.values():
+            public = any(
+                (node_spec['configDict'].get('address_mode') or
+                 addressing.PRIVATE) != addressing.PRIVATE
+                for _, _, node_spec in shard_items)
+
+            resolver = addressing.VnicResolver(
+                shard.client('compute'), shard.client('network'))
+
+            try:
+                vnics = resolver.resolve(
+                    [instance for instance, _, _ in shard_items],
+                    public=public)
+            except Exception as exc:
+                self.getLogger().warning(
+                    'Unable to resolve addresses of %d instance(s): %s',
+                    len(shard_items), exc)
+
+                continue
+
+            for instance, node_dict, _ in shard_items:
+                node_dict['vnics'] = vnics.get(instance.id, [])
+
+            self.getLogger().debug(
+                'Resolved addresses of %d instance(s) with %d call(s)',
+                len(shard_items), resolver.calls)
+
+    def __commit_nodes(self, items, prepared):
+        """
+        Commit prepared nodes, once per database session.  If a batch
+        commit fails, nodes of that session are retried one at a time.
+
+        :return: Dictionary index: exception for nodes that failed
+        """
+        sessions = {}
+
+        for idx in prepared:
+            db_session = items[idx][2]['db_session']
+
+            sessions.setdefault(id(db_session), (db_session, []))[1].append(
+                idx)
+
+        failed = {}
+
+        for db_session, indexes in sessions.values():
+            try:
+                db_session.commit()
+
+                continue
+            except Exception as exc:
+                db_session.rollback()
+
+                self.getLogger().warning(
+                    'Batch commit of %d node(s) failed, retrying'
+                    ' individually: %s', len(indexes), exc)
+
+            for idx in indexes:
+                try:
+                    prepared[idx] = self.__prepare_post_launch(*items[idx])
+
+                    db_session.commit()
+                except Exception as exc:
+                    db_session.rollback()
+
+                    failed[idx] = exc
+
+        return failed
+
+    def __cache_instance(self, node, instance, node_dict, node_spec):
+        instance_cache = {
+            'id': instance.id,
+            'compartment_id': instance.compartment_id,
+            'shape': node_spec['configDict']['shape'],
+            'vcpus': str(node_spec['configDict']['shape'].split('.')[-1]),
+            'launch_time': str(int(
+                instance.time_created.timestamp()
+                if instance.time_created else time.time())),
+            'capacity_type': node_dict.get(
+                'capacity_type', capacity.ON_DEMAND),
+            'region': self.__get_node_spec_shard(node_spec).region,
+            'image_id': getattr(instance, 'image_id', None) or
+            node_spec['configDict'].get('image_id'),
+        }
+
+        if node_dict.get('vnics'):
+            instance_cache['private_ip'] = addressing.get_private_address(
+                node_dict['vnics'])
+
+        if node_dict.get('volume_ids'):
+            instance_cache['volume_ids'] = ' '.join(node_dict['volume_ids'])
+
+        if node_dict.get('user_data_includes'):
+            # Removed once the node checks in
+            instance_cache['user_data_include'] = ' '.join(
+                node_dict['user_data_includes'])
+
+        if node_spec.get('warm'):
+            instance_cache['warm_since'] = str(int(time.time()))
+            instance_cache['warm_profile'] = self.__get_warm_profile(
+                node_spec['db_hardware_profile'],
+                node_spec['db_software_profile'])
+
+        if node_dict.get('placement'):
+            # Cluster network placement group
+            instance_cache['cluster_network_id'] = \
+                node_dict['placement'].cluster_network_id
+            instance_cache['instance_pool_id'] = \
+                node_dict['placement'].instance_pool_id
+
+        self.instanceCacheSet(node.name, instance_cache)
+
+    def __record_launch_telemetry(self, node, instance, node_dict,
+                                  node_spec):
+        """
+        Record launch time of instance as the first provisioning phase;
+        the bootstrap script reports the remaining phases.
+        """
+        config = node_spec['configDict']
+
+        if not config.get('bootstrap_telemetry'):
+            return
+
+        try:
+            self.__get_telemetry_store(config).record({
+                'instance_id': instance.id,
+                'image_id': config['image_id'],
+                'shape': config['shape'],
+                'node': node.name,
+                'phase': 'launched',
+                'timestamp': instance.time_created.timestamp()
+                if instance.time_created else time.time(),
+            })
+        except Exception as exc:
+            # Telemetry must not fail the launch
+            self._get_log_adapter(instance.id).warning(
+                'Unable to record launch telemetry: %s', exc)
+
+    def __get_telemetry_store(self, config=None):
+        config = config or self.getResourceAdapterConfig()
+
+        return telemetry.TelemetryStore(
+            config.get('bootstrap_telemetry_dir') or
+            os.path.join(self._cm.getRoot(), 'var', 'oci-telemetry'))
+
+    def get_node_bootstrap_telemetry(self, name):
+        """
+        Provisioning phase timestamps and durations of a node.
+
+        :param name: String node name
+        :return: Dictionary with 'phases' and 'durations', or None
+        :raises ResourceNotFound: node not in instance cache
+        """
+        record = self.__get_telemetry_store().get(
+            self.instanceCacheGet(name)['id'])
+
+        if record is None:
+            return None
+
+        record['durations'] = telemetry.phase_durations(record)
+
+        return record
+
+    def get_bootstrap_telemetry_summary(self):
+        """
+        Provisioning phase durations aggregated per image and shape,
+        showing which part of provisioning is slow.
+
+        :return: Dictionary '<image_id>/<shape>': statistics
+        """
+        return telemetry.summarize(self.__get_telemetry_store().records())
+
+    def __get_dns_backend(self, config):
+        """
+        DNS backend selected by 'dns_backend', shared by all adapter
+        instances: 'oci' (OCI DNS, private view 'dns_view_id' if set),
+        'memory' or a 'package.module:ClassName' reference.
+
+        :param config: Dictionary
+        :return: DnsBackend or None, if DNS registration is disabled
+        """
+        name = config.get('dns_backend')
+
+        if not name:
+            return None
+
+        key = (name, self.__region, config.get('dns_view_id'),
+               config.get('dns_ttl'))
+
+        backend = self._dns_backends.get(key)
+
+        if backend is None:
+            if name == 'oci':
+                backend = privatedns.OciDnsBackend(
+                    self.__get_shard().client('dns'),
+                    ttl=config.get('dns_ttl') or 300,
+                    scope='PRIVATE' if config.get('dns_view_id') else None,
+                    view_id=config.get('dns_view_id')
+                )
+            else:
+                backend = privatedns.load_backend(name, config)
+
+            self._dns_backends[key] = backend
+
+        return backend
+
+    def __get_private_ips(self, nodes, entries=None):
+        """
+        Private IP of the primary VNIC of nodes, from the instance cache.
+        Entries cached without one fall back to the first private NIC
+        address, boot NIC first.
+
+        :param nodes: List Nodes objects
+        :param entries: Dictionary node name: instance cache entry; by
+                        default looked up by node name
+        :return: Dictionary node name: String IP or None
+        """
+        if entries is None:
+            entries = self.__get_instance_cache_index().get_many(
+                [node.name for node in nodes])
+
+        result = {}
+
+        for node in nodes:
+            result[node.name] = entries.get(node.name, {}).get('private_ip')
+
+            if result[node.name]:
+                continue
+
+            for nic in sorted(node.nics, key=lambda nic: not nic.boot):
+                if nic.ip and ipaddress.ip_address(nic.ip).is_private:
+                    result[node.name] = nic.ip
+
+                    break
+
+        return result
+
+    def __get_dns_records(self, config, nodes, private_ips=None):
+        """
+        A and PTR records for the private IP of the primary VNIC of
+        nodes.  The zone is resolved inside the VCN, so the private IP
+        is registered whatever the address mode.
+
+        :param nodes: List Nodes objects
+        :param private_ips: Dictionary node name: String IP; by default
+                            looked up with __get_private_ips()
+        :return: List DnsRecord
+        """
+        if private_ips is None:
+            private_ips = self.__get_private_ips(nodes)
+
+        hosts = [
+            (node.name, private_ips[node.name])
+            for node in nodes if private_ips.get(node.name)
+        ]
+
+        return privatedns.make_records(
+            hosts,
+            config.get('dns_zone') or self.private_dns_zone,
+            config.get('dns_reverse_zone')
+        )
+
+    def __register_dns(self, config, nodes, private_ips=None):
+        """
+        Register A and PTR records of a post-launch batch with one
+        backend update.  Failures are logged; they do not fail nodes.
+
+        :param config: Dictionary
+        :param nodes: List Nodes objects
+        :param private_ips: Dictionary node name: String IP (optional)
+        :return: None
+        """
+        try:
+            backend = self.__get_dns_backend(config)
+
+            if backend is None:
+                return
+
+            records = self.__get_dns_records(config, nodes, private_ips)
+
+            if records:
+                backend.add(records)
+        except Exception as exc:
+            self.getLogger().warning(
+                'Unable to register DNS records of %d node(s): %s',
+                len(nodes), exc)
+
+    def __deregister_dns(self, config, nodes, private_ips=None):
+        """
+        Remove A and PTR records of deleted nodes with one backend
+        update.
+
+        :param config: Dictionary
+        :param nodes: List Nodes objects
+        :param private_ips: Dictionary node name: String IP (optional)
+        :return: None
+        """
+        try:
+            backend = self.__get_dns_backend(config)
+
+            if backend is None:
+                return
+
+            records = self.__get_dns_records(config, nodes, private_ips)
+
+            if records:
+                backend.remove(records)
+        except Exception as exc:
+            self.getLogger().warning(
+                'Unable to remove DNS records of %d node(s): %s',
+                len(nodes), exc)
+
+    def __register_node(self, node, instance, node_dict, node_spec):
+        ip = [nic for nic in node.nics if nic.boot][0].ip
+
+        self._pre_add_host(
+            node.name,
+            node.hardwareprofile.name,
+            node.softwareprofile.name,
+            ip)
+
+    def __fire_provisioned_event(self, node, instance, node_dict, node_spec):
+        self._get_log_adapter(instance.id).debug(
+            '_instance_post_launch(): node=[%s]', node)
 
         self.fire_provisioned_event(node)
 
-        return node
+    def __get_common_user_data_settings(self, config, node=None):
+        """
+        Format resource adapters for the bootstrap
+        template.
+
+        :param config: Dictionary
+        :param node: Node instance
+        :return: Dictionary
+        """
+        installer_ip = self.__get_installer_ip(
+            hardwareprofile=node.hardwareprofile if node else None)
+
+        settings_dict = {
+            'installerHostName': self.installer_public_hostname,
+            'installerIp': '\'{0}\''.format(installer_ip)
+                           if installer_ip else 'None',
+            'adminport': self._cm.getAdminPort(),
+            'cfmuser': self._cm.getCfmUser(),
+            'cfmpassword': self._cm.getCfmPassword(),
+            'override_dns_domain': str(config['override_dns_domain']),
+            'dns_options': '\'{0}\''.format(config['dns_options'])
+                           if config['dns_options'] else None,
+            'dns_search': '\'{0}\''.format(config['dns_search'])
+                          if config['dns_search'] else None,
+            'dns_nameservers': self.__get_encoded_list(
+                config['dns_nameservers']),
+            'telemetryUrl': '\'{0}\''.format(
+                self.__get_telemetry_url(config, installer_ip))
+                if config.get('bootstrap_telemetry') else 'None',
+        }
+
+        return settings_dict
+
+    def __get_telemetry_url(self, config, installer_ip=None):
+        """
+        URL of the bootstrap telemetry endpoint on the installer.
+
+        :param config: Dictionary
+        :param installer_ip: String (optional)
+        :return: String
+        """
+        if config.get('bootstrap_telemetry_url'):
+            return config['bootstrap_telemetry_url']
+
+        return 'http://%s:%d/' % (
+            installer_ip or self.installer_public_hostname,
+            telemetry.DEFAULT_PORT)
+
+    def __get_common_user_data_content(self, settings_dict):
+        """
+        Create header for bootstrap file.
+
+        :param settings_dict: Dictionary
+        :return: String
+        """
+        result = """\
+installerHostName = '%(installerHostName)s'
+installerIpAddress = %(installerIp)s
+port = %(adminport)d
+cfmUser = '%(cfmuser)s'
+cfmPassword = '%(cfmpassword)s'
+
+# DNS resolution settings
+override_dns_domain = %(override_dns_domain)s
+dns_options = %(dns_options)s
+dns_search = %(dns_search)s
+dns_nameservers = %(dns_nameservers)s
+
+# Bootstrap phase reporting
+telemetryUrl = %(telemetryUrl)s
+""" % settings_dict
+
+        return result
+
+    def __render_user_data_script(self, config, settings_dict):
+        """
+        Render bootstrap template.  Rendered scripts are cached by
+        template path, modification time and settings.
+
+        :param config: Dictionary
+        :param settings_dict: Dictionary
+        :return: String
+        """
+        template = config['user_data_script_template']
+
+        key = (
+            'script',
+            template,
+            os.path.getmtime(template),
+            tuple(sorted((k, str(v)) for k, v in settings_dict.items())),
+        )
+
+        result = self._user_data_cache.get(key)
+        if result is not None:
+            return result
+
+        self.getLogger().info(
+            'Using cloud-init script template [%s]', template)
+
+        with open(template) as fp:
+            result = ''
+
+            for line in fp.readlines():
+                if line.startswith('### SETTINGS'):
+                    result += self.__get_common_user_data_content(
+                        settings_dict)
+                else:
+                    result += line
+
+        self._user_data_cache.set(key, result)
+
+        return result
+
+    def __get_user_data(self, config, node=None, name=None, includes=None):
+        """
+        Compile the cloud-init payload from bootstrap template, gzip
+        compress it and encode into base64.
+
+        Payloads exceeding 'user_data_max_size' are published on the
+        installer internal web server and referenced through a
+        cloud-init '#include' URL when 'user_data_include' is enabled.
+        Each call publishes its own file.
+
+        :param config: Dictionary
+        :param node: Node instance
+        :param name: String host name of the instance, if not the node
+                     name (optional)
+        :param includes: List receiving the published file name of a
+                         single launch; without it, the file is kept as
+                         a template (instance configurations)
+        :return: String
+        """
+        settings_dict = self.__get_common_user_data_settings(config, node)
+
+        script = self.__render_user_data_script(config, settings_dict)
+
+        fqdn = (name or node.name) \
+            if node and not config.get('use_instance_hostname', True) \
+            else None
+
+        compress = config.get('user_data_compress', True)
+
+        key = ('user_data', script, fqdn, compress)
+
+        result = self._user_data_cache.get(key)
+        if result is not None:
+            return result
+
+        data = userdata.compress_payload(
+            userdata.build_payload(script, fqdn=fqdn), compress=compress)
+
+        result = userdata.encode(data)
+
+        max_size = config.get('user_data_max_size') or \
+            userdata.DEFAULT_MAX_SIZE
+
+        if len(result) > max_size:
+            if not config.get('user_data_include'):
+                raise userdata.UserDataSizeError(
+                    'Encoded user-data is %d bytes, exceeding budget of %d'
+                    ' bytes; enable \'user_data_include\' or reduce size'
+                    ' of [%s]' % (
+                        len(result),
+                        max_size,
+                        config['user_data_script_template']
+                    )
+                )
+
+            # Not cached: every launch gets its own file
+            return self.__get_include_user_data(
+                config, data, compress, includes)
+
+        self._get_log_adapter().sampled(
+            logging.DEBUG, 'Encoded user-data size: %d bytes', len(result))
+
+        self._user_data_cache.set(key, result)
+
+        return result
+
+    def __get_include_directory(self):
+        return os.path.join(self._cm.getRoot(), 'www_int', 'oci-user-data')
+
+    def __remove_include_files(self, filenames):
+        """
+        :param filenames: List String include file names (optional)
+        :return: None
+        """
+        if filenames:
+            userdata.remove_include_files(
+                filenames, self.__get_include_directory())
+
+    def __get_include_user_data(self, config, data, compress, includes):
+        """
+        Publish user-data blob on the installer internal web server and
+        return encoded '#include' user-data referencing it.
+
+        :param config: Dictionary
+        :param data: Bytes user-data blob
+        :param compress: Boolean
+        :param includes: List receiving the file name (optional)
+        :return: String
+        """
+        filename = userdata.write_include_file(
+            data, self.__get_include_directory(),
+            suffix='' if includes is not None else '.template')
+
+        if includes is not None:
+            includes.append(filename)
+
+        base_url = config.get('user_data_include_url') or \
+            '%s/oci-user-data' % (
+                self._cm.getIntWebRootUrl(self.installer_public_hostname))
+
+        url = '%s/%s' % (base_url.rstrip('/'), filename)
+
+        self.getLogger().info(
+            'User-data exceeds size budget; using include URL [%s/...]',
+            base_url.rstrip('/'))
+
+        return userdata.encode(
+            userdata.compress_payload(
+                userdata.include_payload(url), compress=compress))
+
+    def deleteNode(self, dbNodes):
+        """
+        Delete a node from the infrastructure.
+
+        :param dbNodes: List Nodes object
+        :return: None
+        """
+        self._profiler = self.__get_profiler('delete')
+
+        try:
+            config = self.getResourceAdapterConfig()
+
+            self.__record_deletes(dbNodes)
+
+            # Nodes to be parked keep their instance and volumes
+            parking = self.__get_parkable_nodes(config, dbNodes)
+
+            terminating = [
+                node for node in dbNodes if node.name not in parking]
+
+            self.__update_inventory(
+                config, 'terminate', [node.name for node in terminating])
+
+            volumes = self.__get_node_volumes(terminating)
+
+            # Instance cache entries go with their instances
+            private_ips = self.__get_private_ips(dbNodes)
+
+            self.__delete_watchers = {}
+
+            try:
+                self._async_delete_nodes(dbNodes)
+            finally:
+                self.__delete_watchers = None
+
+            # Volumes are detached once their instances are terminated
+            gevent.joinall([
+                gevent.spawn(self.__delete_volumes, volume_ids, config,
+                             shard)
+                for shard, volume_ids in volumes.values()
+            ])
+
+            self.__deregister_dns(config, dbNodes, private_ips)
+
+            if parking:
+                self.release_parked_nodes()
+        finally:
+            self._profiler.dump()
+
+        self.getLogger().info('%d node(s) deleted', len(dbNodes))
+
+    def __get_node_volumes(self, dbNodes):
+        """
+        Block volumes of nodes, from the instance cache, grouped by
+        shard so they can be deleted in one pass per shard.
+
+        :param dbNodes: List Nodes objects
+        :return: Dictionary shard key: (Shard, List String volume OCIDs)
+        """
+        result = {}
+
+        entries = self.__get_instance_cache_index().get_many(
+            [node.name for node in dbNodes])
+
+        for entry in entries.values():
+            if not entry.get('volume_ids'):
+                continue
+
+            shard = self.__get_instance_shard(entry)
+
+            result.setdefault(shard.key, (shard, []))[1].extend(
+                entry['volume_ids'].split())
+
+        return result
+
+    def __get_inventory(self, config):
+        """
+        Local launch inventory queried by the 'oci-inventory' command,
+        shared by all adapter instances in this process.
+
+        :return: Inventory or None, if disabled
+        """
+        if not config.get('inventory', True):
+            return None
+
+        path = config.get('inventory_file') or os.path.join(
+            self._cm.getRoot(), 'var', 'oci-inventory.db')
+
+        index = self._inventories.get(path)
+
+        if index is None:
+            index = self._inventories[path] = inventory.Inventory(path)
+
+        return index
+
+    def __update_inventory(self, config, method, *args, **kwargs):
+        """
+        Apply a change to the launch inventory.  Failures are logged;
+        they never affect launches or deletions.
+
+        :param config: Dictionary
+        :param method: String Inventory method name
+        """
+        try:
+            index = self.__get_inventory(config)
+
+            if index is not None:
+                getattr(index, method)(*args, **kwargs)
+        except Exception as exc:
+            self.getLogger().warning(
+                'Unable to update launch inventory: %s', exc)
+
+    def __get_request_history(self, config):
+        """
+        Add/delete node request history shared by all adapter instances
+        in this process, initially loaded from 'request_history_file'.
+
+        :return: RequestHistory
+        """
+        cls = Oracleadapter
+
+        if cls._request_history is None:
+            history = forecast.RequestHistory()
+            history.load(self.__get_request_history_path(config))
+
+            cls._request_history = history
+
+        return cls._request_history
+
+    def __get_request_history_path(self, config):
+        return config.get('request_history_file') or os.path.join(
+            self._cm.getRoot(), 'var', 'oci-request-history.json')
+
+    def __save_request_history(self, config):
+        try:
+            self.__get_request_history(config).save(
+                self.__get_request_history_path(config))
+        except EnvironmentError as exc:
+            self.getLogger().warning(
+                'Unable to save request history: %s', exc)
+
+    def __record_request(self, config, profile, added=0, deleted=0):
+        if not config.get('request_history', True):
+            return
+
+        self.__get_request_history(config).record(
+            profile, added=added, deleted=deleted)
+
+        self.__save_request_history(config)
+
+    def __record_deletes(self, dbNodes):
+        """
+        Record deleted nodes per hardware profile, and charge the warm
+        time of unclaimed warm nodes to the pre-scaling budget.
+        """
+        config = self.getResourceAdapterConfig()
+
+        if not config.get('request_history', True):
+            return
+
+        history = self.__get_request_history(config)
+
+        entries = self.__get_instance_cache_index().get_many(
+            [node.name for node in dbNodes])
+
+        deleted = defaultdict(int)
+
+        for node in dbNodes:
+            profile = node.hardwareprofile.name
+
+            deleted[profile] += 1
+
+            warm_since = entries.get(node.name, {}).get('warm_since')
+
+            if warm_since:
+                history.charge(
+                    profile, (time.time() - float(warm_since)) / 3600.0)
+
+        for profile, count in deleted.items():
+            history.record(profile, deleted=count)
+
+        self.__save_request_history(config)
+
+    @staticmethod
+    def __get_warm_profile(db_hardware_profile, db_software_profile):
+        return '%s/%s' % (
+            db_hardware_profile.name,
+            db_software_profile.name if db_software_profile else '')
+
+    def __get_warm_node_entries(self, db_hardware_profile,
+                                db_software_profile):
+        """
+        :return: List of (String node name, Dictionary cache entry) of
+                 unclaimed warm nodes, oldest first
+        """
+        warm_profile = self.__get_warm_profile(
+            db_hardware_profile, db_software_profile)
+
+        entries = self.__get_instance_cache_index().find(
+            lambda entry: entry.get('warm_since') and
+            entry.get('warm_profile') == warm_profile)
+
+        return sorted(entries.items(),
+                      key=lambda item: float(item[1]['warm_since']))
+
+    def __claim_warm_nodes(self, db_session, db_hardware_profile,
+                           db_software_profile, count):
+        """
+        Hand up to 'count' warm nodes launched by prescale() to the
+        current request.
+
+        :return: List Nodes objects
+        """
+        entries = self.__get_warm_node_entries(
+            db_hardware_profile, db_software_profile)[:count]
+
+        if not entries:
+            return []
+
+        config = self.getResourceAdapterConfig()
+
+        history = self.__get_request_history(config) \
+            if config.get('request_history', True) else None
+
+        nodes = {
+            node.name: node for node in db_session.query(Node).filter(
+                Node.name.in_([name for name, _ in entries]))
+        }
+
+        now = time.time()
+
+        result = []
+
+        for name, entry in entries:
+            warm_since = float(entry['warm_since'])
+
+            entry['warm_since'] = ''
+
+            self.instanceCacheSet(name, entry)
+
+            if history is not None:
+                history.charge(db_hardware_profile.name,
+                               (now - warm_since) / 3600.0)
+
+            node = nodes.get(name)
+
+            if node is None:
+                # Deleted since it was launched
+                continue
+
+            node.addHostSession = self.addHostSession
+
+            result.append(node)
+
+        db_session.commit()
+
+        if history is not None:
+            self.__save_request_history(config)
+
+        self.getLogger().info(
+            'Claimed %d warm node(s) for request of %d', len(result), count)
+
+        return result
+
+    def get_hardware_profile_config(self, db_hardware_profile):
+        """
+        Resource adapter configuration profile of a hardware profile,
+        for nodes added outside of an add nodes request.
+
+        :param db_hardware_profile: HardwareProfile object
+        :return: Dictionary
+        """
+        profile = getattr(
+            db_hardware_profile, 'default_resource_adapter_config', None)
+
+        if profile is None:
+            return self.getResourceAdapterConfig()
+
+        return self.getResourceAdapterConfig(profile.name)
+
+    def get_prescale_plan(self, db_hardware_profile, db_software_profile=None,
+                          now=None, config=None):
+        """
+        Forecast node requests for a hardware profile over the next
+        'prescale_lead_time' seconds from recorded history, and determine
+        how many warm nodes to launch within 'prescale_max_nodes' and the
+        daily 'prescale_budget' of warm node hours.
+
+        :param db_hardware_profile: HardwareProfile object
+        :param db_software_profile: SoftwareProfile object (optional)
+        :param now: Number seconds since the epoch (optional)
+        :param config: Dictionary; by default the configuration profile
+                       of the hardware profile
+        :return: Dictionary with 'forecast', 'warm', 'spent' and 'launch'
+        """
+        config = config or self.get_hardware_profile_config(
+            db_hardware_profile)
+
+        now = time.time() if now is None else now
+
+        history = self.__get_request_history(config)
+
+        planner = forecast.WarmPoolPlanner(
+            max_nodes=config.get('prescale_max_nodes', 10),
+            budget=config.get('prescale_budget', 24),
+            lead_time=config.get('prescale_lead_time') or 1800
+        )
+
+        expected = forecast.SeasonalForecaster(history).forecast(
+            db_hardware_profile.name, now, planner.lead_time)
+
+        warm = len(self.__get_warm_node_entries(
+            db_hardware_profile, db_software_profile))
+
+        spent = history.spent(db_hardware_profile.name, now)
+
+        return {
+            'forecast': round(expected, 2),
+            'warm': warm,
+            'spent': round(spent, 2),
+            'launch': planner.plan(expected, warm, spent),
+        }
 
-    def __get_instance_public_ips(self, instance_id, compartment_id):
+    def prescale(self, dbSession, dbHardwareProfile, dbSoftwareProfile=None,
+                 now=None):
         """
-        Get public IP from the attached VNICs.
+        Launch warm nodes ahead of forecast demand, when 'prescale' is
+        enabled in the configuration profile of the hardware profile.
+        Called periodically by the oci-maintenance command.  Warm nodes
+        are claimed by the next start() for the same hardware and
+        software profile; unclaimed ones are released by the idle node
+        scale-down policy.
+
+        :param dbSession: Database session
+        :param dbHardwareProfile: HardwareProfile object
+        :param dbSoftwareProfile: SoftwareProfile object (optional)
+        :param now: Number seconds since the epoch (optional)
+        :return: List Nodes objects launched
+        """
+        config = self.get_hardware_profile_config(dbHardwareProfile)
+
+        if not config.get('prescale'):
+            return []
 
-        :param instance_id: String instance id
-        :param compartment_id: String compartment id
-        :return: Generator String IPs
+        plan = self.get_prescale_plan(
+            dbHardwareProfile, dbSoftwareProfile, now=now, config=config)
+
+        if not plan['launch']:
+            return []
+
+        self.getLogger().info(
+            'Pre-scaling [%s]: %s node(s) expected, %d warm, launching %d',
+            dbHardwareProfile.name, plan['forecast'], plan['warm'],
+            plan['launch'])
+
+        return self.__add_nodes(
+            {'count': plan['launch']}, dbSession, dbHardwareProfile,
+            dbSoftwareProfile, warm=True, config=config)
+
+    @staticmethod
+    def __can_park(config, instance_cache):
         """
-        for vnic in self.__get_vnics_for_instance(instance_id, compartment_id):
-            attached_vnic = self.__net_client.get_vnic(vnic.vnic_id)
-            if attached_vnic:
-                yield attached_vnic.data.public_ip
+        Determine whether a deleted node is parked (stopped) rather than
+        terminated.  Cluster network and preemptible instances cannot be
+        stopped.
 
-    def __get_instance_private_ips(self, instance_id, compartment_id):
+        :param config: Dictionary
+        :param instance_cache: Dictionary instance cache entry
+        :return: Boolean
         """
-        Get private IP from the attached VNICs.
+        return bool(
+            config.get('hibernate') and
+            instance_cache and
+            not instance_cache.get('instance_pool_id') and
+            not instance_cache.get('preempted') and
+            instance_cache.get('capacity_type') != capacity.PREEMPTIBLE
+        )
 
-        :param instance_id: String instance id
-        :param compartment_id: String compartment id
-        :return: Generator String IPs
+    def __get_parkable_nodes(self, config, dbNodes):
         """
-        for vnic in self.__get_vnics_for_instance(instance_id, compartment_id):
-            attached_vnic = self.__net_client.get_vnic(vnic.vnic_id)
-            if attached_vnic:
-                yield attached_vnic.data.private_ip
+        :return: Set String names of nodes to be parked
+        """
+        if not config.get('hibernate'):
+            return set()
+
+        entries = self.__get_instance_cache_index().get_many(
+            [node.name for node in dbNodes])
+
+        return {
+            name for name, entry in entries.items()
+            if self.__can_park(config, entry)
+        }
 
-    def __get_vnics_for_instance(self, instance_id, compartment_id):
+    def __park_instance(self, node, instance_cache, shard):
         """
-        Get all VNICs attached to instance.
+        Stop the instance of a deleted node and keep its instance cache
+        entry, with the name, addresses and profiles of the node, so a
+        later start() can resume it.  The entry moves to a key derived
+        from the instance OCID, freeing the node name.
 
-        :param instance_id: String instance id
-        :param compartment_id: String compartment id
-        :return: Generator VNIC objects
+        :return: Boolean True if parked
         """
-        for vnic in self.__get_vnics(compartment_id):
-            if vnic.instance_id == instance_id \
-                    and vnic.lifecycle_state == 'ATTACHED':
-                yield vnic
+        log_adapter = self._get_log_adapter(instance_cache['id'])
+
+        log_adapter.debug('Stopping...')
+
+        try:
+            shard.client('compute').instance_action(
+                instance_cache['id'], 'STOP')
+
+            self._wait_for_instance_state(
+                instance_cache['id'], 'STOPPED', shard=shard)
+        except Exception as exc:
+            log_adapter.warning(
+                'Unable to park instance, terminating: %s', exc)
+
+            return False
+
+        nics = sorted(node.nics, key=lambda nic: not nic.boot)
+
+        instance_cache.update(
+            name=node.name,
+            parked_since=str(int(time.time())),
+            parked_profile=self.__get_warm_profile(
+                node.hardwareprofile, node.softwareprofile),
+            parked_nics=' '.join(nic.ip for nic in nics if nic.ip),
+            warm_since='',
+        )
+
+        self.instanceCacheSet(
+            hibernation.parked_key(instance_cache['id']), instance_cache)
+
+        self.instanceCacheDelete(node.name)
 
-    def __get_vnics(self, compartment_id):
+        log_adapter.info('Parked node [%s]', node.name)
+
+        return True
+
+    def get_parked_nodes(self):
         """
-        Get VNICs in compartment.
+        :return: Dictionary key: instance cache entry, of parked nodes;
+                 see hibernation.parked_name() for the node name
+        """
+        return self.__get_instance_cache_index().find(
+            lambda entry: entry.get('parked_since'))
 
-        :param compartment_id: String id
-        :return: List VNIC objects
+    def __take_parked_nodes(self, entries):
+        """
+        Clear the parked flag of entries, so concurrent requests do not
+        resume or release the same instances.
         """
-        vnics = self.__client.list_vnic_attachments(compartment_id)
+        for key, entry in entries:
+            entry['parked_since'] = ''
 
-        return vnics.data
+            self.instanceCacheSet(key, entry)
 
-    def __get_common_user_data_settings(self, config, node=None):
+    def __resume_parked_nodes(self, db_session, db_hardware_profile,
+                              db_software_profile, count):
         """
-        Format resource adapters for the bootstrap
-        template.
+        Resume up to 'count' parked nodes of the hardware and software
+        profile, starting their instances in bulk.  Resumed nodes have
+        completed bootstrap before they were parked and are not
+        bootstrapped again.
 
-        :param config: Dictionary
-        :param node: Node instance
-        :return: Dictionary
+        :return: List Nodes objects
         """
-        installer_ip = self.__get_installer_ip(
-            hardwareprofile=node.hardwareprofile if node else None)
+        config = self.getResourceAdapterConfig()
 
-        settings_dict = {
-            'installerHostName': self.installer_public_hostname,
-            'installerIp': '\'{0}\''.format(installer_ip)
-                           if installer_ip else 'None',
-            'adminport': self._cm.getAdminPort(),
-            'cfmuser': self._cm.getCfmUser(),
-            'cfmpassword': self._cm.getCfmPassword(),
-            'override_dns_domain': str(config['override_dns_domain']),
-            'dns_options': '\'{0}\''.format(config['dns_options'])
-                           if config['dns_options'] else None,
-            'dns_search': '\'{0}\''.format(config['dns_search'])
-                          if config['dns_search'] else None,
-            'dns_nameservers': self.__get_encoded_list(
-                config['dns_nameservers']),
-        }
+        if not config.get('hibernate') or count <= 0:
+            return []
 
-        return settings_dict
+        resumable, _ = hibernation.split_parked(
+            self.get_parked_nodes(),
+            self.__get_warm_profile(db_hardware_profile, db_software_profile),
+            time.time(),
+            config.get('hibernate_max_idle')
+        )
 
-    def __get_common_user_data_content(self, settings_dict):
+        # Nodes launched since parking may have taken the name of a
+        # parked node; its instance cannot be resumed under that name
+        in_use = self.__get_instance_cache_index().get_many([
+            hibernation.parked_name(key, entry)
+            for key, entry in resumable
+        ])
+
+        names = set()
+        conflicts = []
+
+        for key, entry in list(resumable):
+            name = hibernation.parked_name(key, entry)
+
+            if name in names or name != key and name in in_use:
+                resumable.remove((key, entry))
+
+                conflicts.append((key, entry))
+            else:
+                names.add(name)
+
+        if conflicts:
+            self.__take_parked_nodes(conflicts)
+
+            self.getLogger().info(
+                'Releasing %d parked node(s) whose name is in use',
+                len(conflicts))
+
+            gevent.joinall([
+                gevent.spawn(self.__release_parked_node, key, entry, config)
+                for key, entry in conflicts
+            ])
+
+        resumable = resumable[:count]
+
+        if not resumable:
+            return []
+
+        self.__take_parked_nodes(resumable)
+
+        shards = {}
+
+        for key, entry in resumable:
+            shard = self.__get_instance_shard(entry)
+
+            shards.setdefault(shard.key, (shard, []))[1].append(
+                (key, entry))
+
+        greenlets = [
+            gevent.spawn(self.__resume_instances, shard, entries, config)
+            for shard, entries in shards.values()
+        ]
+
+        gevent.joinall(greenlets)
+
+        failed = {}
+
+        for greenlet in greenlets:
+            failed.update(greenlet.value)
+
+        resumed = []
+
+        for key, entry in resumable:
+            name = hibernation.parked_name(key, entry)
+
+            if not entry.get('parked_nics'):
+                failed.setdefault(key, 'no addresses recorded')
+
+            if key in failed:
+                self._get_log_adapter(entry['id']).warning(
+                    'Unable to resume node [%s]: %s', name, failed[key])
+
+                self.__release_parked_node(key, entry, config)
+
+                continue
+
+            node = self.__initialize_node(
+                name, db_hardware_profile, db_software_profile,
+                self.addHostSession)
+
+            node.state = state.NODE_STATE_INSTALLED
+
+            node.nics = [
+                Nic(ip=ip, boot=idx == 0)
+                for idx, ip in enumerate(entry['parked_nics'].split())
+            ]
+
+            db_session.add(node)
+
+            resumed.append((node, key, entry))
+
+        try:
+            db_session.commit()
+        except Exception as exc:
+            db_session.rollback()
+
+            self.getLogger().error(
+                'Unable to add %d resumed node(s): %s', len(resumed), exc)
+
+            for _, key, entry in resumed:
+                self.__release_parked_node(key, entry, config)
+
+            return []
+
+        self.__register_dns(
+            config, [node for node, _, _ in resumed],
+            self.__get_private_ips(
+                [node for node, _, _ in resumed],
+                {node.name: entry for node, _, entry in resumed}))
+
+        for node, key, entry in resumed:
+            for field in ('name', 'parked_since', 'parked_profile',
+                          'parked_nics'):
+                entry.pop(field, None)
+
+            # Billing restarts with the instance
+            entry['launch_time'] = str(int(time.time()))
+
+            self.instanceCacheSet(node.name, entry)
+
+            if key != node.name:
+                self.instanceCacheDelete(key)
+
+            self._pre_add_host(
+                node.name,
+                node.hardwareprofile.name,
+                node.softwareprofile.name,
+                node.nics[0].ip)
+
+            self.fire_provisioned_event(node)
+
+        self.getLogger().info(
+            'Resumed %d parked node(s) for request of %d', len(resumed),
+            count)
+
+        return [node for node, _, _ in resumed]
+
+    def __resume_instances(self, shard, entries, config):
         """
-        Create header for bootstrap file.
+        Start parked instances of one shard.
 
-        :param settings_dict: Dictionary
-        :return: String
+        :param entries: List of (String key, Dictionary entry)
+        :return: Dictionary key: exception, for nodes that failed
         """
-        result = """\
-installerHostName = '%(installerHostName)s'
-installerIpAddress = %(installerIp)s
-port = %(adminport)d
-cfmUser = '%(cfmuser)s'
-cfmPassword = '%(cfmpassword)s'
+        orchestrator = hibernation.ResumeOrchestrator(
+            shard.client('compute'),
+            sleep=gevent.sleep,
+            interval=config.get('state_poll_interval') or 5,
+            timeout=config.get('resume_timeout') or 600,
+            clock=time.time
+        )
 
-# DNS resolution settings
-override_dns_domain = %(override_dns_domain)s
-dns_options = %(dns_options)s
-dns_search = %(dns_search)s
-dns_nameservers = %(dns_nameservers)s
-""" % settings_dict
+        try:
+            results = orchestrator.resume(
+                [(entry['id'], entry['compartment_id'])
+                 for _, entry in entries])
+        except Exception as exc:
+            return {key: exc for key, _ in entries}
 
-        return result
+        return {
+            key: results[entry['id']] for key, entry in entries
+            if results.get(entry['id']) is not None
+        }
 
-    def __get_user_data(self, config, node=None):
+    def __release_parked_node(self, key, entry, config):
         """
-        Compile the cloud-init script from
-        bootstrap template and encode into
-        base64.
+        Terminate the instance of a parked node and delete its volumes
+        and instance cache entry.  The Puppet certificate of the node is
+        removed unless a node has since taken its name.
+        """
+        name = hibernation.parked_name(key, entry)
 
-        :param config: Dictionary
-        :param node: Node instance
-        :return: String
+        shard = self.__get_instance_shard(entry)
+
+        try:
+            self.__terminate_instance(entry['id'], shard)
+        except Exception as exc:
+            self._get_log_adapter(entry['id']).warning(
+                'Unable to terminate parked instance: %s', exc)
+
+        if entry.get('volume_ids'):
+            self.__delete_volumes(entry['volume_ids'].split(), config, shard)
+
+        self.__update_inventory(config, 'terminate', [name])
+
+        self.instanceCacheDelete(key)
+
+        if self.__get_instance_cache_index().get(name) is not None:
+            return
+
+        try:
+            # Remove Puppet certificate kept while parked
+            bhm = osUtility.getOsObjectFactory().getOsBootHostManager()
+            bhm.deleteNodeCleanup(Node(name=name))
+        except Exception as exc:
+            self.getLogger().warning(
+                'Unable to clean up parked node [%s]: %s', name, exc)
+
+    def release_parked_nodes(self, now=None):
         """
+        Terminate nodes parked for longer than 'hibernate_max_idle'
+        seconds.  Called after nodes are parked and periodically by the
+        oci-maintenance command.
+
+        :param now: Number seconds since the epoch (optional)
+        :return: List String names of released nodes
+        """
+        config = self.getResourceAdapterConfig()
+
+        _, expired = hibernation.split_parked(
+            self.get_parked_nodes(), None,
+            time.time() if now is None else now,
+            config.get('hibernate_max_idle'))
+
+        if not expired:
+            return []
+
+        self.__take_parked_nodes(expired)
+
+        names = [hibernation.parked_name(key, entry)
+                 for key, entry in expired]
+
         self.getLogger().info(
-            'Using cloud-init script template [%s]' % (
-                config['user_data_script_template']))
+            'Releasing %d parked node(s): %s', len(expired),
+            ' '.join(names))
 
-        settings_dict = self.__get_common_user_data_settings(config, node)
+        gevent.joinall([
+            gevent.spawn(self.__release_parked_node, key, entry, config)
+            for key, entry in expired
+        ])
 
-        with open(config['user_data_script_template']) as fp:
-            result = ''
+        return names
 
-            for line in fp.readlines():
-                if line.startswith('### SETTINGS'):
-                    result += self.__get_common_user_data_content(
-                        settings_dict)
-                else:
-                    result += line
+    def get_scale_down_policy(self, config=None):
+        """
+        Build idle node scale-down policy from resource adapter settings.
+
+        :param config: Dictionary (optional)
+        :return: ScaleDownPolicy
+        """
+        config = config or self.getResourceAdapterConfig()
+
+        return scaledown.ScaleDownPolicy(
+            billing_granularity=config['scale_down_billing_granularity'],
+            release_window=config['scale_down_release_window'],
+            min_lifetime=config['scale_down_min_lifetime'],
+            min_nodes=config['scale_down_min_nodes'],
+            batch_size=config['scale_down_batch_size'],
+        )
+
+    def get_idle_nodes_to_release(self, dbNodes, now=None):
+        """
+        Evaluate scale-down policy against nodes.  Launch times are read
+        from the instance cache; no cloud API calls are made.
+
+        :param dbNodes: List Nodes objects
+        :param now: Number seconds since the epoch (optional)
+        :return: List of List Nodes objects, one list per batch
+        """
+        policy = self.get_scale_down_policy()
+
+        nodes_by_name = {}
+        candidates = []
+
+        for node in dbNodes:
+            nodes_by_name[node.name] = node
+
+            try:
+                launch_time = self.instanceCacheGet(node.name).get(
+                    'launch_time')
+            except ResourceNotFound:
+                launch_time = None
+
+            candidates.append(
+                scaledown.Candidate(
+                    name=node.name,
+                    idle=bool(node.isIdle),
+                    launch_time=float(launch_time) if launch_time else None,
+                )
+            )
+
+        return [
+            [nodes_by_name[name] for name in batch]
+            for batch in policy.batches(policy.select(candidates, now=now))
+        ]
+
+    def release_idle_nodes(self, dbNodes, now=None):
+        """
+        Release idle nodes selected by the scale-down policy.  Each batch
+        is passed to Tortuga node deletion as a single request.  Called
+        periodically by the oci-maintenance command.
 
-        combined_message = MIMEMultipart()
+        :param dbNodes: List Nodes objects
+        :param now: Number seconds since the epoch (optional)
+        :return: List String names of released nodes
+        """
+        from tortuga.node.nodeApi import NodeApi
 
-        if node and not config['use_instance_hostname']:
-            # Use cloud-init to set fully-qualified domain name of instance
-            cloud_init = """#cloud-config
+        released = []
 
-fqdn: %s
-""" % node.name
+        for batch in self.get_idle_nodes_to_release(dbNodes, now=now):
+            names = [node.name for node in batch]
 
-            sub_message = MIMEText(
-                cloud_init, 'text/cloud-config', sys.getdefaultencoding())
-            filename = 'user-data.txt'
-            sub_message.add_header(
-                'Content-Disposition',
-                'attachment; filename="%s"' % filename)
-            combined_message.attach(sub_message)
+            self.getLogger().info(
+                'Releasing %d idle node(s): %s', len(names), ' '.join(names))
 
-            sub_message = MIMEText(
-                result, 'text/x-shellscript', sys.getdefaultencoding())
-            filename = 'bootstrap.py'
-            sub_message.add_header(
-                'Content-Disposition',
-                'attachment; filename="%s"' % filename)
-            combined_message.attach(sub_message)
+            NodeApi().deleteNode(','.join(names))
 
-            return b64encode(str(combined_message).encode()).deocde()
+            released.extend(names)
 
-        # Fallback to default behaviour
-        return b64encode(result.encode()).decode()
+        return released
 
-    def deleteNode(self, dbNodes):
+    def release_user_data_includes(self, dbNodes, now=None):
         """
-        Delete a node from the infrastructure.
+        Remove the include user-data files of nodes which have checked
+        in, and files of failed or abandoned launches older than
+        'user_data_include_max_age' seconds.  Called periodically by the
+        oci-maintenance command.
+
+        :param dbNodes: List Nodes objects
+        :param now: Number seconds since the epoch (optional)
+        :return: List String names of nodes whose files were removed
+        """
+        directory = self.__get_include_directory()
 
-        :param dbNodes: List Nodes object
-        :return: None
+        entries = self.__get_instance_cache_index().get_many([
+            node.name for node in dbNodes
+            if node.state == state.NODE_STATE_INSTALLED
+        ])
+
+        released = []
+
+        for name, entry in sorted(entries.items()):
+            if not entry.get('user_data_include'):
+                continue
+
+            userdata.remove_include_files(
+                entry.pop('user_data_include').split(), directory)
+
+            self.instanceCacheSet(name, entry)
+
+            released.append(name)
+
+        expired = userdata.expire_include_files(
+            directory,
+            self.getResourceAdapterConfig().get(
+                'user_data_include_max_age') or 86400,
+            now=now)
+
+        if released or expired:
+            self.getLogger().info(
+                'Removed include user-data of %d node(s) and %d expired'
+                ' file(s)', len(released), len(expired))
+
+        return released
+
+    def get_preempted_nodes(self, dbNodes):
         """
-        self._async_delete_nodes(dbNodes)
+        Find nodes backed by preemptible instances which OCI has
+        terminated.  Instance states are fetched with one list call per
+        shard.
 
-        self.getLogger().info(
-            '%d node(s) deleted' % (
-                len(dbNodes))
-        )
+        :param dbNodes: List Nodes objects
+        :return: List Nodes objects
+        """
+        candidates = []
+
+        for node in dbNodes:
+            try:
+                instance_cache = self.instanceCacheGet(node.name)
+            except ResourceNotFound:
+                continue
+
+            if instance_cache.get('capacity_type') == capacity.PREEMPTIBLE:
+                candidates.append((node, instance_cache))
+
+        if not candidates:
+            return []
+
+        states = {}
+
+        for shard in {self.__get_instance_shard(instance_cache)
+                      for _, instance_cache in candidates}:
+            states.update(self.__list_instance_states(shard))
+
+        return [
+            node for node, instance_cache in candidates
+            if states.get(instance_cache['id']) in waiter.TERMINAL_STATES
+        ]
+
+    def handle_preempted_nodes(self, dbNodes):
+        """
+        Report preempted nodes to Tortuga as lost; all preempted nodes
+        are removed with a single node deletion request.  Called
+        periodically by the oci-maintenance command.
+
+        :param dbNodes: List Nodes objects
+        :return: List String names of preempted nodes
+        """
+        from tortuga.node.nodeApi import NodeApi
+
+        preempted = self.get_preempted_nodes(dbNodes)
+
+        if not preempted:
+            return []
+
+        names = [node.name for node in preempted]
+
+        for name in names:
+            instance_cache = self.instanceCacheGet(name)
+            instance_cache['preempted'] = '1'
+            self.instanceCacheSet(name, instance_cache)
+
+        self.getLogger().warning(
+            '%d node(s) lost to preemption: %s', len(names), ' '.join(names))
+
+        NodeApi().deleteNode(','.join(names))
+
+        return names
 
     def _wait_for_instance_state(self, instance_ocid, state, callback=None,
-                                 timeout=None):
+                                 timeout=None, shard=None):
         """
         Wait for instance to reach state
 
         :param instance_ocid: Instance OCID
         :param state: Expected state of instance
         :param timeout: (optional) operation timeout
+        :param shard: (optional) Shard of instance
         :return: None
         """
+        client = (shard or self.__get_shard()).client('compute')
+
         # TODO: implement timeout
         for nRetries in itertools.count(0):
-            instance = self.__client.get_instance(instance_ocid)
+            instance = client.get_instance(instance_ocid)
 
             if instance.data.lifecycle_state == state:
                 break
@@ -755,28 +3482,51 @@ fqdn: %s
             gevent.sleep(get_random_sleep_time(retries=nRetries) / 1000.0)
 
     def _delete_node(self, node):
+        with self._profiler.phase('delete_node'):
+            self.__delete_node(node)
+
+    def __delete_node(self, node):
         # TODO: add error handling; if the instance termination request
         # fails, we shouldn't be removing the node from the system
         try:
             instance_cache = self.instanceCacheGet(node.name)
 
-            # TODO: what happens when you attempt to terminate an already
-            # terminated instance? Exception?
-            instance = self.__client.get_instance(instance_cache['id'])
+            shard = self.__get_instance_shard(instance_cache)
+
+            config = self.getResourceAdapterConfig()
 
-            log_adapter = CustomAdapter(
-                self.getLogger(), {'instance_ocid': instance_cache['id']})
+            self.__remove_include_files(
+                instance_cache.pop('user_data_include', '').split())
 
-            # Issue terminate request
-            log_adapter.debug('Terminating...')
+            if self.__can_park(config, instance_cache):
+                if self.__park_instance(node, instance_cache, shard):
+                    # Parked nodes keep their instance cache entry (under
+                    # a new key) and Puppet certificate
+                    return
 
-            self.__client.terminate_instance(instance.data.id)
+                # Parking failed; volumes kept for the parked instance
+                # go with it
+                self.__update_inventory(config, 'terminate', [node.name])
 
-            # Wait 3 seconds before checking state
-            gevent.sleep(3)
+                self.__terminate_instance(instance_cache['id'], shard)
 
-            # Wait until state is 'TERMINATED'
-            self._wait_for_instance_state(instance_cache['id'], 'TERMINATED')
+                if instance_cache.get('volume_ids'):
+                    self.__delete_volumes(
+                        instance_cache['volume_ids'].split(), config,
+                        shard)
+            elif instance_cache.get('instance_pool_id'):
+                # Shrink cluster network pool; terminating the instance
+                # directly would cause the pool to replace it
+                self.__get_cluster_network_orchestrator(
+                    config, shard).detach_instance(
+                        instance_cache['instance_pool_id'],
+                        instance_cache['id'])
+
+                self._wait_for_instance_state(
+                    instance_cache['id'], 'TERMINATED', shard=shard)
+            elif not instance_cache.get('preempted'):
+                # Preempted instances have already been terminated by OCI
+                self.__terminate_instance(instance_cache['id'], shard)
 
             # Clean up the instance cache.
             self.instanceCacheDelete(node.name)
@@ -787,6 +3537,72 @@ fqdn: %s
         bhm = osUtility.getOsObjectFactory().getOsBootHostManager()
         bhm.deleteNodeCleanup(node)
 
+    def __terminate_instance(self, instance_ocid, shard):
+        # TODO: what happens when you attempt to terminate an already
+        # terminated instance? Exception?
+        client = shard.client('compute')
+
+        log_adapter = self._get_log_adapter(instance_ocid)
+
+        # Issue terminate request
+        log_adapter.debug('Terminating...')
+
+        client.terminate_instance(instance_ocid)
+
+        # Wait 3 seconds before checking state
+        gevent.sleep(3)
+
+        # Wait until state is 'TERMINATED'
+        watcher = self.__get_delete_watcher(shard)
+
+        if watcher is not None:
+            watcher.wait(instance_ocid, 'TERMINATED')
+        else:
+            self._wait_for_instance_state(instance_ocid, 'TERMINATED',
+                                          shard=shard)
+
+    def __get_delete_watcher(self, shard):
+        """
+        Instance state watcher shared by the terminations in a shard
+        during deleteNode(), so that termination is confirmed using one
+        list call per poll instead of one get call per instance.
+
+        :param shard: Shard
+        :return: InstanceStateWatcher or None, outside deleteNode()
+        """
+        if self.__delete_watchers is None:
+            return None
+
+        watcher = self.__delete_watchers.get(shard.key)
+
+        if watcher is None:
+            config = self.getResourceAdapterConfig()
+
+            watcher = self.__delete_watchers[shard.key] = \
+                waiter.InstanceStateWatcher(
+                    lambda: self.__list_instance_states(shard),
+                    interval=config.get('state_poll_interval') or 5
+                )
+
+        return watcher
+
+    def _get_log_adapter(self, instance_ocid=None):
+        """
+        Return logger adapter carrying add host session and (optional)
+        instance OCID as structured record fields.
+
+        :param instance_ocid: String instance OCID (optional)
+        :return: CustomAdapter
+        """
+        return CustomAdapter(
+            self.getLogger(),
+            {
+                'instance_ocid': instance_ocid,
+                'add_host_session': self.addHostSession,
+            },
+            sampler=self.__log_sampler
+        )
+
     def __get_installer_ip(self, hardwareprofile=None):
         """
         Get IP address of the installer node.
@@ -814,7 +3630,54 @@ fqdn: %s
             if items else '[]'
 
 
+class LogSampler(object):
+    """
+    Allow one in every 'rate' occurrences of a repetitive message.
+    Messages are keyed by their unformatted template.
+    """
+    def __init__(self, rate=1):
+        self.rate = max(int(rate), 1)
+        self.__counts = defaultdict(int)
+
+    def __call__(self, key):
+        count = self.__counts[key]
+
+        self.__counts[key] = count + 1
+
+        return count % self.rate == 0
+
+
 class CustomAdapter(logging.LoggerAdapter):
+    """
+    Prefix messages with the abbreviated instance OCID and attach
+    'instance_ocid' and 'add_host_session' to log records as structured
+    fields.  Messages are only formatted if the record is emitted.
+    """
+    def __init__(self, logger, extra, sampler=None):
+        super(CustomAdapter, self).__init__(logger, extra)
+
+        self.sampler = sampler
+
     def process(self, msg, kwargs):
-        return 'Instance OCID [...%s]: %s' % (
-            self.extra['instance_ocid'][-6:], msg), kwargs
+        extra = dict(self.extra)
+        extra.update(kwargs.get('extra') or {})
+        kwargs['extra'] = extra
+
+        if self.extra.get('instance_ocid'):
+            msg = 'Instance OCID [...%s]: %s' % (
+                self.extra['instance_ocid'][-6:], msg)
+
+        return msg, kwargs
+
+    def sampled(self, level, msg, *args, **kwargs):
+        """
+        Log repetitive message, subject to sampling.
+
+        :param level: Integer logging level
+        :param msg: String message template
+        """
+        if not self.isEnabledFor(level):
+            return
+
+        if self.sampler is None or self.sampler(msg):
+            self.log(level, msg, *args, **kwargs)
@@ -0,0 +1,230 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from collections import defaultdict, namedtuple
+
+
+PRIVATE = 'private'
+PUBLIC = 'public'
+BOTH = 'both'
+
+MODES = (PRIVATE, PUBLIC, BOTH)
+
+
+#: Addresses of one VNIC; public_ip is None when it has none
+VnicAddress = namedtuple(
+    'VnicAddress', ['vnic_id', 'is_primary', 'private_ip', 'public_ip'])
+
+
+class AddressingError(Exception):
+    pass
+
+
+def _list_all(method, *args, **kwargs):
+    result = []
+    page = None
+
+    while True:
+        if page:
+            kwargs['page'] = page
+
+        response = method(*args, **kwargs)
+
+        result.extend(response.data)
+
+        page = getattr(response, 'next_page', None)
+        if not page:
+            return result
+
+
+class VnicResolver(object):
+    """
+    Resolve the addresses of the VNICs of many instances at once.
+
+    Instead of listing the VNIC attachments of the compartment and
+    fetching each VNIC for every instance, one batch costs one
+    (paginated) attachment listing per compartment, one private IP
+    listing per subnet and, when public addresses are needed, one
+    public IP listing per compartment and availability domain,
+    regardless of the number of instances.
+
+    compute and network are any objects implementing the calls of
+    oci.core.ComputeClient and oci.core.VirtualNetworkClient used here.
+    """
+    def __init__(self, compute, network):
+        """
+        :param compute: Compute client
+        :param network: Virtual network client
+        """
+        self._compute = compute
+        self._network = network
+        self.calls = 0
+
+    def __list(self, method, *args, **kwargs):
+        self.calls += 1
+
+        return _list_all(method, *args, **kwargs)
+
+    def resolve(self, instances, public=False):
+        """
+        :param instances: Iterable instances (id, compartment_id and
+                          availability_domain attributes)
+        :param public: Boolean also resolve public IPs
+        :return: Dictionary instance id: List VnicAddress, primary VNIC
+                 first; instances without attached VNICs are omitted
+        """
+        instances = list(instances)
+
+        by_compartment = defaultdict(set)
+
+        for instance in instances:
+            by_compartment[instance.compartment_id].add(instance.id)
+
+        attachments = defaultdict(list)
+
+        for compartment_id, instance_ids in by_compartment.items():
+            for attachment in self.__list(
+                    self._compute.list_vnic_attachments, compartment_id):
+                if attachment.instance_id in instance_ids and \
+                        attachment.lifecycle_state == 'ATTACHED':
+                    attachments[attachment.instance_id].append(attachment)
+
+        vnic_ids = set()
+        subnet_ids = set()
+
+        for instance_attachments in attachments.values():
+            for attachment in instance_attachments:
+                vnic_ids.add(attachment.vnic_id)
+                subnet_ids.add(attachment.subnet_id)
+
+        private_ips = {}
+
+        for subnet_id in sorted(subnet_ids):
+            for private_ip in self.__list(
+                    self._network.list_private_ips, subnet_id=subnet_id):
+                if private_ip.vnic_id in vnic_ids and private_ip.is_primary:
+                    private_ips[private_ip.vnic_id] = private_ip
+
+        public_ips = self.__get_public_ips(instances) if public else {}
+
+        result = {}
+
+        for instance_id, instance_attachments in attachments.items():
+            # The primary VNIC is attached when the instance is launched,
+            # before any secondary VNIC
+            instance_attachments.sort(
+                key=lambda attachment: attachment.time_created)
+
+            result[instance_id] = [
+                VnicAddress(
+                    vnic_id=attachment.vnic_id,
+                    is_primary=idx == 0,
+                    private_ip=private_ips[attachment.vnic_id].ip_address
+                    if attachment.vnic_id in private_ips else None,
+                    public_ip=public_ips.get(
+                        private_ips[attachment.vnic_id].id)
+                    if attachment.vnic_id in private_ips else None
+                )
+                for idx, attachment in enumerate(instance_attachments)
+            ]
+
+        return result
+
+    def __get_public_ips(self, instances):
+        """
+        :return: Dictionary private IP OCID: String public IP
+        """
+        # Reserved public IPs are regional; ephemeral public IPs are
+        # listed per availability domain
+        scopes = set()
+
+        for instance in instances:
+            scopes.add((instance.compartment_id, None))
+            scopes.add((instance.compartment_id,
+                        instance.availability_domain))
+
+        result = {}
+
+        for compartment_id, availability_domain in sorted(
+                scopes, key=lambda scope: (scope[0], scope[1] or '')):
+            if availability_domain:
+                public_ips = self.__list(
+                    self._network.list_public_ips, 'AVAILABILITY_DOMAIN',
+                    compartment_id, availability_domain=availability_domain)
+            else:
+                public_ips = self.__list(
+                    self._network.list_public_ips, 'REGION', compartment_id)
+
+            for public_ip in public_ips:
+                if public_ip.private_ip_id:
+                    result[public_ip.private_ip_id] = public_ip.ip_address
+
+        return result
+
+
+def get_private_address(vnics):
+    """
+    :param vnics: List VnicAddress, primary first
+    :return: String private IP of the primary VNIC, or None
+    """
+    if not vnics or not vnics[0].is_primary:
+        return None
+
+    return vnics[0].private_ip
+
+
+def get_nic_addresses(vnics, mode=PRIVATE):
+    """
+    Addresses to register for a node, as (String IP, Boolean boot).
+    The boot address belongs to the primary VNIC: its private IP in
+    'private' and 'both' mode, its public IP in 'public' mode.  In
+    'public' mode secondary VNICs without a public IP contribute their
+    private IP; 'both' adds the public IP of each VNIC that has one
+    after its private IP.
+
+    :param vnics: List VnicAddress, primary first
+    :param mode: String addressing mode
+    :return: List (String IP, Boolean boot)
+    :raises AddressingError:
+    """
+    if mode not in MODES:
+        raise AddressingError('Invalid addressing mode [%s]' % (mode))
+
+    if not vnics or not vnics[0].is_primary:
+        raise AddressingError('No primary VNIC found')
+
+    if not vnics[0].private_ip:
+        raise AddressingError(
+            'Primary VNIC [%s] has no private IP' % (vnics[0].vnic_id))
+
+    if mode == PUBLIC and not vnics[0].public_ip:
+        raise AddressingError(
+            'Primary VNIC [%s] has no public IP' % (vnics[0].vnic_id))
+
+    result = []
+
+    for vnic in vnics:
+        if mode == PUBLIC:
+            ips = [vnic.public_ip or vnic.private_ip]
+        elif mode == BOTH:
+            ips = [vnic.private_ip, vnic.public_ip]
+        else:
+            ips = [vnic.private_ip]
+
+        for ip in ips:
+            if ip:
+                result.append((ip, not result))
+
+    return result
@@ -0,0 +1,387 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from collections import namedtuple
+
+from tortuga.resourceAdapter.oraclecloud import sdk
+
+
+VNIC_KEYS = (
+    'subnet_id',
+    'nic_index',
+    'assign_public_ip',
+    'skip_source_dest_check',
+)
+
+VOLUME_KEYS = (
+    'size_in_gbs',
+    'vpus_per_gb',
+    'attachment_type',
+)
+
+ATTACHMENT_TYPES = ('paravirtualized', 'iscsi')
+
+#: Balanced performance tier
+DEFAULT_VPUS_PER_GB = 10
+
+#: Attachment and volume states from which an attachment cannot succeed
+FAILED_STATES = ('DETACHING', 'DETACHED', 'FAULTY', 'TERMINATING',
+                 'TERMINATED')
+
+
+#: Attachments made for one instance
+Attachments = namedtuple(
+    'Attachments', ['vnic_attachment_ids', 'volume_attachment_ids'])
+
+
+class AttachmentError(Exception):
+    pass
+
+
+def _parse_bool(value):
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def _parse_spec(spec, keys, kind):
+    result = {}
+
+    for item in spec.split(','):
+        key, sep, value = item.partition('=')
+
+        key = key.strip()
+
+        if not sep or key not in keys:
+            raise ValueError(
+                'Invalid %s setting [%s] in [%s]' % (kind, item, spec))
+
+        result[key] = value.strip()
+
+    return result
+
+
+def parse_vnic_specs(specs):
+    """
+    Parse secondary VNIC specifications of the form
+    'subnet_id=ocid1...,nic_index=1,assign_public_ip=false'.
+
+    :param specs: List String VNIC specifications
+    :return: List Dictionaries
+    :raises ValueError: malformed specification
+    """
+    result = []
+
+    for spec in specs or []:
+        vnic = _parse_spec(spec, VNIC_KEYS, 'VNIC')
+
+        if not vnic.get('subnet_id'):
+            raise ValueError('VNIC [%s] requires subnet_id' % (spec))
+
+        vnic['nic_index'] = int(vnic.get('nic_index') or 0)
+        vnic['assign_public_ip'] = _parse_bool(
+            vnic.get('assign_public_ip', 'false'))
+        vnic['skip_source_dest_check'] = _parse_bool(
+            vnic.get('skip_source_dest_check', 'false'))
+
+        result.append(vnic)
+
+    return result
+
+
+def parse_volume_specs(specs):
+    """
+    Parse block volume specifications of the form
+    'size_in_gbs=1024,vpus_per_gb=20,attachment_type=paravirtualized'.
+    'vpus_per_gb' selects the performance tier (0 lower cost, 10
+    balanced, 20 higher performance, 30 to 120 ultra high performance).
+
+    :param specs: List String volume specifications
+    :return: List Dictionaries
+    :raises ValueError: malformed specification
+    """
+    result = []
+
+    for spec in specs or []:
+        volume = _parse_spec(spec, VOLUME_KEYS, 'block volume')
+
+        try:
+            volume['size_in_gbs'] = int(volume['size_in_gbs'])
+            volume['vpus_per_gb'] = int(
+                volume.get('vpus_per_gb') or DEFAULT_VPUS_PER_GB)
+        except (KeyError, ValueError):
+            raise ValueError(
+                'Block volume [%s] requires integer size_in_gbs and'
+                ' vpus_per_gb' % (spec))
+
+        if volume['vpus_per_gb'] % 10 or \
+                not 0 <= volume['vpus_per_gb'] <= 120:
+            raise ValueError(
+                'Block volume [%s]: vpus_per_gb must be a multiple of 10'
+                ' between 0 and 120' % (spec))
+
+        volume['attachment_type'] = \
+            volume.get('attachment_type') or ATTACHMENT_TYPES[0]
+
+        if volume['attachment_type'] not in ATTACHMENT_TYPES:
+            raise ValueError(
+                'Block volume [%s]: attachment_type must be one of %s' % (
+                    spec, ', '.join(ATTACHMENT_TYPES)))
+
+        result.append(volume)
+
+    return result
+
+
+def is_retryable(exc):
+    """
+    Determine whether a request failed only because a resource was not
+    yet (or no longer) in a state allowing it, for example attaching to
+    an instance which is still provisioning.
+
+    :param exc: Exception
+    :return: Boolean
+    """
+    return getattr(exc, 'status', None) == 409
+
+
+class _Pending(object):
+    def __init__(self, kind, spec, display_name, volume_id=None):
+        self.kind = kind
+        self.spec = spec
+        self.display_name = display_name
+        self.volume_id = volume_id
+        self.attachment_id = None
+
+
+class AttachmentOrchestrator(object):
+    """
+    Create and attach secondary VNICs and block volumes for instances.
+
+    Volumes are created before the instance is launched.  All
+    attachments are requested as soon as the instance and volumes allow
+    it and then polled together, so they proceed in parallel with each
+    other and with the instance boot.
+    """
+    def __init__(self, compute_client, blockstorage_client, models=None,
+                 sleep=time.sleep, interval=5):
+        """
+        :param compute_client: oci.core.ComputeClient (or stand-in)
+        :param blockstorage_client: oci.core.BlockstorageClient (or
+                                    stand-in)
+        :param models: Module/namespace of request models (optional)
+        :param sleep: Callable used between polls
+        :param interval: Number seconds between polls
+        """
+        if models is None:
+            models = sdk.load().core.models
+
+        self._compute = compute_client
+        self._blockstorage = blockstorage_client
+        self._models = models
+        self._sleep = sleep
+        self.interval = interval
+
+    def create_volumes(self, compartment_id, availability_domain, specs,
+                       display_name):
+        """
+        Request creation of block volumes, without waiting for them.
+
+        :param compartment_id: String compartment OCID
+        :param availability_domain: String availability domain
+        :param specs: List volume specifications
+        :param display_name: String prefix of volume names
+        :return: List String volume OCIDs, in order of specs
+        """
+        result = []
+
+        for idx, spec in enumerate(specs):
+            result.append(self._blockstorage.create_volume(
+                self._models.CreateVolumeDetails(
+                    availability_domain=availability_domain,
+                    compartment_id=compartment_id,
+                    display_name='%s-scratch%d' % (display_name, idx),
+                    size_in_gbs=spec['size_in_gbs'],
+                    vpus_per_gb=spec['vpus_per_gb']
+                )
+            ).data.id)
+
+        return result
+
+    def attach(self, instance_id, vnic_specs, volume_ids, volume_specs,
+               display_name):
+        """
+        Attach secondary VNICs and volumes to an instance and wait until
+        all attachments are ATTACHED.  Attach requests rejected because
+        the instance or a volume is not ready yet are retried on the
+        next poll.
+
+        :param instance_id: String instance OCID
+        :param vnic_specs: List VNIC specifications
+        :param volume_ids: List String volume OCIDs
+        :param volume_specs: List volume specifications, matching
+                             volume_ids
+        :param display_name: String prefix of attachment names
+        :return: Attachments
+        :raises AttachmentError: attachment or volume failed
+        """
+        pending = [
+            _Pending('vnic', spec, '%s-vnic%d' % (display_name, idx))
+            for idx, spec in enumerate(vnic_specs)
+        ] + [
+            _Pending('volume', spec, '%s-volume%d' % (display_name, idx),
+                     volume_id=volume_id)
+            for idx, (volume_id, spec) in enumerate(
+                zip(volume_ids, volume_specs))
+        ]
+
+        waiting = list(pending)
+
+        while True:
+            waiting = [
+                item for item in waiting
+                if not self.__advance(instance_id, item)
+            ]
+
+            if not waiting:
+                break
+
+            self._sleep(self.interval)
+
+        return Attachments(
+            vnic_attachment_ids=[
+                item.attachment_id for item in pending
+                if item.kind == 'vnic'
+            ],
+            volume_attachment_ids=[
+                item.attachment_id for item in pending
+                if item.kind == 'volume'
+            ]
+        )
+
+    def __advance(self, instance_id, item):
+        """
+        :return: Boolean True when item is attached
+        """
+        if item.attachment_id is None:
+            if item.kind == 'volume':
+                volume_state = self._blockstorage.get_volume(
+                    item.volume_id).data.lifecycle_state
+
+                if volume_state in FAILED_STATES:
+                    raise AttachmentError(
+                        'Volume [%s] entered state [%s]' % (
+                            item.volume_id, volume_state))
+
+                if volume_state != 'AVAILABLE':
+                    return False
+
+            try:
+                item.attachment_id = self.__request_attach(
+                    instance_id, item)
+            except Exception as exc:
+                if not is_retryable(exc):
+                    raise
+
+            return False
+
+        if item.kind == 'vnic':
+            attachment = self._compute.get_vnic_attachment(
+                item.attachment_id).data
+        else:
+            attachment = self._compute.get_volume_attachment(
+                item.attachment_id).data
+
+        if attachment.lifecycle_state in FAILED_STATES:
+            raise AttachmentError(
+                'Attachment [%s] entered state [%s]' % (
+                    item.attachment_id, attachment.lifecycle_state))
+
+        return attachment.lifecycle_state == 'ATTACHED'
+
+    def __request_attach(self, instance_id, item):
+        models = self._models
+        display_name = item.display_name
+
+        if item.kind == 'vnic':
+            return self._compute.attach_vnic(
+                models.AttachVnicDetails(
+                    create_vnic_details=models.CreateVnicDetails(
+                        subnet_id=item.spec['subnet_id'],
+                        assign_public_ip=item.spec['assign_public_ip'],
+                        skip_source_dest_check=(
+                            item.spec['skip_source_dest_check']),
+                        display_name=display_name
+                    ),
+                    display_name=display_name,
+                    instance_id=instance_id,
+                    nic_index=item.spec['nic_index']
+                )
+            ).data.id
+
+        if item.spec['attachment_type'] == 'iscsi':
+            details_class = models.AttachIScsiVolumeDetails
+        else:
+            details_class = models.AttachParavirtualizedVolumeDetails
+
+        return self._compute.attach_volume(
+            details_class(
+                display_name=display_name,
+                instance_id=instance_id,
+                volume_id=item.volume_id
+            )
+        ).data.id
+
+    def delete_volumes(self, volume_ids, attempts=30):
+        """
+        Delete many volumes, typically of instances just terminated.
+        All delete requests are issued together; requests rejected
+        because a volume is still detaching are retried on each poll.
+
+        :param volume_ids: Iterable String volume OCIDs
+        :param attempts: Integer polls before giving up
+        :return: Dictionary volume OCID: exception, for volumes which
+                 could not be deleted
+        """
+        remaining = list(volume_ids)
+        failed = {}
+
+        for attempt in range(attempts):
+            retry = []
+
+            for volume_id in remaining:
+                try:
+                    self._blockstorage.delete_volume(volume_id)
+                except Exception as exc:
+                    if getattr(exc, 'status', None) == 404:
+                        # Already deleted
+                        continue
+
+                    if not is_retryable(exc):
+                        failed[volume_id] = exc
+
+                        continue
+
+                    if attempt == attempts - 1:
+                        failed[volume_id] = exc
+                    else:
+                        retry.append(volume_id)
+
+            remaining = retry
+
+            if not remaining:
+                break
+
+            self._sleep(self.interval)
+
+        return failed
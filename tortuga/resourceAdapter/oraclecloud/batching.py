@@ -0,0 +1,139 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gevent
+import gevent.event
+
+
+class BatchAggregator(object):
+    """
+    Collect items submitted by many greenlets and process them together.
+
+    A batch is flushed when 'window' seconds have passed since its first
+    item was submitted, or as soon as it holds 'max_size' items.  The
+    flush callable receives the list of items and returns one result per
+    item; a result which is an exception is raised in the submitting
+    greenlet only, so failures are isolated per item.
+    """
+    def __init__(self, flush, window=0.5, max_size=100):
+        """
+        :param flush: Callable taking a list of items and returning a
+                      list of results (or exceptions) in the same order
+        :param window: Number seconds to wait for more items
+        :param max_size: Integer maximum items per batch
+        """
+        self._flush = flush
+        self.window = window
+        self.max_size = max(int(max_size), 1)
+        self.batches = 0
+        self.__pending = []
+        self.__abandoned = set()
+        self.__running = set()
+        self.__timer = None
+
+    def submit(self, item):
+        """
+        Add item to the current batch and wait for its result.  An item
+        whose submitter stops waiting (times out or is killed) before
+        its batch starts processing it is dropped from the batch; once
+        processing has started, the submitter waits for the item to
+        finish and gets its result, since the batch cannot undo it.
+
+        :param item: Object
+        :return: Result for item
+        """
+        result = gevent.event.AsyncResult()
+
+        entry = (item, result)
+
+        self.__pending.append(entry)
+
+        if len(self.__pending) >= self.max_size:
+            # Flush in a greenlet of its own, so that a timeout of this
+            # submitter cannot interrupt the batch
+            gevent.spawn(self.__flush, self.__take())
+        elif self.__timer is None:
+            self.__timer = gevent.spawn_later(self.window, self.flush)
+
+        try:
+            return result.get()
+        except BaseException:
+            if result.ready():
+                raise
+
+            if entry in self.__pending:
+                self.__pending.remove(entry)
+
+                raise
+
+            if result not in self.__running:
+                # Taken into a batch which has not started yet
+                self.__abandoned.add(result)
+
+                raise
+
+        # The batch is processing the item; wait for it to finish
+        return result.get()
+
+    def flush(self):
+        """
+        Process all pending items now.
+
+        :return: None
+        """
+        self.__flush(self.__take())
+
+    def __take(self):
+        timer, self.__timer = self.__timer, None
+
+        if timer is not None and timer is not gevent.getcurrent():
+            timer.kill(block=False)
+
+        pending, self.__pending = self.__pending, []
+
+        return pending
+
+    def __flush(self, pending):
+        # Skip items whose submitters gave up before the batch started
+        abandoned = [result for _, result in pending
+                     if result in self.__abandoned]
+
+        self.__abandoned.difference_update(abandoned)
+
+        pending = [(item, result) for item, result in pending
+                   if result not in abandoned]
+
+        if not pending:
+            return
+
+        self.batches += 1
+
+        self.__running.update(result for _, result in pending)
+
+        try:
+            results = self._flush([item for item, _ in pending])
+        except Exception as exc:
+            for _, result in pending:
+                result.set_exception(exc)
+
+            return
+        finally:
+            self.__running.difference_update(
+                result for _, result in pending)
+
+        for (_, result), value in zip(pending, results):
+            if isinstance(value, Exception):
+                result.set_exception(value)
+            else:
+                result.set(value)
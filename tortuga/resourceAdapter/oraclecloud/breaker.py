@@ -0,0 +1,434 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from tortuga.resourceAdapter.oraclecloud import capacity
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+HEALTHY = 'healthy'
+DEGRADED = 'degraded'
+UNAVAILABLE = 'unavailable'
+
+#: Operations without which no node can be launched
+LAUNCH_OPERATIONS = ('launch_instance',)
+
+#: HTTP statuses of transient errors, which OCI clients are expected to
+#: retry
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a service whose circuit is open.
+    """
+    def __init__(self, message, retry_after=0):
+        """
+        :param message: String
+        :param retry_after: Number seconds until the circuit lets a
+                            probe call through
+        """
+        super(CircuitOpenError, self).__init__(message)
+
+        self.retry_after = retry_after
+
+
+def is_failure(exc):
+    """
+    Determine whether an exception indicates a failing service, as
+    opposed to a bad request.  Throttling, server errors and transport
+    errors (which carry no HTTP status) count as failures; exhausted
+    capacity, reported by OCI as a server error, does not.
+
+    :param exc: Exception
+    :return: Boolean
+    """
+    if capacity.is_capacity_error(exc):
+        return False
+
+    status = getattr(exc, 'status', None)
+
+    if not isinstance(status, int):
+        return True
+
+    return status == 429 or status >= 500
+
+
+def is_retryable(exc):
+    """
+    Determine whether a failure is transient: throttling, or a server
+    error that OCI asks clients to retry.
+
+    :param exc: Exception
+    :return: Boolean
+    """
+    return getattr(exc, 'status', None) in RETRYABLE_STATUSES
+
+
+class CircuitBreaker(object):
+    """
+    Stop calling a service that is failing or slow.
+
+    The circuit opens after 'failure_threshold' consecutive hard
+    failures, or when at least 'min_calls' of the last 'window' calls
+    have completed and the share of failed or slow calls (taking longer
+    than 'slow_call_duration' seconds) reaches 'error_rate'.  Transient
+    failures (see is_retryable()) count towards the error rate only, so
+    that a short burst of them does not open the circuit.  Once
+    'reset_timeout' seconds have passed, a single probe call is let
+    through; its outcome closes or re-opens the circuit.
+    """
+    def __init__(self, name, failure_threshold=5, reset_timeout=60,
+                 error_rate=0.5, slow_call_duration=None, window=20,
+                 min_calls=10, clock=time.time, listener=None):
+        """
+        :param name: String used in error messages
+        :param failure_threshold: Integer consecutive failures to open
+        :param reset_timeout: Number seconds before probing
+        :param error_rate: Number share of bad calls in window to open
+        :param slow_call_duration: Number seconds after which a call
+                                   counts as bad (optional)
+        :param window: Integer recent calls considered for error rate
+        :param min_calls: Integer calls required before error rate is
+                          considered
+        :param clock: Callable returning current time in seconds
+        :param listener: Callable (breaker, old state, new state) called
+                         on state changes (optional)
+        """
+        self.name = name
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.reset_timeout = reset_timeout
+        self.error_rate = error_rate
+        self.slow_call_duration = slow_call_duration
+        self.min_calls = min(max(int(min_calls), 1), max(int(window), 1))
+        self._clock = clock
+        self._listener = listener
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.__outcomes = deque(maxlen=max(int(window), 1))
+        self.__state = CLOSED
+        self.__consecutive = 0
+        self.__opened_at = None
+        self.__probing = False
+        self.__lock = threading.Lock()
+
+    @property
+    def state(self):
+        """
+        :return: String CLOSED, OPEN or HALF_OPEN
+        """
+        with self.__lock:
+            old, new = self.__state, self.__get_state()
+
+        self.__notify(old, new)
+
+        return new
+
+    def __get_state(self):
+        if self.__state == OPEN and \
+                self._clock() - self.__opened_at >= self.reset_timeout:
+            self.__state = HALF_OPEN
+            self.__probing = False
+
+        return self.__state
+
+    def __notify(self, old, new):
+        if old != new and self._listener is not None:
+            self._listener(self, old, new)
+
+    def allow(self):
+        """
+        Determine whether a call may be made now.  In half-open state,
+        only one caller is allowed through to probe the service.
+
+        :return: Boolean
+        """
+        with self.__lock:
+            old = self.__state
+            state = self.__get_state()
+
+            if state == CLOSED:
+                allowed = True
+            elif state == HALF_OPEN and not self.__probing:
+                self.__probing = True
+                allowed = True
+            else:
+                self.rejected += 1
+                allowed = False
+
+        self.__notify(old, state)
+
+        return allowed
+
+    def retry_after(self):
+        """
+        :return: Number seconds until an open circuit lets a probe call
+                 through; 0 if it is not open
+        """
+        with self.__lock:
+            if self.__get_state() != OPEN:
+                return 0
+
+            return max(
+                self.reset_timeout - (self._clock() - self.__opened_at), 0)
+
+    def __release_probe(self):
+        with self.__lock:
+            self.__probing = False
+
+    def __bad_call_rate(self):
+        if len(self.__outcomes) < self.min_calls:
+            return None
+
+        return sum(1 for ok in self.__outcomes if not ok) / \
+            float(len(self.__outcomes))
+
+    def record(self, failed, duration=None, retryable=False):
+        """
+        Record outcome of a call.
+
+        :param failed: Boolean call failed
+        :param duration: Number seconds the call took (optional)
+        :param retryable: Boolean failure is transient
+        """
+        slow = self.slow_call_duration is not None and \
+            duration is not None and duration >= self.slow_call_duration
+
+        with self.__lock:
+            old = self.__state
+
+            self.calls += 1
+
+            if failed:
+                self.failures += 1
+
+                if not retryable:
+                    self.__consecutive += 1
+            else:
+                self.__consecutive = 0
+
+            self.__outcomes.append(not (failed or slow))
+
+            rate = self.__bad_call_rate()
+
+            if old == HALF_OPEN and (failed or slow) or \
+                    self.__consecutive >= self.failure_threshold or \
+                    rate is not None and rate >= self.error_rate:
+                self.__state = OPEN
+                self.__opened_at = self._clock()
+                # Start the next closed period with a clean window
+                self.__outcomes.clear()
+                self.__consecutive = 0
+            elif old == HALF_OPEN:
+                self.__state = CLOSED
+
+            self.__probing = False
+
+            new = self.__state
+
+        self.__notify(old, new)
+
+    def record_success(self, duration=None):
+        self.record(False, duration)
+
+    def record_failure(self, duration=None):
+        self.record(True, duration)
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call 'func' through the circuit breaker.
+
+        :raises CircuitOpenError: circuit is open
+        """
+        return self.call_after(None, func, *args, **kwargs)
+
+    def call_after(self, wait, func, *args, **kwargs):
+        """
+        Call 'func' through the circuit breaker, first calling 'wait'
+        (such as a rate limiter) once the call has been allowed.  Time
+        spent in 'wait' does not count towards the call duration.
+
+        :param wait: Callable taking no arguments (optional)
+        :raises CircuitOpenError: circuit is open
+        """
+        if not self.allow():
+            raise CircuitOpenError(
+                'Circuit [%s] is open; not calling service' % (self.name),
+                retry_after=self.retry_after())
+
+        if wait is not None:
+            try:
+                wait()
+            except BaseException:
+                # Nothing was sent; let another caller probe instead
+                self.__release_probe()
+
+                raise
+
+        start = self._clock()
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            self.record(is_failure(exc), self._clock() - start,
+                        retryable=is_retryable(exc))
+
+            raise
+        except BaseException:
+            # Interrupted (greenlet killed or timed out); a call which
+            # hung counts against the service
+            self.record(self.slow_call_duration is not None and
+                        self._clock() - start >= self.slow_call_duration,
+                        self._clock() - start)
+
+            raise
+
+        self.record(False, self._clock() - start)
+
+        return result
+
+    def stats(self):
+        """
+        :return: Dictionary state and call statistics
+        """
+        state = self.state
+
+        with self.__lock:
+            rate = self.__bad_call_rate()
+
+            return {
+                'state': state,
+                'calls': self.calls,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'error_rate': round(rate, 3) if rate is not None else None,
+                'opened_at': self.__opened_at if state != CLOSED else None,
+            }
+
+
+class BreakerSet(object):
+    """
+    One circuit breaker per API operation, so that a failing operation
+    does not block unrelated ones.
+    """
+    def __init__(self, name, clock=time.time, listener=None, **options):
+        """
+        :param name: String prefix of breaker names
+        :param clock: Callable returning current time in seconds
+        :param listener: Callable (breaker, old state, new state)
+        :param options: CircuitBreaker keyword arguments
+        """
+        self.name = name
+        self._clock = clock
+        self._listener = listener
+        self._options = options
+        self.__breakers = {}
+        self.__lock = threading.Lock()
+
+    def get(self, operation):
+        """
+        :param operation: String API operation name
+        :return: CircuitBreaker
+        """
+        with self.__lock:
+            breaker = self.__breakers.get(operation)
+
+            if breaker is None:
+                breaker = self.__breakers[operation] = CircuitBreaker(
+                    '%s:%s' % (self.name, operation),
+                    clock=self._clock,
+                    listener=self._listener,
+                    **self._options
+                )
+
+            return breaker
+
+    def call(self, operation, func, *args, **kwargs):
+        return self.get(operation).call(func, *args, **kwargs)
+
+    def call_after(self, operation, wait, func, *args, **kwargs):
+        return self.get(operation).call_after(wait, func, *args, **kwargs)
+
+    def state(self, operation):
+        """
+        :return: String state; CLOSED for operations not called yet
+        """
+        with self.__lock:
+            breaker = self.__breakers.get(operation)
+
+        return breaker.state if breaker is not None else CLOSED
+
+    def health(self):
+        """
+        :return: Dictionary with overall 'status' and per-operation
+                 statistics
+        """
+        with self.__lock:
+            breakers = dict(self.__breakers)
+
+        operations = {
+            operation: breaker.stats()
+            for operation, breaker in breakers.items()
+        }
+
+        if any(operations.get(operation, {}).get('state') == OPEN
+               for operation in LAUNCH_OPERATIONS):
+            status = UNAVAILABLE
+        elif any(stats['state'] != CLOSED for stats in operations.values()):
+            status = DEGRADED
+        else:
+            status = HEALTHY
+
+        return {'status': status, 'operations': operations}
+
+
+def worst_status(statuses):
+    """
+    :param statuses: Iterable health status Strings
+    :return: String least healthy status (HEALTHY if none)
+    """
+    order = (HEALTHY, DEGRADED, UNAVAILABLE)
+
+    return max(statuses, key=order.index, default=HEALTHY)
+
+
+def write_health_file(path, health):
+    """
+    Atomically write health report as JSON, for consumers outside the
+    adapter process.
+
+    :param path: String file path
+    :param health: Dictionary
+    :return: None
+    """
+    directory = os.path.dirname(path)
+
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+
+    with open(tmp_path, 'w') as fp:
+        json.dump(health, fp, indent=2, sort_keys=True)
+
+    os.rename(tmp_path, path)
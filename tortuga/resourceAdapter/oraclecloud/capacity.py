@@ -0,0 +1,98 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+RESERVED = 'reserved'
+PREEMPTIBLE = 'preemptible'
+ON_DEMAND = 'on-demand'
+
+
+class CapacityError(Exception):
+    """
+    Raised when no capacity type is left to launch into.
+    """
+
+
+def is_capacity_error(exc):
+    """
+    Determine whether a launch failure was caused by exhausted capacity
+    (out of host capacity, full reservation or exceeded limit).
+
+    :param exc: Exception
+    :return: Boolean
+    """
+    code = getattr(exc, 'code', None) or ''
+    message = getattr(exc, 'message', None) or str(exc)
+
+    if code in ('LimitExceeded', 'OutOfCapacity', 'OutOfHostCapacity'):
+        return True
+
+    return 'capacity' in message.lower()
+
+
+class CapacityPlan(object):
+    """
+    Ordered capacity types to launch into.  A type that runs out is
+    skipped for the remainder of the launch batch, so later launches do
+    not repeat the failed request.
+    """
+    def __init__(self, modes):
+        """
+        :param modes: List capacity types in order of preference
+        """
+        self.__modes = list(modes)
+        self.__exhausted = {}
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        :param config: Dictionary resource adapter configuration
+        :return: CapacityPlan
+        """
+        modes = []
+
+        if config.get('capacity_reservation_id'):
+            modes.append(RESERVED)
+
+        if config.get('preemptible'):
+            modes.append(PREEMPTIBLE)
+
+        if not modes or config.get('capacity_fallback', True):
+            modes.append(ON_DEMAND)
+
+        return cls(modes)
+
+    @property
+    def modes(self):
+        """
+        :return: List capacity types not yet exhausted
+        """
+        return [mode for mode in self.__modes
+                if mode not in self.__exhausted]
+
+    def exhaust(self, mode, reason=None):
+        """
+        Mark capacity type as exhausted.
+
+        :param mode: String capacity type
+        :param reason: String (optional)
+        :return: None
+        """
+        self.__exhausted[mode] = reason
+
+    @property
+    def exhausted(self):
+        """
+        :return: Dictionary capacity type: reason
+        """
+        return dict(self.__exhausted)
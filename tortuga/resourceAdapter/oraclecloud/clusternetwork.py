@@ -0,0 +1,303 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import time
+from collections import namedtuple
+
+from tortuga.resourceAdapter.oraclecloud import sdk
+
+
+#: Result of launching into a cluster network; instance_ids lists only
+#: the instances added by the launch
+Placement = namedtuple(
+    'Placement', ['cluster_network_id', 'instance_pool_id', 'instance_ids'])
+
+
+FAILED_STATES = ('TERMINATING', 'TERMINATED', 'FAILED')
+
+
+class ClusterNetworkError(Exception):
+    pass
+
+
+class ClusterNetworkOrchestrator(object):
+    """
+    Create or extend OCI cluster networks so that the nodes of one
+    launch share a low-latency RDMA placement group.
+
+    The client is any object implementing the cluster network calls of
+    oci.core.ComputeManagementClient; models is a namespace providing
+    the request model classes (oci.core.models by default).
+    """
+    def __init__(self, client, models=None, sleep=time.sleep, interval=10,
+                 clock=time.time):
+        """
+        :param client: Compute management client
+        :param models: Module/namespace of request models (optional)
+        :param sleep: Callable used between polls
+        :param interval: Number seconds between polls
+        :param clock: Callable returning current time in seconds
+        """
+        if models is None:
+            models = sdk.load().core.models
+
+        self._client = client
+        self._models = models
+        self._sleep = sleep
+        self._clock = clock
+        self.interval = interval
+
+    def create_instance_configuration(self, compartment_id, display_name,
+                                      launch_details):
+        """
+        Create instance configuration used as cluster network template.
+
+        :param compartment_id: String compartment OCID
+        :param display_name: String
+        :param launch_details: Dictionary with availability_domain,
+                               shape, image_id, subnet_id and metadata
+        :return: String instance configuration OCID
+        """
+        models = self._models
+
+        source_details = \
+            models.InstanceConfigurationInstanceSourceViaImageDetails(
+                image_id=launch_details['image_id'])
+
+        vnic_details = models.InstanceConfigurationCreateVnicDetails(
+            subnet_id=launch_details['subnet_id'])
+
+        instance_launch_details = \
+            models.InstanceConfigurationLaunchInstanceDetails(
+                availability_domain=launch_details['availability_domain'],
+                compartment_id=compartment_id,
+                shape=launch_details['shape'],
+                metadata=launch_details.get('metadata'),
+                source_details=source_details,
+                create_vnic_details=vnic_details
+            )
+
+        details = models.CreateInstanceConfigurationDetails(
+            compartment_id=compartment_id,
+            display_name=display_name,
+            instance_details=models.ComputeInstanceDetails(
+                instance_type='compute',
+                launch_details=instance_launch_details
+            )
+        )
+
+        return self._client.create_instance_configuration(details).data.id
+
+    def launch(self, compartment_id, availability_domain, subnet_id,
+               instance_configuration_id, count, cluster_network_id=None,
+               display_name=None, timeout=None):
+        """
+        Create a cluster network of 'count' instances, or grow an
+        existing one by 'count', and wait until the instances are up.
+        If that fails or times out, a created cluster network is
+        terminated and an extended one shrunk back to its previous size.
+
+        :param timeout: Number seconds to wait for the instances
+                        (optional)
+        :return: Placement
+        :raises ClusterNetworkError:
+        """
+        models = self._models
+
+        if cluster_network_id:
+            network = self._client.get_cluster_network(
+                cluster_network_id).data
+
+            pool = network.instance_pools[0]
+
+            existing = set(
+                self.list_instance_ids(compartment_id, cluster_network_id))
+
+            self._client.update_cluster_network(
+                cluster_network_id,
+                models.UpdateClusterNetworkDetails(
+                    instance_pools=[
+                        models.UpdateClusterNetworkInstancePoolDetails(
+                            id=pool.id, size=pool.size + count)
+                    ]
+                )
+            )
+        else:
+            existing = set()
+
+            placement_configuration = \
+                models.ClusterNetworkPlacementConfigurationDetails(
+                    availability_domain=availability_domain,
+                    primary_subnet_id=subnet_id)
+
+            network = self._client.create_cluster_network(
+                models.CreateClusterNetworkDetails(
+                    compartment_id=compartment_id,
+                    display_name=display_name,
+                    instance_pools=[
+                        models.CreateClusterNetworkInstancePoolDetails(
+                            instance_configuration_id=(
+                                instance_configuration_id),
+                            size=count)
+                    ],
+                    placement_configuration=placement_configuration
+                )
+            ).data
+
+        try:
+            instance_ids = self.wait_for_instances(
+                compartment_id, network.id, len(existing) + count,
+                timeout=timeout)
+
+            network = self._client.get_cluster_network(network.id).data
+        except BaseException as exc:
+            if cluster_network_id:
+                self.__shrink(compartment_id, network.id, pool, existing,
+                              exc)
+            else:
+                self.__terminate(network.id, exc)
+
+            raise
+
+        return Placement(
+            cluster_network_id=network.id,
+            instance_pool_id=network.instance_pools[0].id,
+            instance_ids=[
+                instance_id for instance_id in instance_ids
+                if instance_id not in existing
+            ]
+        )
+
+    def __terminate(self, cluster_network_id, exc):
+        try:
+            self._client.terminate_cluster_network(cluster_network_id)
+        except Exception as rollback_exc:
+            raise ClusterNetworkError(
+                '%s; unable to terminate cluster network [%s]: %s' % (
+                    exc, cluster_network_id, rollback_exc))
+
+    def __shrink(self, compartment_id, cluster_network_id, pool, existing,
+                 exc):
+        """
+        Remove instances added to a cluster network, then restore the
+        previous pool size for instances not created yet.
+        """
+        models = self._models
+
+        try:
+            for instance_id in self.list_instance_ids(
+                    compartment_id, cluster_network_id):
+                if instance_id not in existing:
+                    self.detach_instance(pool.id, instance_id)
+
+            network = self._client.get_cluster_network(
+                cluster_network_id).data
+
+            if network.instance_pools[0].size > pool.size:
+                self._client.update_cluster_network(
+                    cluster_network_id,
+                    models.UpdateClusterNetworkDetails(
+                        instance_pools=[
+                            models.UpdateClusterNetworkInstancePoolDetails(
+                                id=pool.id, size=pool.size)
+                        ]
+                    )
+                )
+        except Exception as rollback_exc:
+            raise ClusterNetworkError(
+                '%s; unable to shrink cluster network [%s]: %s' % (
+                    exc, cluster_network_id, rollback_exc))
+
+    def wait_for_instances(self, compartment_id, cluster_network_id,
+                           expected, timeout=None):
+        """
+        Wait until cluster network is RUNNING with 'expected' running
+        instances.
+
+        :param timeout: Number seconds (optional)
+        :return: List String instance OCIDs
+        :raises ClusterNetworkError: failed or timed out
+        """
+        deadline = self._clock() + timeout if timeout else None
+
+        for _ in itertools.count():
+            network = self._client.get_cluster_network(
+                cluster_network_id).data
+
+            if network.lifecycle_state in FAILED_STATES:
+                raise ClusterNetworkError(
+                    'Cluster network [%s] entered state [%s]' % (
+                        cluster_network_id, network.lifecycle_state))
+
+            if network.lifecycle_state == 'RUNNING':
+                instances = self.list_instances(
+                    compartment_id, cluster_network_id)
+
+                running = [
+                    instance.id for instance in instances
+                    if (instance.state or '').upper() == 'RUNNING'
+                ]
+
+                if len(running) >= expected:
+                    return running
+
+            if deadline is not None and self._clock() >= deadline:
+                raise ClusterNetworkError(
+                    'Timed out waiting for %d instance(s) of cluster'
+                    ' network [%s]' % (expected, cluster_network_id))
+
+            self._sleep(self.interval)
+
+    def list_instances(self, compartment_id, cluster_network_id):
+        """
+        :return: List instance summaries
+        """
+        result = []
+        page = None
+
+        while True:
+            kwargs = {'page': page} if page else {}
+
+            response = self._client.list_cluster_network_instances(
+                compartment_id, cluster_network_id, **kwargs)
+
+            result.extend(response.data)
+
+            page = getattr(response, 'next_page', None)
+            if not page:
+                return result
+
+    def list_instance_ids(self, compartment_id, cluster_network_id):
+        return [
+            instance.id for instance in self.list_instances(
+                compartment_id, cluster_network_id)
+        ]
+
+    def detach_instance(self, instance_pool_id, instance_id):
+        """
+        Remove instance from its pool, shrinking the pool and
+        terminating the instance.  Terminating a pool instance directly
+        would cause the pool to replace it.
+
+        :return: None
+        """
+        self._client.detach_instance_pool_instance(
+            instance_pool_id,
+            self._models.DetachInstancePoolInstanceDetails(
+                instance_id=instance_id,
+                is_decrement_size=True,
+                is_auto_terminate=True
+            )
+        )
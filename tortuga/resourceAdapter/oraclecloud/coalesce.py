@@ -0,0 +1,114 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gevent
+import gevent.event
+import gevent.lock
+
+
+class LaunchRequest(object):
+    """
+    One caller's share of a (possibly coalesced) launch batch.
+    """
+    def __init__(self, count, node_spec):
+        """
+        :param count: Integer number of nodes requested
+        :param node_spec: Dictionary instance launch specification
+        """
+        self.count = count
+        self.node_spec = node_spec
+        self.nodes = []
+        self.error = None
+        self.done = gevent.event.Event()
+
+
+class LaunchCoalescer(object):
+    """
+    Merge launch requests with identical launch templates that arrive
+    within a short window into a single batch.
+
+    The first caller for a key becomes the leader: it waits for the
+    coalescing window, then executes the whole batch.  Other callers
+    block until the leader has finished and receive only the nodes
+    launched for their own request.  Callers are greenlets.
+    """
+    def __init__(self, sleep=None):
+        """
+        :param sleep: Callable used to wait out the coalescing window
+                      (defaults to gevent.sleep)
+        """
+        self._sleep = sleep
+        self.__lock = gevent.lock.Semaphore()
+        self.__pending = {}
+
+    def submit(self, key, request, execute, window):
+        """
+        Submit launch request.
+
+        :param key: Hashable launch template key
+        :param request: LaunchRequest
+        :param execute: Callable taking a list of LaunchRequest and
+                        filling in their 'nodes'
+        :param window: Number coalescing window in seconds
+        :return: List of nodes launched for request
+        """
+        if window <= 0:
+            execute([request])
+
+            return request.nodes
+
+        with self.__lock:
+            batch = self.__pending.get(key)
+
+            if batch is None:
+                self.__pending[key] = batch = []
+                leader = True
+            else:
+                leader = False
+
+            batch.append(request)
+
+        if not leader:
+            request.done.wait()
+
+            if request.error is not None:
+                raise request.error
+
+            return request.nodes
+
+        (self._sleep or gevent.sleep)(window)
+
+        with self.__lock:
+            del self.__pending[key]
+
+        try:
+            execute(batch)
+        except Exception as exc:
+            for follower in batch[1:]:
+                follower.error = exc
+
+            raise
+        finally:
+            for follower in batch[1:]:
+                follower.done.set()
+
+        return request.nodes
+
+    def pending(self, key):
+        """
+        :param key: Hashable launch template key
+        :return: Integer number of requests waiting for key
+        """
+        with self.__lock:
+            return len(self.__pending.get(key, ()))
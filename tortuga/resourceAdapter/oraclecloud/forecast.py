@@ -0,0 +1,476 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+
+DAY = 86400
+WEEK = 7 * DAY
+
+
+class RequestHistory(object):
+    """
+    Compact history of add-node and delete-node requests per hardware
+    profile, aggregated into fixed time buckets, and of the warm node
+    hours spent per profile and day.  Buckets older than 'retention'
+    seconds are dropped.
+    """
+    def __init__(self, bucket=900, retention=5 * WEEK, clock=time.time):
+        """
+        :param bucket: Integer seconds per bucket; should divide a day
+        :param retention: Integer seconds of history kept
+        :param clock: Callable returning current time in seconds
+        """
+        self.bucket = int(bucket)
+        self.retention = retention
+        self._clock = clock
+        self.__buckets = {}
+        self.__warm_hours = {}
+        self.__lock = threading.Lock()
+
+    def bucket_start(self, timestamp):
+        return int(timestamp) - int(timestamp) % self.bucket
+
+    def record(self, profile, added=0, deleted=0, timestamp=None):
+        """
+        :param profile: String hardware profile name
+        :param added: Integer nodes requested
+        :param deleted: Integer nodes deleted
+        :param timestamp: Number seconds since the epoch (optional)
+        """
+        start = self.bucket_start(
+            self._clock() if timestamp is None else timestamp)
+
+        with self.__lock:
+            counts = self.__buckets.setdefault(profile, {}).setdefault(
+                start, [0, 0])
+
+            counts[0] += added
+            counts[1] += deleted
+
+    def added(self, profile, start):
+        """
+        :return: Integer nodes requested in bucket starting at 'start'
+        """
+        with self.__lock:
+            return self.__buckets.get(profile, {}).get(start, (0, 0))[0]
+
+    def first(self, profile):
+        """
+        :return: Integer start of oldest bucket of profile, or None
+        """
+        with self.__lock:
+            buckets = self.__buckets.get(profile)
+
+            return min(buckets) if buckets else None
+
+    def series(self, profile):
+        """
+        :return: List of (bucket start, added, deleted), oldest first
+        """
+        with self.__lock:
+            return [
+                (start, counts[0], counts[1])
+                for start, counts in sorted(
+                    self.__buckets.get(profile, {}).items())
+            ]
+
+    @property
+    def profiles(self):
+        with self.__lock:
+            return sorted(self.__buckets)
+
+    def charge(self, profile, hours, timestamp=None):
+        """
+        Account warm node hours against the day of 'timestamp'.
+
+        :param profile: String hardware profile name
+        :param hours: Number node hours
+        """
+        timestamp = self._clock() if timestamp is None else timestamp
+
+        day = int(timestamp) - int(timestamp) % DAY
+
+        with self.__lock:
+            spent = self.__warm_hours.setdefault(profile, {})
+
+            spent[day] = spent.get(day, 0.0) + hours
+
+    def spent(self, profile, timestamp=None):
+        """
+        :return: Number warm node hours spent on the day of 'timestamp'
+        """
+        timestamp = self._clock() if timestamp is None else timestamp
+
+        day = int(timestamp) - int(timestamp) % DAY
+
+        with self.__lock:
+            return self.__warm_hours.get(profile, {}).get(day, 0.0)
+
+    def prune(self, now=None):
+        """
+        Drop buckets and budget days older than the retention period.
+        """
+        oldest = (self._clock() if now is None else now) - self.retention
+
+        with self.__lock:
+            for data in (self.__buckets, self.__warm_hours):
+                for profile in list(data):
+                    data[profile] = {
+                        start: value
+                        for start, value in data[profile].items()
+                        if start >= oldest
+                    }
+
+                    if not data[profile]:
+                        del data[profile]
+
+    def load(self, path):
+        """
+        Load history saved by save(), including its bucket size; a
+        missing or unreadable file is ignored.
+
+        :param path: String file path
+        """
+        try:
+            with open(path) as fp:
+                data = json.load(fp)
+        except (IOError, OSError, ValueError):
+            return
+
+        with self.__lock:
+            self.bucket = int(data.get('bucket', self.bucket))
+
+            self.__buckets = {
+                profile: {
+                    int(start): list(counts)
+                    for start, counts in buckets.items()
+                }
+                for profile, buckets in data.get('buckets', {}).items()
+            }
+
+            self.__warm_hours = {
+                profile: {
+                    int(day): float(hours) for day, hours in days.items()
+                }
+                for profile, days in data.get('warm_hours', {}).items()
+            }
+
+    def save(self, path):
+        """
+        :param path: String file path
+        """
+        self.prune()
+
+        with self.__lock:
+            data = {
+                'bucket': self.bucket,
+                'buckets': {
+                    profile: {
+                        str(start): counts
+                        for start, counts in buckets.items()
+                    }
+                    for profile, buckets in self.__buckets.items()
+                },
+                'warm_hours': {
+                    profile: {
+                        str(day): hours for day, hours in days.items()
+                    }
+                    for profile, days in self.__warm_hours.items()
+                },
+            }
+
+        directory = os.path.dirname(path)
+
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+
+        with open(tmp_path, 'w') as fp:
+            json.dump(data, fp)
+
+        os.rename(tmp_path, path)
+
+
+class SeasonalForecaster(object):
+    """
+    Expected node requests for a hardware profile, from the same time
+    of week over the last 'weeks' weeks blended with the same time of
+    day over the last 'days' days.  Only history older than one day is
+    consulted, so forecasts looking less than a day ahead never see the
+    window they predict.
+    """
+    def __init__(self, history, weeks=4, days=7, daily_weight=0.3):
+        """
+        :param history: RequestHistory
+        :param weeks: Integer weeks of weekly seasonality
+        :param days: Integer days of daily seasonality
+        :param daily_weight: Number weight of the daily estimate
+        """
+        self.history = history
+        self.weeks = weeks
+        self.days = days
+        self.daily_weight = daily_weight
+
+    def __mean(self, profile, start, first, period, count):
+        samples = [
+            self.history.added(profile, start - idx * period)
+            for idx in range(1, count + 1)
+            if start - idx * period >= first
+        ]
+
+        return float(sum(samples)) / len(samples) if samples else None
+
+    def rate(self, profile, start):
+        """
+        :param profile: String hardware profile name
+        :param start: Integer bucket start
+        :return: Number expected nodes requested in bucket
+        """
+        first = self.history.first(profile)
+
+        if first is None:
+            return 0.0
+
+        weekly = self.__mean(profile, start, first, WEEK, self.weeks)
+        daily = self.__mean(profile, start, first, DAY, self.days)
+
+        if weekly is None:
+            return daily or 0.0
+
+        if daily is None:
+            return weekly
+
+        return (1 - self.daily_weight) * weekly + self.daily_weight * daily
+
+    def forecast(self, profile, start, horizon):
+        """
+        :param profile: String hardware profile name
+        :param start: Number seconds since the epoch
+        :param horizon: Number seconds
+        :return: Number expected nodes requested in [start,
+                 start + horizon)
+        """
+        bucket = self.history.bucket
+        first = self.history.bucket_start(start)
+
+        return sum(
+            self.rate(profile, bucket_start)
+            for bucket_start in range(
+                first, int(start + horizon), bucket)
+        )
+
+
+class WarmPoolPlanner(object):
+    """
+    Decide how many warm nodes to launch ahead of forecast demand,
+    within a daily budget of warm node hours.  A warm node is expected
+    to wait up to 'lead_time' seconds before it is claimed; that time is
+    reserved from the budget for unclaimed warm nodes until they are
+    claimed or released and their actual time is spent.
+    """
+    def __init__(self, max_nodes=10, budget=24.0, lead_time=1800):
+        """
+        :param max_nodes: Integer maximum warm nodes per profile
+        :param budget: Number warm node hours per profile and day
+        :param lead_time: Integer seconds of demand to warm ahead for
+        """
+        self.max_nodes = max(int(max_nodes), 0)
+        self.budget = float(budget)
+        self.lead_time = lead_time
+
+    def plan(self, forecast, warm, spent):
+        """
+        :param forecast: Number expected nodes requested in lead time
+        :param warm: Integer unclaimed warm nodes
+        :param spent: Number warm node hours spent today
+        :return: Integer warm nodes to launch
+        """
+        desired = min(int(forecast + 0.5), self.max_nodes)
+
+        cost = self.lead_time / 3600.0
+
+        affordable = int(
+            max(self.budget - spent - warm * cost, 0) / cost) \
+            if cost > 0 else desired
+
+        return max(min(desired - warm, affordable), 0)
+
+
+def replay(history, profile, forecaster, planner, launch_latency,
+           start=None, end=None):
+    """
+    Replay recorded requests of a profile against the forecaster and
+    planner, as if warm nodes had been launched at each bucket.  Warm
+    nodes become available 'launch_latency' seconds after launch and are
+    released when unclaimed for 'lead_time' seconds after that.
+
+    :param history: RequestHistory
+    :param profile: String hardware profile name
+    :param forecaster: SeasonalForecaster
+    :param planner: WarmPoolPlanner
+    :param launch_latency: Number seconds from launch until a node is
+                           usable (launch and bootstrap)
+    :param start: Integer first bucket (default start of the day after
+                  the oldest recorded bucket)
+    :param end: Integer end of replay (default end of newest bucket)
+    :return: Dictionary
+    """
+    series = history.series(profile)
+
+    result = {
+        'profile': profile,
+        'nodes_requested': 0,
+        'hits': 0,
+        'misses': 0,
+        'hit_rate': None,
+        'latency_saved_seconds': 0,
+        'warm_launches': 0,
+        'warm_node_hours': 0.0,
+        'wasted_node_hours': 0.0,
+    }
+
+    if not series:
+        return result
+
+    bucket = history.bucket
+    if start is None:
+        start = series[0][0] - series[0][0] % DAY + DAY
+
+    end = series[-1][0] + bucket if end is None else end
+
+    spent = {}
+    # (ready_at, launched_at) of unclaimed warm nodes, oldest first
+    pool = []
+
+    def charge(launched_at, now):
+        hours = (now - launched_at) / 3600.0
+
+        day = now - now % DAY
+
+        spent[day] = spent.get(day, 0.0) + hours
+
+        result['warm_node_hours'] += hours
+
+        return hours
+
+    for now in range(history.bucket_start(start), end, bucket):
+        for node in [node for node in pool
+                     if node[0] + planner.lead_time <= now]:
+            pool.remove(node)
+
+            result['wasted_node_hours'] += charge(node[1], now)
+
+        launch = planner.plan(
+            forecaster.forecast(profile, now, planner.lead_time),
+            len(pool), spent.get(now - now % DAY, 0.0))
+
+        pool.extend([(now + launch_latency, now)] * launch)
+
+        result['warm_launches'] += launch
+
+        demand = history.added(profile, now)
+
+        ready = [node for node in pool if node[0] <= now]
+
+        hits = min(demand, len(ready))
+
+        for node in ready[:hits]:
+            pool.remove(node)
+
+            charge(node[1], now)
+
+        result['nodes_requested'] += demand
+        result['hits'] += hits
+        result['misses'] += demand - hits
+
+    for node in pool:
+        result['wasted_node_hours'] += charge(node[1], end)
+
+    if result['nodes_requested']:
+        result['hit_rate'] = \
+            float(result['hits']) / result['nodes_requested']
+
+    result['latency_saved_seconds'] = result['hits'] * launch_latency
+
+    for key in ('warm_node_hours', 'wasted_node_hours'):
+        result[key] = round(result[key], 2)
+
+    return result
+
+
+def main(argv=None):
+    """
+    Replay recorded request history against the pre-scaling forecaster
+    and report hit rate, latency saved and warm node hours.
+    """
+    parser = argparse.ArgumentParser(
+        description='Replay OCI request history against pre-scaling')
+    parser.add_argument(
+        '--history',
+        default=os.path.join(
+            os.getenv('TORTUGA_ROOT', '/opt/tortuga'), 'var',
+            'oci-request-history.json'))
+    parser.add_argument('--profile', action='append',
+                        help='hardware profile (default: all)')
+    parser.add_argument('--launch-latency', type=float, default=600,
+                        help='seconds from launch until a node is usable')
+    parser.add_argument('--lead-time', type=int, default=1800)
+    parser.add_argument('--max-nodes', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=24.0,
+                        help='warm node hours per profile and day')
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--daily-weight', type=float, default=0.3)
+    parser.add_argument('--json', action='store_true')
+
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.history):
+        parser.error('no request history at [%s]' % (args.history))
+
+    history = RequestHistory()
+    history.load(args.history)
+
+    forecaster = SeasonalForecaster(
+        history, weeks=args.weeks, daily_weight=args.daily_weight)
+
+    planner = WarmPoolPlanner(max_nodes=args.max_nodes, budget=args.budget,
+                              lead_time=args.lead_time)
+
+    results = [
+        replay(history, profile, forecaster, planner, args.launch_latency)
+        for profile in args.profile or history.profiles
+    ]
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+        return
+
+    for result in results:
+        print('%(profile)s: %(hits)d/%(nodes_requested)d node(s) served'
+              ' warm, %(latency_saved_seconds)d seconds saved,'
+              ' %(warm_node_hours)s warm node hours'
+              ' (%(wasted_node_hours)s unused)' % result)
+
+
+if __name__ == '__main__':
+    main()
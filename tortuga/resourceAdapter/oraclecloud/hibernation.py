@@ -0,0 +1,204 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import time
+from collections import defaultdict
+
+
+FAILED_STATES = ('TERMINATING', 'TERMINATED')
+
+#: Prefix of instance cache entries of parked instances.  Parked
+#: instances are keyed by instance OCID rather than node name, so that a
+#: new node may take the name without overwriting the entry.
+PARKED_PREFIX = 'parked:'
+
+
+class HibernationError(Exception):
+    pass
+
+
+def parked_key(instance_id):
+    """
+    :param instance_id: String instance OCID
+    :return: String instance cache key of parked instance
+    """
+    return PARKED_PREFIX + instance_id
+
+
+def parked_name(key, entry):
+    """
+    :param key: String instance cache key of parked instance
+    :param entry: Dictionary instance cache entry
+    :return: String name of the node the instance belonged to
+    """
+    return entry.get('name') or key
+
+
+def split_parked(entries, profile, now, max_idle):
+    """
+    Split instance cache entries of parked nodes of a profile into
+    those that can be resumed and those idle for longer than
+    'max_idle' seconds.
+
+    :param entries: Dictionary key: instance cache entry
+    :param profile: String parked profile (None matches any profile)
+    :param now: Number seconds since the epoch
+    :param max_idle: Number seconds; 0 or None for no limit
+    :return: (resumable, expired) Lists of (String key, Dictionary
+             entry), longest parked first
+    """
+    resumable = []
+    expired = []
+
+    for key, entry in sorted(
+            entries.items(),
+            key=lambda item: float(item[1].get('parked_since') or 0)):
+        if not entry.get('parked_since'):
+            continue
+
+        if max_idle and now - float(entry['parked_since']) >= max_idle:
+            expired.append((key, entry))
+        elif profile is None or entry.get('parked_profile') == profile:
+            resumable.append((key, entry))
+
+    return resumable, expired
+
+
+class ResumeOrchestrator(object):
+    """
+    Start many stopped instances at once: the START actions are issued
+    back-to-back and the instances are then polled with one (paginated)
+    instance listing per compartment, instead of one get_instance()
+    call per instance.
+
+    The client is any object implementing instance_action() and
+    list_instances() of oci.core.ComputeClient.
+    """
+    def __init__(self, client, sleep=time.sleep, interval=5, timeout=600,
+                 clock=time.time):
+        """
+        :param client: Compute client
+        :param sleep: Callable used between polls
+        :param interval: Number seconds between polls
+        :param timeout: Number seconds to wait for instances to run
+        :param clock: Callable returning current time in seconds
+        """
+        self._client = client
+        self._sleep = sleep
+        self.interval = interval
+        self.timeout = timeout
+        self._clock = clock
+        self.calls = 0
+
+    def __start(self, instance_ids, results):
+        """
+        Issue START actions; instances in conflicting states are retried
+        on the next poll.
+
+        :return: Set String instance OCIDs to retry
+        """
+        retry = set()
+
+        for instance_id in instance_ids:
+            self.calls += 1
+
+            try:
+                self._client.instance_action(instance_id, 'START')
+            except Exception as exc:
+                if getattr(exc, 'status', None) == 409:
+                    retry.add(instance_id)
+                else:
+                    results[instance_id] = exc
+
+        return retry
+
+    def __list_states(self, compartment_id):
+        states = {}
+        page = None
+
+        while True:
+            kwargs = {'page': page} if page else {}
+
+            self.calls += 1
+
+            response = self._client.list_instances(compartment_id, **kwargs)
+
+            for instance in response.data:
+                states[instance.id] = instance.lifecycle_state
+
+            page = getattr(response, 'next_page', None)
+            if not page:
+                return states
+
+    def resume(self, instances):
+        """
+        :param instances: Iterable of (String instance OCID, String
+                          compartment OCID)
+        :return: Dictionary instance OCID: None once RUNNING, or the
+                 exception it failed with
+        """
+        compartments = defaultdict(set)
+
+        for instance_id, compartment_id in instances:
+            compartments[compartment_id].add(instance_id)
+
+        results = {}
+
+        retry = self.__start(
+            sorted(set().union(*compartments.values())), results)
+
+        deadline = self._clock() + self.timeout
+
+        while True:
+            pending = {
+                compartment_id: instance_ids - set(results)
+                for compartment_id, instance_ids in compartments.items()
+                if instance_ids - set(results)
+            }
+
+            if not pending:
+                return results
+
+            if self._clock() >= deadline:
+                for instance_ids in pending.values():
+                    for instance_id in instance_ids:
+                        results[instance_id] = HibernationError(
+                            'Instance [%s] not running after %s seconds' % (
+                                instance_id, self.timeout))
+
+                return results
+
+            self._sleep(self.interval)
+
+            if retry:
+                retry = self.__start(sorted(retry), results)
+
+            for compartment_id, instance_ids in sorted(pending.items()):
+                states = self.__list_states(compartment_id)
+
+                for instance_id in instance_ids:
+                    if instance_id in retry:
+                        continue
+
+                    lifecycle_state = states.get(instance_id)
+
+                    if lifecycle_state == 'RUNNING':
+                        results[instance_id] = None
+                    elif lifecycle_state is None or \
+                            lifecycle_state in FAILED_STATES:
+                        results[instance_id] = HibernationError(
+                            'Instance [%s] is %s' % (
+                                instance_id,
+                                lifecycle_state or 'gone'))
@@ -0,0 +1,139 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import fnmatch
+import threading
+import time
+
+
+class ImageNotFoundError(Exception):
+    pass
+
+
+def is_image_ocid(value):
+    return value.startswith('ocid1.image.')
+
+
+def parse_tags(specs):
+    """
+    :param specs: List String 'key=value' freeform tag filters
+    :return: Dictionary
+    :raises ValueError: malformed filter
+    """
+    result = {}
+
+    for spec in specs or []:
+        key, sep, value = spec.partition('=')
+
+        if not sep or not key:
+            raise ValueError('Invalid image tag filter [%s]' % (spec))
+
+        result[key] = value
+
+    return result
+
+
+def parse_profile_images(specs):
+    """
+    Parse software profile image selectors of the form
+    'profile=selector', where the selector is an image OCID or an image
+    name pattern.
+
+    :param specs: List String
+    :return: Dictionary software profile name: selector
+    :raises ValueError: malformed selector
+    """
+    result = {}
+
+    for spec in specs or []:
+        profile, sep, selector = spec.partition('=')
+
+        if not sep or not profile or not selector:
+            raise ValueError('Invalid software profile image [%s]' % (spec))
+
+        result[profile] = selector
+
+    return result
+
+
+class ImageIndex(object):
+    """
+    Available images of a compartment, listed at most once per TTL.
+    Name patterns resolve to the newest matching image.
+    """
+    def __init__(self, list_images, ttl=300, clock=time.time):
+        """
+        :param list_images: Callable taking a compartment OCID and
+                            returning all available image summaries
+        :param ttl: Number seconds the image list remains valid
+        :param clock: Callable returning current time in seconds
+        """
+        self._list_images = list_images
+        self.ttl = ttl
+        self._clock = clock
+        self.loads = 0
+        self.__images = {}
+        self.__lock = threading.Lock()
+
+    def images(self, compartment_id):
+        """
+        :param compartment_id: String compartment OCID
+        :return: List image summaries, newest first
+        """
+        now = self._clock()
+
+        with self.__lock:
+            cached = self.__images.get(compartment_id)
+
+            if cached and now - cached[0] < self.ttl:
+                return cached[1]
+
+        images = sorted(
+            self._list_images(compartment_id),
+            key=lambda image: image.time_created,
+            reverse=True
+        )
+
+        with self.__lock:
+            self.__images[compartment_id] = (now, images)
+            self.loads += 1
+
+        return images
+
+    def resolve(self, compartment_id, selector, tags=None):
+        """
+        :param compartment_id: String compartment OCID
+        :param selector: String image OCID or display name pattern
+        :param tags: Dictionary freeform tags images must carry
+                     (optional)
+        :return: String image OCID
+        :raises ImageNotFoundError:
+        """
+        if is_image_ocid(selector):
+            return selector
+
+        for image in self.images(compartment_id):
+            if not fnmatch.fnmatchcase(image.display_name or '', selector):
+                continue
+
+            image_tags = image.freeform_tags or {}
+
+            if all(image_tags.get(key) == value
+                   for key, value in (tags or {}).items()):
+                return image.id
+
+        raise ImageNotFoundError(
+            'No available image matches [%s]%s' % (
+                selector,
+                ' with tags %s' % (tags) if tags else ''))
@@ -0,0 +1,139 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+
+class InstanceCacheIndex(object):
+    """
+    In-memory index of instance cache entries.
+
+    All entries are loaded with one call to 'loader' on first use and
+    kept current by write-through from the adapter.  A lookup miss
+    reloads the index, at most once per 'reload_interval' seconds, to
+    pick up entries written by other processes.
+    """
+    def __init__(self, loader, reload_interval=5, clock=time.time):
+        """
+        :param loader: Callable returning dictionary of node name to
+                       dictionary of cache entry fields
+        :param reload_interval: Number minimum seconds between reloads
+        :param clock: Callable returning current time in seconds
+        """
+        self._loader = loader
+        self.reload_interval = reload_interval
+        self._clock = clock
+        self.loads = 0
+        self.__entries = None
+        self.__loaded_at = None
+        self.__lock = threading.Lock()
+
+    def __load(self):
+        entries = self._loader()
+
+        with self.__lock:
+            self.__entries = {
+                name: dict(entry) for name, entry in entries.items()
+            }
+            self.__loaded_at = self._clock()
+            self.loads += 1
+
+    def __ensure_loaded(self):
+        if self.__entries is None:
+            self.__load()
+
+    def __reload_on_miss(self):
+        if self._clock() - self.__loaded_at >= self.reload_interval:
+            self.__load()
+
+            return True
+
+        return False
+
+    def get(self, name):
+        """
+        :param name: String node name
+        :return: Dictionary copy of entry, or None
+        """
+        self.__ensure_loaded()
+
+        entry = self.__entries.get(name)
+
+        if entry is None and self.__reload_on_miss():
+            entry = self.__entries.get(name)
+
+        return dict(entry) if entry is not None else None
+
+    def get_many(self, names):
+        """
+        :param names: Iterable String node names
+        :return: Dictionary node name: entry, for names with an entry
+        """
+        self.__ensure_loaded()
+
+        names = list(names)
+
+        result = {
+            name: self.__entries[name]
+            for name in names if name in self.__entries
+        }
+
+        if len(result) < len(names) and self.__reload_on_miss():
+            result = {
+                name: self.__entries[name]
+                for name in names if name in self.__entries
+            }
+
+        return {name: dict(entry) for name, entry in result.items()}
+
+    def find(self, predicate):
+        """
+        :param predicate: Callable taking an entry, returning Boolean
+        :return: Dictionary node name: entry, for matching entries
+        """
+        self.__ensure_loaded()
+
+        with self.__lock:
+            entries = list(self.__entries.items())
+
+        return {
+            name: dict(entry) for name, entry in entries if predicate(entry)
+        }
+
+    def set(self, name, entry):
+        """
+        :param name: String node name
+        :param entry: Dictionary entry fields
+        """
+        self.__ensure_loaded()
+
+        with self.__lock:
+            self.__entries[name] = {
+                key: str(value) for key, value in entry.items()
+            }
+
+    def delete(self, name):
+        """
+        :param name: String node name
+        """
+        self.__ensure_loaded()
+
+        with self.__lock:
+            self.__entries.pop(name, None)
+
+    def __len__(self):
+        self.__ensure_loaded()
+
+        return len(self.__entries)
@@ -0,0 +1,527 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import datetime
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from urllib.request import pathname2url
+
+
+LAUNCHING = 'LAUNCHING'
+RUNNING = 'RUNNING'
+PROVISIONED = 'PROVISIONED'
+FAILED = 'FAILED'
+TERMINATED = 'TERMINATED'
+
+#: Column set when a launch enters a state
+STATE_TIMESTAMPS = {
+    RUNNING: 'running',
+    PROVISIONED: 'provisioned',
+    FAILED: 'finished',
+    TERMINATED: 'terminated',
+}
+
+COLUMNS = (
+    'launch_id',
+    'name',
+    'instance_id',
+    'session',
+    'hardware_profile',
+    'software_profile',
+    'shape',
+    'availability_domain',
+    'region',
+    'capacity_type',
+    'image_id',
+    'state',
+    'error',
+    'tags',
+    'phases',
+    'requested',
+    'running',
+    'provisioned',
+    'finished',
+    'terminated',
+)
+
+#: Columns durations can be grouped by
+GROUP_COLUMNS = (
+    'shape',
+    'availability_domain',
+    'region',
+    'hardware_profile',
+    'software_profile',
+    'session',
+    'capacity_type',
+)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS launches (
+    launch_id TEXT PRIMARY KEY,
+    name TEXT,
+    instance_id TEXT,
+    session TEXT,
+    hardware_profile TEXT,
+    software_profile TEXT,
+    shape TEXT,
+    availability_domain TEXT,
+    region TEXT,
+    capacity_type TEXT,
+    image_id TEXT,
+    state TEXT,
+    error TEXT,
+    tags TEXT,
+    phases TEXT,
+    requested REAL,
+    running REAL,
+    provisioned REAL,
+    finished REAL,
+    terminated REAL
+);
+CREATE INDEX IF NOT EXISTS launches_name ON launches (name);
+CREATE INDEX IF NOT EXISTS launches_instance_id ON launches (instance_id);
+CREATE INDEX IF NOT EXISTS launches_session ON launches (session);
+CREATE INDEX IF NOT EXISTS launches_state ON launches (state);
+CREATE INDEX IF NOT EXISTS launches_requested ON launches (requested);
+'''
+
+_RELATIVE_TIME_RE = re.compile(r'^(\d+(?:\.\d+)?)([smhdw])$')
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+class Inventory(object):
+    """
+    Local index of launches (one row per launch attempt) with node
+    names, instance OCIDs, tags, phase timestamps and states, kept
+    current by the adapter so operators can answer inventory questions
+    without querying the OCI API.
+    """
+    def __init__(self, path, clock=time.time, readonly=False):
+        """
+        :param path: String SQLite database path
+        :param clock: Callable returning current time in seconds
+        :param readonly: Boolean open an existing database for queries
+                         only, without changing its journal mode or
+                         schema
+        """
+        self.path = path
+        self._clock = clock
+        self.__lock = threading.Lock()
+
+        if readonly:
+            self.__db = sqlite3.connect(
+                'file:%s?mode=ro' % (pathname2url(path)), timeout=30,
+                check_same_thread=False, uri=True)
+            self.__db.row_factory = sqlite3.Row
+
+            return
+
+        directory = os.path.dirname(path)
+
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.__db = sqlite3.connect(path, timeout=30,
+                                    check_same_thread=False)
+        self.__db.row_factory = sqlite3.Row
+
+        with self.__lock, self.__db:
+            # Readers do not block the adapter while it writes
+            self.__db.execute('PRAGMA journal_mode=WAL')
+            self.__db.executescript(_SCHEMA)
+
+    def close(self):
+        self.__db.close()
+
+    @staticmethod
+    def __values(fields):
+        values = {}
+
+        for key, value in fields.items():
+            if key not in COLUMNS:
+                raise ValueError('Unknown inventory field [%s]' % (key))
+
+            if key in ('tags', 'phases') and value is not None:
+                value = json.dumps(value, sort_keys=True)
+
+            values[key] = value
+
+        return values
+
+    def begin(self, launch_id, **fields):
+        """
+        Record a launch attempt in state LAUNCHING.
+
+        :param launch_id: String unique launch attempt id
+        :param fields: Column values
+        """
+        values = self.__values(fields)
+        values.update(launch_id=launch_id, state=LAUNCHING)
+        values.setdefault('requested', self._clock())
+
+        with self.__lock, self.__db:
+            self.__db.execute(
+                'INSERT OR REPLACE INTO launches (%s) VALUES (%s)' % (
+                    ', '.join(values), ', '.join('?' * len(values))),
+                list(values.values()))
+
+    def update(self, launch_id, **fields):
+        """
+        :param launch_id: String launch attempt id
+        :param fields: Column values
+        """
+        self.update_many([(launch_id, fields)])
+
+    def update_many(self, updates):
+        """
+        Apply many updates in one transaction.  Setting 'state' also
+        sets the timestamp column of that state, unless given.
+
+        :param updates: Iterable of (String launch id, Dictionary fields)
+        """
+        with self.__lock, self.__db:
+            for launch_id, fields in updates:
+                values = self.__values(fields)
+
+                column = STATE_TIMESTAMPS.get(values.get('state'))
+
+                if column:
+                    values.setdefault(column, self._clock())
+
+                if not values:
+                    continue
+
+                self.__db.execute(
+                    'UPDATE launches SET %s WHERE launch_id = ?' % (
+                        ', '.join('%s = ?' % key for key in values)),
+                    list(values.values()) + [launch_id])
+
+    def terminate(self, names, timestamp=None):
+        """
+        Mark the current launches of nodes as terminated, in one
+        transaction.
+
+        :param names: Iterable String node names
+        :return: Integer launches updated
+        """
+        timestamp = self._clock() if timestamp is None else timestamp
+
+        names = list(names)
+
+        with self.__lock, self.__db:
+            return self.__db.executemany(
+                'UPDATE launches SET state = ?, terminated = ?'
+                ' WHERE name = ? AND state IN (?, ?, ?)',
+                [(TERMINATED, timestamp, name, LAUNCHING, RUNNING,
+                  PROVISIONED) for name in names]).rowcount
+
+    def record_phases(self, instance_id, phases):
+        """
+        Merge bootstrap phase timestamps into the launch of an instance.
+
+        :param instance_id: String instance OCID
+        :param phases: Dictionary phase: timestamp
+        """
+        with self.__lock, self.__db:
+            row = self.__db.execute(
+                'SELECT launch_id, phases FROM launches'
+                ' WHERE instance_id = ?', (instance_id,)).fetchone()
+
+            if row is None:
+                return
+
+            merged = json.loads(row['phases'] or '{}')
+
+            for phase, timestamp in phases.items():
+                merged.setdefault(phase, timestamp)
+
+            self.__db.execute(
+                'UPDATE launches SET phases = ? WHERE launch_id = ?',
+                (json.dumps(merged, sort_keys=True), row['launch_id']))
+
+    @staticmethod
+    def __row(row):
+        result = dict(row)
+
+        for key in ('tags', 'phases'):
+            result[key] = json.loads(result[key]) if result[key] else {}
+
+        return result
+
+    def query(self, name=None, instance_id=None, session=None, state=None,
+              shape=None, hardware_profile=None, since=None, until=None,
+              limit=None):
+        """
+        :param since: Number earliest request time (optional)
+        :param until: Number latest request time (optional)
+        :param limit: Integer maximum rows (optional)
+        :return: List Dictionaries, most recently requested first
+        """
+        clauses = []
+        params = []
+
+        for column, value in (('name', name),
+                              ('instance_id', instance_id),
+                              ('session', session),
+                              ('state', state),
+                              ('shape', shape),
+                              ('hardware_profile', hardware_profile)):
+            if value is not None:
+                clauses.append('%s = ?' % (column))
+                params.append(value)
+
+        if since is not None:
+            clauses.append('requested >= ?')
+            params.append(since)
+
+        if until is not None:
+            clauses.append('requested < ?')
+            params.append(until)
+
+        sql = 'SELECT * FROM launches'
+
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+
+        sql += ' ORDER BY requested DESC'
+
+        if limit:
+            sql += ' LIMIT %d' % (int(limit))
+
+        with self.__lock:
+            rows = self.__db.execute(sql, params).fetchall()
+
+        return [self.__row(row) for row in rows]
+
+    def durations(self, group_by='shape', **filters):
+        """
+        Launch durations grouped by a column: request until RUNNING and
+        request until provisioned, over launches matching 'filters'
+        (see query()).
+
+        :return: Dictionary group: statistics
+        """
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError('Cannot group by [%s]' % (group_by))
+
+        groups = {}
+
+        for row in self.query(**filters):
+            group = groups.setdefault(row[group_by] or 'unknown', {
+                'launches': 0,
+                'failed': 0,
+                'to_running': [],
+                'to_provisioned': [],
+            })
+
+            group['launches'] += 1
+
+            if row['state'] == FAILED:
+                group['failed'] += 1
+
+            for key, column in (('to_running', 'running'),
+                                ('to_provisioned', 'provisioned')):
+                if row[column] and row['requested']:
+                    group[key].append(row[column] - row['requested'])
+
+        return {
+            key: dict(
+                group,
+                to_running=_stats(group['to_running']),
+                to_provisioned=_stats(group['to_provisioned'])
+            )
+            for key, group in groups.items()
+        }
+
+
+def _stats(values):
+    if not values:
+        return None
+
+    values = sorted(values)
+
+    def percentile(fraction):
+        return round(
+            values[min(int(fraction * len(values)), len(values) - 1)], 1)
+
+    return {
+        'count': len(values),
+        'mean': round(sum(values) / len(values), 1),
+        'p50': percentile(0.5),
+        'p90': percentile(0.9),
+        'max': round(values[-1], 1),
+    }
+
+
+def parse_time(value, now=None):
+    """
+    :param value: String seconds since the epoch, ISO 8601 local time
+                  ('2018-06-01T18:00') or age ('30m', '12h', '2d')
+    :return: Number seconds since the epoch
+    :raises ValueError:
+    """
+    now = time.time() if now is None else now
+
+    match = _RELATIVE_TIME_RE.match(value)
+
+    if match:
+        return now - float(match.group(1)) * _UNITS[match.group(2)]
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    for fmt in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d'):
+        try:
+            return time.mktime(
+                datetime.datetime.strptime(value, fmt).timetuple())
+        except ValueError:
+            continue
+
+    raise ValueError('Invalid time [%s]' % (value))
+
+
+def _format_time(timestamp):
+    if not timestamp:
+        return '-'
+
+    return datetime.datetime.fromtimestamp(timestamp).strftime(
+        '%Y-%m-%d %H:%M:%S')
+
+
+def _print_launches(rows):
+    for row in rows:
+        print('%-30s %-12s %-20s %s  %s' % (
+            row['name'] or '-', row['state'], row['shape'] or '-',
+            _format_time(row['requested']), row['instance_id'] or '-'))
+
+
+def _print_durations(groups):
+    for key, group in sorted(groups.items()):
+        line = '%s: %d launch(es), %d failed' % (
+            key, group['launches'], group['failed'])
+
+        for label in ('to_running', 'to_provisioned'):
+            stats = group[label]
+
+            if stats:
+                line += '; %s mean %ss p90 %ss max %ss' % (
+                    label.replace('_', ' '), stats['mean'], stats['p90'],
+                    stats['max'])
+
+        print(line)
+
+
+def main(argv=None):
+    """
+    Query the local OCI launch inventory.
+    """
+    parser = argparse.ArgumentParser(
+        description='Query the local OCI instance and launch inventory')
+    parser.add_argument(
+        '--index',
+        default=os.path.join(
+            os.getenv('TORTUGA_ROOT', '/opt/tortuga'), 'var',
+            'oci-inventory.db'))
+    parser.add_argument('--json', action='store_true',
+                        help='JSON output')
+
+    subparsers = parser.add_subparsers(dest='command')
+
+    list_parser = subparsers.add_parser('list', help='list launches')
+    durations_parser = subparsers.add_parser(
+        'durations', help='launch durations')
+
+    for subparser in (list_parser, durations_parser):
+        subparser.add_argument('--name')
+        subparser.add_argument('--instance-id')
+        subparser.add_argument('--session')
+        subparser.add_argument('--state', type=str.upper)
+        subparser.add_argument('--shape')
+        subparser.add_argument('--hardware-profile')
+        subparser.add_argument(
+            '--since', help='epoch, ISO time or age such as 12h')
+        subparser.add_argument('--until')
+
+    list_parser.add_argument('--limit', type=int)
+
+    durations_parser.add_argument(
+        '--by', default='shape', choices=GROUP_COLUMNS)
+
+    show_parser = subparsers.add_parser(
+        'show', help='launches of a node name or instance OCID')
+    show_parser.add_argument('node')
+
+    args = parser.parse_args(argv)
+
+    if not args.command:
+        parser.error('a command is required')
+
+    if not os.path.exists(args.index):
+        parser.error('no inventory at [%s]' % (args.index))
+
+    inventory = Inventory(args.index, readonly=True)
+
+    try:
+        if args.command == 'show':
+            key = 'instance_id' if args.node.startswith('ocid1.') \
+                else 'name'
+
+            result = inventory.query(**{key: args.node})
+        else:
+            try:
+                filters = {
+                    'name': args.name,
+                    'instance_id': args.instance_id,
+                    'session': args.session,
+                    'state': args.state,
+                    'shape': args.shape,
+                    'hardware_profile': args.hardware_profile,
+                    'since': parse_time(args.since)
+                    if args.since else None,
+                    'until': parse_time(args.until)
+                    if args.until else None,
+                }
+            except ValueError as exc:
+                parser.error(str(exc))
+
+            if args.command == 'list':
+                result = inventory.query(limit=args.limit, **filters)
+            else:
+                result = inventory.durations(group_by=args.by, **filters)
+    finally:
+        inventory.close()
+
+    if args.json:
+        json.dump(result, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    elif args.command == 'durations':
+        _print_durations(result)
+    elif args.command == 'show':
+        for row in result:
+            print(json.dumps(row, indent=2, sort_keys=True))
+    else:
+        _print_launches(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import threading
+from collections import deque
+
+
+class LaunchStats(object):
+    """
+    Recent launch durations (launch request until RUNNING) per shape and
+    availability domain, used to derive launch timeouts and straggler
+    thresholds from observed behaviour.
+
+    Until 'min_samples' launches have been observed for a shape and
+    availability domain, callers' defaults are used.
+    """
+    def __init__(self, max_samples=200, min_samples=20, percentile=0.99,
+                 timeout_factor=2.0, min_timeout=60, max_timeout=7200):
+        """
+        :param max_samples: Integer durations kept per key
+        :param min_samples: Integer durations required before deriving
+        :param percentile: Number expected launch time percentile
+        :param timeout_factor: Number timeout as multiple of expected
+        :param min_timeout: Number smallest derived timeout
+        :param max_timeout: Number largest derived timeout
+        """
+        self.max_samples = max_samples
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.timeout_factor = timeout_factor
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.__samples = {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def key(shape, availability_domain):
+        return '%s/%s' % (shape, availability_domain)
+
+    def record(self, shape, availability_domain, duration):
+        """
+        :param shape: String shape name
+        :param availability_domain: String
+        :param duration: Number seconds
+        """
+        key = self.key(shape, availability_domain)
+
+        with self.__lock:
+            if key not in self.__samples:
+                self.__samples[key] = deque(maxlen=self.max_samples)
+
+            self.__samples[key].append(float(duration))
+
+    def expected(self, shape, availability_domain):
+        """
+        Launch duration at the configured percentile.
+
+        :return: Number seconds, or None with too few samples
+        """
+        with self.__lock:
+            samples = sorted(self.__samples.get(
+                self.key(shape, availability_domain), ()))
+
+        if len(samples) < self.min_samples:
+            return None
+
+        return samples[
+            min(int(self.percentile * len(samples)), len(samples) - 1)]
+
+    def timeout(self, shape, availability_domain, default):
+        """
+        :param default: Number seconds used with too few samples
+        :return: Number seconds
+        """
+        expected = self.expected(shape, availability_domain)
+
+        if expected is None:
+            return default
+
+        return min(max(expected * self.timeout_factor, self.min_timeout),
+                   self.max_timeout)
+
+    def summary(self):
+        """
+        :return: Dictionary key: {'samples', 'expected'}
+        """
+        with self.__lock:
+            counts = {
+                key: len(samples) for key, samples in self.__samples.items()
+            }
+
+        result = {}
+
+        for key, count in counts.items():
+            shape, availability_domain = key.split('/', 1)
+
+            result[key] = {
+                'samples': count,
+                'expected': self.expected(shape, availability_domain),
+            }
+
+        return result
+
+    def load(self, path):
+        """
+        Load durations saved by save(); a missing or unreadable file is
+        ignored.
+
+        :param path: String file path
+        """
+        try:
+            with open(path) as fp:
+                data = json.load(fp)
+        except (IOError, OSError, ValueError):
+            return
+
+        with self.__lock:
+            for key, durations in data.items():
+                self.__samples[key] = deque(
+                    (float(duration) for duration in durations),
+                    maxlen=self.max_samples)
+
+    def save(self, path):
+        """
+        :param path: String file path
+        """
+        with self.__lock:
+            data = {
+                key: list(samples) for key, samples in self.__samples.items()
+            }
+
+        directory = os.path.dirname(path)
+
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+
+        with open(tmp_path, 'w') as fp:
+            json.dump(data, fp)
+
+        os.rename(tmp_path, path)
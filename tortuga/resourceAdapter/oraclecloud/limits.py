@@ -0,0 +1,179 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from collections import namedtuple
+
+
+#: Outcome of a pre-flight check.  'available_cores' and 'limit_name'
+#: are None when the applicable limit could not be determined.
+PreflightResult = namedtuple(
+    'PreflightResult',
+    ['requested', 'allowed', 'available_cores', 'limit_name'])
+
+
+def core_limit_names(shape):
+    """
+    Candidate compute service limit names for the cores of a shape, for
+    example 'VM.Standard2.4' maps to 'standard2-core-count' and
+    'BM.Standard.E3.128' to 'standard-e3-core-ad-count'.
+
+    :param shape: String shape name
+    :return: List String limit names
+    """
+    parts = shape.split('.')[1:]
+
+    if parts and parts[-1].isdigit():
+        parts = parts[:-1]
+
+    family = '-'.join(parts).lower()
+
+    return [
+        '%s-core-count' % family,
+        '%s-core-ad-count' % family,
+        '%s-core-regional-count' % family,
+    ]
+
+
+class LimitsPreflight(object):
+    """
+    Look up available cores for a shape once per TTL, taking both
+    service limits and compartment quotas into account, and clamp launch
+    requests to what can succeed.
+
+    Cores granted to a request are deducted from the cached
+    availability, so concurrent requests within the TTL do not both
+    claim the same headroom.
+    """
+    def __init__(self, limits_client, tenancy_id, ttl=60, clock=time.time):
+        """
+        :param limits_client: oci.limits.LimitsClient (or stand-in)
+        :param tenancy_id: String tenancy OCID
+        :param ttl: Number seconds cached lookups remain valid
+        :param clock: Callable returning current time in seconds
+        """
+        self._client = limits_client
+        self._tenancy_id = tenancy_id
+        self.ttl = ttl
+        self._clock = clock
+        self.__definitions = None
+        self.__available = {}
+        self.__lock = threading.Lock()
+
+    def __get_definitions(self):
+        now = self._clock()
+
+        if self.__definitions is None or \
+                now - self.__definitions[0] >= self.ttl:
+            definitions = {}
+            page = None
+
+            while True:
+                kwargs = {'service_name': 'compute'}
+                if page:
+                    kwargs['page'] = page
+
+                response = self._client.list_limit_definitions(
+                    self._tenancy_id, **kwargs)
+
+                for definition in response.data:
+                    definitions[definition.name] = definition
+
+                page = getattr(response, 'next_page', None)
+                if not page:
+                    break
+
+            self.__definitions = (now, definitions)
+
+        return self.__definitions[1]
+
+    def get_limit_name(self, shape):
+        """
+        :param shape: String shape name
+        :return: (String limit name, String scope type) or (None, None)
+        """
+        definitions = self.__get_definitions()
+
+        for name in core_limit_names(shape):
+            if name in definitions:
+                return name, getattr(definitions[name], 'scope_type', None)
+
+        return None, None
+
+    def available_cores(self, compartment_id, availability_domain, shape):
+        """
+        :return: (Integer available cores or None, String limit name)
+        """
+        limit_name, scope_type = self.get_limit_name(shape)
+
+        if limit_name is None:
+            return None, None
+
+        key = (compartment_id,
+               availability_domain if scope_type == 'AD' else None,
+               limit_name)
+
+        now = self._clock()
+
+        with self.__lock:
+            cached = self.__available.get(key)
+
+            if cached and now - cached[0] < self.ttl:
+                return cached[1], limit_name
+
+        kwargs = {}
+
+        if scope_type == 'AD':
+            kwargs['availability_domain'] = availability_domain
+
+        availability = self._client.get_resource_availability(
+            'compute', limit_name, compartment_id, **kwargs).data
+
+        available = availability.available
+
+        with self.__lock:
+            self.__available[key] = (now, available)
+
+        return available, limit_name
+
+    def __deduct(self, compartment_id, availability_domain, limit_name,
+                 cores):
+        with self.__lock:
+            for key, (timestamp, available) in \
+                    list(self.__available.items()):
+                if key[0] == compartment_id and key[2] == limit_name and \
+                        key[1] in (None, availability_domain):
+                    self.__available[key] = \
+                        (timestamp, max(available - cores, 0))
+
+    def check(self, compartment_id, availability_domain, shape, count,
+              cores_per_node):
+        """
+        Determine how many of 'count' nodes fit within limits and quota.
+
+        :return: PreflightResult
+        """
+        available, limit_name = self.available_cores(
+            compartment_id, availability_domain, shape)
+
+        if available is None:
+            return PreflightResult(count, count, None, None)
+
+        allowed = min(count, available // max(cores_per_node, 1))
+
+        self.__deduct(compartment_id, availability_domain, limit_name,
+                      allowed * cores_per_node)
+
+        return PreflightResult(count, allowed, available, limit_name)
@@ -0,0 +1,186 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import json
+import logging
+import sys
+import uuid
+
+
+#: Maintenance tasks, in the order they run
+PREEMPTED = 'preempted'
+IDLE = 'idle'
+PARKED = 'parked'
+PRESCALE = 'prescale'
+USER_DATA = 'user_data'
+
+TASKS = (PREEMPTED, IDLE, PARKED, PRESCALE, USER_DATA)
+
+ADAPTER_NAME = 'oraclecloud'
+
+
+logger = logging.getLogger('tortuga.resourceAdapter.oraclecloud.maintenance')
+
+
+def get_hardware_profiles(session, names=None):
+    """
+    :param session: Database session
+    :param names: List String hardware profile names (optional)
+    :return: List HardwareProfile objects using the Oracle Cloud adapter
+    """
+    from tortuga.db.models.hardwareProfile import HardwareProfile
+
+    return [
+        hardware_profile
+        for hardware_profile in session.query(HardwareProfile).all()
+        if hardware_profile.resourceadapter and
+        hardware_profile.resourceadapter.name == ADAPTER_NAME and
+        (not names or hardware_profile.name in names)
+    ]
+
+
+def _get_nodes(hardware_profiles, handled):
+    return [
+        node for hardware_profile in hardware_profiles
+        for node in hardware_profile.nodes
+        if node.name not in handled
+    ]
+
+
+def _preempted(adapter, session, hardware_profiles, now, handled):
+    return adapter.handle_preempted_nodes(
+        _get_nodes(hardware_profiles, handled))
+
+
+def _idle(adapter, session, hardware_profiles, now, handled):
+    return adapter.release_idle_nodes(
+        _get_nodes(hardware_profiles, handled), now=now)
+
+
+def _parked(adapter, session, hardware_profiles, now, handled):
+    return adapter.release_parked_nodes(now=now)
+
+
+def _prescale(adapter, session, hardware_profiles, now, handled):
+    result = []
+
+    for hardware_profile in hardware_profiles:
+        software_profiles = list(
+            getattr(hardware_profile, 'mappedsoftwareprofiles', None) or [])
+
+        if len(software_profiles) != 1:
+            # Warm nodes are launched for one software profile
+            logger.debug(
+                'Not pre-scaling [%s]: %d mapped software profile(s)',
+                hardware_profile.name, len(software_profiles))
+
+            continue
+
+        result.extend(
+            node.name for node in adapter.prescale(
+                session, hardware_profile, software_profiles[0], now=now))
+
+    return result
+
+
+def _user_data(adapter, session, hardware_profiles, now, handled):
+    # Nodes deleted by earlier tasks have had their files removed
+    return adapter.release_user_data_includes(
+        _get_nodes(hardware_profiles, handled), now=now)
+
+
+_RUNNERS = {
+    PREEMPTED: _preempted,
+    IDLE: _idle,
+    PARKED: _parked,
+    PRESCALE: _prescale,
+    USER_DATA: _user_data,
+}
+
+
+def run(adapter, session, hardware_profiles, tasks=TASKS, now=None):
+    """
+    Run maintenance tasks for the nodes of hardware profiles.  Nodes a
+    task acted on are skipped by later tasks; a failing task is logged
+    and does not stop the others.
+
+    :param adapter: Oracleadapter
+    :param session: Database session
+    :param hardware_profiles: List HardwareProfile objects
+    :param tasks: Iterable String task names
+    :param now: Number seconds since the epoch (optional)
+    :return: Dictionary task: List String node names acted on
+    """
+    result = {}
+    handled = set()
+
+    for task in TASKS:
+        if task not in tasks:
+            continue
+
+        try:
+            result[task] = _RUNNERS[task](
+                adapter, session, hardware_profiles, now, handled)
+        except Exception as exc:
+            logger.exception('Maintenance task [%s] failed: %s', task, exc)
+
+            result[task] = []
+
+        handled.update(result[task])
+
+    return result
+
+
+def main(argv=None):
+    """
+    Run Oracle Cloud adapter maintenance once; the kit runs this
+    periodically from a systemd timer.
+    """
+    parser = argparse.ArgumentParser(
+        description='Run periodic Oracle Cloud adapter maintenance')
+    parser.add_argument(
+        '--task', dest='tasks', action='append', choices=TASKS,
+        help='task to run (repeatable); by default all tasks')
+    parser.add_argument(
+        '--hardware-profile', dest='hardware_profiles', action='append',
+        help='limit to hardware profile (repeatable)')
+    parser.add_argument('--json', action='store_true',
+                        help='JSON output')
+
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    from tortuga.db.dbManager import DbManager
+    from tortuga.resourceAdapter.oracleadapter import Oracleadapter
+
+    with DbManager().session() as session:
+        # Nodes launched by this run share one add host session
+        result = run(
+            Oracleadapter(addHostSession=str(uuid.uuid4())), session,
+            get_hardware_profiles(session, args.hardware_profiles),
+            tasks=args.tasks or TASKS)
+
+    if args.json:
+        json.dump(result, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    else:
+        for task, names in result.items():
+            print('%s: %d node(s)%s' % (
+                task, len(names), ' ' + ' '.join(names) if names else ''))
+
+
+if __name__ == '__main__':
+    main()
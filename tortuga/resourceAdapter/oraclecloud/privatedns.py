@@ -0,0 +1,231 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib
+import threading
+from collections import namedtuple
+
+from tortuga.resourceAdapter.oraclecloud import sdk
+
+
+#: One DNS record; 'domain' is fully qualified without trailing dot
+DnsRecord = namedtuple('DnsRecord', ['zone', 'domain', 'rtype', 'rdata'])
+
+
+class DnsBackendError(Exception):
+    pass
+
+
+def reverse_name(ip):
+    """
+    :param ip: String IPv4 address
+    :return: String PTR record name, for example '4.3.2.10.in-addr.arpa'
+    """
+    return '.'.join(reversed(ip.split('.'))) + '.in-addr.arpa'
+
+
+def default_reverse_zone(ip):
+    """
+    :param ip: String IPv4 address
+    :return: String /24 reverse zone, for example '2.10.in-addr.arpa'
+             for 10.2.3.4
+    """
+    return reverse_name(ip).split('.', 1)[1]
+
+
+def make_records(hosts, zone, reverse_zone=None):
+    """
+    A and PTR records for hosts.
+
+    :param hosts: Iterable of (String fqdn, String IPv4 address)
+    :param zone: String forward zone
+    :param reverse_zone: String reverse zone (optional); by default the
+                         /24 reverse zone of each address
+    :return: List DnsRecord
+    """
+    result = []
+
+    for fqdn, ip in hosts:
+        fqdn = fqdn.rstrip('.')
+
+        result.append(DnsRecord(zone, fqdn, 'A', ip))
+        result.append(DnsRecord(
+            reverse_zone or default_reverse_zone(ip),
+            reverse_name(ip), 'PTR', fqdn + '.'))
+
+    return result
+
+
+def group_by_zone(records):
+    """
+    :param records: Iterable DnsRecord
+    :return: Dictionary zone: List DnsRecord, in order of records
+    """
+    result = {}
+
+    for record in records:
+        result.setdefault(record.zone, []).append(record)
+
+    return result
+
+
+class DnsBackend(object):
+    """
+    Applies DNS record changes for a batch of nodes at once.  Custom
+    backends are constructed with the resource adapter configuration.
+    """
+    def add(self, records):
+        """
+        :param records: List DnsRecord
+        :return: None
+        :raises DnsBackendError:
+        """
+        raise NotImplementedError
+
+    def remove(self, records):
+        """
+        :param records: List DnsRecord
+        :return: None
+        :raises DnsBackendError:
+        """
+        raise NotImplementedError
+
+
+class MemoryBackend(DnsBackend):
+    """
+    In-process record store, for tests and dry runs.
+    """
+    def __init__(self, config=None):
+        self.records = set()
+        self.batches = 0
+        self.__lock = threading.Lock()
+
+    def add(self, records):
+        with self.__lock:
+            self.batches += 1
+            self.records.update(records)
+
+    def remove(self, records):
+        with self.__lock:
+            self.batches += 1
+            self.records.difference_update(records)
+
+    def lookup(self, domain, rtype):
+        """
+        :return: List String record data
+        """
+        with self.__lock:
+            return sorted(
+                record.rdata for record in self.records
+                if record.domain == domain.rstrip('.') and
+                record.rtype == rtype
+            )
+
+
+class OciDnsBackend(DnsBackend):
+    """
+    OCI DNS zones, updated with one patch request per zone per batch of
+    at most 'batch_size' records.
+    """
+    def __init__(self, client, models=None, ttl=300, scope=None,
+                 view_id=None, batch_size=500):
+        """
+        :param client: oci.dns.DnsClient (or stand-in)
+        :param models: Module/namespace of request models (optional)
+        :param ttl: Integer record TTL in seconds
+        :param scope: String zone scope, 'PRIVATE' for private views
+        :param view_id: String private view OCID (optional)
+        :param batch_size: Integer maximum record operations per request
+        """
+        if models is None:
+            models = sdk.load().dns.models
+
+        self._client = client
+        self._models = models
+        self.ttl = ttl
+        self.scope = scope
+        self.view_id = view_id
+        self.batch_size = max(int(batch_size), 1)
+
+    def __patch(self, operation, records):
+        kwargs = {}
+
+        if self.scope:
+            kwargs['scope'] = self.scope
+
+        if self.view_id:
+            kwargs['view_id'] = self.view_id
+
+        for zone, zone_records in group_by_zone(records).items():
+            for idx in range(0, len(zone_records), self.batch_size):
+                items = [
+                    self._models.RecordOperation(
+                        operation=operation,
+                        domain=record.domain,
+                        rtype=record.rtype,
+                        rdata=record.rdata,
+                        ttl=self.ttl
+                    )
+                    for record in zone_records[idx:idx + self.batch_size]
+                ]
+
+                try:
+                    self._client.patch_zone_records(
+                        zone,
+                        self._models.PatchZoneRecordsDetails(items=items),
+                        **kwargs
+                    )
+                except Exception as exc:
+                    raise DnsBackendError(
+                        'Unable to update zone [%s]: %s' % (zone, exc))
+
+    def add(self, records):
+        self.__patch('ADD', records)
+
+    def remove(self, records):
+        self.__patch('REMOVE', records)
+
+
+#: Backends selectable by name; other values of the 'dns_backend'
+#: setting are 'package.module:ClassName' references
+BACKENDS = {
+    'memory': MemoryBackend,
+}
+
+
+def load_backend(name, config):
+    """
+    Instantiate a named or referenced DNS backend.
+
+    :param name: String backend name or 'package.module:ClassName'
+    :param config: Dictionary resource adapter configuration
+    :return: DnsBackend
+    :raises DnsBackendError: unknown backend
+    """
+    if name in BACKENDS:
+        return BACKENDS[name](config)
+
+    module_name, sep, class_name = name.partition(':')
+
+    if not sep:
+        raise DnsBackendError('Unknown DNS backend [%s]' % (name))
+
+    try:
+        backend_class = getattr(
+            importlib.import_module(module_name), class_name)
+    except (ImportError, AttributeError) as exc:
+        raise DnsBackendError(
+            'Unable to load DNS backend [%s]: %s' % (name, exc))
+
+    return backend_class(config)
@@ -0,0 +1,252 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cProfile
+import os
+import pstats
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+#: Environment variable enabling profiling regardless of adapter settings
+PROFILE_ENV = 'TORTUGA_OCI_PROFILE'
+
+
+def _get_current_greenlet():
+    try:
+        import greenlet
+    except ImportError:
+        return threading.current_thread()
+
+    return greenlet.getcurrent()
+
+
+class _NullContext(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class NullProfiler(object):
+    """
+    Profiler used when profiling is disabled; every operation is a no-op.
+    """
+    enabled = False
+
+    _context = _NullContext()
+
+    def phase(self, name):
+        return self._context
+
+    def dump(self):
+        return None
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class SessionProfiler(object):
+    """
+    Collects one cProfile profile per greenlet and phase.
+
+    A greenlet switch tracer pauses the profile of the greenlet being
+    switched away from and resumes the profile of the greenlet being
+    switched to, so time spent in other greenlets is not attributed to
+    the phase.  Nested phases within a greenlet are exclusive: the outer
+    phase is paused while the inner phase runs.
+    """
+    enabled = True
+
+    def __init__(self, path, logger=None):
+        """
+        :param path: String output path, without extension
+        :param logger: Logger (optional)
+        """
+        self.path = path
+        self._logger = logger
+        self.__stacks = defaultdict(list)
+        self.__profiles = []
+        self.__lock = threading.Lock()
+        self.__previous_trace = None
+        self.__trace_installed = False
+
+    def __install_trace(self):
+        if self.__trace_installed:
+            return
+
+        try:
+            import greenlet
+        except ImportError:
+            return
+
+        self.__previous_trace = greenlet.settrace(self.__trace)
+        self.__trace_installed = True
+
+    def __uninstall_trace(self):
+        if not self.__trace_installed:
+            return
+
+        import greenlet
+
+        greenlet.settrace(self.__previous_trace)
+
+        self.__previous_trace = None
+        self.__trace_installed = False
+
+    def __trace(self, event, args):
+        if event in ('switch', 'throw'):
+            origin, target = args
+
+            stack = self.__stacks.get(origin)
+            if stack:
+                stack[-1].disable()
+
+            stack = self.__stacks.get(target)
+            if stack:
+                stack[-1].enable()
+
+        if self.__previous_trace is not None:
+            self.__previous_trace(event, args)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Profile the enclosed block as phase 'name' of the current
+        greenlet.
+
+        :param name: String phase name
+        """
+        current = _get_current_greenlet()
+
+        profile = cProfile.Profile()
+
+        with self.__lock:
+            self.__install_trace()
+
+            stack = self.__stacks[current]
+
+            if stack:
+                stack[-1].disable()
+
+            stack.append(profile)
+
+            self.__profiles.append(
+                (name, getattr(current, 'name', None) or
+                 '%s-%x' % (type(current).__name__, id(current)),
+                 profile)
+            )
+
+        profile.enable()
+
+        try:
+            yield profile
+        finally:
+            profile.disable()
+
+            with self.__lock:
+                stack.pop()
+
+                if stack:
+                    stack[-1].enable()
+                else:
+                    del self.__stacks[current]
+
+    def summary(self):
+        """
+        Profiled time per phase.
+
+        :return: Dictionary phase name: (count, total seconds,
+                 max seconds, greenlet label of max)
+        """
+        result = {}
+
+        for name, label, profile in self.__profiles:
+            total = pstats.Stats(profile).total_tt
+
+            count, phase_total, phase_max, max_label = \
+                result.get(name, (0, 0.0, 0.0, None))
+
+            if total >= phase_max:
+                phase_max, max_label = total, label
+
+            result[name] = (count + 1, phase_total + total, phase_max,
+                            max_label)
+
+        return result
+
+    def dump(self):
+        """
+        Write merged profile, readable by pstats and compatible tools,
+        and a per-phase summary.
+
+        :return: String path of profile, or None if nothing was profiled
+        """
+        with self.__lock:
+            if self.__stacks:
+                # Phases still running; leave tracing in place
+                return None
+
+            self.__uninstall_trace()
+
+        if not self.__profiles:
+            return None
+
+        stats = pstats.Stats(self.__profiles[0][2])
+
+        for _, _, profile in self.__profiles[1:]:
+            stats.add(profile)
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        prof_path = self.path + '.prof'
+
+        stats.dump_stats(prof_path)
+
+        lines = []
+
+        for name, (count, total, phase_max, max_label) in \
+                sorted(self.summary().items()):
+            lines.append(
+                '%s: count=%d total=%0.3fs max=%0.3fs (%s)' % (
+                    name, count, total, phase_max, max_label)
+            )
+
+        with open(self.path + '.txt', 'w') as fp:
+            fp.write('\n'.join(lines) + '\n')
+
+        if self._logger:
+            for line in lines:
+                self._logger.info('profile %s' % (line))
+
+            self._logger.info('Profile written to [%s]' % (prof_path))
+
+        self.__profiles = []
+
+        return prof_path
+
+
+def is_enabled(config):
+    """
+    :param config: Dictionary resource adapter configuration
+    :return: Boolean
+    """
+    value = os.environ.get(PROFILE_ENV, '')
+
+    if value.lower() in ('1', 'true', 'yes', 'on'):
+        return True
+
+    return bool(config and config.get('profile'))
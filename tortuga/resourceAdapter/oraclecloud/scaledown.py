@@ -0,0 +1,118 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from collections import namedtuple
+
+
+#: Node considered for release; launch_time is seconds since the epoch
+Candidate = namedtuple('Candidate', ['name', 'idle', 'launch_time'])
+
+
+class ScaleDownPolicy(object):
+    """
+    Select idle nodes to release so that instances are terminated just
+    before they start another billing period.
+
+    Evaluation is pure computation over data already held by the
+    adapter (node idle flag and cached launch time); no cloud API calls
+    are made.
+    """
+    def __init__(self, billing_granularity=3600, release_window=300,
+                 min_lifetime=900, min_nodes=0, batch_size=0):
+        """
+        :param billing_granularity: Integer seconds per billing period;
+                                    0 disables boundary alignment
+        :param release_window: Integer seconds before a billing boundary
+                               within which a node may be released
+        :param min_lifetime: Integer minimum node age in seconds
+        :param min_nodes: Integer number of nodes to always keep
+        :param batch_size: Integer nodes per deletion batch; 0 means a
+                           single batch
+        """
+        self.billing_granularity = max(int(billing_granularity), 0)
+        self.release_window = max(int(release_window), 0)
+        self.min_lifetime = max(int(min_lifetime), 0)
+        self.min_nodes = max(int(min_nodes), 0)
+        self.batch_size = max(int(batch_size), 0)
+
+    def seconds_to_boundary(self, age):
+        """
+        Seconds remaining in the current billing period.
+
+        :param age: Number node age in seconds
+        :return: Number seconds
+        """
+        if not self.billing_granularity:
+            return 0
+
+        return self.billing_granularity - (age % self.billing_granularity)
+
+    def is_releasable(self, candidate, now):
+        """
+        :param candidate: Candidate
+        :param now: Number seconds since the epoch
+        :return: Boolean
+        """
+        if not candidate.idle or candidate.launch_time is None:
+            return False
+
+        age = now - candidate.launch_time
+
+        if age < self.min_lifetime:
+            return False
+
+        return self.seconds_to_boundary(age) <= self.release_window
+
+    def select(self, candidates, now=None):
+        """
+        Return names of nodes to release, nodes closest to their next
+        billing boundary first.
+
+        :param candidates: Iterable Candidate
+        :param now: Number seconds since the epoch (optional)
+        :return: List String node names
+        """
+        now = time.time() if now is None else now
+
+        candidates = list(candidates)
+
+        releasable = [
+            candidate for candidate in candidates
+            if self.is_releasable(candidate, now)
+        ]
+
+        releasable.sort(
+            key=lambda candidate: self.seconds_to_boundary(
+                now - candidate.launch_time))
+
+        limit = max(len(candidates) - self.min_nodes, 0)
+
+        return [candidate.name for candidate in releasable[:limit]]
+
+    def batches(self, names):
+        """
+        Split names into deletion batches.
+
+        :param names: List String node names
+        :return: Generator List String node names
+        """
+        if not self.batch_size:
+            if names:
+                yield names
+
+            return
+
+        for idx in range(0, len(names), self.batch_size):
+            yield names[idx:idx + self.batch_size]
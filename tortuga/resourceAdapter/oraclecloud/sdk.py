@@ -0,0 +1,59 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib
+import sys
+import threading
+
+
+_lock = threading.Lock()
+
+
+def load():
+    """
+    Import the OCI SDK.  Importing 'oci' loads every service client and
+    model, so this is deferred until an operation needs the SDK.
+
+    :return: oci module
+    """
+    module = sys.modules.get('oci')
+
+    if module is None:
+        with _lock:
+            module = importlib.import_module('oci')
+
+    return module
+
+
+def is_loaded():
+    """
+    :return: Boolean OCI SDK has been imported in this process
+    """
+    return 'oci' in sys.modules
+
+
+class _DeferredSDK(object):
+    """
+    Stand-in for the 'oci' module; the SDK is imported on first
+    attribute access.
+    """
+    def __getattr__(self, name):
+        return getattr(load(), name)
+
+    def __repr__(self):
+        return '<deferred oci SDK%s>' % (' (loaded)' if is_loaded() else '')
+
+
+#: Use as 'from ...sdk import oci' in place of 'import oci'
+oci = _DeferredSDK()
@@ -0,0 +1,329 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+import threading
+import time
+
+from tortuga.resourceAdapter.oraclecloud import breaker
+
+
+#: Settings which may be given per shard
+SHARD_KEYS = (
+    'region',
+    'compartment_id',
+    'availability_domain',
+    'subnet_id',
+    'image_id',
+)
+
+
+def parse_shards(specs):
+    """
+    Parse shard specifications of the form
+    'region=us-phoenix-1,compartment_id=ocid1...,subnet_id=ocid1...'.
+    'region' and 'compartment_id' are required; availability domain,
+    subnet and image default to the hardware profile settings.
+
+    :param specs: List String shard specifications
+    :return: List Dictionaries
+    :raises ValueError: malformed specification
+    """
+    result = []
+
+    for spec in specs or []:
+        shard = {}
+
+        for item in spec.split(','):
+            key, sep, value = item.partition('=')
+
+            key = key.strip()
+
+            if not sep or key not in SHARD_KEYS:
+                raise ValueError(
+                    'Invalid shard setting [%s] in [%s]' % (item, spec))
+
+            shard[key] = value.strip()
+
+        if not shard.get('region') or not shard.get('compartment_id'):
+            raise ValueError(
+                'Shard [%s] requires region and compartment_id' % (spec))
+
+        result.append(shard)
+
+    return result
+
+
+class RateLimiter(object):
+    """
+    Token bucket allowing 'rate' calls per second with bursts of up to
+    'burst' calls.  Callers over the limit are delayed, in order.
+    """
+    def __init__(self, rate, burst=None, clock=time.time, sleep=time.sleep):
+        """
+        :param rate: Number calls per second; 0 disables limiting
+        :param burst: Integer bucket size (defaults to rate)
+        :param clock: Callable returning current time in seconds
+        :param sleep: Callable used to delay callers
+        """
+        self.rate = rate
+        self.burst = burst or max(int(rate or 0), 1)
+        self._clock = clock
+        self._sleep = sleep
+        self.delayed = 0
+        self.__tokens = self.burst
+        self.__updated = clock()
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take one token, waiting until it is available.
+
+        :return: Number seconds waited
+        """
+        if not self.rate or self.rate <= 0:
+            return 0
+
+        with self.__lock:
+            now = self._clock()
+
+            self.__tokens = min(
+                self.burst,
+                self.__tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+
+            # A negative balance queues callers behind earlier ones
+            self.__tokens -= 1
+
+            wait = -self.__tokens / self.rate if self.__tokens < 0 else 0
+
+        if wait > 0:
+            self.delayed += 1
+
+            self._sleep(wait)
+
+        return wait
+
+
+class ShardClient(object):
+    """
+    Proxy for an OCI client; method calls are rate limited and pass
+    through the circuit breaker of the shard for the operation.
+    """
+    def __init__(self, client, shard):
+        self._client = client
+        self._shard = shard
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            return self._shard.call(name, attr, *args, **kwargs)
+
+        return call
+
+
+class Shard(object):
+    """
+    Region and compartment pair that nodes can be launched into.
+    """
+    def __init__(self, region, compartment_id, pool, limiter, breakers):
+        self.region = region
+        self.compartment_id = compartment_id
+        self.limiter = limiter
+        self.breakers = breakers
+        self._pool = pool
+
+    @property
+    def key(self):
+        return self.region, self.compartment_id
+
+    def apply(self, config, overrides=None):
+        """
+        :param config: Dictionary resource adapter configuration
+        :param overrides: Dictionary shard settings (optional)
+        :return: Dictionary configuration for this shard
+        """
+        result = dict(config)
+        result.update(overrides or {})
+        result['region'] = self.region
+        result['compartment_id'] = self.compartment_id
+
+        return result
+
+    def client(self, kind):
+        """
+        :param kind: String client kind known to the pool client factory
+        :return: ShardClient
+        """
+        return ShardClient(self._pool.get_client(kind, self.region), self)
+
+    @property
+    def available(self):
+        """
+        :return: Boolean instances can be launched into shard
+        """
+        return all(
+            self.breakers.state(operation) != breaker.OPEN
+            for operation in breaker.LAUNCH_OPERATIONS
+        )
+
+    def call(self, operation, func, *args, **kwargs):
+        """
+        Call API operation, subject to the rate limit and circuit
+        breaker.  Calls to an open circuit fail immediately, without
+        waiting for the rate limiter.  Time spent waiting for the rate
+        limiter does not count towards slow calls.
+
+        :raises CircuitOpenError:
+        """
+        return self.breakers.call_after(
+            operation, self.limiter.acquire, func, *args, **kwargs)
+
+    def __repr__(self):
+        return 'Shard(%s, ...%s)' % (
+            self.region, (self.compartment_id or '')[-6:])
+
+
+class ShardPool(object):
+    """
+    Shards and the regional clients they share.  Each shard has its own
+    rate limiter and set of per-operation circuit breakers.
+    """
+    def __init__(self, client_factory, rate=10, burst=None, clock=time.time,
+                 sleep=time.sleep, listener=None, **breaker_options):
+        """
+        :param client_factory: Callable (kind, region) returning client
+        :param rate: Number API calls per second per shard
+        :param burst: Integer burst size per shard
+        :param listener: Callable (pool, breaker, old state, new state)
+                         called on circuit state changes (optional)
+        :param breaker_options: CircuitBreaker keyword arguments
+        """
+        self._client_factory = client_factory
+        self.rate = rate
+        self.burst = burst
+        self.breaker_options = breaker_options
+        self._clock = clock
+        self._sleep = sleep
+        self.listener = listener
+        self.__clients = {}
+        self.__shards = {}
+        self.__lock = threading.Lock()
+
+    def get_client(self, kind, region):
+        key = (kind, region)
+
+        with self.__lock:
+            if key not in self.__clients:
+                self.__clients[key] = self._client_factory(kind, region)
+
+            return self.__clients[key]
+
+    def get(self, region, compartment_id):
+        """
+        :param region: String region name
+        :param compartment_id: String compartment OCID
+        :return: Shard
+        """
+        key = (region, compartment_id)
+
+        with self.__lock:
+            shard = self.__shards.get(key)
+
+            if shard is None:
+                shard = self.__shards[key] = Shard(
+                    region,
+                    compartment_id,
+                    self,
+                    RateLimiter(self.rate, burst=self.burst,
+                                clock=self._clock, sleep=self._sleep),
+                    breaker.BreakerSet(
+                        '%s/%s' % key,
+                        clock=self._clock,
+                        listener=self.__on_state_change,
+                        **self.breaker_options)
+                )
+
+            return shard
+
+    def __on_state_change(self, breaker_, old, new):
+        if self.listener is not None:
+            self.listener(self, breaker_, old, new)
+
+    @property
+    def shards(self):
+        with self.__lock:
+            return list(self.__shards.values())
+
+    def health(self):
+        """
+        :return: Dictionary with overall 'status' and health of each
+                 shard
+        """
+        shards = {
+            '%s/%s' % shard.key: shard.breakers.health()
+            for shard in self.shards
+        }
+
+        return {
+            'status': breaker.worst_status(
+                health['status'] for health in shards.values()),
+            'shards': shards,
+            'updated': self._clock(),
+        }
+
+
+class PlacementPolicy(object):
+    """
+    Spread nodes of a request evenly across shards whose launch circuit
+    is not open.  The shard receiving the remainder rotates between
+    requests.
+    """
+    def __init__(self):
+        self.__offset = 0
+
+    def spread(self, count, shards):
+        """
+        :param count: Integer nodes
+        :param shards: List Shard
+        :return: List of (Shard, Integer count), omitting empty shares;
+                 empty if no shard is available
+        """
+        healthy = [shard for shard in shards if shard.available]
+
+        if not healthy:
+            return []
+
+        offset = self.__offset % len(healthy)
+
+        self.__offset += 1
+
+        healthy = healthy[offset:] + healthy[:offset]
+
+        base, extra = divmod(count, len(healthy))
+
+        result = []
+
+        for idx, shard in enumerate(healthy):
+            share = base + (1 if idx < extra else 0)
+
+            if share:
+                result.append((shard, share))
+
+        return result
@@ -0,0 +1,177 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+import hashlib
+import os
+import threading
+import time
+
+
+def credentials_key(config):
+    """
+    Key identifying a credential set; the pass phrase is hashed.
+
+    :param config: Dictionary OCI SDK configuration
+    :return: Tuple
+    """
+    pass_phrase = config.get('pass_phrase') or ''
+
+    return (
+        config.get('tenancy'),
+        config.get('user'),
+        config.get('fingerprint'),
+        os.path.abspath(config.get('key_file') or ''),
+        hashlib.sha256(pass_phrase.encode()).hexdigest(),
+    )
+
+
+class CachedSigner(object):
+    """
+    Request signer shared by all clients using one credential set.
+
+    The private key is loaded (and decrypted) once by 'factory'; it is
+    reloaded only when the modification time of the key file changes,
+    which is checked at most every 'check_interval' seconds.  Time spent
+    signing requests is counted.
+    """
+    def __init__(self, factory, key_file, check_interval=60,
+                 clock=time.time, timer=time.time):
+        """
+        :param factory: Callable returning an OCI request signer
+        :param key_file: String private key file path
+        :param check_interval: Number seconds between key file checks
+        :param clock: Callable returning current time in seconds
+        :param timer: Callable used to time signing
+        """
+        self._factory = factory
+        self.key_file = key_file
+        self.check_interval = check_interval
+        self._clock = clock
+        self._timer = timer
+        self.signatures = 0
+        self.signing_seconds = 0.0
+        self.key_loads = 0
+        self.key_load_seconds = 0.0
+        self.__signer = None
+        self.__mtime = None
+        self.__checked_at = None
+        self.__lock = threading.Lock()
+
+    def __key_mtime(self):
+        try:
+            return os.path.getmtime(self.key_file)
+        except OSError:
+            return None
+
+    def __get_signer(self):
+        now = self._clock()
+
+        if self.__signer is not None and \
+                now - self.__checked_at < self.check_interval:
+            return self.__signer
+
+        with self.__lock:
+            mtime = self.__key_mtime()
+
+            if self.__signer is None or mtime != self.__mtime:
+                start = self._timer()
+
+                self.__signer = self._factory()
+
+                self.key_loads += 1
+                self.key_load_seconds += self._timer() - start
+                self.__mtime = mtime
+
+            self.__checked_at = now
+
+            return self.__signer
+
+    def __call__(self, request, *args, **kwargs):
+        signer = self.__get_signer()
+
+        start = self._timer()
+
+        try:
+            return signer(request, *args, **kwargs)
+        finally:
+            self.signatures += 1
+            self.signing_seconds += self._timer() - start
+
+    @property
+    def without_content_headers(self):
+        # Signs through this wrapper, so that such requests are counted
+        # and use the current key, as the OCI SDK signer does
+        return functools.partial(self, enforce_content_headers=False)
+
+    def __getattr__(self, name):
+        return getattr(self.__get_signer(), name)
+
+    def metrics(self):
+        """
+        :return: Dictionary signing and key loading counters
+        """
+        return {
+            'signatures': self.signatures,
+            'signing_seconds': round(self.signing_seconds, 3),
+            'mean_signing_ms': round(
+                1000.0 * self.signing_seconds / self.signatures, 3)
+            if self.signatures else None,
+            'key_loads': self.key_loads,
+            'key_load_seconds': round(self.key_load_seconds, 3),
+        }
+
+
+class SignerCache(object):
+    """
+    One CachedSigner per credential set, shared by all clients and
+    adapter instances in the process.
+    """
+    def __init__(self, **options):
+        """
+        :param options: CachedSigner keyword arguments
+        """
+        self._options = options
+        self.__signers = {}
+        self.__lock = threading.Lock()
+
+    def get(self, config, factory):
+        """
+        :param config: Dictionary OCI SDK configuration
+        :param factory: Callable returning an OCI request signer for
+                        the configuration
+        :return: CachedSigner
+        """
+        key = credentials_key(config)
+
+        with self.__lock:
+            signer = self.__signers.get(key)
+
+            if signer is None:
+                signer = self.__signers[key] = CachedSigner(
+                    factory, config.get('key_file'), **self._options)
+
+            return signer
+
+    def metrics(self):
+        """
+        :return: Dictionary key fingerprint: signer metrics
+        """
+        with self.__lock:
+            signers = dict(self.__signers)
+
+        return {
+            key[2] or 'unknown': signer.metrics()
+            for key, signer in signers.items()
+        }
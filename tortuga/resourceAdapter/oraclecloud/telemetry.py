@@ -0,0 +1,342 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+
+
+#: Provisioning phases, in order.  'launched' is recorded by the adapter;
+#: the remaining phases are reported by the bootstrap script.
+PHASES = (
+    'launched',
+    'boot',
+    'cloud_init_start',
+    'packages_installed',
+    'puppet_complete',
+    'ready',
+)
+
+#: Fields accepted from a report in addition to the phase timestamps
+REPORT_FIELDS = ('instance_id', 'image_id', 'shape', 'node')
+
+DEFAULT_PORT = 8445
+
+MAX_REPORT_SIZE = 4096
+
+_INSTANCE_ID_RE = re.compile(r'^ocid1\.instance\.[A-Za-z0-9._-]+$')
+
+
+class TelemetryError(Exception):
+    pass
+
+
+def validate_report(report):
+    """
+    :param report: Dictionary with 'instance_id', 'phase', 'timestamp'
+                   and optionally 'image_id', 'shape' and 'node'
+    :return: Dictionary validated report
+    :raises TelemetryError:
+    """
+    if not isinstance(report, dict):
+        raise TelemetryError('Report must be a JSON object')
+
+    instance_id = report.get('instance_id')
+
+    if not isinstance(instance_id, str) or \
+            not _INSTANCE_ID_RE.match(instance_id):
+        raise TelemetryError('Invalid instance id [%s]' % (instance_id))
+
+    if report.get('phase') not in PHASES:
+        raise TelemetryError('Unknown phase [%s]' % (report.get('phase')))
+
+    try:
+        timestamp = float(report['timestamp'])
+    except (KeyError, TypeError, ValueError):
+        raise TelemetryError('Invalid timestamp')
+
+    result = {
+        key: str(report[key])[:255]
+        for key in REPORT_FIELDS if report.get(key)
+    }
+
+    result['phase'] = report['phase']
+    result['timestamp'] = timestamp
+
+    return result
+
+
+class TelemetryStore(object):
+    """
+    Phase timestamps of each instance, stored as one JSON file per
+    instance so that the telemetry endpoint and adapter processes can
+    share them without coordination.
+    """
+    def __init__(self, directory, retention=30 * 86400, clock=time.time):
+        """
+        :param directory: String directory path
+        :param retention: Number seconds records are kept
+        :param clock: Callable returning current time in seconds
+        """
+        self.directory = directory
+        self.retention = retention
+        self._clock = clock
+        self.__lock = threading.Lock()
+
+    def __path(self, instance_id):
+        if not _INSTANCE_ID_RE.match(instance_id):
+            raise TelemetryError('Invalid instance id [%s]' % (instance_id))
+
+        return os.path.join(self.directory, instance_id + '.json')
+
+    def get(self, instance_id):
+        """
+        :param instance_id: String instance OCID
+        :return: Dictionary record or None
+        """
+        try:
+            with open(self.__path(instance_id)) as fp:
+                return json.load(fp)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def record(self, report):
+        """
+        Merge (validated) report into the record of its instance.
+
+        :param report: Dictionary
+        :return: Dictionary updated record
+        """
+        report = validate_report(report)
+
+        path = self.__path(report['instance_id'])
+
+        with self.__lock:
+            record = self.get(report['instance_id']) or {'phases': {}}
+
+            for key in REPORT_FIELDS:
+                if report.get(key):
+                    record[key] = report[key]
+
+            # First report of a phase wins; bootstrap retries may repeat
+            record['phases'].setdefault(report['phase'], report['timestamp'])
+
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+
+            tmp_path = '%s.%d.tmp' % (path, os.getpid())
+
+            with open(tmp_path, 'w') as fp:
+                json.dump(record, fp, sort_keys=True)
+
+            os.rename(tmp_path, path)
+
+        return record
+
+    def records(self):
+        """
+        All records within the retention period; expired records are
+        removed.
+
+        :return: List Dictionaries
+        """
+        if not os.path.isdir(self.directory):
+            return []
+
+        cutoff = self._clock() - self.retention
+
+        result = []
+
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json'):
+                continue
+
+            path = os.path.join(self.directory, filename)
+
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.unlink(path)
+
+                    continue
+
+                with open(path) as fp:
+                    result.append(json.load(fp))
+            except (IOError, OSError, ValueError):
+                continue
+
+        return result
+
+
+def phase_durations(record):
+    """
+    Durations between consecutive reported phases, and the total time
+    from launch to ready.
+
+    :param record: Dictionary
+    :return: Dictionary 'phase->phase' (or 'time_to_ready'): seconds
+    """
+    phases = record.get('phases', {})
+
+    result = {}
+    previous = None
+
+    for phase in PHASES:
+        if phase not in phases:
+            continue
+
+        if previous is not None:
+            result['%s->%s' % (previous, phase)] = \
+                phases[phase] - phases[previous]
+
+        previous = phase
+
+    if 'launched' in phases and 'ready' in phases:
+        result['time_to_ready'] = phases['ready'] - phases['launched']
+
+    return result
+
+
+def _percentile(values, fraction):
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def summarize(records):
+    """
+    Aggregate phase durations per image and shape.
+
+    :param records: List Dictionaries
+    :return: Dictionary '<image_id>/<shape>': {'nodes': Integer,
+             'durations': {name: {count, mean, p50, p90, max}}}
+    """
+    groups = defaultdict(lambda: defaultdict(list))
+    nodes = defaultdict(int)
+
+    for record in records:
+        key = '%s/%s' % (record.get('image_id', 'unknown'),
+                         record.get('shape', 'unknown'))
+
+        nodes[key] += 1
+
+        for name, duration in phase_durations(record).items():
+            groups[key][name].append(duration)
+
+    result = {}
+
+    for key, durations in groups.items():
+        result[key] = {'nodes': nodes[key], 'durations': {}}
+
+        for name, values in durations.items():
+            values = sorted(values)
+
+            result[key]['durations'][name] = {
+                'count': len(values),
+                'mean': round(sum(values) / len(values), 1),
+                'p50': round(_percentile(values, 0.5), 1),
+                'p90': round(_percentile(values, 0.9), 1),
+                'max': round(values[-1], 1),
+            }
+
+    for key in nodes:
+        result.setdefault(key, {'nodes': nodes[key], 'durations': {}})
+
+    return result
+
+
+def make_app(store, inventory=None):
+    """
+    WSGI application accepting phase reports POSTed as JSON by the
+    bootstrap script.
+
+    :param store: TelemetryStore
+    :param inventory: Inventory also receiving phase timestamps
+                      (optional)
+    :return: WSGI callable
+    """
+    def app(environ, start_response):
+        def respond(status, body):
+            start_response(status, [('Content-Type', 'text/plain')])
+
+            return [body.encode()]
+
+        if environ.get('REQUEST_METHOD') != 'POST':
+            return respond('405 Method Not Allowed', 'POST required\n')
+
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+
+        if not 0 < length <= MAX_REPORT_SIZE:
+            return respond('400 Bad Request', 'Invalid report size\n')
+
+        try:
+            record = store.record(json.loads(
+                environ['wsgi.input'].read(length).decode()))
+        except (TelemetryError, ValueError) as exc:
+            return respond('400 Bad Request', '%s\n' % (exc))
+
+        if inventory is not None:
+            try:
+                inventory.record_phases(
+                    record['instance_id'], record['phases'])
+            except Exception as exc:
+                sys.stderr.write(
+                    'Unable to update inventory: %s\n' % (exc))
+
+        return respond('200 OK', 'OK\n')
+
+    return app
+
+
+def main(argv=None):
+    """
+    Run the bootstrap telemetry endpoint on the installer.
+    """
+    from wsgiref.simple_server import make_server
+
+    parser = argparse.ArgumentParser(
+        description='Receive OCI node bootstrap phase reports')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        '--directory',
+        default=os.path.join(
+            os.getenv('TORTUGA_ROOT', '/opt/tortuga'), 'var',
+            'oci-telemetry'))
+    parser.add_argument(
+        '--inventory', metavar='PATH',
+        help='Launch inventory database to record phase timestamps in')
+
+    args = parser.parse_args(argv)
+
+    inv = None
+
+    if args.inventory:
+        from tortuga.resourceAdapter.oraclecloud.inventory import Inventory
+
+        inv = Inventory(args.inventory)
+
+    server = make_server(args.host, args.port,
+                         make_app(TelemetryStore(args.directory), inv))
+
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
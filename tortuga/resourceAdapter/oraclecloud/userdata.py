@@ -0,0 +1,249 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import io
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from base64 import b64encode
+from collections import OrderedDict
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+
+#: OCI limits the combined instance metadata to 32,000 bytes
+DEFAULT_MAX_SIZE = 32000
+
+#: Name of an include file written for a single launch
+_INCLUDE_FILE_RE = re.compile(r'^[A-Za-z0-9_-]{43}$')
+
+
+class UserDataSizeError(Exception):
+    """
+    Raised when encoded user-data does not fit the size budget and
+    include-URL indirection is not enabled.
+    """
+
+
+class UserDataCache(object):
+    """
+    Bounded LRU cache for rendered and encoded user-data.
+    """
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.__items = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return cached value, or None on a miss.
+
+        :param key: Hashable key
+        :return: Cached value or None
+        """
+        with self.__lock:
+            try:
+                value = self.__items.pop(key)
+            except KeyError:
+                return None
+
+            self.__items[key] = value
+
+            return value
+
+    def set(self, key, value):
+        """
+        Store value, evicting least recently used entries.
+
+        :param key: Hashable key
+        :param value: Object
+        :return: None
+        """
+        with self.__lock:
+            self.__items.pop(key, None)
+            self.__items[key] = value
+
+            while len(self.__items) > self.maxsize:
+                self.__items.popitem(last=False)
+
+    def clear(self):
+        with self.__lock:
+            self.__items.clear()
+
+    def __len__(self):
+        return len(self.__items)
+
+
+def build_payload(script, fqdn=None):
+    """
+    Build user-data payload.  When an FQDN is given, a multipart MIME
+    document carrying a cloud-config part is returned, otherwise the
+    bootstrap script is returned as-is.
+
+    :param script: String rendered bootstrap script
+    :param fqdn: String fully-qualified domain name (optional)
+    :return: String payload
+    """
+    if not fqdn:
+        return script
+
+    combined_message = MIMEMultipart()
+
+    # Use cloud-init to set fully-qualified domain name of instance
+    cloud_init = """#cloud-config
+
+fqdn: %s
+""" % fqdn
+
+    for content, mime_type, filename in (
+            (cloud_init, 'text/cloud-config', 'user-data.txt'),
+            (script, 'text/x-shellscript', 'bootstrap.py')):
+        sub_message = MIMEText(content, mime_type, sys.getdefaultencoding())
+        sub_message.add_header(
+            'Content-Disposition',
+            'attachment; filename="%s"' % filename)
+        combined_message.attach(sub_message)
+
+    return str(combined_message)
+
+
+def compress_payload(payload, compress=True):
+    """
+    Convert payload to bytes, gzip compressing it if requested.
+    cloud-init transparently decompresses gzip user-data.
+
+    :param payload: String payload
+    :param compress: Boolean
+    :return: Bytes
+    """
+    data = payload.encode()
+
+    if not compress:
+        return data
+
+    buf = io.BytesIO()
+
+    # mtime is fixed so identical payloads produce identical blobs
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=9,
+                       mtime=0) as fp:
+        fp.write(data)
+
+    return buf.getvalue()
+
+
+def encode(data):
+    """
+    Base64 encode bytes for OCI instance metadata.
+
+    :param data: Bytes
+    :return: String
+    """
+    return b64encode(data).decode()
+
+
+def include_payload(url):
+    """
+    Build cloud-init '#include' user-data pointing at url.
+
+    :param url: String URL
+    :return: String payload
+    """
+    return '#include\n%s\n' % url
+
+
+def write_include_file(data, directory, suffix=''):
+    """
+    Write user-data blob to directory under a random, unguessable file
+    name.  The blob holds installer credentials, so the directory is
+    not listable by other users (or the web server) and the file is
+    only served to whoever knows its name.
+
+    :param data: Bytes
+    :param directory: String directory path
+    :param suffix: String file name suffix; files with a suffix are not
+                   removed by expire_include_files()
+    :return: String file name
+    """
+    filename = secrets.token_urlsafe(32) + suffix
+
+    path = os.path.join(directory, filename)
+
+    os.makedirs(directory, exist_ok=True)
+    os.chmod(directory, 0o711)
+
+    fd = os.open('%s.tmp' % (path),
+                 os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+
+    with os.fdopen(fd, 'wb') as fp:
+        fp.write(data)
+
+    # Readable by the web server
+    os.chmod('%s.tmp' % (path), 0o644)
+
+    os.rename('%s.tmp' % (path), path)
+
+    return filename
+
+
+def remove_include_files(filenames, directory):
+    """
+    :param filenames: Iterable String file names
+    :param directory: String directory path
+    :return: None
+    """
+    for filename in filenames:
+        try:
+            os.unlink(os.path.join(directory, os.path.basename(filename)))
+        except FileNotFoundError:
+            pass
+
+
+def expire_include_files(directory, max_age, now=None):
+    """
+    Remove single launch include files older than 'max_age' seconds,
+    left behind by launches that failed or lost a speculative race.
+
+    :param directory: String directory path
+    :param max_age: Number seconds
+    :param now: Number seconds since the epoch (optional)
+    :return: List String removed file names
+    """
+    now = time.time() if now is None else now
+
+    try:
+        filenames = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+
+    result = []
+
+    for filename in filenames:
+        if not _INCLUDE_FILE_RE.match(filename):
+            continue
+
+        path = os.path.join(directory, filename)
+
+        try:
+            if now - os.stat(path).st_mtime > max_age:
+                os.unlink(path)
+
+                result.append(filename)
+        except FileNotFoundError:
+            pass
+
+    return result
@@ -0,0 +1,141 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gevent
+import gevent.event
+
+from tortuga.resourceAdapter.oraclecloud import breaker
+from tortuga.resourceAdapter.utility import get_random_sleep_time
+
+
+#: States from which an instance will never reach RUNNING
+TERMINAL_STATES = ('TERMINATING', 'TERMINATED')
+
+
+class InstanceStateError(Exception):
+    """
+    Raised when an instance enters a terminal state while waiting for a
+    different state.
+    """
+
+
+class _Waiter(object):
+    def __init__(self, state, callback):
+        self.state = state
+        self.callback = callback
+        self.last_state = None
+        self.result = gevent.event.AsyncResult()
+
+
+class InstanceStateWatcher(object):
+    """
+    Wait for lifecycle states of many instances using one list call per
+    poll interval, instead of one get call per instance per poll.
+    """
+    def __init__(self, list_states, interval=5.0, max_errors=3):
+        """
+        :param list_states: Callable returning a dictionary of instance
+                            OCID to lifecycle state
+        :param interval: Number seconds between polls
+        :param max_errors: Integer consecutive poll failures after which
+                           waiters fail
+        """
+        self._list_states = list_states
+        self.interval = interval
+        self.max_errors = max_errors
+        self.polls = 0
+        self.__waiters = {}
+        self.__poller = None
+
+    def wait(self, instance_ocid, state, callback=None):
+        """
+        Block current greenlet until instance reaches state.
+
+        :param instance_ocid: String instance OCID
+        :param state: String expected lifecycle state
+        :param callback: Callable(instance_ocid, state) called on each
+                         observed state change before state is reached
+        :return: None
+        """
+        waiter = _Waiter(state, callback)
+
+        self.__waiters[instance_ocid] = waiter
+
+        if self.__poller is None or self.__poller.dead:
+            self.__poller = gevent.spawn(self.__poll)
+
+        try:
+            waiter.result.get()
+        finally:
+            self.__waiters.pop(instance_ocid, None)
+
+    def __poll(self):
+        errors = 0
+
+        while self.__waiters:
+            try:
+                states = self._list_states()
+
+                errors = 0
+            except breaker.CircuitOpenError as exc:
+                # Not a failed poll; wait for the circuit to let a probe
+                # through
+                gevent.sleep(max(exc.retry_after, self.interval))
+
+                continue
+            except Exception as exc:
+                errors += 1
+
+                if errors >= self.max_errors:
+                    for waiter in list(self.__waiters.values()):
+                        waiter.result.set_exception(exc)
+
+                    return
+
+                gevent.sleep(get_random_sleep_time(retries=errors) / 1000.0)
+
+                continue
+
+            self.polls += 1
+
+            for instance_ocid, waiter in list(self.__waiters.items()):
+                self.__update(instance_ocid, waiter,
+                              states.get(instance_ocid))
+
+            gevent.sleep(self.interval)
+
+    @staticmethod
+    def __update(instance_ocid, waiter, state):
+        if state is None or waiter.result.ready():
+            # Not (yet) visible in listing
+            return
+
+        if state == waiter.state:
+            waiter.result.set(state)
+
+            return
+
+        if state in TERMINAL_STATES and waiter.state not in TERMINAL_STATES:
+            waiter.result.set_exception(
+                InstanceStateError(
+                    'Instance [%s] entered state [%s] while waiting for'
+                    ' [%s]' % (instance_ocid, state, waiter.state)))
+
+            return
+
+        if state != waiter.last_state:
+            waiter.last_state = state
+
+            if waiter.callback:
+                waiter.callback(instance_ocid, state)
@@ -0,0 +1,82 @@
+# Copyright 2008-2018 Univa Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+from collections import namedtuple
+
+
+#: Summary of a windowed run
+WaveStats = namedtuple('WaveStats', ['waves', 'tasks', 'largest'])
+
+
+def iter_waves(tasks, size=None):
+    """
+    Split tasks into consecutive waves of at most 'size' tasks.  Tasks
+    are consumed lazily, so only one wave is held at a time.
+
+    :param tasks: Iterable
+    :param size: Integer wave size; None or 0 for a single wave
+    :return: Generator of lists
+    """
+    tasks = iter(tasks)
+
+    if not size or size <= 0:
+        wave = list(tasks)
+
+        if wave:
+            yield wave
+
+        return
+
+    while True:
+        wave = list(itertools.islice(tasks, size))
+
+        if not wave:
+            return
+
+        yield wave
+
+
+def run_in_waves(tasks, size, execute, on_result):
+    """
+    Run tasks in waves of at most 'size', starting a wave once the
+    previous one has completed.  Results are passed to 'on_result' as
+    they arrive and are not retained, so memory use is bounded by the
+    wave size rather than the number of tasks.
+
+    :param tasks: Iterable of tasks, consumed lazily
+    :param size: Integer wave size; None or 0 for a single wave
+    :param execute: Callable taking a list of tasks and returning an
+                    iterable of (task, result) as tasks complete
+    :param on_result: Callable(task, result)
+    :return: WaveStats
+    """
+    waves = count = largest = 0
+
+    for wave in iter_waves(tasks, size):
+        waves += 1
+        count += len(wave)
+        largest = max(largest, len(wave))
+
+        _run_wave(wave, execute, on_result)
+
+        # Release the wave before the next one is built
+        del wave
+
+    return WaveStats(waves, count, largest)
+
+
+def _run_wave(wave, execute, on_result):
+    for task, result in execute(wave):
+        on_result(task, result)
@@ -15,6 +15,8 @@
 class tortuga_kit_oraclecloudadapter::management {
   contain tortuga_kit_oraclecloudadapter::management::package
   contain tortuga_kit_oraclecloudadapter::management::install
+  contain tortuga_kit_oraclecloudadapter::management::telemetry
+  contain tortuga_kit_oraclecloudadapter::management::maintenance
 
   Class['tortuga_kit_oraclecloudadapter::management::install'] ~>
     Class['tortuga_kit_base::installer::webservice::server']
@@ -37,3 +39,104 @@ class tortuga_kit_oraclecloudadapter::management::install {
     compdescr => 'management-6.3',
   }
 }
+
+# Endpoint receiving bootstrap phase reports from OCI nodes, used with
+# the 'bootstrap_telemetry' adapter setting.  The endpoint does not
+# authenticate reports, so it is installed stopped unless 'enable' is
+# set, and its port should only be reachable from the VCN of the
+# compute nodes (security list or installer firewall); 'host' binds it
+# to a single address, such as the installer's VCN address.  Phase
+# timestamps are also recorded in the launch inventory at 'inventory',
+# which must match the adapter's 'inventory_file' setting if set.
+class tortuga_kit_oraclecloudadapter::management::telemetry (
+  $instroot = '/opt/tortuga',
+  $host = '0.0.0.0',
+  $port = 8445,
+  $enable = false,
+  $inventory = "${instroot}/var/oci-inventory.db",
+) {
+  require tortuga_kit_oraclecloudadapter::management::install
+
+  $inventory_arg = $inventory ? {
+    undef   => '',
+    ''      => '',
+    default => " --inventory ${inventory}",
+  }
+
+  $service_ensure = $enable ? {
+    true    => running,
+    default => stopped,
+  }
+
+  file { '/etc/systemd/system/tortuga-oci-telemetry.service':
+    content => "[Unit]
+Description=Tortuga OCI bootstrap telemetry endpoint
+After=network.target
+
+[Service]
+Environment=TORTUGA_ROOT=${instroot}
+ExecStart=${instroot}/bin/python -m tortuga.resourceAdapter.oraclecloud.telemetry --host ${host} --port ${port}${inventory_arg}
+Restart=on-failure
+
+[Install]
+WantedBy=multi-user.target
+",
+  } ~>
+  exec { 'tortuga-oci-telemetry-daemon-reload':
+    command     => '/usr/bin/systemctl daemon-reload',
+    refreshonly => true,
+  } ~>
+  service { 'tortuga-oci-telemetry':
+    ensure => $service_ensure,
+    enable => $enable,
+  }
+}
+
+# Periodic adapter maintenance (oci-maintenance): removal of nodes lost
+# to preemption, release of idle nodes by the scale-down policy and of
+# expired parked nodes, pre-scaling of warm nodes ahead of forecast
+# demand and removal of include user-data once nodes check in
+class tortuga_kit_oraclecloudadapter::management::maintenance (
+  $instroot = '/opt/tortuga',
+  $interval = '5min',
+  $enable = true,
+) {
+  require tortuga_kit_oraclecloudadapter::management::install
+
+  $timer_ensure = $enable ? {
+    true    => running,
+    default => stopped,
+  }
+
+  file { '/etc/systemd/system/tortuga-oci-maintenance.service':
+    content => "[Unit]
+Description=Tortuga OCI adapter maintenance
+
+[Service]
+Type=oneshot
+Environment=TORTUGA_ROOT=${instroot}
+ExecStart=${instroot}/bin/oci-maintenance
+",
+    notify  => Exec['tortuga-oci-maintenance-daemon-reload'],
+  } ->
+  file { '/etc/systemd/system/tortuga-oci-maintenance.timer':
+    content => "[Unit]
+Description=Run Tortuga OCI adapter maintenance every ${interval}
+
+[Timer]
+OnBootSec=${interval}
+OnUnitActiveSec=${interval}
+
+[Install]
+WantedBy=timers.target
+",
+  } ~>
+  exec { 'tortuga-oci-maintenance-daemon-reload':
+    command     => '/usr/bin/systemctl daemon-reload',
+    refreshonly => true,
+  } ~>
+  service { 'tortuga-oci-maintenance.timer':
+    ensure => $timer_ensure,
+    enable => $enable,
+  }
+}